@@ -1,6 +1,6 @@
+from functools import lru_cache
 from fastapi import APIRouter, Body, Header, BackgroundTasks
 from app.auth.domain.services.auth_service import AuthService
-from app.auth.adapters.persistence.user_repository import UserRepositorySQL
 from app.shared.infrastructure.response import ResultHandler
 from app.auth.adapters.http.auth_dtos import RegisterRequest, LoginRequest, TokenVerifyRequest, ForgotPasswordRequest, ResetPasswordRequest
 
@@ -10,8 +10,11 @@ router = APIRouter(
 )
 
 # Inyección de dependencias - Configuración de servicios
-user_repo = UserRepositorySQL()
-auth_manager = AuthService(user_repo)
+# Se construyen en el primer uso (o en el hook de arranque de app.main)
+@lru_cache(maxsize=None)
+def get_auth_manager() -> AuthService:
+    from app.auth.adapters.persistence.user_repository import UserRepositorySQL
+    return AuthService(UserRepositorySQL())
 
 
 @router.get("/ping")
@@ -20,18 +23,18 @@ def ping():
 
 @router.post("/sign-up")
 def sign_up(request: RegisterRequest = Body(...)):
-    result = auth_manager.register(request)
+    result = get_auth_manager().register(request)
     return result
 
 @router.post("/log-in")
 def log_in(request: LoginRequest = Body(...)):
-    result = auth_manager.login(request)
+    result = get_auth_manager().login(request)
     return result
 
 @router.post("/forgot-password")
 def forgot_password(request: ForgotPasswordRequest, background_tasks: BackgroundTasks):
     try:
-        res = auth_manager.generate_and_store_otp(request.document)
+        res = get_auth_manager().generate_and_store_otp(request.document)
     except ValueError as e:
         return ResultHandler.bad_request(message=str(e))
     except Exception as e:
@@ -39,16 +42,16 @@ def forgot_password(request: ForgotPasswordRequest, background_tasks: Background
         return ResultHandler.internal_error(message="Error interno al solicitar OTP")
 
     # Programar envío asíncrono
-    background_tasks.add_task(auth_manager.send_otp_email_async, res["email"], res["otp"])
+    background_tasks.add_task(get_auth_manager().send_otp_email_async, res["email"], res["otp"])
     # Nota: en producción NO incluyas OTP en la respuesta. Aquí devolvemos mensaje genérico.
     return ResultHandler.success(message="Si existe una cuenta con ese documento, se ha enviado un OTP al correo registrado.")
 
 @router.post("/reset-password")
 def reset_password(request: ResetPasswordRequest):
-    result = auth_manager.reset_password(request)
+    result = get_auth_manager().reset_password(request)
     return result
 
 @router.get("/verify-token")
 def verify_token(authorization: str = Header(...)):
-    result = auth_manager.verify_token(authorization)
+    result = get_auth_manager().verify_token(authorization)
     return result
@@ -30,12 +30,14 @@ class UserRepositorySQL(UserRepositoryPort):
   def _user_entity_to_domain(self, entity: UserEntity) -> User:
     """
     Convierte una entidad User de base de datos a modelo de dominio.
+    Usa model_construct: el email ya fue validado como EmailStr al registrarse,
+    así que no se revalida en cada lectura.
     Args:
       entity (UserEntity): Entidad de la base de datos
     Returns:
       User: Modelo de dominio
     """
-    return User(
+    return User.model_construct(
       id=entity.id,
       document=entity.document,
       name=entity.name,
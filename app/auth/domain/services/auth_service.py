@@ -1,8 +1,7 @@
 import random
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from passlib.context import CryptContext
-from jose import jwt, JWTError
+from functools import cached_property
+from typing import Any, Dict, Optional, Tuple
 from app.auth.domain.models.user import User, AuthData
 from app.auth.domain.ports.user_repository_port import UserRepositoryPort
 from app.auth.adapters.http.auth_dtos import RegisterRequest, LoginRequest, ForgotPasswordRequest, ResetPasswordRequest
@@ -10,9 +9,10 @@ from app.shared.infrastructure.response import ResultHandler
 import os # Para manejar variables de entorno
 from dotenv import load_dotenv # Para cargar variables de entorno desde un archivo .env
 from zoneinfo import ZoneInfo
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from fastapi import BackgroundTasks
 from pydantic import EmailStr
+# passlib, jose y fastapi_mail se importan en el primer uso (ver pwd_context,
+# mail_conf y los métodos de JWT) para no cargarlos durante el arranque.
 
 
 bogota_tz = ZoneInfo("America/Bogota")
@@ -32,14 +32,22 @@ class AuthService:
     
   def __init__(self, user_repository: UserRepositoryPort):
     self.user_repository = user_repository
-    # Configuración para hash de contraseñas con bcrypt
-    self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     # Configuración JWT - En producción estos valores deben venir de variables de entorno
     self.SECRET_KEY = os.getenv("SECRET_KEY")
     self.ALGORITHM  = os.getenv("ALGORITHM", "HS256")
     self.ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-    self.mail_conf = ConnectionConfig(
+  @cached_property
+  def pwd_context(self):
+    """Configuración para hash de contraseñas con bcrypt (se construye en el primer uso)"""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+  @cached_property
+  def mail_conf(self):
+    """Configuración SMTP de FastAPI-Mail (se construye en el primer envío)"""
+    from fastapi_mail import ConnectionConfig
+    return ConnectionConfig(
         MAIL_USERNAME = os.getenv("MAIL_USERNAME"),
         MAIL_PASSWORD = os.getenv("MAIL_PASSWORD"),
         MAIL_FROM = os.getenv("MAIL_FROM", os.getenv("MAIL_USERNAME")),
@@ -213,20 +221,8 @@ class AuthService:
         
       token = authorization_header.split(" ")[1]
         
-      # Decodificar token
-      payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-      user_id: str = payload.get("sub")
-        
-      if user_id is None:
-          return ResultHandler.unauthorized(message="Token inválido")
-            
-      # Buscar usuario por ID
-      user = self.user_repository.get_by_id(int(user_id))
-      if user is None:
-          return ResultHandler.unauthorized(message="Usuario no encontrado")
-          
-      if not user.is_active:
-          return ResultHandler.unauthorized(message="Usuario inactivo")
+      # Decodificar token y buscar al usuario activo
+      user, _ = self.authenticate_token(token)
             
       # Preparar datos de respuesta
       user_data = {
@@ -245,10 +241,8 @@ class AuthService:
         message="Token válido"
       )
           
-    except JWTError:
-      return ResultHandler.unauthorized(message="Token inválido o expirado")
     except ValueError as e:
-      # Error de validación de negocio
+      # Token inválido o expirado, o usuario inexistente / inactivo
       return ResultHandler.unauthorized(message=str(e))
     except Exception as e:
       # Error técnico (DB, conexión, etc.)
@@ -258,6 +252,39 @@ class AuthService:
       )
 
 
+  def authenticate_token(self, token: str) -> Tuple[User, Dict[str, Any]]:
+    """
+    Decodifica un token JWT de acceso y busca al usuario activo al que
+    pertenece. Lo usan verify_token y los canales que no reciben el header
+    Authorization de cada petición (p. ej. el WebSocket de ingesta).
+
+    Args:
+        token (str): Token JWT sin el prefijo "Bearer "
+
+    Returns:
+        Tuple[User, Dict]: Usuario y claims del token (incluye exp)
+
+    Raises:
+        ValueError: Si el token es inválido o expiró, o el usuario no existe o está inactivo
+    """
+    from jose import jwt, JWTError
+    try:
+      payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+    except JWTError:
+      raise ValueError("Token inválido o expirado")
+
+    user_id = payload.get("sub")
+    if user_id is None:
+      raise ValueError("Token inválido")
+
+    user = self.user_repository.get_by_id(int(user_id))
+    if user is None:
+      raise ValueError("Usuario no encontrado")
+    if not user.is_active:
+      raise ValueError("Usuario inactivo")
+    return user, payload
+
+
   def _hash_password(self, password: str) -> str:
     """
     Genera hash de la contraseña usando bcrypt.
@@ -295,6 +322,7 @@ class AuthService:
     Returns:
         str: Token JWT firmado
     """
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=self.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
@@ -318,6 +346,8 @@ class AuthService:
       print(f"[DEV-OTP] to={to_email} otp={otp}")
       return True
 
+    from fastapi_mail import FastMail, MessageSchema
+
     message = MessageSchema(
       subject="Recuperación de contraseña - OTP",
       recipients=[to_email],
@@ -0,0 +1,60 @@
+"""
+Raíz de composición entre contextos.
+
+Los contextos no se importan entre sí: app/energy publica los puertos
+ReadingBatchConsumer y MeterAccessPort y este módulo los conecta con el
+agregador de energy_records y las asignaciones de medidores de app/user.
+Lo importan app.main, los shards de ingesta (fábrica get_energy_service) y
+la carga masiva.
+"""
+from typing import List, Mapping, Sequence, Set
+from app.energy.adapters.http import routes as energy_routes
+from app.energy.domain.ports.reading_batch_consumer_port import ReadingBatchConsumer, MeterEnergyReading
+from app.energy.domain.ports.meter_access_port import MeterAccessPort
+from app.energy.domain.services.energy_service import EnergyService
+from app.user.domain.services.energy_balance_aggregator import EnergyBalanceAggregator
+
+
+class EnergyBalanceConsumer(ReadingBatchConsumer):
+    """Entrega las lecturas persistidas al agregador de energy_records"""
+
+    def __init__(self, aggregator: EnergyBalanceAggregator):
+        self.aggregator = aggregator
+
+    def consume(self, readings: Mapping[str, Sequence[MeterEnergyReading]]) -> int:
+        return self.aggregator.fold_readings(readings)
+
+
+class MeterAssignmentAccess(MeterAccessPort):
+    """Medidores de un usuario según meter_assignments"""
+
+    def __init__(self, meter_assignment_repository):
+        self.meter_assignment_repository = meter_assignment_repository
+
+    def owned_meters(self, user_id: int) -> Set[str]:
+        return {a.meter_id for a in self.meter_assignment_repository.get_by_user_id(user_id)}
+
+
+def meter_assignment_access() -> MeterAccessPort:
+    from app.user.adapters.persistence.meter_assignment_repository import MeterAssignmentRepositorySQL
+    return MeterAssignmentAccess(MeterAssignmentRepositorySQL())
+
+
+def energy_balance_consumer() -> ReadingBatchConsumer:
+    from app.user.adapters.http.routes import get_energy_balance_aggregator
+    return EnergyBalanceConsumer(get_energy_balance_aggregator())
+
+
+def batch_consumers() -> List[ReadingBatchConsumer]:
+    """Consumidores de lotes de lecturas (para quien no pasa por EnergyService, p. ej. la carga masiva)"""
+    return [factory() for factory in energy_routes.batch_consumer_factories]
+
+
+def get_energy_service() -> EnergyService:
+    """Proveedor de EnergyService con los consumidores conectados (fábrica de los shards)"""
+    return energy_routes.get_energy_manager()
+
+
+if energy_balance_consumer not in energy_routes.batch_consumer_factories:
+    energy_routes.batch_consumer_factories.append(energy_balance_consumer)
+energy_routes.meter_access_factory = meter_assignment_access
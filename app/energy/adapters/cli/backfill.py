@@ -0,0 +1,484 @@
+"""
+Carga masiva de lecturas históricas (p. ej. al incorporar una comunidad).
+
+Ejecutar con:
+    python -m app.energy.adapters.cli.backfill lecturas.jsonl historico.csv.gz --workers 4
+
+Formatos, según la extensión (.gz se descomprime al vuelo):
+- .jsonl / .ndjson: un cuerpo de /energy/save-record (SaveRecordRequest) por línea.
+- .csv: una lectura por fila, con encabezado y las columnas de READING_FIELDS
+  (lo que exporta /energy/readings/export); id y created_at se ignoran.
+
+Etapas:
+1. El proceso principal lee los archivos en bloques de líneas completas
+   (--chunk-bytes) sin parsearlos y los reparte entre --workers procesos.
+2. Cada worker valida el bloque completo de una vez (JSONL: una sola
+   llamada a pydantic-core para todas las líneas; CSV: columnas convertidas
+   con numpy), le aplica las reglas de negocio de la ingesta en vivo
+   (ReadingValidator, ENERGY_VALIDATION_*) y lo inserta con
+   EnergyRepositorySQL.save_rows. Las líneas inválidas y las lecturas
+   rechazadas se descartan y se reportan (por motivo); los duplicados
+   (meter_id, timestamp) se ignoran, así que repetir un bloque no duplica
+   lecturas.
+3. Al terminar la carga, por cada medidor cargado (un medidor por tarea,
+   en paralelo) se calculan los deltas de sus contadores (los bloques se
+   insertan sin deltas), se recalculan los rollups del rango cargado y se
+   entregan sus lecturas a los consumidores de lotes (p. ej. energy_records,
+   conectados en app.composition) en orden de timestamp. Se hace al final y no
+   por bloque porque los bloques llegan en desorden y las marcas de agua
+   de energy_records descartan las lecturas anteriores a la última sumada:
+   la carga histórica debe hacerse antes de que el medidor empiece a
+   reportar en vivo.
+
+Con --checkpoint, después de cada bloque se guardan los rangos de bytes ya
+cargados de cada archivo y el rango de timestamps por medidor pendiente de
+la etapa 3; al repetir el mismo comando se retoma donde quedó.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+from app.energy.adapters.http.energy_dtos import SaveRecordRequest
+from app.energy.adapters.http.row_mapper import request_to_rows
+from app.energy.domain.models.reading_batch import ReadingBatch
+from app.energy.domain.models.energy_record import READING_COLUMNS
+
+bogota_tz = ZoneInfo("America/Bogota")
+
+# Columnas de una lectura en CSV (READING_COLUMNS sin created_at, con timestamp)
+CSV_COLUMNS = READING_COLUMNS[:-1]
+CSV_REQUIRED = ("operation", "subject", "meter_id", "timestamp", "flag")
+_INT_COLUMNS = ("timestamp", "flag")
+_FLOAT_COLUMNS = CSV_COLUMNS[CSV_COLUMNS.index("flag") + 1:]
+
+# Errores de validación que se muestran por bloque
+MAX_REPORTED_ERRORS = 3
+
+_REQUESTS = TypeAdapter(List[SaveRecordRequest])
+
+
+def file_kind(path: str) -> str:
+    """'jsonl' o 'csv' según la extensión (sin contar .gz)"""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Formato no soportado: {path} (se espera .jsonl, .ndjson o .csv, opcionalmente .gz)")
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def iter_chunks(path: str, chunk_bytes: int, done: List[List[int]]) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Bloques de líneas completas de ~chunk_bytes, como (inicio, fin, bytes).
+    Las posiciones son del contenido sin comprimir; las líneas que caen en
+    un rango de done (ya cargado) se saltan. En CSV la primera línea
+    (encabezado) no forma parte de ningún bloque.
+    """
+    ranges = sorted(done)
+    position = 0
+    start = None
+    buffer: List[bytes] = []
+    size = 0
+    with _open(path) as f:
+        if file_kind(path) == "csv":
+            position = len(f.readline())
+        for line in f:
+            line_start, position = position, position + len(line)
+            while ranges and ranges[0][1] <= line_start:
+                ranges.pop(0)
+            if ranges and ranges[0][0] <= line_start:
+                if buffer:
+                    yield start, line_start, b"".join(buffer)
+                    buffer, size = [], 0
+                continue
+            if not buffer:
+                start = line_start
+            buffer.append(line)
+            size += len(line)
+            if size >= chunk_bytes:
+                yield start, position, b"".join(buffer)
+                buffer, size = [], 0
+    if buffer:
+        yield start, position, b"".join(buffer)
+
+
+def read_csv_header(path: str) -> List[str]:
+    with _open(path) as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+    header = [name.strip() for name in header]
+    missing = [name for name in CSV_REQUIRED if name not in header]
+    if missing:
+        raise ValueError(f"{path}: faltan columnas {', '.join(missing)}")
+    return header
+
+
+def parse_jsonl_chunk(data: bytes, created_at: datetime) -> Tuple[List[tuple], int, List[str]]:
+    """
+    Valida un bloque JSONL completo en una sola llamada a pydantic-core
+    (las líneas se envuelven en un arreglo JSON). Si el bloque tiene alguna
+    línea inválida, se valida línea por línea para descartar solo esas.
+
+    Returns:
+        (filas en el orden de READING_COLUMNS, líneas rechazadas, errores de muestra)
+    """
+    lines = [line for line in data.splitlines() if line.strip()]
+    errors: List[str] = []
+    rejected = 0
+    try:
+        requests = _REQUESTS.validate_json(b"[" + b",".join(lines) + b"]")
+    except ValidationError:
+        requests = []
+        for number, line in enumerate(lines):
+            try:
+                requests.append(SaveRecordRequest.model_validate_json(line))
+            except ValidationError as e:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"línea {number + 1} del bloque: {e.errors(include_url=False)[0]['msg']}")
+    rows = [row for request in requests for row in request_to_rows(request, created_at)]
+    return rows, rejected, errors
+
+
+def _csv_row(record: Dict[str, str], created_at: datetime) -> tuple:
+    """Una fila CSV validada de a una (camino lento, solo si el bloque falló)"""
+    values = []
+    for name in CSV_COLUMNS:
+        value = record.get(name, "").strip()
+        if name in _INT_COLUMNS:
+            values.append(int(value))
+        elif name in _FLOAT_COLUMNS:
+            number = float(value) if value else None
+            values.append(None if number is None or number != number else number)
+        elif not value:
+            raise ValueError(f"'{name}' vacío")
+        else:
+            values.append(value)
+    return tuple(values) + (created_at,)
+
+
+def parse_csv_chunk(header: List[str], data: bytes, created_at: datetime) -> Tuple[List[tuple], int, List[str]]:
+    """
+    Valida un bloque CSV por columnas: cada columna numérica se convierte
+    de una vez con numpy (vacío → None). Si alguna columna falla, se valida
+    fila por fila para descartar solo las inválidas.
+
+    Returns:
+        (filas en el orden de READING_COLUMNS, filas rechazadas, errores de muestra)
+    """
+    records = [record for record in csv.reader(io.StringIO(data.decode("utf-8"))) if record]
+    positions = {name: header.index(name) for name in CSV_COLUMNS if name in header}
+    width = len(header)
+    try:
+        if any(len(record) != width for record in records):
+            raise ValueError("número de columnas distinto al encabezado")
+        columns: Dict[str, List[Any]] = {}
+        for name in CSV_COLUMNS:
+            position = positions.get(name)
+            raw = [record[position].strip() for record in records] if position is not None else [""] * len(records)
+            if name in _INT_COLUMNS:
+                columns[name] = np.array(raw, dtype=np.int64).tolist()
+            elif name in _FLOAT_COLUMNS:
+                values = np.array([value or "nan" for value in raw], dtype=np.float64)
+                columns[name] = np.where(np.isnan(values), None, values).tolist()
+            elif not all(raw):
+                raise ValueError(f"'{name}' vacío")
+            else:
+                columns[name] = raw
+        rows = [row + (created_at,) for row in zip(*(columns[name] for name in CSV_COLUMNS))]
+        return rows, 0, []
+    except ValueError:
+        pass
+
+    rows, rejected, errors = [], 0, []
+    for number, record in enumerate(records):
+        try:
+            rows.append(_csv_row(dict(zip(header, record)), created_at))
+        except (ValueError, TypeError) as e:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"fila {number + 1} del bloque: {e}")
+    return rows, rejected, errors
+
+
+_worker: Dict[str, Any] = {}
+
+
+def init_worker(database_url: Optional[str] = None):
+    """Configura la BD del proceso (DB_* del .env, o database_url) y construye los adaptadores"""
+    if database_url:
+        from sqlalchemy import create_engine
+        from app.shared.infrastructure.db import configure_engine
+        configure_engine(create_engine(database_url))
+    from app.energy.adapters.persistence.energy_repository import EnergyRepositorySQL
+    from app.energy.adapters.persistence.energy_rollup_repository import EnergyRollupRepositorySQL
+    from app.energy.adapters.http.routes import get_reading_validator
+    from app.composition import batch_consumers
+    _worker.update(
+        repository=EnergyRepositorySQL(),
+        rollups=EnergyRollupRepositorySQL(),
+        validator=get_reading_validator(),
+        consumers=batch_consumers(),
+    )
+
+
+def load_chunk(kind: str, header: Optional[List[str]], start: int, end: int, data: bytes) -> Dict[str, Any]:
+    """
+    Valida e inserta un bloque.
+
+    Las reglas de negocio se aplican sin el estado previo de cada medidor:
+    los bloques llegan en desorden, así que los contadores solo se comparan
+    dentro del bloque.
+
+    Returns:
+        Dict: Rango del bloque, conteos, rechazos por motivo, errores de
+        muestra y rango (min_ts, max_ts) de cada medidor del bloque
+    """
+    created_at = datetime.now(bogota_tz)
+    if kind == "jsonl":
+        rows, rejected, errors = parse_jsonl_chunk(data, created_at)
+    else:
+        rows, rejected, errors = parse_csv_chunk(header, data, created_at)
+    parsed = len(rows)
+    invalid = 0
+    reasons: Dict[str, int] = {}
+    batch = ReadingBatch.from_rows(rows)
+    validator = _worker["validator"]
+    if validator is not None and rows:
+        result = validator.validate_batch(batch, int(time.time() * 1000))
+        if result.rejected_count:
+            rows = result.split(rows)
+            batch = ReadingBatch.from_rows(rows)
+            invalid = result.rejected_count
+            rejected += invalid
+            reasons = result.counts()
+    inserted = _worker["repository"].save_rows(rows)
+    return {
+        "start": start, "end": end, "readings": parsed, "inserted": inserted,
+        "rejected": rejected, "invalid": invalid, "reasons": reasons, "errors": errors,
+        "meters": {meter_id: [low, high] for meter_id, (low, high) in batch.ranges().items()},
+    }
+
+
+def finish_meter(meter_id: str, ts_from: int, ts_to: int, page_size: int = 5000, buckets_per_refresh: int = 2000) -> int:
+    """
+    Etapa 3 para un medidor: calcula los deltas y recalcula los rollups de
+    [ts_from, ts_to] y entrega a los consumidores de lotes sus lecturas de
+    ese rango en orden de timestamp.
+
+    Returns:
+        int: Lecturas recorridas
+    """
+    from app.energy.domain.models.energy_rollup import bucket_start, dirty_buckets
+    repository, rollups, consumers = _worker["repository"], _worker["rollups"], _worker["consumers"]
+    # Antes que los rollups: sus buckets suman los deltas
+    repository.recompute_deltas(meter_id, ts_from, ts_to + 1, page_size=page_size)
+    seen = 0
+    after_ts = None
+    keys: Set[Tuple[str, int]] = set()
+    while True:
+        page = repository.get_range(
+            meter_id, ts_from, ts_to + 1, ["energy_ai", "energy_ae"], after_ts=after_ts, limit=page_size
+        )
+        if page.items:
+            seen += len(page.items)
+            readings = {meter_id: [(item["timestamp"], item["energy_ai"], item["energy_ae"]) for item in page.items]}
+            for consumer in consumers:
+                consumer.consume(readings)
+            keys.update((meter_id, bucket_start(item["timestamp"], "15m")) for item in page.items)
+        # Un timestamp por bucket de 15 minutos basta para marcar todos sus buckets
+        if len(keys) >= buckets_per_refresh or (page.next_key is None and keys):
+            rollups.refresh(dirty_buckets(keys))
+            keys = set()
+        if page.next_key is None:
+            return seen
+        after_ts = page.next_key
+
+
+class Checkpoint:
+    """
+    Estado reanudable de una carga, en un archivo JSON reescrito de forma
+    atómica (archivo temporal + rename):
+        files:  ruta → {size, done: [[inicio, fin], ...]} (rangos de bytes cargados)
+        meters: meter_id → [min_ts, max_ts] pendientes de la etapa 3
+    Sin ruta, vive solo en memoria.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.state: Dict[str, Any] = {"files": {}, "meters": {}}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def file(self, path: str) -> Dict[str, Any]:
+        """Estado de un archivo; si cambió de tamaño desde el checkpoint, se vuelve a cargar completo"""
+        size = os.path.getsize(path)
+        entry = self.state["files"].get(path)
+        if entry is None or entry["size"] != size:
+            entry = self.state["files"][path] = {"size": size, "done": []}
+        return entry
+
+    def complete_chunk(self, path: str, result: Dict[str, Any]):
+        done = self.state["files"][path]["done"]
+        done.append([result["start"], result["end"]])
+        done.sort()
+        merged = [done[0]]
+        for start, end in done[1:]:
+            if start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.state["files"][path]["done"] = merged
+        meters = self.state["meters"]
+        for meter_id, (low, high) in result["meters"].items():
+            span = meters.get(meter_id)
+            meters[meter_id] = [low, high] if span is None else [min(span[0], low), max(span[1], high)]
+
+    def complete_meter(self, meter_id: str):
+        self.state["meters"].pop(meter_id, None)
+
+    def save(self):
+        if not self.path:
+            return
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(self.path + ".tmp", self.path)
+
+
+class Progress:
+    """Conteos acumulados y reporte periódico de throughput"""
+
+    def __init__(self, every_s: float):
+        self.every = every_s
+        self.started = self.last_report = time.perf_counter()
+        self.chunks = self.bytes = self.readings = self.inserted = self.rejected = self.invalid = 0
+        self.reasons: Dict[str, int] = {}
+
+    def add(self, result: Dict[str, Any]):
+        self.chunks += 1
+        self.bytes += result["end"] - result["start"]
+        self.readings += result["readings"]
+        self.inserted += result["inserted"]
+        self.rejected += result["rejected"]
+        self.invalid += result["invalid"]
+        for reason, count in result["reasons"].items():
+            self.reasons[reason] = self.reasons.get(reason, 0) + count
+        for error in result["errors"]:
+            print(f"⚠️  [{result['start']}-{result['end']}] {error}", file=sys.stderr)
+        if time.perf_counter() - self.last_report >= self.every:
+            self.report()
+
+    def report(self, final: bool = False):
+        self.last_report = time.perf_counter()
+        elapsed = max(self.last_report - self.started, 1e-9)
+        print(
+            f"{'✅' if final else '…'} {self.readings} lecturas en {elapsed:.1f} s "
+            f"({self.readings / elapsed:,.0f} lecturas/s, {self.bytes / elapsed / 1e6:.1f} MB/s) · "
+            f"insertadas {self.inserted} · duplicadas {self.readings - self.inserted - self.invalid} · "
+            f"rechazadas {self.rejected} · bloques {self.chunks}",
+            flush=True,
+        )
+        if final and self.reasons:
+            print("   rechazos por motivo: " + ", ".join(
+                f"{reason} {count}" for reason, count in sorted(self.reasons.items())
+            ), flush=True)
+
+
+class _InlineExecutor(Executor):
+    """Executor que corre las tareas en el proceso actual (--workers 0)"""
+
+    def submit(self, fn, *args, **kwargs):
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def run(args) -> int:
+    checkpoint = Checkpoint(args.checkpoint)
+    progress = Progress(args.report_every)
+    if args.workers > 0:
+        executor: Executor = ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=get_context("spawn"),
+            initializer=init_worker, initargs=(args.database_url,)
+        )
+    else:
+        init_worker(args.database_url)
+        executor = _InlineExecutor()
+    # Bloques en vuelo acotados: la memoria no depende del tamaño de los archivos
+    max_in_flight = max(args.workers, 1) * 2
+
+    with executor:
+        for path in args.files:
+            path = os.path.abspath(path)
+            kind = file_kind(path)
+            header = read_csv_header(path) if kind == "csv" else None
+            entry = checkpoint.file(path)
+            pending: Dict[Future, str] = {}
+
+            def collect(done_futures):
+                for future in done_futures:
+                    pending.pop(future)
+                    result = future.result()
+                    checkpoint.complete_chunk(path, result)
+                    checkpoint.save()
+                    progress.add(result)
+
+            for start, end, data in iter_chunks(path, args.chunk_bytes, entry["done"]):
+                pending[executor.submit(load_chunk, kind, header, start, end, data)] = path
+                if len(pending) >= max_in_flight:
+                    collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            collect(wait(pending).done)
+        progress.report(final=True)
+
+        meters = dict(checkpoint.state["meters"])
+        if meters and not args.skip_aggregates:
+            print(f"🔁 Rollups y energy_records de {len(meters)} medidores…", flush=True)
+            started = time.perf_counter()
+            futures = {
+                executor.submit(finish_meter, meter_id, low, high): meter_id
+                for meter_id, (low, high) in meters.items()
+            }
+            for future in wait(futures).done:
+                future.result()
+                checkpoint.complete_meter(futures[future])
+            checkpoint.save()
+            print(f"✅ Agregados recalculados en {time.perf_counter() - started:.1f} s")
+    return progress.rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="Archivos .jsonl/.ndjson/.csv (opcionalmente .gz)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Procesos de validación e inserción (0 = en el proceso actual)")
+    parser.add_argument("--chunk-bytes", type=int, default=4_000_000, help="Tamaño aproximado de cada bloque")
+    parser.add_argument("--checkpoint", help="Archivo de checkpoint para retomar la carga")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Segundos entre reportes de throughput")
+    parser.add_argument("--skip-aggregates", action="store_true",
+                        help="No recalcular rollups ni energy_records al final (quedan pendientes en el checkpoint)")
+    parser.add_argument("--database-url", help="URL de SQLAlchemy (por defecto, DB_* del .env)")
+    args = parser.parse_args()
+    rejected = run(args)
+    sys.exit(1 if rejected else 0)
+
+
+if __name__ == "__main__":
+    main()
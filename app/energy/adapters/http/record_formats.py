@@ -0,0 +1,170 @@
+import struct
+from datetime import datetime
+from itertools import repeat
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from pydantic import ValidationError
+from fastapi.exceptions import RequestValidationError
+from app.energy.adapters.http.energy_dtos import SaveRecordRequest
+from app.energy.adapters.http.row_mapper import request_to_rows, request_summary, rows_summary
+from app.energy.domain.models.energy_record import READING_COLUMNS
+from app.shared.infrastructure.content_encoding import RequestBodyError
+from app.shared.infrastructure.json_body import parse_json_body
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional: sin él application/msgpack se rechaza con 415
+    msgpack = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+FRAME_CONTENT_TYPE = "application/vnd.volt.readings-frame"
+
+# Frame columnar de lecturas (little-endian):
+#   magic        4 bytes  b"VRF1"
+#   operation    u16 longitud + UTF-8
+#   subject      u16 longitud + UTF-8
+#   medidores    u32 M, y M veces: u16 longitud + UTF-8 del meter_id, u32 lecturas
+#   ts           i64[N]   (N = total de lecturas, medidor por medidor en el orden anterior)
+#   flag         i32[N]
+#   mediciones   f64[N] por cada columna de FRAME_VALUE_COLUMNS (NaN = sin dato)
+FRAME_MAGIC = b"VRF1"
+FRAME_VALUE_COLUMNS = READING_COLUMNS[READING_COLUMNS.index("flag") + 1:-1]
+_FRAME_BYTES_PER_READING = 8 + 4 + 8 * len(FRAME_VALUE_COLUMNS)
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+
+def _read_text(body: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = _U16.unpack_from(body, offset)
+    offset += _U16.size
+    if offset + length > len(body):
+        raise RequestBodyError("Frame truncado")
+    return body[offset:offset + length].decode("utf-8"), offset + length
+
+
+def decode_frame(body: bytes, created_at: datetime) -> Tuple[str, str, int, List[tuple]]:
+    """
+    Decodifica un frame columnar directo a arreglos numpy (np.frombuffer,
+    sin copiar ni parsear lectura por lectura) y arma las filas en el orden
+    de READING_COLUMNS.
+
+    Returns:
+        (operation, subject, número de medidores, filas)
+
+    Raises:
+        RequestBodyError: Si el frame está mal formado
+    """
+    try:
+        if body[:4] != FRAME_MAGIC:
+            raise RequestBodyError("Frame inválido: magic esperado VRF1")
+        operation, offset = _read_text(body, 4)
+        subject, offset = _read_text(body, offset)
+        (meters,) = _U32.unpack_from(body, offset)
+        offset += _U32.size
+        meter_ids: List[str] = []
+        counts: List[int] = []
+        for _ in range(meters):
+            meter_id, offset = _read_text(body, offset)
+            (count,) = _U32.unpack_from(body, offset)
+            offset += _U32.size
+            meter_ids.append(meter_id)
+            counts.append(count)
+    except (struct.error, UnicodeDecodeError) as e:
+        raise RequestBodyError(f"Frame inválido: {e}")
+    if not operation or not subject:
+        raise RequestBodyError("Frame inválido: operation y subject son obligatorios")
+
+    total = sum(counts)
+    if len(body) - offset != total * _FRAME_BYTES_PER_READING:
+        raise RequestBodyError(
+            f"Frame inválido: se esperaban {total * _FRAME_BYTES_PER_READING} bytes de columnas "
+            f"para {total} lecturas y hay {len(body) - offset}"
+        )
+    ts = np.frombuffer(body, dtype="<i8", count=total, offset=offset)
+    offset += 8 * total
+    flags = np.frombuffer(body, dtype="<i4", count=total, offset=offset)
+    offset += 4 * total
+    values = np.frombuffer(body, dtype="<f8", count=total * len(FRAME_VALUE_COLUMNS), offset=offset)
+    values = values.reshape(len(FRAME_VALUE_COLUMNS), total)
+
+    missing = np.isnan(values)
+    if missing.any():
+        columns = values.astype(object)
+        columns[missing] = None
+        columns = columns.tolist()
+    else:
+        columns = values.tolist()
+    meter_column = np.repeat(np.array(meter_ids, dtype=object), counts).tolist()
+    rows = list(zip(
+        repeat(operation), repeat(subject), meter_column, ts.tolist(), flags.tolist(), *columns, repeat(created_at)
+    ))
+    return operation, subject, meters, rows
+
+
+def encode_frame(request: SaveRecordRequest) -> bytes:
+    """Codifica un SaveRecordRequest como frame columnar (para gateways, pruebas y benchmarks)"""
+    parts = [FRAME_MAGIC]
+    for text in (request.operation, request.subject):
+        data = text.encode("utf-8")
+        parts += [_U16.pack(len(data)), data]
+    parts.append(_U32.pack(len(request.meter)))
+    readings = []
+    for meter_id, meter_readings in request.meter.items():
+        data = meter_id.encode("utf-8")
+        parts += [_U16.pack(len(data)), data, _U32.pack(len(meter_readings))]
+        readings.extend(meter_readings)
+    parts.append(np.array([r.ts for r in readings], dtype="<i8").tobytes())
+    parts.append(np.array([r.flag for r in readings], dtype="<i4").tobytes())
+    for name in FRAME_VALUE_COLUMNS:
+        group, field = name.split("_")
+        values = [getattr(getattr(r, group), field) for r in readings]
+        parts.append(np.array([np.nan if v is None else v for v in values], dtype="<f8").tobytes())
+    return b"".join(parts)
+
+
+def _parse_msgpack(body: bytes) -> SaveRecordRequest:
+    """Valida un cuerpo MessagePack con la misma forma que el JSON"""
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise RequestBodyError(f"Cuerpo MessagePack inválido: {e}")
+    try:
+        return SaveRecordRequest.model_validate(payload)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=payload)
+
+
+def supported_content_types() -> Tuple[str, ...]:
+    """Content-Type aceptados por /energy/save-record"""
+    return (JSON_CONTENT_TYPE, FRAME_CONTENT_TYPE) + (MSGPACK_CONTENT_TYPES if msgpack is not None else ())
+
+
+def decode_record(content_type: str, body: bytes, created_at: datetime) -> Tuple[List[tuple], Dict[str, Any]]:
+    """
+    Convierte el cuerpo (ya descomprimido) de /energy/save-record en filas
+    y datos de respuesta, según el Content-Type:
+    - application/json (o sin Content-Type): SaveRecordRequest
+    - application/msgpack: la misma estructura en MessagePack (si msgpack está instalado)
+    - application/vnd.volt.readings-frame: frame columnar binario (ver FRAME_MAGIC)
+
+    Raises:
+        RequestBodyError: 415 si el Content-Type no está soportado, 400 si el frame es inválido
+        RequestValidationError: Si el JSON / MessagePack no cumple SaveRecordRequest
+    """
+    media_type = (content_type or JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+    if media_type == FRAME_CONTENT_TYPE:
+        operation, subject, meters, rows = decode_frame(body, created_at)
+        return rows, rows_summary(operation, subject, meters, rows, created_at)
+    if media_type == JSON_CONTENT_TYPE or media_type.endswith("+json"):
+        payload = parse_json_body(SaveRecordRequest, body)
+    elif media_type in MSGPACK_CONTENT_TYPES and msgpack is not None:
+        payload = _parse_msgpack(body)
+    else:
+        raise RequestBodyError(
+            f"Content-Type no soportado: {media_type}. Opciones: {', '.join(supported_content_types())}",
+            status_code=415
+        )
+    rows = request_to_rows(payload, created_at)
+    return rows, request_summary(payload, rows, created_at)
@@ -0,0 +1,364 @@
+import codecs
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+import anyio.to_thread
+from pydantic import TypeAdapter, ValidationError
+from app.energy.adapters.http.energy_dtos import ReadingDTO
+from app.energy.adapters.http.row_mapper import readings_to_rows
+from app.shared.infrastructure.content_encoding import RequestBodyError
+
+# Lecturas por bloque: se validan juntas y se insertan en una sola transacción
+STREAM_CHUNK_READINGS = int(os.getenv("ENERGY_STREAM_CHUNK_READINGS", "5000"))
+# Tamaño máximo de un valor JSON individual (una lectura, operation, subject)
+STREAM_MAX_VALUE_CHARS = int(os.getenv("ENERGY_STREAM_MAX_VALUE_CHARS", str(1024 * 1024)))
+# Errores de validación que se detallan en la respuesta (el resto solo se cuenta)
+MAX_REPORTED_ERRORS = 20
+
+_READINGS = TypeAdapter(List[ReadingDTO])
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_MISSING = object()
+
+# Estados del parser
+_START, _TOP_KEY, _TOP_COLON, _TOP_VALUE, _TOP_SEP = range(5)
+_METER_OPEN, _METER_KEY, _METER_COLON, _READINGS_OPEN, _READING, _READING_SEP, _METER_SEP = range(5, 12)
+_END = 12
+
+
+class RecordStreamParser:
+    """
+    Parser incremental del cuerpo JSON de /energy/save-record.
+
+    Recibe el texto por partes (feed) a medida que llega y emite eventos sin
+    construir el documento completo:
+    - ("field", nombre, valor): campo de primer nivel distinto de meter
+    - ("meters",): empieza el objeto meter (aunque no traiga medidores)
+    - ("meter", meter_id): empieza el arreglo de lecturas de un medidor
+    - ("reading", meter_id, dict): una lectura (aún sin validar)
+    - ("meter_end", meter_id): termina el arreglo del medidor
+
+    Cada lectura se decodifica con json.JSONDecoder.raw_decode (el scanner
+    en C de la librería estándar) en cuanto está completa en el buffer; el
+    buffer solo guarda el valor a medio llegar, acotado por max_value_chars.
+    """
+
+    def __init__(self, max_value_chars: int = STREAM_MAX_VALUE_CHARS):
+        self.max_value_chars = max_value_chars
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._consumed = 0
+        self._eof = False
+        self._state = _START
+        self._first = True
+        self._key: Optional[str] = None
+        self._meter_id: Optional[str] = None
+
+    def _error(self, message: str, pos: Optional[int] = None) -> RequestBodyError:
+        position = self._consumed + (self._pos if pos is None else pos)
+        return RequestBodyError(f"JSON inválido en la posición {position}: {message}")
+
+    def _peek(self) -> Optional[str]:
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _expect(self, char: str, message: str) -> bool:
+        found = self._peek()
+        if found is None:
+            return False
+        if found != char:
+            raise self._error(message)
+        self._pos += 1
+        return True
+
+    def _value(self) -> Any:
+        """Decodifica el valor que empieza en la posición actual, o _MISSING si aún no llegó completo"""
+        if self._peek() is None:
+            return _MISSING
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError as e:
+            # Un valor cortado por el final del buffer falla cerca del final
+            # (o como string sin cerrar); cualquier otro error es de sintaxis
+            truncated = e.msg.startswith("Unterminated string") or len(self._buf) - e.pos < 16
+            if self._eof or not truncated:
+                raise self._error(e.msg, e.pos)
+            return _MISSING
+        # Un número al final del buffer podría continuar en la siguiente parte
+        if end == len(self._buf) and not self._eof:
+            return _MISSING
+        self._pos = end
+        return value
+
+    def _key_value(self) -> Any:
+        key = self._value()
+        if key is not _MISSING and not isinstance(key, str):
+            raise self._error("se esperaba el nombre de un campo")
+        return key
+
+    def _step(self, events: List[tuple]) -> bool:
+        """Avanza un token; False si hace falta más texto"""
+        state = self._state
+        if state == _START:
+            if not self._expect("{", "el cuerpo debe ser un objeto"):
+                return False
+            self._state, self._first = _TOP_KEY, True
+        elif state == _TOP_KEY:
+            if self._first and self._peek() == "}":
+                self._pos += 1
+                self._state = _END
+                return True
+            key = self._key_value()
+            if key is _MISSING:
+                return False
+            self._key, self._state = key, _TOP_COLON
+        elif state == _TOP_COLON:
+            if not self._expect(":", "se esperaba ':'"):
+                return False
+            self._state = _METER_OPEN if self._key == "meter" else _TOP_VALUE
+        elif state == _TOP_VALUE:
+            value = self._value()
+            if value is _MISSING:
+                return False
+            events.append(("field", self._key, value))
+            self._state = _TOP_SEP
+        elif state == _TOP_SEP:
+            found = self._peek()
+            if found is None:
+                return False
+            if found not in ",}":
+                raise self._error("se esperaba ',' o '}'")
+            self._pos += 1
+            self._state, self._first = (_TOP_KEY, False) if found == "," else (_END, False)
+        elif state == _METER_OPEN:
+            if not self._expect("{", "meter debe ser un objeto {meter_id: [lecturas]}"):
+                return False
+            events.append(("meters",))
+            self._state, self._first = _METER_KEY, True
+        elif state == _METER_KEY:
+            if self._first and self._peek() == "}":
+                self._pos += 1
+                self._state = _TOP_SEP
+                return True
+            meter_id = self._key_value()
+            if meter_id is _MISSING:
+                return False
+            self._meter_id, self._state = meter_id, _METER_COLON
+        elif state == _METER_COLON:
+            if not self._expect(":", "se esperaba ':'"):
+                return False
+            self._state = _READINGS_OPEN
+        elif state == _READINGS_OPEN:
+            if not self._expect("[", f"las lecturas del medidor {self._meter_id} deben ser un arreglo"):
+                return False
+            events.append(("meter", self._meter_id))
+            self._state, self._first = _READING, True
+        elif state == _READING:
+            if self._first and self._peek() == "]":
+                self._pos += 1
+                events.append(("meter_end", self._meter_id))
+                self._state = _METER_SEP
+                return True
+            reading = self._value()
+            if reading is _MISSING:
+                return False
+            events.append(("reading", self._meter_id, reading))
+            self._state = _READING_SEP
+        elif state == _READING_SEP:
+            found = self._peek()
+            if found is None:
+                return False
+            if found not in ",]":
+                raise self._error("se esperaba ',' o ']'")
+            self._pos += 1
+            if found == ",":
+                self._state, self._first = _READING, False
+            else:
+                events.append(("meter_end", self._meter_id))
+                self._state = _METER_SEP
+        elif state == _METER_SEP:
+            found = self._peek()
+            if found is None:
+                return False
+            if found not in ",}":
+                raise self._error("se esperaba ',' o '}'")
+            self._pos += 1
+            self._state, self._first = (_METER_KEY, False) if found == "," else (_TOP_SEP, False)
+        else:
+            if self._peek() is not None:
+                raise self._error("contenido después del objeto")
+            return False
+        return True
+
+    def _run(self) -> List[tuple]:
+        events: List[tuple] = []
+        while self._step(events):
+            pass
+        return events
+
+    def feed(self, text: str) -> List[tuple]:
+        """Agrega texto y retorna los eventos que quedaron completos"""
+        self._consumed += self._pos
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        events = self._run()
+        if len(self._buf) - self._pos > self.max_value_chars:
+            raise self._error(f"un valor supera {self.max_value_chars} caracteres")
+        return events
+
+    def close(self) -> List[tuple]:
+        """Fin del cuerpo: retorna los últimos eventos y verifica que el JSON esté completo"""
+        self._eof = True
+        events = self._run()
+        if self._state != _END:
+            raise self._error("el cuerpo terminó antes de cerrar el objeto")
+        return events
+
+
+class RecordStreamDecoder:
+    """
+    Convierte un cuerpo JSON de /energy/save-record que llega por partes en
+    bloques de filas (tuplas en el orden de READING_COLUMNS).
+
+    Las lecturas de cada medidor se validan por bloques de hasta
+    chunk_readings (una llamada a pydantic-core por bloque). Las lecturas
+    inválidas se descartan y se reportan con su ubicación
+    (meter, meter_id, índice); las válidas del mismo bloque se conservan.
+    Las filas válidas se entregan en lotes de hasta chunk_readings, que
+    pueden mezclar medidores pequeños.
+
+    operation y subject deben aparecer antes de meter en el objeto: las
+    filas los necesitan y el cuerpo no se guarda completo para buscarlos.
+
+    La memoria está acotada por chunk_readings y el valor más grande del
+    cuerpo, no por su tamaño total.
+    """
+
+    def __init__(self, created_at: datetime, chunk_readings: int = STREAM_CHUNK_READINGS):
+        self.created_at = created_at
+        self.chunk_readings = chunk_readings
+        self._parser = RecordStreamParser()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._readings: List[Any] = []
+        self._reading_index = 0
+        self._rows: List[tuple] = []
+        self._meter_seen = False
+
+        self.operation: Optional[str] = None
+        self.subject: Optional[str] = None
+        self.meters_count = 0
+        self.total_readings = 0
+        self.rejected_readings = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def _header_field(self, name: str, value: Any):
+        if name not in ("operation", "subject"):
+            return
+        if not isinstance(value, str):
+            raise RequestBodyError(f"El campo {name} debe ser texto", status_code=422)
+        setattr(self, name, value)
+
+    def _report(self, error: Dict[str, Any]):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+
+    def _validate(self, meter_id: str):
+        """Valida las lecturas pendientes del medidor y las convierte en filas"""
+        readings = self._readings
+        if not readings:
+            return
+        try:
+            valid = _READINGS.validate_python(readings)
+        except ValidationError as e:
+            invalid = set()
+            for error in e.errors(include_url=False):
+                index = error["loc"][0]
+                invalid.add(index)
+                self._report({
+                    "loc": ["meter", meter_id, self._reading_index + index, *error["loc"][1:]],
+                    "msg": error["msg"],
+                    "type": error["type"],
+                })
+            self.rejected_readings += len(invalid)
+            valid = _READINGS.validate_python([r for i, r in enumerate(readings) if i not in invalid])
+        self._rows.extend(readings_to_rows(self.operation, self.subject, meter_id, valid, self.created_at))
+        self._reading_index += len(readings)
+        self._readings = []
+
+    def _take_batches(self, final: bool = False) -> List[List[tuple]]:
+        batches = []
+        while len(self._rows) >= self.chunk_readings or (final and self._rows):
+            batches.append(self._rows[:self.chunk_readings])
+            self._rows = self._rows[self.chunk_readings:]
+        return batches
+
+    def _handle(self, events: List[tuple]) -> List[List[tuple]]:
+        for event in events:
+            kind = event[0]
+            if kind == "reading":
+                self._readings.append(event[2])
+                self.total_readings += 1
+                if len(self._readings) >= self.chunk_readings:
+                    self._validate(event[1])
+            elif kind == "meter_end":
+                self._validate(event[1])
+            elif kind == "meter":
+                if self.operation is None or self.subject is None:
+                    raise RequestBodyError(
+                        "En la carga en streaming operation y subject deben ir antes de meter", status_code=422
+                    )
+                self.meters_count += 1
+                self._reading_index = 0
+            elif kind == "meters":
+                self._meter_seen = True
+            else:
+                self._header_field(event[1], event[2])
+        return self._take_batches()
+
+    def feed(self, data: bytes) -> List[List[tuple]]:
+        """Procesa una parte del cuerpo y retorna los lotes de filas completos"""
+        try:
+            text = self._text.decode(data)
+        except UnicodeDecodeError as e:
+            raise RequestBodyError(f"El cuerpo no es UTF-8 válido: {e}")
+        return self._handle(self._parser.feed(text))
+
+    def close(self) -> List[List[tuple]]:
+        """Fin del cuerpo: retorna los lotes restantes"""
+        try:
+            text = self._text.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            raise RequestBodyError(f"El cuerpo no es UTF-8 válido: {e}")
+        self._handle(self._parser.feed(text) + self._parser.close())
+        missing = [name for name in ("operation", "subject") if getattr(self, name) is None]
+        if not self._meter_seen:
+            missing.append("meter")
+        if missing:
+            raise RequestBodyError(f"Faltan campos obligatorios: {', '.join(missing)}", status_code=422)
+        return self._take_batches(final=True)
+
+    async def iter_batches(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[List[tuple]]:
+        """
+        Lotes de filas a partir de las partes del cuerpo (ya descomprimidas).
+        El parseo y la validación de cada parte corren en un hilo del
+        threadpool, fuera del event loop.
+        """
+        async for data in chunks:
+            for rows in await anyio.to_thread.run_sync(self.feed, data):
+                yield rows
+        for rows in await anyio.to_thread.run_sync(self.close):
+            yield rows
+
+    def summary(self) -> Dict[str, Any]:
+        """Datos de respuesta de lo procesado hasta ahora"""
+        return {
+            "operation": self.operation,
+            "subject": self.subject,
+            "meters_count": self.meters_count,
+            "total_readings": self.total_readings,
+            "rejected_readings": self.rejected_readings,
+            "validation_errors": self.errors,
+            "timestamp": self.created_at.isoformat(),
+        }
@@ -1,17 +1,143 @@
-from fastapi import APIRouter, Body
+import logging
+import os
+from datetime import datetime
+from functools import lru_cache, partial
+from zoneinfo import ZoneInfo
+from typing import Callable, List, Optional
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from app.energy.domain.services.energy_service import EnergyService
-from app.energy.adapters.persistence.energy_repository import EnergyRepositorySQL
+from app.energy.domain.ports.reading_batch_consumer_port import ReadingBatchConsumer
+from app.energy.domain.ports.meter_access_port import MeterAccessPort
 from app.shared.infrastructure.response import ResultHandler
 from app.energy.adapters.http.energy_dtos import SaveRecordRequest
+from app.energy.adapters.http.record_formats import decode_record, FRAME_CONTENT_TYPE, MSGPACK_CONTENT_TYPES
+from app.energy.adapters.http.record_stream import RecordStreamDecoder, STREAM_CHUNK_READINGS
+from app.energy.adapters.http.stream_session import (
+    ReadingStreamSession, stream_settings, gateway_roles, CLOSE_POLICY_VIOLATION
+)
+from app.shared.infrastructure.content_encoding import decode_request_body, iter_decoded_body, RequestBodyError
+from app.shared.infrastructure.json_body import json_body_openapi
+
+logger = logging.getLogger(__name__)
+
+bogota_tz = ZoneInfo("America/Bogota")
 
 router = APIRouter(
     prefix="/energy",
     tags=["Energy Service"]
 )
 
+# Consumidores de lotes de otros contextos (ReadingBatchConsumer) y acceso a
+# las asignaciones de medidores (MeterAccessPort). Los registra la raíz de
+# composición (app.composition) antes del primer uso de los proveedores;
+# este módulo no importa otros contextos.
+batch_consumer_factories: List[Callable[[], ReadingBatchConsumer]] = []
+meter_access_factory: Optional[Callable[[], MeterAccessPort]] = None
+
+
 # Inyección de dependencias - Configuración de servicios
-energy_repo = EnergyRepositorySQL()
-energy_manager = EnergyService(energy_repo)
+# Se construyen en el primer uso (o en el hook de arranque de app.main)
+@lru_cache(maxsize=None)
+def get_reading_archive():
+    from app.energy.adapters.persistence.reading_archive import ReadingArchive, archive_settings
+    return ReadingArchive(**archive_settings())
+
+
+@lru_cache(maxsize=None)
+def get_meter_access() -> Optional[MeterAccessPort]:
+    """Medidores asignados a cada usuario (None si la raíz de composición no lo conectó)"""
+    return meter_access_factory() if meter_access_factory is not None else None
+
+
+@lru_cache(maxsize=None)
+def get_reading_validator():
+    """Reglas de negocio de las lecturas (ENERGY_VALIDATION_*); None si ENERGY_VALIDATION=false"""
+    from app.energy.domain.models.reading_validation import ReadingValidator
+    if os.getenv("ENERGY_VALIDATION", "true").lower() != "true":
+        return None
+    return ReadingValidator(
+        voltage_range=(
+            float(os.getenv("ENERGY_VALIDATION_MIN_VOLTAGE", "0")),
+            float(os.getenv("ENERGY_VALIDATION_MAX_VOLTAGE", "500")),
+        ),
+        max_current=float(os.getenv("ENERGY_VALIDATION_MAX_CURRENT", "2000")),
+        max_power=float(os.getenv("ENERGY_VALIDATION_MAX_POWER", "1000")),
+        max_future_ms=int(os.getenv("ENERGY_VALIDATION_MAX_FUTURE_MS", "3600000")),
+        flag_reject_mask=int(os.getenv("ENERGY_VALIDATION_FLAG_REJECT_MASK", "0"), 0),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_energy_manager() -> EnergyService:
+    from app.energy.adapters.persistence.energy_repository import EnergyRepositorySQL
+    from app.energy.adapters.persistence.energy_rollup_repository import EnergyRollupRepositorySQL
+    from app.energy.adapters.persistence.reading_storage import ReadingStorageSQL
+    from app.energy.infrastructure.ingestion_queue import IngestionQueue, ingestion_settings
+    from app.energy.infrastructure.dead_letter import DeadLetterFile, dead_letter_settings
+    from app.energy.infrastructure.ingestion_shards import IngestionShardClient, shard_client_settings
+    from app.energy.infrastructure.periodic_task import PeriodicTask
+    from app.energy.infrastructure.recent_keys import RecentReadingKeys
+    from app.energy.infrastructure.meter_state import MeterStateTable, meter_state_settings
+    repository = EnergyRepositorySQL(archive=get_reading_archive())
+    service = EnergyService(
+        repository,
+        recent_keys=RecentReadingKeys(
+            keys_per_meter=int(os.getenv("ENERGY_DEDUP_KEYS_PER_METER", "672")),
+            max_meters=int(os.getenv("ENERGY_DEDUP_MAX_METERS", "50000")),
+        ),
+        rollup_repository=EnergyRollupRepositorySQL(),
+        batch_consumers=[factory() for factory in batch_consumer_factories],
+        reading_storage=ReadingStorageSQL(get_reading_archive()),
+        retention_months=int(os.getenv("ENERGY_RETENTION_MONTHS", "0")),
+        partition_months_ahead=int(os.getenv("ENERGY_PARTITION_MONTHS_AHEAD", "3")),
+        reading_validator=get_reading_validator(),
+        meter_state=MeterStateTable(repository, **meter_state_settings())
+        if os.getenv("ENERGY_METER_STATE", "true").lower() == "true" else None,
+    )
+    # ENERGY_INGEST_MODE=queue agrupa lecturas de muchos requests por transacción;
+    # sync guarda cada request en su propia transacción; sharded entrega los
+    # lotes a los shards de ingesta que lanza app.server (sin ellos, cola local)
+    mode = os.getenv("ENERGY_INGEST_MODE", "queue").lower()
+    shards = shard_client_settings() if mode == "sharded" else None
+    if shards is not None:
+        service.ingestion_shards = IngestionShardClient(**shards)
+    elif mode in ("queue", "sharded"):
+        if mode == "sharded":
+            logger.warning("ENERGY_INGEST_MODE=sharded sin shards en marcha (se lanzan con app.server): se usa la cola local")
+        service.ingestion_queue = IngestionQueue(
+            sink=service.persist_rows,
+            dead_letter=DeadLetterFile(**dead_letter_settings()).write,
+            **ingestion_settings()
+        )
+    # Particiones y archivo de lecturas cada ENERGY_MAINTENANCE_INTERVAL_S (0 = desactivado)
+    maintenance_interval = float(os.getenv("ENERGY_MAINTENANCE_INTERVAL_S", "3600"))
+    service.maintenance_task = (
+        PeriodicTask(service.maintain_storage, maintenance_interval, name="energy-storage-maintenance")
+        if maintenance_interval > 0 else None
+    )
+    return service
+
+
+def start_storage_maintenance():
+    """Inicia la tarea periódica de mantenimiento de lecturas (desde el hook de arranque)"""
+    maintenance_task = get_energy_manager().maintenance_task
+    if maintenance_task is not None:
+        maintenance_task.start()
+
+
+async def shutdown_ingestion():
+    """
+    Detiene el mantenimiento y vacía la cola de ingesta al apagar el worker
+    (si el servicio se llegó a construir)
+    """
+    if get_energy_manager.cache_info().currsize == 0:
+        return
+    service = get_energy_manager()
+    if service.maintenance_task is not None:
+        await service.maintenance_task.stop()
+    if service.ingestion_queue is not None:
+        await service.ingestion_queue.stop()
 
 
 @router.get("/ping")
@@ -19,8 +145,22 @@ def ping():
     return ResultHandler.success(message="pong desde energy")
 
 
-@router.post("/save-record")
-def save_record(request: SaveRecordRequest = Body(...)):
+def _save_record_openapi():
+    """Cuerpo documentado: JSON (SaveRecordRequest), MessagePack o frame columnar"""
+    extra = json_body_openapi(SaveRecordRequest)
+    content = extra["requestBody"]["content"]
+    for media_type in (FRAME_CONTENT_TYPE,) + MSGPACK_CONTENT_TYPES:
+        content[media_type] = {"schema": {"type": "string", "format": "binary"}}
+    return extra
+
+
+def _decode_record_body(body: bytes, content_encoding: Optional[str], content_type: Optional[str], created_at: datetime):
+    """Descomprime y decodifica el cuerpo de /save-record (corre en el threadpool)"""
+    return decode_record(content_type, decode_request_body(body, content_encoding), created_at)
+
+
+@router.post("/save-record", openapi_extra=_save_record_openapi())
+async def save_record(request: Request):
     """
     Endpoint para guardar registros de lecturas de medidores de energía.
 
@@ -33,9 +173,201 @@ def save_record(request: SaveRecordRequest = Body(...)):
       }
     }
 
+    El cuerpo se valida una sola vez desde los bytes (SaveRecordRequest) y se
+    convierte directamente en filas para inserción masiva.
+
+    Formatos (Content-Type):
+    - application/json: la estructura anterior
+    - application/msgpack: la misma estructura en MessagePack (si msgpack está instalado)
+    - application/vnd.volt.readings-frame: frame columnar binario (ts, flag y
+      14 columnas float64 por lectura; ver record_formats), que se decodifica
+      directo a arreglos sin parsear lectura por lectura
+    Cualquiera puede llegar comprimido (Content-Encoding: gzip, deflate o zstd).
+
+    Con la cola de ingesta activa (ENERGY_INGEST_MODE=queue) las lecturas se
+    encolan y se persisten por lotes en segundo plano; con sharded se
+    entregan al proceso shard dueño de cada medidor, que las valida y encola.
+
+    Returns:
+        JSON response con status 202 (encolado) o 200 (guardado síncrono),
+        503 si la cola está llena, 415 si el formato o la compresión no
+        están soportados
+    """
+    created_at = datetime.now(bogota_tz)
+    body = await request.body()
+    try:
+        # Descompresión y parseo fuera del event loop: un cuerpo grande no frena las demás conexiones
+        rows, summary = await run_in_threadpool(
+            _decode_record_body, body, request.headers.get("content-encoding"),
+            request.headers.get("content-type"), created_at
+        )
+    except RequestBodyError as e:
+        return ResultHandler.error(message=str(e), status_code=e.status_code)
+
+    service = get_energy_manager()
+    if service.ingestion_queue is not None or service.ingestion_shards is not None:
+        return await service.enqueue_readings(rows, summary)
+    return await run_in_threadpool(service.save_readings, rows, summary)
+
+
+@router.post("/save-record/stream", openapi_extra=json_body_openapi(SaveRecordRequest))
+async def save_record_stream(
+    request: Request,
+    chunk_size: int = Query(STREAM_CHUNK_READINGS, ge=1, le=100_000, description="Lecturas por bloque de validación e inserción")
+):
+    """
+    Carga masiva de lecturas (p. ej. históricos de cientos de MB) con el
+    mismo cuerpo JSON que /energy/save-record, leído y parseado en streaming.
+
+    El cuerpo no se guarda completo en memoria: las lecturas se decodifican
+    a medida que llegan, se validan por bloques de chunk_size y cada bloque
+    se entrega a la ingesta: a la cola o a los shards si están activos, o
+    insertado en su propia transacción. Las lecturas inválidas se descartan
+    y se reportan (validation_errors, con su ubicación) sin rechazar el resto.
+
+    operation y subject deben ir antes de meter en el cuerpo. Acepta
+    Content-Encoding gzip, deflate o zstd, también descomprimidos en streaming.
+
     Returns:
-        JSON response con status 200 y mensaje de confirmación
+        JSON response con status 200 (202 con cola o shards) y conteos
+        (aceptadas, duplicadas, rechazadas); 400/422 si el cuerpo es
+        inválido, reportando lo que alcanzó a guardarse; 503 si la cola
+        sigue llena
+    """
+    media_type = (request.headers.get("content-type") or "application/json").split(";")[0].strip().lower()
+    if media_type != "application/json" and not media_type.endswith("+json"):
+        return ResultHandler.error(message=f"Content-Type no soportado: {media_type}. Opciones: application/json", status_code=415)
+
+    decoder = RecordStreamDecoder(datetime.now(bogota_tz), chunk_readings=chunk_size)
+    chunks = iter_decoded_body(request.stream(), request.headers.get("content-encoding"))
+    return await get_energy_manager().save_reading_stream(decoder.iter_batches(chunks), decoder.summary)
+
+
+@router.websocket("/stream")
+async def reading_stream(websocket: WebSocket):
+    """
+    Canal persistente de ingesta para medidores y gateways.
+
+    El handshake se autentica con el JWT de /auth/log-in en el header
+    Authorization: Bearer <token> (no se acepta en la URL, donde quedaría
+    en logs y proxies). Después, cada mensaje es un frame de lecturas (JSON
+    de SaveRecordRequest como texto, o el frame columnar binario) que entra
+    al mismo pipeline de /energy/save-record, con acks por lotes y control
+    de flujo por créditos (ver ReadingStreamSession).
+
+    Los usuarios con rol de gateway (ENERGY_STREAM_GATEWAY_ROLES, vacío por
+    defecto: el rol lo elige el cliente al registrarse) pueden reportar
+    cualquier medidor; el resto, solo los que tienen asignados: un frame
+    con otro medidor se rechaza completo (403).
+
+    Un token inválido cierra el handshake con 1008 (HTTP 403).
+    """
+    from app.auth.adapters.http.routes import get_auth_manager
+    authorization = websocket.headers.get("authorization", "")
+    token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else None
+    try:
+        if not token:
+            raise ValueError("Falta el token")
+        user, claims = await run_in_threadpool(get_auth_manager().authenticate_token, token)
+        meter_access = None
+        if user.role not in gateway_roles():
+            access = get_meter_access()
+            if access is None:
+                raise ValueError("Solo los gateways pueden usar el canal de ingesta")
+            meter_access = partial(access.owned_meters, user.id)
+    except ValueError as e:
+        await websocket.close(code=CLOSE_POLICY_VIOLATION, reason=str(e))
+        return
+
+    await websocket.accept()
+    session = ReadingStreamSession(
+        websocket, get_energy_manager(), expires_at=claims.get("exp"), meter_access=meter_access, **stream_settings()
+    )
+    try:
+        await session.run()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/ingestion/metrics")
+def ingestion_metrics():
+    """Profundidad de la cola de ingesta y latencia de los vaciados"""
+    result = get_energy_manager().ingestion_metrics()
+    return result
+
+
+@router.get("/readings/export")
+def export_readings(
+    meter_id: Optional[str] = Query(None, description="Filtra por medidor"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Formato de exportación")
+):
+    """
+    Exporta lecturas individuales en streaming (NDJSON o CSV).
+    La memoria del servidor no depende del número de lecturas.
+    """
+    result = get_energy_manager().export_readings(meter_id=meter_id, export_format=format)
+    return result
+
+
+@router.get("/meters/{meter_id}/readings")
+def get_meter_readings(
+    meter_id: str,
+    ts_from: int = Query(..., alias="from", description="Inicio del rango (timestamp en ms, inclusivo)"),
+    ts_to: int = Query(..., alias="to", description="Fin del rango (timestamp en ms, exclusivo)"),
+    fields: Optional[str] = Query(None, description="Columnas separadas por coma, p. ej. energy_ai,energy_ae"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior"),
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página (solo json)"),
+    format: str = Query("json", pattern="^(json|ndjson|csv)$", description="json paginado o ndjson/csv en streaming")
+):
+    """
+    Lecturas de un medidor en un rango de tiempo, ordenadas por timestamp.
+    Paginadas por cursor (json) o en streaming del rango completo (ndjson/csv).
+    """
+    result = get_energy_manager().get_meter_readings(
+        meter_id, ts_from, ts_to, fields=fields, cursor=cursor, limit=limit, export_format=format
+    )
+    return result
+
+
+@router.get("/meters/{meter_id}/latest")
+def get_meter_latest(meter_id: str):
+    """
+    Último estado conocido de un medidor: timestamp y flag de su última
+    lectura y último valor no nulo de cada contador de energía.
+    Se sirve desde la memoria del servidor (caché de estado de medidores).
+    """
+    result = get_energy_manager().get_latest_reading(meter_id)
+    return result
+
+
+@router.get("/meters/{meter_id}/rollups")
+def get_meter_rollups(
+    meter_id: str,
+    ts_from: int = Query(..., alias="from", description="Inicio del rango (timestamp en ms, inclusivo)"),
+    ts_to: int = Query(..., alias="to", description="Fin del rango (timestamp en ms, exclusivo)"),
+    resolution: str = Query("1h", pattern="^(15m|1h|1d|1mo)$", description="Tamaño de bucket de la respuesta")
+):
+    """
+    Agregados de un medidor por bucket: min/max/avg de voltaje y corriente,
+    delta de los contadores de energía y número de lecturas.
+    Días y meses en hora de Bogotá.
+    """
+    result = get_energy_manager().get_meter_rollups(meter_id, ts_from, ts_to, resolution=resolution)
+    return result
+
+
+@router.get("/storage")
+def storage_status():
+    """Particiones de energy_readings, retención y meses archivados"""
+    result = get_energy_manager().storage_status()
+    return result
+
+
+@router.post("/storage/maintenance")
+def run_storage_maintenance():
+    """
+    Ejecuta ya un ciclo de mantenimiento: crea las particiones futuras y
+    archiva los meses fuera de la retención (ENERGY_RETENTION_MONTHS).
     """
-    # Convertir el DTO a diccionario para pasarlo al servicio
-    result = energy_manager.save_record(request.model_dump())
+    result = get_energy_manager().run_storage_maintenance()
     return result
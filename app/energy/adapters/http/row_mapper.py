@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+from app.energy.adapters.http.energy_dtos import ReadingDTO, SaveRecordRequest
+
+
+def readings_to_rows(operation: str, subject: str, meter_id: str, readings: Iterable[ReadingDTO], created_at: datetime) -> List[tuple]:
+    """Filas (en el orden de READING_COLUMNS) de las lecturas ya validadas de un medidor"""
+    rows = []
+    append = rows.append
+    for r in readings:
+        voltage, current, power, energy = r.voltage, r.current, r.power, r.energy
+        append((
+            operation, subject, meter_id, r.ts, r.flag,
+            voltage.a, voltage.b, voltage.c,
+            current.a, current.b, current.c,
+            power.ai, power.ae, power.ri, power.re,
+            energy.ai, energy.ae, energy.ri, energy.re,
+            created_at,
+        ))
+    return rows
+
+
+def request_to_rows(request: SaveRecordRequest, created_at: datetime) -> List[tuple]:
+    """
+    Convierte el DTO ya validado directamente en filas listas para inserción
+    masiva (tuplas en el orden de READING_COLUMNS).
+
+    Evita los pasos intermedios del camino anterior (model_dump → dicts →
+    modelos de dominio → tuplas): el payload se valida una sola vez, al
+    construir el DTO, y aquí solo se leen atributos.
+    """
+    rows = []
+    for meter_id, readings in request.meter.items():
+        rows.extend(readings_to_rows(request.operation, request.subject, meter_id, readings, created_at))
+    return rows
+
+
+def rows_summary(operation: str, subject: str, meters_count: int, rows: List[tuple], created_at: datetime) -> Dict[str, Any]:
+    """Datos de respuesta de un registro recibido"""
+    return {
+        "operation": operation,
+        "subject": subject,
+        "meters_count": meters_count,
+        "total_readings": len(rows),
+        "timestamp": created_at.isoformat()
+    }
+
+
+def request_summary(request: SaveRecordRequest, rows: List[tuple], created_at: datetime) -> Dict[str, Any]:
+    """Datos de respuesta de un registro recibido como SaveRecordRequest"""
+    return rows_summary(request.operation, request.subject, len(request.meter), rows, created_at)
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+from zoneinfo import ZoneInfo
+from fastapi import WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from app.energy.adapters.http.record_formats import decode_record, FRAME_CONTENT_TYPE, JSON_CONTENT_TYPE
+from app.energy.domain.models.energy_record import METER_ID_INDEX
+from app.energy.domain.services.energy_service import EnergyService
+from app.energy.infrastructure.ingestion_queue import IngestionQueueFull
+from app.shared.infrastructure.content_encoding import RequestBodyError
+
+logger = logging.getLogger(__name__)
+
+bogota_tz = ZoneInfo("America/Bogota")
+
+# Códigos de cierre (RFC 6455)
+CLOSE_POLICY_VIOLATION = 1008
+
+# Errores de validación que se detallan por frame
+MAX_REPORTED_ERRORS = 5
+# Espera mínima entre consultas de los medidores asignados al encontrar uno desconocido
+METER_ACCESS_REFRESH_S = 30.0
+
+
+def stream_settings() -> Dict[str, Any]:
+    """Parámetros del WebSocket de ingesta desde variables de entorno"""
+    return {
+        "window": int(os.getenv("ENERGY_STREAM_WINDOW", "64")),
+        "ack_every": int(os.getenv("ENERGY_STREAM_ACK_EVERY", "32")),
+        "ack_interval_ms": float(os.getenv("ENERGY_STREAM_ACK_INTERVAL_MS", "250")),
+    }
+
+
+def gateway_roles() -> FrozenSet[int]:
+    """
+    Roles que pueden reportar cualquier medidor (ENERGY_STREAM_GATEWAY_ROLES,
+    separados por coma). Por defecto ninguno: el registro acepta el rol que
+    envía el cliente, así que todos pasan por los medidores asignados.
+    """
+    return frozenset(int(role) for role in os.getenv("ENERGY_STREAM_GATEWAY_ROLES", "").split(",") if role.strip())
+
+
+def _decode_frame(content_type: str, body: bytes) -> tuple:
+    """Filas del frame y sus medidores (corre en el threadpool)"""
+    rows, _ = decode_record(content_type, body, datetime.now(bogota_tz))
+    return rows, {row[METER_ID_INDEX] for row in rows}
+
+
+class ReadingStreamSession:
+    """
+    Una conexión del WebSocket de ingesta (/energy/stream) ya autenticada.
+
+    Protocolo:
+    - Al conectar el servidor envía {"type": "ready", "credits": window, ...}.
+    - Cada mensaje del cliente es un frame de lecturas: texto con el JSON de
+      SaveRecordRequest, o binario con el frame columnar de record_formats
+      (application/vnd.volt.readings-frame). Los frames se numeran
+      implícitamente desde 1 (seq) en el orden en que llegan.
+    - Cada frame se decodifica y se entrega al mismo pipeline que
+      /energy/save-record (EnergyService.submit_readings: la cola de ingesta
+      o la inserción síncrona).
+    - Acks por lotes: cada ack_every frames, o ack_interval_ms después del
+      primer frame sin confirmar, el servidor envía
+      {"type": "ack", "seq": último frame, "frames", "accepted", "duplicates", "rejected", "credits"}.
+      El ack es acumulativo: confirma todos los frames hasta seq; rejected
+      son las lecturas descartadas por las reglas de negocio.
+    - Un frame inválido, no autorizado o rechazado por contrapresión genera
+      de inmediato {"type": "error", "seq", "status", "message"} (400/415/422,
+      403 si trae medidores que el cliente no puede reportar, 503 si la
+      cola de ingesta está llena o 500 si falló su persistencia: reenviar
+      ese frame más tarde, la clave única descarta lo que ya se guardó);
+      igual cuenta en el siguiente ack y la conexión sigue abierta.
+
+    Control de flujo por créditos: el cliente puede tener como máximo
+    window frames enviados sin confirmar y cada ack devuelve tantos
+    créditos como frames confirma. El servidor lee el siguiente frame solo
+    cuando el anterior entró al pipeline (submit espera si la cola está
+    llena), así que los acks, y con ellos los créditos, llegan al ritmo de
+    la cola. Un cliente que envía sin créditos no consume memoria del
+    servidor: sus frames esperan en el buffer TCP de la conexión.
+
+    Si el token del handshake expira, la conexión se cierra (1008) después
+    de confirmar lo recibido; el frame que llegó tras la expiración no se
+    procesa y el gateway lo reenvía al reconectarse con un token nuevo.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        service: EnergyService,
+        window: int = 64,
+        ack_every: int = 32,
+        ack_interval_ms: float = 250,
+        expires_at: Optional[float] = None,
+        meter_access: Optional[Callable[[], Set[str]]] = None,
+    ):
+        """
+        Args:
+            websocket: Conexión ya aceptada
+            service: Servicio de energía (pipeline de ingesta)
+            window: Frames sin confirmar que puede tener el cliente
+            ack_every: Frames por ack (se limita a la mitad de window)
+            ack_interval_ms: Espera máxima de un frame sin confirmar
+            expires_at: Expiración del token (epoch en segundos; None = no expira)
+            meter_access: Medidores que puede reportar el cliente (consulta
+                bloqueante: se hace en el threadpool al primer frame y, ante
+                un medidor desconocido, a lo sumo cada METER_ACCESS_REFRESH_S);
+                None = cualquiera (gateway)
+        """
+        self.websocket = websocket
+        self.service = service
+        self.window = max(window, 1)
+        self.ack_every = max(1, min(ack_every, self.window // 2 or 1))
+        self.ack_interval = ack_interval_ms / 1000
+        self.expires_at = expires_at
+        self.meter_access = meter_access
+        self._allowed_meters: Optional[Set[str]] = None
+        self._allowed_loaded_at = 0.0
+
+        self.seq = 0
+        self._unacked = 0
+        self._first_unacked_at: Optional[float] = None
+        self._pending_accepted = 0
+        self._pending_duplicates = 0
+        self._pending_rejected = 0
+
+        # Totales de la conexión
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.rejected_frames = 0
+
+    async def run(self):
+        """Atiende la conexión hasta que el cliente cierre o se viole el protocolo"""
+        await self.websocket.send_json({
+            "type": "ready",
+            "credits": self.window,
+            "ack_every": self.ack_every,
+            "ack_interval_ms": self.ack_interval * 1000,
+        })
+        while True:
+            message = await self._receive()
+            if message is None:
+                await self._ack()
+                continue
+            if message["type"] == "websocket.disconnect":
+                break
+            if self.expires_at is not None and time.time() >= self.expires_at:
+                await self._close(CLOSE_POLICY_VIOLATION, "Token expirado")
+                break
+            await self._handle(message)
+            if self._unacked >= self.ack_every:
+                await self._ack()
+        logger.info(
+            "Conexión de ingesta cerrada: %s frames, %s lecturas aceptadas, %s duplicadas, %s inválidas, %s frames rechazados",
+            self.seq, self.accepted, self.duplicates, self.rejected, self.rejected_frames
+        )
+
+    async def _receive(self) -> Optional[Dict[str, Any]]:
+        """Siguiente mensaje, o None si vence el plazo del ack pendiente"""
+        if self._first_unacked_at is None:
+            return await self.websocket.receive()
+        remaining = self._first_unacked_at + self.ack_interval - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            return await asyncio.wait_for(self.websocket.receive(), timeout=remaining)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _handle(self, message: Dict[str, Any]):
+        self.seq += 1
+        self._unacked += 1
+        if self._first_unacked_at is None:
+            self._first_unacked_at = time.monotonic()
+        body = message.get("bytes")
+        if body is not None:
+            content_type = FRAME_CONTENT_TYPE
+        else:
+            content_type, body = JSON_CONTENT_TYPE, (message.get("text") or "").encode("utf-8")
+        try:
+            rows, meter_ids = await run_in_threadpool(_decode_frame, content_type, body)
+            denied = await self._denied_meters(meter_ids)
+            if not denied:
+                accepted, duplicates, rejected = await self.service.submit_readings(rows)
+        except RequestBodyError as e:
+            await self._error(e.status_code, str(e))
+        except RequestValidationError as e:
+            await self._error(422, "Frame inválido", errors=[
+                {"loc": list(error["loc"]), "msg": error["msg"], "type": error["type"]}
+                for error in e.errors()[:MAX_REPORTED_ERRORS]
+            ])
+        except IngestionQueueFull as e:
+            await self._error(503, str(e))
+        except Exception as e:
+            print(f"Error al procesar frame {self.seq} del canal de ingesta: {e}")
+            await self._error(500, "Error interno del servidor al procesar el frame")
+        else:
+            if denied:
+                await self._error(403, f"Medidores no asignados al usuario: {', '.join(denied[:MAX_REPORTED_ERRORS])}")
+                return
+            self._pending_accepted += accepted
+            self._pending_duplicates += duplicates
+            self._pending_rejected += rejected
+
+    async def _denied_meters(self, meter_ids: Set[str]) -> List[str]:
+        """Medidores del frame que el cliente no puede reportar"""
+        if self.meter_access is None:
+            return []
+        now = time.monotonic()
+        unknown = self._allowed_meters is None or not meter_ids <= self._allowed_meters
+        if unknown and (self._allowed_meters is None or now - self._allowed_loaded_at >= METER_ACCESS_REFRESH_S):
+            self._allowed_meters = await run_in_threadpool(self.meter_access)
+            self._allowed_loaded_at = now
+        return sorted(meter_ids - self._allowed_meters)
+
+    async def _error(self, status: int, message: str, **extra):
+        self.rejected_frames += 1
+        await self.websocket.send_json({"type": "error", "seq": self.seq, "status": status, "message": message, **extra})
+
+    async def _ack(self):
+        """Confirma los frames recibidos desde el último ack y devuelve sus créditos"""
+        if not self._unacked:
+            return
+        await self.websocket.send_json({
+            "type": "ack",
+            "seq": self.seq,
+            "frames": self._unacked,
+            "accepted": self._pending_accepted,
+            "duplicates": self._pending_duplicates,
+            "rejected": self._pending_rejected,
+            "credits": self._unacked,
+        })
+        self.accepted += self._pending_accepted
+        self.duplicates += self._pending_duplicates
+        self.rejected += self._pending_rejected
+        self._unacked = self._pending_accepted = self._pending_duplicates = self._pending_rejected = 0
+        self._first_unacked_at = None
+
+    async def _close(self, code: int, reason: str):
+        await self._ack()
+        await self.websocket.close(code=code, reason=reason)
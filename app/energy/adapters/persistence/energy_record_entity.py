@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, BigInteger
+from sqlalchemy import Column, Integer, SmallInteger, DateTime, Float, BigInteger, UniqueConstraint
 from app.shared.infrastructure.db import Base
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -16,16 +16,39 @@ class EnergyReadingEntity(Base):
 
     Descompone el JSON de entrada y almacena cada lectura como un registro individual.
     Esto facilita consultas, análisis y reportes sobre los datos de energía.
+
+    Un medidor reporta una sola lectura por timestamp: (meter_key, timestamp)
+    es única, y los reintentos o envíos solapados se ignoran al insertar.
+    Esa clave es también el índice compuesto de las consultas por rango de
+    un medidor (WHERE meter_key = ? AND timestamp BETWEEN ...), por lo que
+    meter_key no necesita un índice propio.
+
+    Los textos repetidos en cada lectura van codificados en diccionarios:
+    meter_id en meters, operation y subject en reading_operations y
+    reading_subjects.
+
+    delta_ai … delta_re son el consumo de cada contador desde la lectura
+    anterior del mismo medidor, calculado al ingerir (con rollover y
+    reinicios del registro); sumarlos da la energía de cualquier rango.
+
+    En MySQL la tabla se particiona por mes (RANGE sobre timestamp; ver
+    create_energy_table.py y ReadingPartitionManager). MySQL no admite
+    claves foráneas en tablas particionadas, por eso las claves de los
+    diccionarios no se declaran como ForeignKey, y exige que toda clave
+    única incluya timestamp: en la BD la clave primaria es (id, timestamp).
     """
     __tablename__ = "energy_readings"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        UniqueConstraint("meter_key", "timestamp", name="uq_energy_readings_meter_ts"),
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
-    # Metadata del request
-    operation = Column(String(100), nullable=False)
-    subject = Column(String(100), nullable=False)
-    meter_id = Column(String(100), nullable=False, index=True)
+    # Metadata del request (claves de los diccionarios)
+    operation_id = Column(SmallInteger, nullable=False)  # reading_operations.id
+    subject_id = Column(SmallInteger, nullable=False)  # reading_subjects.id
+    meter_key = Column(Integer, nullable=False)  # meters.id
 
     # Datos de la lectura
     timestamp = Column(BigInteger, nullable=False, index=True)  # ts en milisegundos
@@ -53,8 +76,14 @@ class EnergyReadingEntity(Base):
     energy_ri = Column(Float, nullable=True)  # Reactive Import
     energy_re = Column(Float, nullable=True)  # Reactive Export
 
+    # Consumo del intervalo por contador (desde la lectura anterior del medidor)
+    delta_ai = Column(Float, nullable=True)
+    delta_ae = Column(Float, nullable=True)
+    delta_ri = Column(Float, nullable=True)
+    delta_re = Column(Float, nullable=True)
+
     # Metadata del sistema
     created_at = Column(DateTime(timezone=True), default=bogota_now)
 
     def __repr__(self):
-        return f"<EnergyReading(id={self.id}, meter_id='{self.meter_id}', timestamp={self.timestamp})>"
+        return f"<EnergyReading(id={self.id}, meter_key={self.meter_key}, timestamp={self.timestamp})>"
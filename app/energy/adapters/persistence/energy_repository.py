@@ -1,9 +1,57 @@
-from typing import Optional, List
+import heapq
+import os
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, Optional, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.energy.domain.ports.energy_repository_port import EnergyRepositoryPort
-from app.energy.domain.models.energy_record import EnergyRecord
+from app.energy.domain.models.energy_record import EnergyRecord, READING_FIELDS, READING_COLUMNS, DELTA_FIELDS
+from app.energy.domain.models.reading_deltas import StoredCounters, MeterState, CounterDeltas, sequence_deltas
 from app.energy.adapters.persistence.energy_record_entity import EnergyReadingEntity
+from app.energy.adapters.persistence.meter_entity import MeterEntity
+from app.energy.adapters.persistence.reading_operation_entity import ReadingOperationEntity
+from app.energy.adapters.persistence.reading_subject_entity import ReadingSubjectEntity
+from app.energy.adapters.persistence.reading_keys import (
+    ReadingKeyResolver, insert_sql, insert_ignore_sql, driver_placeholder, LOOKUP_CHUNK_SIZE
+)
+from app.energy.adapters.persistence.reading_archive import ReadingArchive
 from app.shared.infrastructure.db import get_db
+from app.shared.infrastructure.export import stream_query
+from app.shared.infrastructure.pagination import KeysetPage
+
+# Las filas lógicas (READING_COLUMNS) empiezan con operation, subject y
+# meter_id; en la tabla esos tres son claves enteras. created_at se guarda
+# tal como llega en la fila (hora de Bogotá del request).
+STORAGE_COLUMNS = ("operation_id", "subject_id", "meter_key") + READING_COLUMNS[3:]
+
+# Error de MySQL por clave única repetida (ER_DUP_ENTRY)
+MYSQL_DUPLICATE_KEY = 1062
+
+# Contadores de energía: valores leídos como contexto para calcular deltas
+COUNTER_COLUMNS = READING_COLUMNS[READING_COLUMNS.index("energy_ai"):READING_COLUMNS.index("energy_re") + 1]
+
+# Tabla temporal (una por conexión) con el rango de cada medidor de un lote
+DELTA_RANGES_TABLE = "energy_delta_ranges"
+
+# Campo lógico → columna a consultar (los textos salen de los diccionarios)
+FIELD_COLUMNS = {
+    name: getattr(EnergyReadingEntity, name)
+    for name in READING_FIELDS if name not in ("operation", "subject", "meter_id")
+}
+FIELD_COLUMNS.update(
+    operation=ReadingOperationEntity.name,
+    subject=ReadingSubjectEntity.name,
+    meter_id=MeterEntity.meter_id,
+)
+
+# Campo lógico → columna del archivo de meses retirados (meter_id no se archiva:
+# es el del medidor consultado)
+ARCHIVE_FIELD_COLUMNS = {
+    name: name for name in READING_FIELDS if name not in ("operation", "subject", "meter_id")
+}
+ARCHIVE_FIELD_COLUMNS.update(operation="operation_id", subject="subject_id")
 
 
 class EnergyRepositorySQL(EnergyRepositoryPort):
@@ -12,14 +60,28 @@ class EnergyRepositorySQL(EnergyRepositoryPort):
     Este es un ADAPTADOR que conecta el dominio con la base de datos.
 
     Descompone el EnergyRecord en lecturas individuales para almacenarlas
-    de forma normalizada en la base de datos.
+    de forma normalizada en la base de datos. meter_id, operation y subject
+    se guardan como claves enteras (ReadingKeyResolver) y se vuelven a
+    texto con joins al leer.
+
+    Las consultas por rango leen también los meses ya retirados de la BD
+    al ReadingArchive, si se configura uno.
     """
 
-    def __init__(self):
+    def __init__(self, chunk_size: Optional[int] = None, archive: Optional[ReadingArchive] = None):
         """
         Inicializa el repositorio.
+
+        Args:
+            chunk_size: Filas por sentencia INSERT (por defecto ENERGY_INSERT_CHUNK_SIZE)
+            archive: Archivo de meses retirados (None = solo la BD)
         """
-        pass
+        self.archive = archive
+        self.chunk_size = chunk_size or int(os.getenv("ENERGY_INSERT_CHUNK_SIZE", "1000"))
+        # Las sentencias dependen del paramstyle del driver; se arman en el primer uso
+        self._insert_sql = None
+        self._delta_statements = None
+        self.keys = ReadingKeyResolver()
 
     def _get_db_session(self) -> Session:
         """
@@ -29,96 +91,392 @@ class EnergyRepositorySQL(EnergyRepositoryPort):
         db_generator = get_db()
         return next(db_generator)
 
-    def _create_reading_entity(self, operation: str, subject: str, meter_id: str, reading_data) -> EnergyReadingEntity:
+    def _get_insert_sql(self, dialect) -> Dict[str, str]:
         """
-        Crea una entidad EnergyReadingEntity desde los datos de una lectura.
+        INSERT con los placeholders del driver (%s en pymysql, ? en sqlite).
+        pymysql reescribe el executemany de estas sentencias como un INSERT
+        multi-fila (VALUES (...), (...), ...).
 
-        Args:
-            operation (str): Tipo de operación
-            subject (str): Sujeto de la operación
-            meter_id (str): ID del medidor
-            reading_data: Datos de la lectura individual
+        - "insert": falla si alguna lectura ya existe (clave única meter_key + timestamp)
+        - "ignore": ignora solo las repetidas (ver insert_ignore_sql)
+        - "existing": claves ya guardadas de un bloque (MySQL; se completa por bloque)
+        """
+        if self._insert_sql is None:
+            table = EnergyReadingEntity.__tablename__
+            columns = STORAGE_COLUMNS + DELTA_FIELDS
+            self._insert_sql = {
+                "insert": insert_sql(dialect, table, columns),
+                "ignore": insert_ignore_sql(dialect, table, columns),
+                "existing": f"SELECT meter_key, timestamp FROM {table} WHERE (meter_key, timestamp) IN ({{keys}})",
+            }
+        return self._insert_sql
 
-        Returns:
-            EnergyReadingEntity: Entidad lista para persistir
-        """
-        return EnergyReadingEntity(
-            operation=operation,
-            subject=subject,
-            meter_id=meter_id,
-            timestamp=reading_data.ts,
-            flag=reading_data.flag,
-            # Voltaje
-            voltage_a=reading_data.voltage.a,
-            voltage_b=reading_data.voltage.b,
-            voltage_c=reading_data.voltage.c,
-            # Corriente
-            current_a=reading_data.current.a,
-            current_b=reading_data.current.b,
-            current_c=reading_data.current.c,
-            # Potencia
-            power_ai=reading_data.power.ai,
-            power_ae=reading_data.power.ae,
-            power_ri=reading_data.power.ri,
-            power_re=reading_data.power.re,
-            # Energía
-            energy_ai=reading_data.energy.ai,
-            energy_ae=reading_data.energy.ae,
-            energy_ri=reading_data.energy.ri,
-            energy_re=reading_data.energy.re
-        )
+    def _insert_chunk(self, conn, chunk: List[tuple]) -> int:
+        """
+        Inserta un bloque ignorando las lecturas repetidas; retorna las insertadas.
 
-    def save(self, energy_record: EnergyRecord) -> EnergyRecord:
+        En MySQL el rowcount de ON DUPLICATE KEY UPDATE no separa las
+        repetidas (ver insert_ignore_sql): el bloque se intenta con un INSERT
+        simple, que en el caso común (los duplicados ya se descartaron antes)
+        cuenta exacto. Si choca con una clave existente, InnoDB deshace solo
+        esa sentencia: se consultan las claves existentes del bloque y se
+        insertan las demás, ignorando las que otra transacción agregue entre
+        tanto.
         """
-        Implementación concreta: guarda registro de energía en MySQL.
+        statements = self._get_insert_sql(conn.dialect)
+        if conn.dialect.name != "mysql":
+            return conn.exec_driver_sql(statements["ignore"], chunk).rowcount
+        try:
+            return conn.exec_driver_sql(statements["insert"], chunk).rowcount
+        except IntegrityError as e:
+            if getattr(e.orig, "args", (None,))[0] != MYSQL_DUPLICATE_KEY:
+                raise
+        # STORAGE_COLUMNS: meter_key y timestamp son las columnas 2 y 3
+        keys = list({(row[2], row[3]) for row in chunk})
+        existing = set()
+        placeholder = driver_placeholder(conn.dialect)
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            part = keys[start:start + LOOKUP_CHUNK_SIZE]
+            sql = statements["existing"].format(keys=", ".join([f"({placeholder}, {placeholder})"] * len(part)))
+            existing.update((meter_key, ts) for meter_key, ts in conn.exec_driver_sql(sql, tuple(v for key in part for v in key)))
+        fresh = [row for row in chunk if (row[2], row[3]) not in existing]
+        if fresh:
+            conn.exec_driver_sql(statements["ignore"], fresh)
+        return len(fresh)
+
+    def _get_delta_statements(self, dialect) -> Dict[str, str]:
+        """Sentencias del contexto de deltas, de corrección de deltas y del estado de los medidores"""
+        if self._delta_statements is None:
+            placeholder = driver_placeholder(dialect)
+            table = EnergyReadingEntity.__tablename__
+            values = ", ".join(f"r.{name}" for name in COUNTER_COLUMNS + DELTA_FIELDS)
+            self._delta_statements = {
+                "create": (
+                    f"CREATE TEMPORARY TABLE IF NOT EXISTS {DELTA_RANGES_TABLE} ("
+                    "meter_key INTEGER NOT NULL, ts_from BIGINT NOT NULL, ts_to BIGINT NOT NULL)"
+                ),
+                "clear": f"DELETE FROM {DELTA_RANGES_TABLE}",
+                "mark": f"INSERT INTO {DELTA_RANGES_TABLE} (meter_key, ts_from, ts_to) "
+                        f"VALUES ({', '.join([placeholder] * 3)})",
+                # Por medidor: la lectura anterior a ts_from, las de [ts_from, ts_to]
+                # y la siguiente a ts_to; los extremos salen del índice único
+                "context": (
+                    f"SELECT d.meter_key, r.timestamp, {values} FROM {DELTA_RANGES_TABLE} d "
+                    f"JOIN {table} r ON r.meter_key = d.meter_key "
+                    f"AND r.timestamp >= COALESCE((SELECT MAX(p.timestamp) FROM {table} p "
+                    "WHERE p.meter_key = d.meter_key AND p.timestamp < d.ts_from), d.ts_from) "
+                    f"AND r.timestamp <= COALESCE((SELECT MIN(q.timestamp) FROM {table} q "
+                    "WHERE q.meter_key = d.meter_key AND q.timestamp > d.ts_to), d.ts_to) "
+                    "ORDER BY d.meter_key, r.timestamp"
+                ),
+                # Última lectura de cada medidor y último valor no nulo de cada
+                # contador (recorrido hacia atrás del índice único); {keys} son
+                # los marcadores de la lista IN
+                "states": (
+                    f"SELECT r.meter_key, r.timestamp, r.flag, "
+                    + ", ".join(
+                        f"(SELECT x.{name} FROM {table} x WHERE x.meter_key = r.meter_key "
+                        f"AND x.timestamp <= r.timestamp AND x.{name} IS NOT NULL "
+                        "ORDER BY x.timestamp DESC LIMIT 1)"
+                        for name in COUNTER_COLUMNS
+                    )
+                    + f" FROM {table} r WHERE r.meter_key IN ({{keys}}) "
+                    f"AND r.timestamp = (SELECT MAX(p.timestamp) FROM {table} p WHERE p.meter_key = r.meter_key)"
+                ),
+                # Última lectura de cada medidor; {keys} son los marcadores de la lista IN
+                "latest": (
+                    f"SELECT meter_key, MAX(timestamp) FROM {table} "
+                    "WHERE meter_key IN ({keys}) GROUP BY meter_key"
+                ),
+                "update": (
+                    f"UPDATE {table} SET {', '.join(f'{name} = {placeholder}' for name in DELTA_FIELDS)} "
+                    f"WHERE meter_key = {placeholder} AND timestamp = {placeholder}"
+                ),
+            }
+        return self._delta_statements
+
+    def _select(self, db: Session, names: Sequence[str]):
+        """
+        Query de los campos lógicos indicados, con join solo a los
+        diccionarios que hagan falta.
+        """
+        query = db.query(*[FIELD_COLUMNS[name] for name in names]).select_from(EnergyReadingEntity)
+        if "meter_id" in names:
+            query = query.join(MeterEntity, MeterEntity.id == EnergyReadingEntity.meter_key)
+        if "operation" in names:
+            query = query.join(ReadingOperationEntity, ReadingOperationEntity.id == EnergyReadingEntity.operation_id)
+        if "subject" in names:
+            query = query.join(ReadingSubjectEntity, ReadingSubjectEntity.id == EnergyReadingEntity.subject_id)
+        return query
+
+    def save_rows(
+        self,
+        rows: Sequence[tuple],
+        counter_deltas: Optional[CounterDeltas] = None
+    ) -> int:
+        """
+        Implementación concreta: inserta tuplas planas con executemany a nivel
+        de driver, sin construir entidades ORM. Los textos se traducen a sus
+        claves enteras (creando las que falten en la misma transacción).
 
-        Descompone el EnergyRecord en lecturas individuales y las persiste
-        de forma normalizada en la tabla energy_readings.
+        Las filas se envían en bloques de chunk_size y todo va en una sola
+        transacción, junto con las correcciones de deltas: o se guardan todas
+        las lecturas del request o ninguna. Las que ya existían
+        (meter_id, timestamp) se ignoran sin error.
 
-        Flujo:
-        1. Obtiene sesión de DB
-        2. Itera sobre cada medidor y sus lecturas
-        3. Crea una entidad EnergyReadingEntity por cada lectura
-        4. Persiste todas las lecturas en batch
-        5. Retorna el modelo de dominio original
+        Con counter_deltas se bloquean primero (SELECT ... FOR UPDATE, en
+        orden de clave) las filas de los medidores del lote y el contexto se
+        lee con lectura bloqueante (la última versión confirmada, no la
+        instantánea de la transacción): otro lote del mismo medidor espera
+        a que este confirme y calcula sus deltas sobre lo que guardó.
 
         Args:
-            energy_record (EnergyRecord): Registro de energía a guardar
+            rows: Tuplas en el orden de READING_COLUMNS
+            counter_deltas: Cálculo de los deltas con el contexto guardado;
+                None = deltas nulos
 
         Returns:
-            EnergyRecord: Registro original con metadata actualizada
+            int: Número de filas insertadas (sin contar duplicados)
         """
+        if not rows:
+            return 0
         db = self._get_db_session()
         try:
-            entities_to_save = []
-
-            # Descomponer el registro en lecturas individuales
-            for meter_reading in energy_record.meter_readings:
-                meter_id = meter_reading.meter_id
-
-                # Crear una entidad por cada lectura individual
-                for reading in meter_reading.readings:
-                    entity = self._create_reading_entity(
-                        operation=energy_record.operation,
-                        subject=energy_record.subject,
-                        meter_id=meter_id,
-                        reading_data=reading
-                    )
-                    entities_to_save.append(entity)
+            conn = db.connection()
+            operations, new_operations = self.keys.ensure(conn, "operation", {row[0] for row in rows})
+            subjects, new_subjects = self.keys.ensure(conn, "subject", {row[1] for row in rows})
+            meters, new_meters = self.keys.ensure(conn, "meter_id", {row[2] for row in rows})
+            delta_updates = ()
+            if counter_deltas is None:
+                deltas = [(None,) * len(DELTA_FIELDS)] * len(rows)
+            else:
+                self._lock_meters(db, meters.values())
+                deltas, delta_updates = counter_deltas(
+                    partial(self._read_counter_context, conn, keys=meters, locking=True),
+                    partial(self._read_latest, conn, keys=meters),
+                )
+            inserted = 0
+            for start in range(0, len(rows), self.chunk_size):
+                end = start + self.chunk_size
+                chunk = [
+                    (operations[row[0]], subjects[row[1]], meters[row[2]]) + row[3:] + row_deltas
+                    for row, row_deltas in zip(rows[start:end], deltas[start:end])
+                ]
+                inserted += self._insert_chunk(conn, chunk)
+            if delta_updates:
+                conn.exec_driver_sql(self._get_delta_statements(conn.dialect)["update"], [
+                    tuple(update[2:]) + (meters[update[0]], update[1]) for update in delta_updates
+                ])
+            db.commit()
+            self.keys.remember("operation", new_operations)
+            self.keys.remember("subject", new_subjects)
+            self.keys.remember("meter_id", new_meters)
+            return inserted
+
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error al guardar lecturas de energía: {str(e)}")
+        finally:
+            db.close()
+
+    def get_counter_context(self, ranges: Dict[str, Tuple[int, int]]) -> Dict[str, List[StoredCounters]]:
+        """
+        Implementación concreta: los rangos van a una tabla temporal y una
+        sola consulta trae, para todos los medidores, la lectura anterior al
+        rango, las del rango y la siguiente (subconsultas sobre el índice
+        único). Las lecturas archivadas no se consultan.
+        """
+        if not ranges:
+            return {}
+        db = self._get_db_session()
+        try:
+            conn = db.connection()
+            context = self._read_counter_context(conn, ranges, self.keys.lookup_many(conn, "meter_id", ranges))
+            db.commit()
+            return context
+
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error al leer el contexto de deltas: {str(e)}")
+        finally:
+            db.close()
+
+    def _read_counter_context(
+        self,
+        conn,
+        ranges: Dict[str, Tuple[int, int]],
+        keys: Dict[str, int],
+        locking: bool = False
+    ) -> Dict[str, List[StoredCounters]]:
+        """
+        Contexto de deltas de los medidores de ranges en la transacción de
+        conn (keys: meter_id → clave; puede traer otros medidores).
+        locking=True lee con bloqueo compartido en MySQL.
+        """
+        keys = {meter_id: keys[meter_id] for meter_id in ranges if meter_id in keys}
+        if not keys:
+            return {}
+        statements = self._get_delta_statements(conn.dialect)
+        conn.exec_driver_sql(statements["create"])
+        conn.exec_driver_sql(statements["clear"])
+        conn.exec_driver_sql(statements["mark"], [
+            (meter_key,) + tuple(ranges[meter_id]) for meter_id, meter_key in keys.items()
+        ])
+        meter_ids = {meter_key: meter_id for meter_id, meter_key in keys.items()}
+        context: Dict[str, List[StoredCounters]] = {}
+        sql = statements["context"]
+        if locking and conn.dialect.name == "mysql":
+            sql += " LOCK IN SHARE MODE"
+        for row in conn.exec_driver_sql(sql):
+            context.setdefault(meter_ids[row[0]], []).append(tuple(row[1:]))
+        conn.exec_driver_sql(statements["clear"])
+        return context
+
+    def _read_latest(self, conn, meter_ids: Iterable[str], keys: Dict[str, int]) -> Dict[str, int]:
+        """
+        Timestamp de la última lectura de cada medidor en la transacción de
+        conn, con lectura bloqueante en MySQL: un MAX(timestamp) agrupado
+        por medidor sobre el índice único, en una consulta por bloque.
+        """
+        keys = {keys[meter_id]: meter_id for meter_id in meter_ids if meter_id in keys}
+        statement = self._get_delta_statements(conn.dialect)["latest"]
+        if conn.dialect.name == "mysql":
+            statement += " LOCK IN SHARE MODE"
+        placeholder = driver_placeholder(conn.dialect)
+        wanted = list(keys)
+        latest: Dict[str, int] = {}
+        for start in range(0, len(wanted), LOOKUP_CHUNK_SIZE):
+            chunk = wanted[start:start + LOOKUP_CHUNK_SIZE]
+            for meter_key, ts in conn.exec_driver_sql(statement.format(keys=", ".join([placeholder] * len(chunk))), tuple(chunk)):
+                latest[keys[meter_key]] = ts
+        return latest
+
+    def _lock_meters(self, db: Session, meter_keys: Iterable[int]):
+        """
+        Bloquea las filas de meters de un lote (SELECT ... FOR UPDATE) hasta
+        el fin de la transacción. Siempre en orden de clave, por bloques,
+        para que dos lotes con medidores en común no se bloqueen en cruz.
+        SQLite no tiene bloqueos por fila: ignora el FOR UPDATE.
+        """
+        wanted = sorted(set(meter_keys))
+        for start in range(0, len(wanted), LOOKUP_CHUNK_SIZE):
+            db.query(MeterEntity.id).filter(MeterEntity.id.in_(wanted[start:start + LOOKUP_CHUNK_SIZE])) \
+                .order_by(MeterEntity.id).with_for_update().all()
 
-            # Persistir todas las entidades en batch
-            if entities_to_save:
-                db.bulk_save_objects(entities_to_save)
-                db.commit()
+    def get_meter_keys(self, meter_ids: Iterable[str]) -> Dict[str, int]:
+        """Implementación concreta: claves en la caché del proceso; se consultan solo las que falten"""
+        found, missing = self.keys.cached("meter_id", meter_ids)
+        if not missing:
+            return found
+        db = self._get_db_session()
+        try:
+            return {**found, **self.keys.lookup_many(db.connection(), "meter_id", missing)}
+        finally:
+            db.close()
 
-            return energy_record
+    def get_meter_states(self, meter_ids: Iterable[str]) -> Dict[str, MeterState]:
+        """
+        Implementación concreta: una consulta por bloque de medidores; la
+        última lectura sale del índice único (meter_key, timestamp). Las
+        lecturas archivadas no se consultan.
+        """
+        db = self._get_db_session()
+        try:
+            conn = db.connection()
+            keys = self.keys.lookup_many(conn, "meter_id", meter_ids)
+            meter_ids = {meter_key: meter_id for meter_id, meter_key in keys.items()}
+            placeholder = driver_placeholder(conn.dialect)
+            statement = self._get_delta_statements(conn.dialect)["states"]
+            wanted = list(meter_ids)
+            states: Dict[str, MeterState] = {}
+            for start in range(0, len(wanted), LOOKUP_CHUNK_SIZE):
+                chunk = wanted[start:start + LOOKUP_CHUNK_SIZE]
+                for row in conn.exec_driver_sql(statement.format(keys=", ".join([placeholder] * len(chunk))), tuple(chunk)):
+                    states[meter_ids[row[0]]] = tuple(row[1:])
+            return states
+
+        except Exception as e:
+            raise Exception(f"Error al leer el estado de los medidores: {str(e)}")
+        finally:
+            db.close()
+
+    def recompute_deltas(self, meter_id: str, ts_from: int, ts_to: int, page_size: int = 5000) -> int:
+        """
+        Implementación concreta: recorre las lecturas del medidor en la BD
+        por páginas keyset, arrastrando el último valor de cada contador
+        (desde la lectura anterior a ts_from), y corrige las que cambian.
+        Incluye la primera lectura posterior al rango, cuyo delta depende
+        de la última del rango. Cada página va en su propia transacción,
+        con el medidor bloqueado como en save_rows.
+        """
+        db = self._get_db_session()
+        try:
+            conn = db.connection()
+            meter_key = self.keys.lookup(conn, "meter_id", meter_id)
+            if meter_key is None:
+                return 0
+            self._lock_meters(db, [meter_key])
+            names = ("timestamp",) + COUNTER_COLUMNS + DELTA_FIELDS
+            columns = [getattr(EnergyReadingEntity, name) for name in names]
+            by_meter = EnergyReadingEntity.meter_key == meter_key
+            before = db.query(*columns).filter(by_meter, EnergyReadingEntity.timestamp < ts_from) \
+                .order_by(EnergyReadingEntity.timestamp.desc()).first()
+            following = db.query(func.min(EnergyReadingEntity.timestamp)).filter(
+                by_meter, EnergyReadingEntity.timestamp >= ts_to
+            ).scalar()
+            last_ts = following if following is not None else ts_to - 1
+            carry = np.array(before[1:5] if before is not None else (None,) * 4, dtype=np.float64)
+            update_sql = self._get_delta_statements(conn.dialect)["update"]
+            updated = 0
+            after_ts = ts_from - 1
+            while True:
+                page = db.query(*columns).filter(
+                    by_meter, EnergyReadingEntity.timestamp > after_ts, EnergyReadingEntity.timestamp <= last_ts
+                ).order_by(EnergyReadingEntity.timestamp.asc()).limit(page_size).all()
+                if not page:
+                    break
+                values = np.array([row[1:] for row in page], dtype=np.float64).T
+                # La primera columna es el arrastre: el último valor con dato de cada contador
+                energy = np.concatenate([carry[:, None], values[:4]], axis=1)
+                deltas = sequence_deltas(np.zeros(energy.shape[1], dtype=np.intp), energy, np.ones(energy.shape[1], dtype=bool))[:, 1:]
+                old = values[4:]
+                changed = ~((old == deltas) | (np.isnan(old) & np.isnan(deltas))).all(axis=0)
+                if changed.any():
+                    conn.exec_driver_sql(update_sql, [
+                        tuple(None if np.isnan(value) else float(value) for value in deltas[:, i]) + (meter_key, page[i][0])
+                        for i in np.flatnonzero(changed)
+                    ])
+                    db.commit()
+                    self._lock_meters(db, [meter_key])
+                    updated += int(changed.sum())
+                present = ~np.isnan(energy)
+                last = np.where(present, np.arange(energy.shape[1]), -1).max(axis=1)
+                carry = np.where(last >= 0, energy[np.arange(4), np.maximum(last, 0)], np.nan)
+                after_ts = page[-1][0]
+            return updated
 
         except Exception as e:
             db.rollback()
-            raise Exception(f"Error al guardar registros de energía: {str(e)}")
+            raise Exception(f"Error al recalcular deltas del medidor {meter_id}: {str(e)}")
         finally:
             db.close()
 
+    def save(self, energy_record: EnergyRecord) -> EnergyRecord:
+        """
+        Implementación concreta: guarda registro de energía en MySQL.
+
+        Descompone el EnergyRecord en lecturas individuales (una tupla por
+        lectura) y las persiste con save_rows en la tabla energy_readings.
+
+        Args:
+            energy_record (EnergyRecord): Registro de energía a guardar
+
+        Returns:
+            EnergyRecord: Registro original con metadata actualizada
+        """
+        self.save_rows(energy_record.to_rows())
+        return energy_record
+
     def get_by_id(self, record_id: int) -> Optional[EnergyRecord]:
         """
         Implementación concreta: obtiene registro de energía por ID desde MySQL.
@@ -131,10 +489,11 @@ class EnergyRepositorySQL(EnergyRepositoryPort):
         """
         db = self._get_db_session()
         try:
-            entity = db.query(EnergyReadingEntity).filter(EnergyReadingEntity.id == record_id).first()
+            row = self._select(db, READING_FIELDS).filter(EnergyReadingEntity.id == record_id).first()
 
-            if entity is None:
+            if row is None:
                 return None
+            entity = dict(zip(READING_FIELDS, row))
 
             # Reconstruir el modelo de dominio desde una sola lectura
             from app.energy.domain.models.energy_record import (
@@ -142,25 +501,140 @@ class EnergyRepositorySQL(EnergyRepositoryPort):
             )
 
             reading = ReadingData(
-                ts=entity.timestamp,
-                flag=entity.flag,
-                voltage=VoltageData(a=entity.voltage_a, b=entity.voltage_b, c=entity.voltage_c),
-                current=CurrentData(a=entity.current_a, b=entity.current_b, c=entity.current_c),
-                power=PowerData(ai=entity.power_ai, ae=entity.power_ae, ri=entity.power_ri, re=entity.power_re),
-                energy=EnergyData(ai=entity.energy_ai, ae=entity.energy_ae, ri=entity.energy_ri, re=entity.energy_re)
+                ts=entity["timestamp"],
+                flag=entity["flag"],
+                voltage=VoltageData(a=entity["voltage_a"], b=entity["voltage_b"], c=entity["voltage_c"]),
+                current=CurrentData(a=entity["current_a"], b=entity["current_b"], c=entity["current_c"]),
+                power=PowerData(ai=entity["power_ai"], ae=entity["power_ae"], ri=entity["power_ri"], re=entity["power_re"]),
+                energy=EnergyData(ai=entity["energy_ai"], ae=entity["energy_ae"], ri=entity["energy_ri"], re=entity["energy_re"])
             )
 
-            meter_reading = MeterReadings(meter_id=entity.meter_id, readings=[reading])
+            meter_reading = MeterReadings(meter_id=entity["meter_id"], readings=[reading])
 
             return EnergyRecord(
-                id=entity.id,
-                operation=entity.operation,
-                subject=entity.subject,
+                id=entity["id"],
+                operation=entity["operation"],
+                subject=entity["subject"],
                 meter_readings=[meter_reading],
-                created_at=entity.created_at
+                created_at=entity["created_at"]
             )
 
         except Exception as e:
             raise Exception(f"Error al obtener registro de energía {record_id}: {str(e)}")
         finally:
             db.close()
+
+    def iter_readings(self, meter_id: Optional[str] = None, batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Implementación concreta: recorre energy_readings con cursor del servidor.
+        Se consultan columnas (tuplas), sin hidratar entidades ORM; los textos
+        se obtienen con join a los diccionarios.
+        La sesión queda abierta mientras se consume el iterador.
+        """
+        db = self._get_db_session()
+        try:
+            query = self._select(db, READING_FIELDS)
+            if meter_id is not None:
+                meter_key = self.keys.lookup(db.connection(), "meter_id", meter_id)
+                if meter_key is None:
+                    return
+                query = query.filter(EnergyReadingEntity.meter_key == meter_key)
+            query = query.order_by(EnergyReadingEntity.id.asc())
+            for row in stream_query(query, batch_size):
+                yield dict(zip(READING_FIELDS, row))
+        finally:
+            db.close()
+
+    def get_range(
+        self,
+        meter_id: str,
+        ts_from: int,
+        ts_to: int,
+        fields: Sequence[str],
+        after_ts: Optional[int] = None,
+        limit: int = 1000
+    ) -> KeysetPage[Dict[str, Any]]:
+        """
+        Implementación concreta: rango de lecturas de un medidor.
+        Usa el índice único (meter_key, timestamp): el rango y el orden salen
+        del índice, y solo se leen las columnas pedidas.
+        Se pide un elemento extra para saber si hay página siguiente.
+
+        Los meses archivados se leen del ReadingArchive y se combinan por
+        timestamp con lo que haya en la BD (lecturas tardías aún no
+        archivadas); ante un timestamp repetido gana la BD.
+        """
+        names = ["timestamp"] + [name for name in fields if name != "timestamp"]
+        db = self._get_db_session()
+        try:
+            meter_key = self.keys.lookup(db.connection(), "meter_id", meter_id)
+            if meter_key is None:
+                return KeysetPage(items=[], next_key=None)
+            query = self._select(db, names).filter(
+                EnergyReadingEntity.meter_key == meter_key,
+                EnergyReadingEntity.timestamp >= ts_from,
+                EnergyReadingEntity.timestamp < ts_to
+            )
+            if after_ts is not None:
+                query = query.filter(EnergyReadingEntity.timestamp > after_ts)
+            rows = query.order_by(EnergyReadingEntity.timestamp.asc()).limit(limit + 1).all()
+            found = [dict(zip(names, row)) for row in rows]
+
+            if self.archive is not None:
+                archived = self._archived_range(
+                    db.connection(), meter_id, meter_key, names, ts_from, ts_to, after_ts, limit + 1
+                )
+                if archived:
+                    found = self._merge_by_timestamp(found, archived, limit + 1)
+
+            items = found[:limit]
+            next_key = items[-1]["timestamp"] if len(found) > limit else None
+            return KeysetPage(items=items, next_key=next_key)
+        except Exception as e:
+            raise Exception(f"Error al obtener lecturas del medidor {meter_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def _archived_range(
+        self,
+        conn,
+        meter_id: str,
+        meter_key: int,
+        names: List[str],
+        ts_from: int,
+        ts_to: int,
+        after_ts: Optional[int],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Lecturas archivadas del rango con los campos lógicos pedidos"""
+        columns = [ARCHIVE_FIELD_COLUMNS[name] for name in names if name != "meter_id"]
+        rows = self.archive.read_range(meter_key, ts_from, ts_to, columns, after_ts=after_ts, limit=limit)
+        if not rows:
+            return rows
+        decoded = {
+            column: self.keys.names(conn, field, {row[column] for row in rows})
+            for field, column in (("operation", "operation_id"), ("subject", "subject_id")) if field in names
+        }
+        items = []
+        for row in rows:
+            item = {}
+            for name in names:
+                if name == "meter_id":
+                    item[name] = meter_id
+                    continue
+                column = ARCHIVE_FIELD_COLUMNS[name]
+                item[name] = decoded[column][row[column]] if column in decoded else row[column]
+            items.append(item)
+        return items
+
+    @staticmethod
+    def _merge_by_timestamp(first: List[Dict[str, Any]], second: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Combina dos listas ordenadas por timestamp sin repetir timestamps (gana first)"""
+        merged: List[Dict[str, Any]] = []
+        for item in heapq.merge(first, second, key=lambda item: item["timestamp"]):
+            if merged and merged[-1]["timestamp"] == item["timestamp"]:
+                continue
+            merged.append(item)
+            if len(merged) == limit:
+                break
+        return merged
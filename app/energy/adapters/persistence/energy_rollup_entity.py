@@ -0,0 +1,66 @@
+from sqlalchemy import Column, Integer, String, Float, BigInteger
+from app.shared.infrastructure.db import Base
+
+
+class EnergyRollupEntity(Base):
+    """
+    Entidad de base de datos para los agregados por medidor y bucket de tiempo.
+
+    Una fila por (meter_id, granularity, bucket_start), con granularity en
+    15m, 1h, 1d o 1mo. Se mantiene al ingerir lecturas: cada lote recalcula
+    solo los buckets que tocó. La clave primaria es también el índice de las
+    consultas por rango de un medidor.
+
+    Por cada medición de STAT_FIELDS se guardan mínimo, máximo y suma (el
+    promedio es suma / sample_count); por cada contador de energía, el menor
+    y el mayor valor del registro en el bucket, y la suma de sus deltas.
+    """
+    __tablename__ = "energy_rollups"
+    __table_args__ = {'extend_existing': True}
+
+    meter_id = Column(String(100), primary_key=True)
+    granularity = Column(String(3), primary_key=True)
+    bucket_start = Column(BigInteger, primary_key=True, autoincrement=False)  # ms, inicio del bucket
+
+    sample_count = Column(Integer, nullable=False)
+
+    # Voltaje (voltage)
+    voltage_a_min = Column(Float, nullable=True)
+    voltage_a_max = Column(Float, nullable=True)
+    voltage_a_sum = Column(Float, nullable=True)
+    voltage_b_min = Column(Float, nullable=True)
+    voltage_b_max = Column(Float, nullable=True)
+    voltage_b_sum = Column(Float, nullable=True)
+    voltage_c_min = Column(Float, nullable=True)
+    voltage_c_max = Column(Float, nullable=True)
+    voltage_c_sum = Column(Float, nullable=True)
+
+    # Corriente (current)
+    current_a_min = Column(Float, nullable=True)
+    current_a_max = Column(Float, nullable=True)
+    current_a_sum = Column(Float, nullable=True)
+    current_b_min = Column(Float, nullable=True)
+    current_b_max = Column(Float, nullable=True)
+    current_b_sum = Column(Float, nullable=True)
+    current_c_min = Column(Float, nullable=True)
+    current_c_max = Column(Float, nullable=True)
+    current_c_sum = Column(Float, nullable=True)
+
+    # Contadores de energía (energy): rango del registro en el bucket
+    energy_ai_min = Column(Float, nullable=True)  # Active Import
+    energy_ai_max = Column(Float, nullable=True)
+    energy_ae_min = Column(Float, nullable=True)  # Active Export
+    energy_ae_max = Column(Float, nullable=True)
+    energy_ri_min = Column(Float, nullable=True)  # Reactive Import
+    energy_ri_max = Column(Float, nullable=True)
+    energy_re_min = Column(Float, nullable=True)  # Reactive Export
+    energy_re_max = Column(Float, nullable=True)
+
+    # Energía del bucket: suma de los deltas de sus lecturas
+    delta_ai_sum = Column(Float, nullable=True)
+    delta_ae_sum = Column(Float, nullable=True)
+    delta_ri_sum = Column(Float, nullable=True)
+    delta_re_sum = Column(Float, nullable=True)
+
+    def __repr__(self):
+        return f"<EnergyRollup(meter_id='{self.meter_id}', granularity='{self.granularity}', bucket_start={self.bucket_start})>"
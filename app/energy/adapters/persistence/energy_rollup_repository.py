@@ -0,0 +1,188 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session
+from app.energy.domain.ports.energy_rollup_repository_port import EnergyRollupRepositoryPort
+from app.energy.domain.models.energy_rollup import (
+    GRANULARITIES, STAT_FIELDS, COUNTER_FIELDS, ROLLUP_VALUE_COLUMNS
+)
+from app.energy.domain.models.energy_record import DELTA_FIELDS
+from app.energy.adapters.persistence.energy_rollup_entity import EnergyRollupEntity
+from app.energy.adapters.persistence.energy_record_entity import EnergyReadingEntity
+from app.energy.adapters.persistence.meter_entity import MeterEntity
+from app.energy.adapters.persistence.reading_keys import driver_placeholder
+from app.shared.infrastructure.db import get_db
+
+DIRTY_TABLE = "energy_rollup_dirty"
+KEY_COLUMNS = ("meter_id", "granularity", "bucket_start")
+ROLLUP_COLUMNS = KEY_COLUMNS + ROLLUP_VALUE_COLUMNS
+
+
+def _aggregates_from_readings() -> List[str]:
+    """Agregados de un bucket de 15m calculados sobre energy_readings (alias r)"""
+    exprs = ["COUNT(*)"]
+    for name in STAT_FIELDS:
+        exprs += [f"MIN(r.{name})", f"MAX(r.{name})", f"SUM(r.{name})"]
+    for name in COUNTER_FIELDS:
+        exprs += [f"MIN(r.{name})", f"MAX(r.{name})"]
+    exprs += [f"SUM(r.{name})" for name in DELTA_FIELDS]
+    return exprs
+
+
+def _aggregates_from_rollups() -> List[str]:
+    """Agregados de un bucket calculados sobre los rollups más finos (alias s)"""
+    exprs = ["SUM(s.sample_count)"]
+    for column in ROLLUP_VALUE_COLUMNS[1:]:
+        function = {"min": "MIN", "max": "MAX", "sum": "SUM"}[column.rsplit("_", 1)[1]]
+        exprs.append(f"{function}(s.{column})")
+    return exprs
+
+
+class EnergyRollupRepositorySQL(EnergyRollupRepositoryPort):
+    """
+    Implementación concreta del EnergyRollupRepositoryPort usando SQLAlchemy.
+
+    Los buckets afectados por un lote se cargan en una tabla temporal
+    (energy_rollup_dirty, una por conexión) y cada granularidad se recalcula
+    con una sola sentencia INSERT ... SELECT ... GROUP BY con upsert:
+    15m desde energy_readings, 1h desde 15m, 1d desde 1h y 1mo desde 1d.
+    Cada nivel lee pocas filas sin importar el tamaño del histórico.
+    """
+
+    def __init__(self):
+        # Las sentencias dependen del dialecto; se arman en el primer uso
+        self._statements = None
+
+    def _get_db_session(self) -> Session:
+        """
+        Obtiene una sesión de base de datos.
+        Helper privado para obtener la sesión de DB.
+        """
+        db_generator = get_db()
+        return next(db_generator)
+
+    def _upsert_clause(self, dialect) -> str:
+        """ON DUPLICATE KEY UPDATE en MySQL, ON CONFLICT ... DO UPDATE en SQLite/PostgreSQL"""
+        if dialect.name == "mysql":
+            return "ON DUPLICATE KEY UPDATE " + ", ".join(
+                f"{column} = VALUES({column})" for column in ROLLUP_VALUE_COLUMNS
+            )
+        return f"ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET " + ", ".join(
+            f"{column} = excluded.{column}" for column in ROLLUP_VALUE_COLUMNS
+        )
+
+    def _get_statements(self, dialect) -> Dict[str, Any]:
+        """Sentencias de la tabla temporal y de recálculo de cada granularidad"""
+        if self._statements is None:
+            placeholder = driver_placeholder(dialect)
+            table = EnergyRollupEntity.__tablename__
+            readings = EnergyReadingEntity.__tablename__
+            meters = MeterEntity.__tablename__
+            insert = f"INSERT INTO {table} ({', '.join(ROLLUP_COLUMNS)}) "
+            upsert = self._upsert_clause(dialect)
+            group = "GROUP BY d.meter_id, d.granularity, d.bucket_start "
+
+            levels = []
+            for index, granularity in enumerate(GRANULARITIES):
+                if index == 0:
+                    source = (
+                        f"FROM {DIRTY_TABLE} d JOIN {meters} m ON m.meter_id = d.meter_id "
+                        f"JOIN {readings} r ON r.meter_key = m.id "
+                        "AND r.timestamp >= d.bucket_start AND r.timestamp < d.bucket_end "
+                    )
+                    aggregates = _aggregates_from_readings()
+                else:
+                    source = (
+                        f"FROM {DIRTY_TABLE} d JOIN {table} s ON s.meter_id = d.meter_id "
+                        f"AND s.granularity = '{GRANULARITIES[index - 1]}' "
+                        "AND s.bucket_start >= d.bucket_start AND s.bucket_start < d.bucket_end "
+                    )
+                    aggregates = _aggregates_from_rollups()
+                levels.append(
+                    insert
+                    + f"SELECT d.meter_id, d.granularity, d.bucket_start, {', '.join(aggregates)} "
+                    + source
+                    + f"WHERE d.granularity = '{granularity}' "
+                    + group
+                    + upsert
+                )
+
+            self._statements = {
+                "create": (
+                    f"CREATE TEMPORARY TABLE IF NOT EXISTS {DIRTY_TABLE} ("
+                    "meter_id VARCHAR(100) NOT NULL, granularity VARCHAR(3) NOT NULL, "
+                    "bucket_start BIGINT NOT NULL, bucket_end BIGINT NOT NULL)"
+                ),
+                "clear": f"DELETE FROM {DIRTY_TABLE}",
+                "mark": f"INSERT INTO {DIRTY_TABLE} (meter_id, granularity, bucket_start, bucket_end) "
+                        f"VALUES ({', '.join([placeholder] * 4)})",
+                "levels": levels,
+            }
+        return self._statements
+
+    def refresh(self, buckets: Sequence[Tuple[str, str, int, int]]) -> int:
+        """
+        Implementación concreta: marca los buckets en la tabla temporal y
+        recalcula cada granularidad, de la más fina a la más gruesa, en una
+        sola transacción.
+        """
+        if not buckets:
+            return 0
+        db = self._get_db_session()
+        try:
+            conn = db.connection()
+            statements = self._get_statements(conn.dialect)
+            conn.exec_driver_sql(statements["create"])
+            conn.exec_driver_sql(statements["clear"])
+            conn.exec_driver_sql(statements["mark"], list(buckets))
+            for statement in statements["levels"]:
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql(statements["clear"])
+            db.commit()
+            return len(buckets)
+
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error al actualizar rollups de energía: {str(e)}")
+        finally:
+            db.close()
+
+    def _columns(self):
+        """bucket_start y columnas de valores, en el orden de ROLLUP_VALUE_COLUMNS"""
+        return [EnergyRollupEntity.bucket_start] + [getattr(EnergyRollupEntity, name) for name in ROLLUP_VALUE_COLUMNS]
+
+    def get_rollups(self, meter_id: str, granularity: str, ts_from: int, ts_to: int) -> List[Dict[str, Any]]:
+        """
+        Implementación concreta: rango de rollups sobre la clave primaria
+        (meter_id, granularity, bucket_start).
+        """
+        names = ("bucket_start",) + ROLLUP_VALUE_COLUMNS
+        db = self._get_db_session()
+        try:
+            rows = db.query(*self._columns()).filter(
+                EnergyRollupEntity.meter_id == meter_id,
+                EnergyRollupEntity.granularity == granularity,
+                EnergyRollupEntity.bucket_start >= ts_from,
+                EnergyRollupEntity.bucket_start < ts_to
+            ).order_by(EnergyRollupEntity.bucket_start.asc()).all()
+            return [dict(zip(names, row)) for row in rows]
+        except Exception as e:
+            raise Exception(f"Error al obtener rollups del medidor {meter_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def get_previous(self, meter_id: str, granularity: str, before: int) -> Optional[Dict[str, Any]]:
+        """
+        Implementación concreta: último rollup anterior a `before`.
+        """
+        names = ("bucket_start",) + ROLLUP_VALUE_COLUMNS
+        db = self._get_db_session()
+        try:
+            row = db.query(*self._columns()).filter(
+                EnergyRollupEntity.meter_id == meter_id,
+                EnergyRollupEntity.granularity == granularity,
+                EnergyRollupEntity.bucket_start < before
+            ).order_by(EnergyRollupEntity.bucket_start.desc()).first()
+            return dict(zip(names, row)) if row is not None else None
+        except Exception as e:
+            raise Exception(f"Error al obtener rollups del medidor {meter_id}: {str(e)}")
+        finally:
+            db.close()
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.shared.infrastructure.db import Base
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+bogota_tz = ZoneInfo("America/Bogota")
+
+
+def bogota_now():
+    return datetime.now(bogota_tz)
+
+
+class MeterEntity(Base):
+    """
+    Entidad de base de datos para medidores.
+
+    Diccionario del meter_id externo (el que llega en las lecturas) a una
+    clave entera: energy_readings guarda solo meter_key, así cada fila y la
+    clave única (meter_key, timestamp) ocupan unos pocos bytes en lugar de
+    un VARCHAR(100) repetido por lectura.
+    """
+    __tablename__ = "meters"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    meter_id = Column(String(100), nullable=False, unique=True)
+    created_at = Column(DateTime(timezone=True), default=bogota_now)
+
+    def __repr__(self):
+        return f"<Meter(id={self.id}, meter_id='{self.meter_id}')>"
@@ -0,0 +1,277 @@
+import copy
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from app.energy.domain.models.energy_record import READING_COLUMNS, DELTA_FIELDS
+from app.energy.domain.models.reading_retention import month_label, month_starts
+
+# Columnas de energy_readings que se archivan, con su tipo numpy.
+# Las mediciones nulas se guardan como NaN y created_at como µs de la hora
+# de pared que retorna la BD (sin zona).
+ARCHIVE_DTYPE = np.dtype(
+    [("id", "i8"), ("operation_id", "i2"), ("subject_id", "i2"), ("meter_key", "i4"),
+     ("timestamp", "i8"), ("flag", "i4")]
+    + [(name, "f8") for name in READING_COLUMNS[READING_COLUMNS.index("flag") + 1:-1] + DELTA_FIELDS]
+    + [("created_at", "i8")]
+)
+ARCHIVE_COLUMNS = ARCHIVE_DTYPE.names
+_FLOAT_COLUMNS = frozenset(name for name in ARCHIVE_COLUMNS if ARCHIVE_DTYPE[name].kind == "f")
+_CREATED_AT_INDEX = ARCHIVE_COLUMNS.index("created_at")
+
+MANIFEST_NAME = "manifest.json"
+
+
+_WALL_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _wall_us(value: datetime) -> int:
+    """µs de la hora de pared de value (la zona, si tiene, se descarta)"""
+    return (value.replace(tzinfo=None) - _WALL_EPOCH) // _MICROSECOND
+
+
+def _to_records(rows: Sequence[tuple]) -> np.ndarray:
+    """Filas de la BD (en el orden de ARCHIVE_COLUMNS) → arreglo estructurado"""
+    nan = float("nan")
+    return np.array([
+        tuple(nan if value is None else value for value in row[:_CREATED_AT_INDEX]) + (_wall_us(row[_CREATED_AT_INDEX]),)
+        for row in rows
+    ], dtype=ARCHIVE_DTYPE)
+
+
+@lru_cache(maxsize=8)
+def _load_shard(path: str, mtime_ns: int) -> Dict[str, np.ndarray]:
+    """
+    Columnas de un shard ya descomprimidas. La caché evita descomprimir el
+    mismo shard en cada página de una consulta; mtime_ns la invalida si el
+    shard se reescribe. Los shards escritos antes de que existieran los
+    deltas no los tienen: se leen como nulos (NaN).
+    """
+    with np.load(path) as data:
+        rows = len(data["timestamp"])
+        return {
+            name: data[name] if name in data.files else np.full(rows, np.nan, dtype=ARCHIVE_DTYPE[name])
+            for name in ARCHIVE_COLUMNS
+        }
+
+
+class ReadingArchive:
+    """
+    Almacén en disco de los meses de energy_readings que salieron de la BD.
+
+    Formato (columnar, comprimido):
+        <directorio>/manifest.json          meses archivados y número de filas
+        <directorio>/YYYY-MM/shard-NN.npz   una columna por arreglo (np.savez_compressed)
+
+    Las lecturas de un mes se reparten en shards por meter_key % shards y
+    cada shard queda ordenado por (meter_key, timestamp): el rango de un
+    medidor se ubica con búsqueda binaria y solo se descomprime un shard
+    por mes consultado.
+
+    Archivar un mes ya archivado combina las lecturas nuevas con las que
+    ya estaban (lecturas tardías); se conserva la primera de cada
+    (meter_key, timestamp). Los shards y el manifest se escriben en un
+    archivo temporal y se renombran, así un fallo a mitad no deja archivos
+    a medias.
+    """
+
+    def __init__(self, directory: str, shards: int = 16):
+        """
+        Args:
+            directory: Directorio del archivo (se crea si no existe)
+            shards: Shards por mes; si el archivo ya existe manda el del manifest
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._manifest = None
+        manifest = self._read_manifest()
+        self.shards = manifest.get("shards", shards)
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """Manifest del disco; se relee solo si cambió (lo reescribe otro worker)"""
+        path = self._manifest_path()
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        cached = self._manifest
+        if cached is None or cached[0] != mtime_ns:
+            with open(path, encoding="utf-8") as f:
+                cached = self._manifest = (mtime_ns, json.load(f))
+        return copy.deepcopy(cached[1])
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        path = self._manifest_path()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def _shard_path(self, label: str, shard: int) -> str:
+        return os.path.join(self.directory, label, f"shard-{shard:02d}.npz")
+
+    def months(self) -> Dict[str, Dict[str, Any]]:
+        """Meses archivados: etiqueta → {start, end, rows, archived_at}"""
+        return self._read_manifest().get("months", {})
+
+    def write_month(self, start: int, end: int, batches: Iterable[Sequence[tuple]]) -> int:
+        """
+        Archiva las lecturas de un mes.
+
+        Las filas llegan por lotes y se van volcando sin comprimir a un
+        archivo temporal por shard; al final cada shard se ordena, se combina
+        con lo ya archivado y se guarda comprimido. La memoria queda acotada
+        por el tamaño de un shard, no por el del mes.
+
+        Args:
+            start: Inicio del mes (ms)
+            end: Fin del mes (ms, exclusivo)
+            batches: Lotes de filas en el orden de ARCHIVE_COLUMNS
+
+        Returns:
+            int: Filas recibidas en batches
+        """
+        label = month_label(start)
+        staging = os.path.join(self.directory, label, ".staging")
+        os.makedirs(staging, exist_ok=True)
+        received = 0
+        touched = set()
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                records = _to_records(batch)
+                received += len(records)
+                shard_of = records["meter_key"] % self.shards
+                for shard in np.unique(shard_of):
+                    with open(os.path.join(staging, f"{shard:02d}.bin"), "ab") as f:
+                        records[shard_of == shard].tofile(f)
+                    touched.add(int(shard))
+
+            with self._lock:
+                for shard in sorted(touched):
+                    self._merge_shard(label, shard, np.fromfile(os.path.join(staging, f"{shard:02d}.bin"), dtype=ARCHIVE_DTYPE))
+                manifest = self._read_manifest()
+                manifest["shards"] = self.shards
+                months = manifest.setdefault("months", {})
+                rows = sum(self._shard_rows(label, shard) for shard in range(self.shards))
+                months[label] = {
+                    "start": start,
+                    "end": end,
+                    "rows": rows,
+                    "archived_at": datetime.now(timezone.utc).isoformat(),
+                }
+                self._write_manifest(manifest)
+            return received
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _shard_rows(self, label: str, shard: int) -> int:
+        path = self._shard_path(label, shard)
+        if not os.path.exists(path):
+            return 0
+        return len(_load_shard(path, os.stat(path).st_mtime_ns)["timestamp"])
+
+    def _merge_shard(self, label: str, shard: int, records: np.ndarray):
+        """Combina records con el shard existente, ordena, descarta repetidos y reescribe"""
+        path = self._shard_path(label, shard)
+        if os.path.exists(path):
+            current = _load_shard(path, os.stat(path).st_mtime_ns)
+            existing = np.empty(len(current["timestamp"]), dtype=ARCHIVE_DTYPE)
+            for name in ARCHIVE_COLUMNS:
+                existing[name] = current[name]
+            records = np.concatenate([existing, records])
+        # lexsort es estable: ante claves repetidas queda primero lo ya archivado
+        records = records[np.lexsort((records["timestamp"], records["meter_key"]))]
+        if len(records) > 1:
+            keep = np.ones(len(records), dtype=bool)
+            keep[1:] = (records["meter_key"][1:] != records["meter_key"][:-1]) | (
+                records["timestamp"][1:] != records["timestamp"][:-1]
+            )
+            records = records[keep]
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(f, **{name: records[name] for name in ARCHIVE_COLUMNS})
+        os.replace(path + ".tmp", path)
+
+    def read_range(
+        self,
+        meter_key: int,
+        ts_from: int,
+        ts_to: int,
+        columns: Sequence[str],
+        after_ts: Optional[int] = None,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        Lecturas archivadas de un medidor en [ts_from, ts_to) con timestamp
+        mayor a after_ts, ordenadas por timestamp, hasta limit.
+
+        Args:
+            columns: Columnas de ARCHIVE_COLUMNS a retornar
+
+        Returns:
+            Filas como dicts con tipos de Python (NaN → None, created_at → datetime)
+        """
+        months = {info["start"]: label for label, info in self.months().items()}
+        if after_ts is not None:
+            ts_from = max(ts_from, after_ts + 1)
+        items: List[Dict[str, Any]] = []
+        shard = meter_key % self.shards
+        for start in month_starts(ts_from, ts_to) if ts_from < ts_to else []:
+            label = months.get(start)
+            if label is None:
+                continue
+            path = self._shard_path(label, shard)
+            if not os.path.exists(path):
+                continue
+            data = _load_shard(path, os.stat(path).st_mtime_ns)
+            lo, hi = np.searchsorted(data["meter_key"], [meter_key, meter_key + 1])
+            timestamps = data["timestamp"][lo:hi]
+            first, last = np.searchsorted(timestamps, [ts_from, ts_to])
+            last = min(last, first + limit - len(items))
+            if first >= last:
+                continue
+            values = {name: self._column_values(name, data[name][lo + first:lo + last]) for name in columns}
+            items.extend(dict(zip(columns, row)) for row in zip(*(values[name] for name in columns)))
+            if len(items) >= limit:
+                break
+        return items
+
+    @staticmethod
+    def _column_values(name: str, column: np.ndarray) -> List[Any]:
+        if name in _FLOAT_COLUMNS:
+            return [None if value != value else value for value in column.tolist()]
+        if name == "created_at":
+            return [_WALL_EPOCH + value * _MICROSECOND for value in column.tolist()]
+        return column.tolist()
+
+    def status(self) -> Dict[str, Any]:
+        """Meses archivados, filas y bytes en disco"""
+        months = self.months()
+        size = 0
+        for label in months:
+            month_dir = os.path.join(self.directory, label)
+            if os.path.isdir(month_dir):
+                size += sum(entry.stat().st_size for entry in os.scandir(month_dir) if entry.is_file())
+        return {
+            "archive_dir": self.directory,
+            "archive_shards": self.shards,
+            "archived_months": sorted(months),
+            "archived_rows": sum(info["rows"] for info in months.values()),
+            "archive_bytes": size,
+        }
+
+
+def archive_settings() -> Dict[str, Any]:
+    """Parámetros del archivo desde variables de entorno"""
+    return {
+        "directory": os.getenv("ENERGY_ARCHIVE_DIR", "data/energy_archive"),
+        "shards": int(os.getenv("ENERGY_ARCHIVE_SHARDS", "16")),
+    }
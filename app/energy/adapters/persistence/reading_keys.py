@@ -0,0 +1,160 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.energy.adapters.persistence.meter_entity import MeterEntity, bogota_now
+from app.energy.adapters.persistence.reading_operation_entity import ReadingOperationEntity
+from app.energy.adapters.persistence.reading_subject_entity import ReadingSubjectEntity
+
+# Campo lógico de la lectura → (tabla diccionario, columna con el texto)
+LOOKUP_TABLES = {
+    "meter_id": (MeterEntity.__tablename__, "meter_id"),
+    "operation": (ReadingOperationEntity.__tablename__, "name"),
+    "subject": (ReadingSubjectEntity.__tablename__, "name"),
+}
+
+# Diccionarios que registran cuándo se creó cada valor (hora de Bogotá)
+STAMPED_LOOKUPS = ("meter_id",)
+
+# Parámetros por SELECT ... IN (...) al buscar claves
+LOOKUP_CHUNK_SIZE = 500
+
+
+def driver_placeholder(dialect) -> str:
+    """Placeholder de parámetros del driver para exec_driver_sql (%s en pymysql, ? en sqlite)"""
+    placeholder = {"qmark": "?", "format": "%s", "pyformat": "%s"}.get(dialect.paramstyle)
+    if placeholder is None:
+        raise RuntimeError(f"paramstyle no soportado: {dialect.paramstyle}")
+    return placeholder
+
+
+def insert_sql(dialect, table: str, columns: Iterable[str]) -> str:
+    """INSERT con los placeholders del driver"""
+    columns = list(columns)
+    values = ", ".join([driver_placeholder(dialect)] * len(columns))
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})"
+
+
+def insert_ignore_sql(dialect, table: str, columns: Iterable[str], key_column: str = "id") -> str:
+    """
+    INSERT que ignora solo las filas con clave única repetida, con los
+    placeholders del driver: ON DUPLICATE KEY UPDATE key_column = key_column
+    en MySQL (una asignación que no cambia nada) y ON CONFLICT DO NOTHING
+    en el resto. INSERT IGNORE (MySQL) e INSERT OR IGNORE (SQLite) no sirven:
+    también convierten en advertencias o ignoran valores truncados, fuera
+    de rango o nulos en columnas NOT NULL.
+
+    En MySQL el rowcount cuenta también las filas repetidas (SQLAlchemy
+    conecta con CLIENT_FOUND_ROWS); en el resto cuenta solo las insertadas.
+    """
+    sql = insert_sql(dialect, table, columns)
+    if dialect.name == "mysql":
+        return f"{sql} ON DUPLICATE KEY UPDATE {key_column} = {key_column}"
+    return f"{sql} ON CONFLICT DO NOTHING"
+
+
+class ReadingKeyResolver:
+    """
+    Caché en memoria de las claves enteras de meters, reading_operations y
+    reading_subjects.
+
+    Solo guarda claves ya confirmadas en la BD: las que se crean dentro de
+    una transacción se registran con remember() después del commit, para
+    que un rollback no deje en la caché claves que no existen.
+    Es segura entre hilos.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, Dict[str, int]] = {field: {} for field in LOOKUP_TABLES}
+        self._names: Dict[str, Dict[int, str]] = {field: {} for field in LOOKUP_TABLES}
+        self._lock = threading.Lock()
+
+    def _select(self, conn, field: str, names: list) -> Dict[str, int]:
+        """Claves existentes de names"""
+        table, column = LOOKUP_TABLES[field]
+        placeholder = driver_placeholder(conn.dialect)
+        found = {}
+        for start in range(0, len(names), LOOKUP_CHUNK_SIZE):
+            chunk = names[start:start + LOOKUP_CHUNK_SIZE]
+            rows = conn.exec_driver_sql(
+                f"SELECT id, {column} FROM {table} WHERE {column} IN ({', '.join([placeholder] * len(chunk))})",
+                tuple(chunk)
+            )
+            found.update({name: key for key, name in rows})
+        return found
+
+    def ensure(self, conn, field: str, names: Iterable[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Claves de names, creando en la transacción de conn las que falten.
+
+        Returns:
+            (claves de todos los names, claves obtenidas de la BD para remember tras el commit)
+        """
+        keys = self._keys[field]
+        wanted = set(names)
+        missing = [name for name in wanted if name not in keys]
+        if not missing:
+            return keys, {}
+        table, column = LOOKUP_TABLES[field]
+        if field in STAMPED_LOOKUPS:
+            now = bogota_now()
+            conn.exec_driver_sql(
+                insert_ignore_sql(conn.dialect, table, (column, "created_at")), [(name, now) for name in missing]
+            )
+        else:
+            conn.exec_driver_sql(insert_ignore_sql(conn.dialect, table, (column,)), [(name,) for name in missing])
+        fetched = self._select(conn, field, missing)
+        return {**{name: keys[name] for name in wanted if name in keys}, **fetched}, fetched
+
+    def remember(self, field: str, fetched: Dict[str, int]):
+        """Registra claves ya confirmadas"""
+        if fetched:
+            with self._lock:
+                self._keys[field].update(fetched)
+
+    def lookup(self, conn, field: str, name: str) -> Optional[int]:
+        """Clave de un valor existente, sin crearlo (None si no existe)"""
+        key = self._keys[field].get(name)
+        if key is None:
+            key = self._select(conn, field, [name]).get(name)
+            if key is not None:
+                self.remember(field, {name: key})
+        return key
+
+    def cached(self, field: str, names: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """Claves de names que ya están en la caché y los que faltan, sin ir a la BD"""
+        keys = self._keys[field]
+        found, missing = {}, []
+        for name in set(names):
+            key = keys.get(name)
+            if key is None:
+                missing.append(name)
+            else:
+                found[name] = key
+        return found, missing
+
+    def lookup_many(self, conn, field: str, names: Iterable[str]) -> Dict[str, int]:
+        """Claves de los valores existentes de names, sin crear los que falten"""
+        keys = self._keys[field]
+        wanted = set(names)
+        missing = [name for name in wanted if name not in keys]
+        fetched = self._select(conn, field, missing) if missing else {}
+        self.remember(field, fetched)
+        return {**{name: keys[name] for name in wanted if name in keys}, **fetched}
+
+    def names(self, conn, field: str, keys: Iterable[int]) -> Dict[int, str]:
+        """Textos de claves existentes (para decodificar lecturas leídas fuera de la BD)"""
+        names = self._names[field]
+        missing = [key for key in set(keys) if key not in names]
+        if missing:
+            table, column = LOOKUP_TABLES[field]
+            placeholder = driver_placeholder(conn.dialect)
+            found = {}
+            for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+                rows = conn.exec_driver_sql(
+                    f"SELECT id, {column} FROM {table} WHERE id IN ({', '.join([placeholder] * len(chunk))})",
+                    tuple(chunk)
+                )
+                found.update({key: name for key, name in rows})
+            with self._lock:
+                names.update(found)
+        return names
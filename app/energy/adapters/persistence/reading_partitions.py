@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from app.energy.domain.models.energy_rollup import bogota_tz, bucket_end
+from app.energy.domain.models.reading_retention import month_starts
+
+# Partición final que recibe lo que no cae en un mes creado por adelantado
+FUTURE_PARTITION = "p_future"
+
+
+def partition_name(start: int) -> str:
+    """Nombre de la partición del mes que empieza en start: pYYYYMM"""
+    return datetime.fromtimestamp(start / 1000, bogota_tz).strftime("p%Y%m")
+
+
+def partition_clause(first_month: int, until: int) -> str:
+    """
+    Cláusula PARTITION BY RANGE (timestamp) con un mes por partición desde
+    first_month hasta until (exclusivo) y la partición final p_future.
+    La primera partición recibe también todo lo anterior a first_month.
+    """
+    months = month_starts(first_month, until) or [first_month]
+    definitions = [
+        f"PARTITION {partition_name(start)} VALUES LESS THAN ({bucket_end(start, '1mo')})"
+        for start in months
+    ]
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return f"PARTITION BY RANGE (timestamp) ({', '.join(definitions)})"
+
+
+class ReadingPartitionManager:
+    """
+    Particiones mensuales de energy_readings en MySQL (RANGE sobre timestamp).
+
+    Las consultas por rango de un medidor solo tocan las particiones de los
+    meses pedidos, y retirar un mes viejo es un DROP PARTITION (instantáneo)
+    en lugar de un DELETE fila por fila.
+
+    Solo aplica a MySQL y a tablas ya particionadas (create_energy_table.py
+    convierte la tabla); en otro caso los métodos no hacen nada.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+
+    def partitions(self, conn) -> List[Tuple[str, Optional[int]]]:
+        """Particiones en orden: (nombre, límite superior exclusivo; None = MAXVALUE)"""
+        if conn.dialect.name != "mysql":
+            return []
+        rows = conn.execute(text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        ), {"table": self.table})
+        return [(name, None if bound == "MAXVALUE" else int(bound)) for name, bound in rows]
+
+    def create_ahead(self, conn, until: int) -> List[str]:
+        """
+        Crea las particiones mensuales que falten hasta until (exclusivo)
+        partiendo p_future (REORGANIZE PARTITION). p_future debería estar
+        vacía: las particiones se crean con meses de anticipación.
+
+        Returns:
+            List[str]: Particiones creadas
+        """
+        partitions = self.partitions(conn)
+        bounds = [bound for _, bound in partitions if bound is not None]
+        if not bounds or partitions[-1][0] != FUTURE_PARTITION or max(bounds) >= until:
+            return []
+        created = [(partition_name(start), bucket_end(start, "1mo")) for start in month_starts(max(bounds), until)]
+        definitions = [f"PARTITION {name} VALUES LESS THAN ({bound})" for name, bound in created]
+        definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+        conn.execute(text(
+            f"ALTER TABLE {self.table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+        ))
+        return [name for name, _ in created]
+
+    def drop_through(self, conn, until: int, expected_rows: int) -> List[str]:
+        """
+        Elimina las particiones cuyo límite superior es <= until, solo si
+        entre todas tienen exactamente expected_rows filas (las ya
+        archivadas). El conteo y el DROP se hacen con la tabla bloqueada
+        (LOCK TABLES ... WRITE): una lectura tardía no puede entrar entre
+        ambos y perderse con la partición. p_future nunca se elimina.
+
+        Args:
+            conn: Conexión fuera de una transacción (LOCK TABLES confirma la transacción en curso)
+
+        Returns:
+            List[str]: Particiones eliminadas (vacía si el conteo no coincide)
+        """
+        dropped = [name for name, bound in self.partitions(conn) if bound is not None and bound <= until]
+        if not dropped:
+            return []
+        conn.execute(text(f"LOCK TABLES {self.table} WRITE"))
+        try:
+            rows = conn.execute(text(f"SELECT COUNT(*) FROM {self.table} PARTITION ({', '.join(dropped)})")).scalar()
+            if rows != expected_rows:
+                return []
+            conn.execute(text(f"ALTER TABLE {self.table} DROP PARTITION {', '.join(dropped)}"))
+            return dropped
+        finally:
+            conn.execute(text("UNLOCK TABLES"))
@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select, text
+from app.energy.domain.ports.reading_storage_port import ReadingStoragePort
+from app.energy.domain.models.energy_rollup import bucket_end
+from app.energy.domain.models.reading_retention import month_label, month_starts
+from app.energy.adapters.persistence.energy_record_entity import EnergyReadingEntity
+from app.energy.adapters.persistence.reading_archive import ReadingArchive, ARCHIVE_COLUMNS
+from app.energy.adapters.persistence.reading_partitions import ReadingPartitionManager
+from app.shared.infrastructure.db import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Nombre del lock de MySQL (GET_LOCK) que serializa el mantenimiento entre workers
+MAINTENANCE_LOCK = "energy_readings_maintenance"
+
+
+class ReadingStorageSQL(ReadingStoragePort):
+    """
+    Implementación concreta del ReadingStoragePort sobre energy_readings.
+
+    Cada ciclo:
+    1. Crea las particiones mensuales que falten (MySQL particionado).
+    2. Por cada mes anterior al corte de retención, del más antiguo al más
+       reciente: toma el MAX(id) del mes, exporta al ReadingArchive sus
+       lecturas con id hasta ese, verifica que el número de filas
+       archivadas coincida con el de la BD y recién entonces las retira
+       (DROP PARTITION si la partición no tiene nada más, o DELETE por
+       bloques acotado a esos ids; ver _remove_month).
+
+    Si el conteo no coincide el mes no se retira y el ciclo se detiene; el
+    siguiente lo vuelve a archivar combinando con lo ya exportado. Las
+    lecturas tardías (llegadas durante la exportación o a un mes ya
+    retirado) nunca se borran sin archivar: quedan en la BD y se archivan
+    en el siguiente ciclo.
+    """
+
+    def __init__(self, archive: ReadingArchive, delete_chunk_size: Optional[int] = None, read_batch_size: int = 50_000):
+        """
+        Args:
+            archive: Archivo de meses retirados
+            delete_chunk_size: Filas por DELETE cuando la tabla no está particionada
+            read_batch_size: Filas por lote al exportar un mes
+        """
+        self.archive = archive
+        self.table = EnergyReadingEntity.__tablename__
+        self.partitions = ReadingPartitionManager(self.table)
+        self.delete_chunk_size = delete_chunk_size or int(os.getenv("ENERGY_ARCHIVE_DELETE_CHUNK_SIZE", "10000"))
+        self.read_batch_size = read_batch_size
+        self._local_lock = threading.Lock()
+
+    def _acquire(self, conn) -> bool:
+        """Lock entre workers (GET_LOCK en MySQL; en el resto, solo dentro del proceso)"""
+        if conn.dialect.name == "mysql":
+            return conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": MAINTENANCE_LOCK}).scalar() == 1
+        return self._local_lock.acquire(blocking=False)
+
+    def _release(self, conn):
+        if conn.dialect.name == "mysql":
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MAINTENANCE_LOCK})
+        else:
+            self._local_lock.release()
+
+    def _snapshot(self, engine, start: int, end: int) -> Tuple[int, int]:
+        """(MAX(id), COUNT(*)) de las lecturas de [start, end): el id acota lo que se archiva"""
+        with engine.connect() as conn:
+            max_id, count = conn.execute(
+                text(f"SELECT COALESCE(MAX(id), 0), COUNT(*) FROM {self.table} WHERE timestamp >= :start AND timestamp < :end"),
+                {"start": start, "end": end}
+            ).one()
+        return max_id, count
+
+    def _count(self, engine, start: int, end: int, max_id: int) -> int:
+        with engine.connect() as conn:
+            return conn.execute(
+                text(
+                    f"SELECT COUNT(*) FROM {self.table} "
+                    "WHERE timestamp >= :start AND timestamp < :end AND id <= :max_id"
+                ),
+                {"start": start, "end": end, "max_id": max_id}
+            ).scalar()
+
+    def _iter_month(self, engine, start: int, end: int, max_id: int) -> Iterator[List[tuple]]:
+        """Lecturas de [start, end) con id <= max_id por lotes, con cursor del servidor"""
+        table = EnergyReadingEntity.__table__
+        query = select(*[table.c[name] for name in ARCHIVE_COLUMNS]).where(
+            table.c.timestamp >= start, table.c.timestamp < end, table.c.id <= max_id
+        )
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(query)
+            while True:
+                batch = result.fetchmany(self.read_batch_size)
+                if not batch:
+                    return
+                yield [tuple(row) for row in batch]
+
+    def _remove_month(self, engine, start: int, end: int, max_id: int, archived: int) -> List[str]:
+        """
+        Retira de la BD las lecturas ya archivadas de [start, end) (id <=
+        max_id). Si las particiones hasta end tienen exactamente esas filas
+        (conteo con la tabla bloqueada) se eliminan con DROP PARTITION; si
+        no (llegaron lecturas tardías, o la tabla no está particionada) se
+        borran con DELETE por bloques acotado a los ids archivados: las
+        tardías quedan para el siguiente ciclo.
+        """
+        with engine.connect() as conn:
+            dropped = self.partitions.drop_through(conn, end, archived)
+        if dropped:
+            return dropped
+        where = "timestamp >= :start AND timestamp < :end AND id <= :max_id"
+        if engine.dialect.name == "mysql":
+            sql = f"DELETE FROM {self.table} WHERE {where} LIMIT {self.delete_chunk_size}"
+        else:
+            sql = (
+                f"DELETE FROM {self.table} WHERE id IN "
+                f"(SELECT id FROM {self.table} WHERE {where} LIMIT {self.delete_chunk_size})"
+            )
+        params = {"start": start, "end": end, "max_id": max_id}
+        # Un DELETE por transacción para no bloquear la tabla ni inflar el undo log
+        while True:
+            with engine.begin() as conn:
+                if conn.execute(text(sql), params).rowcount < self.delete_chunk_size:
+                    return dropped
+
+    def _archive_before(self, engine, cutoff: int) -> Tuple[List[str], int]:
+        with engine.connect() as conn:
+            oldest = conn.execute(text(f"SELECT MIN(timestamp) FROM {self.table}")).scalar()
+        archived: List[str] = []
+        removed = 0
+        if oldest is None or oldest >= cutoff:
+            return archived, removed
+        for start in month_starts(oldest, cutoff):
+            end = bucket_end(start, "1mo")
+            max_id, expected = self._snapshot(engine, start, end)
+            if expected:
+                exported = self.archive.write_month(start, end, self._iter_month(engine, start, end, max_id))
+                if exported != expected or self._count(engine, start, end, max_id) != expected:
+                    logger.warning(
+                        "Mes %s: %s lecturas archivadas de %s; no se retira de la BD en este ciclo",
+                        month_label(start), exported, expected
+                    )
+                    break
+                archived.append(month_label(start))
+                removed += expected
+            self._remove_month(engine, start, end, max_id, expected)
+        return archived, removed
+
+    def maintain(self, partitions_until: int, archive_before: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Implementación concreta: ver docstring de la clase. Si otro worker
+        tiene el lock, retorna sin hacer nada (skipped).
+        """
+        engine = get_engine()
+        with engine.connect() as lock_conn:
+            if not self._acquire(lock_conn):
+                return {"skipped": True, "created_partitions": [], "archived_months": [], "removed_rows": 0}
+            try:
+                with engine.begin() as conn:
+                    created = self.partitions.create_ahead(conn, partitions_until)
+                archived, removed = [], 0
+                if archive_before is not None:
+                    archived, removed = self._archive_before(engine, archive_before)
+                return {
+                    "skipped": False,
+                    "created_partitions": created,
+                    "archived_months": archived,
+                    "removed_rows": removed,
+                }
+            finally:
+                self._release(lock_conn)
+
+    def status(self) -> Dict[str, Any]:
+        """Implementación concreta: particiones de energy_readings y estado del archivo"""
+        with get_engine().connect() as conn:
+            partitions = [name for name, _ in self.partitions.partitions(conn)]
+        return {"partitions": partitions, **self.archive.status()}
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, SmallInteger, String
+from app.shared.infrastructure.db import Base
+
+
+class ReadingSubjectEntity(Base):
+    """
+    Catálogo de valores de `subject` de las lecturas (p. ej. onDemand).
+    energy_readings guarda solo subject_id.
+    """
+    __tablename__ = "reading_subjects"
+    __table_args__ = {'extend_existing': True}
+
+    # SQLite solo autoincrementa claves INTEGER
+    id = Column(SmallInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    name = Column(String(100), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<ReadingSubject(id={self.id}, name='{self.name}')>"
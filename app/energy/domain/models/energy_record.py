@@ -1,6 +1,9 @@
 from pydantic import BaseModel
 from typing import Optional, Dict, List
 from datetime import datetime
+from zoneinfo import ZoneInfo
+
+bogota_tz = ZoneInfo("America/Bogota")
 
 
 class VoltageData(BaseModel):
@@ -62,5 +65,57 @@ class EnergyRecord(BaseModel):
     meter_readings: List[MeterReadings]
     created_at: Optional[datetime] = None
 
+    def to_rows(self) -> List[tuple]:
+        """
+        Aplana el registro en una tupla por lectura, en el orden de READING_COLUMNS.
+        """
+        created_at = self.created_at or datetime.now(bogota_tz)
+        operation, subject = self.operation, self.subject
+        rows = []
+        for meter_reading in self.meter_readings:
+            meter_id = meter_reading.meter_id
+            for r in meter_reading.readings:
+                voltage, current, power, energy = r.voltage, r.current, r.power, r.energy
+                rows.append((
+                    operation, subject, meter_id, r.ts, r.flag,
+                    voltage.a, voltage.b, voltage.c,
+                    current.a, current.b, current.c,
+                    power.ai, power.ae, power.ri, power.re,
+                    energy.ai, energy.ae, energy.ri, energy.re,
+                    created_at,
+                ))
+        return rows
+
     class Config:
         from_attributes = True
+
+
+# Campos de una lectura en forma plana (una fila por lectura), en el orden
+# en que se exportan. El adaptador de persistencia decide cómo se guardan
+# (p. ej. meter_id, operation y subject como claves de diccionario).
+READING_FIELDS = (
+    "id", "operation", "subject", "meter_id", "timestamp", "flag",
+    "voltage_a", "voltage_b", "voltage_c",
+    "current_a", "current_b", "current_c",
+    "power_ai", "power_ae", "power_ri", "power_re",
+    "energy_ai", "energy_ae", "energy_ri", "energy_re",
+    "delta_ai", "delta_ae", "delta_ri", "delta_re",
+    "created_at",
+)
+
+# Consumo de cada contador de energía desde la lectura anterior del medidor
+# (kWh / kVArh del intervalo). No llegan en el request: los calcula la
+# ingesta (ver reading_deltas) y se guardan junto a los registros.
+DELTA_FIELDS = READING_FIELDS[READING_FIELDS.index("delta_ai"):READING_FIELDS.index("delta_re") + 1]
+
+# Mediciones de una lectura: proyección por defecto de las consultas por rango
+READING_VALUE_FIELDS = READING_FIELDS[READING_FIELDS.index("flag"):READING_FIELDS.index("delta_re") + 1]
+
+# Campos de una lectura nueva (todos menos el id autoincremental y los
+# deltas). Las filas que recibe EnergyRepositoryPort.save_rows son tuplas
+# en este orden.
+READING_COLUMNS = tuple(name for name in READING_FIELDS[1:] if name not in DELTA_FIELDS)
+
+# Posición de la clave (meter_id, timestamp) dentro de una fila de READING_COLUMNS
+METER_ID_INDEX = READING_COLUMNS.index("meter_id")
+TIMESTAMP_INDEX = READING_COLUMNS.index("timestamp")
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+from app.energy.domain.models.energy_record import DELTA_FIELDS
+
+bogota_tz = ZoneInfo("America/Bogota")
+
+# Granularidades de los rollups, de la más fina a la más gruesa.
+# Los días y meses se cortan en hora de Bogotá (UTC-5, sin horario de verano).
+GRANULARITIES = ("15m", "1h", "1d", "1mo")
+
+_FIXED_MS = {"15m": 900_000, "1h": 3_600_000, "1d": 86_400_000}
+_BOGOTA_OFFSET_MS = -5 * 3_600_000
+
+# Mediciones con mínimo / máximo / promedio por bucket
+STAT_FIELDS = ("voltage_a", "voltage_b", "voltage_c", "current_a", "current_b", "current_c")
+# Contadores acumulados de energía: se guarda el rango del registro en el bucket
+COUNTER_FIELDS = ("energy_ai", "energy_ae", "energy_ri", "energy_re")
+
+# Columnas de valores de la tabla de rollups, en orden. Los deltas de las
+# lecturas (consumo por intervalo) se suman: delta_ai_sum es la energía del bucket
+ROLLUP_VALUE_COLUMNS = (
+    ("sample_count",)
+    + tuple(f"{name}_{stat}" for name in STAT_FIELDS for stat in ("min", "max", "sum"))
+    + tuple(f"{name}_{stat}" for name in COUNTER_FIELDS for stat in ("min", "max"))
+    + tuple(f"{name}_sum" for name in DELTA_FIELDS)
+)
+
+
+def bucket_start(ts: int, granularity: str) -> int:
+    """Inicio (ms) del bucket que contiene ts"""
+    if granularity in ("15m", "1h"):
+        return ts - ts % _FIXED_MS[granularity]
+    if granularity == "1d":
+        local = ts + _BOGOTA_OFFSET_MS
+        return local - local % _FIXED_MS["1d"] - _BOGOTA_OFFSET_MS
+    if granularity == "1mo":
+        local = datetime.fromtimestamp(ts / 1000, bogota_tz)
+        first = local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return int(first.timestamp() * 1000)
+    raise ValueError(f"Granularidad no soportada: {granularity}")
+
+
+def bucket_end(start: int, granularity: str) -> int:
+    """Fin (ms, exclusivo) del bucket que empieza en start"""
+    if granularity in _FIXED_MS:
+        return start + _FIXED_MS[granularity]
+    local = datetime.fromtimestamp(start / 1000, bogota_tz)
+    following = (local.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return int(following.timestamp() * 1000)
+
+
+def dirty_buckets(keys: Iterable[Tuple[str, int]]) -> List[Tuple[str, str, int, int]]:
+    """
+    Buckets afectados por un lote de lecturas, en todas las granularidades.
+
+    Args:
+        keys: Pares (meter_id, timestamp) de las lecturas del lote
+
+    Returns:
+        Lista de (meter_id, granularity, bucket_start, bucket_end)
+    """
+    seen: Set[Tuple[str, str, int]] = set()
+    month_of_day: Dict[int, int] = {}
+    for meter_id, ts in keys:
+        day = bucket_start(ts, "1d")
+        month = month_of_day.get(day)
+        if month is None:
+            month = month_of_day[day] = bucket_start(day, "1mo")
+        seen.add((meter_id, "15m", bucket_start(ts, "15m")))
+        seen.add((meter_id, "1h", bucket_start(ts, "1h")))
+        seen.add((meter_id, "1d", day))
+        seen.add((meter_id, "1mo", month))
+    return [(meter_id, g, start, bucket_end(start, g)) for meter_id, g, start in seen]
+
+
+def choose_granularity(ts_from: int, ts_to: int, resolution: str) -> str:
+    """
+    Rollup más grueso que alcanza para responder: no más grueso que la
+    resolución pedida y con bordes que coinciden con el rango.
+    """
+    allowed = GRANULARITIES[:GRANULARITIES.index(resolution) + 1]
+    for granularity in reversed(allowed):
+        if bucket_start(ts_from, granularity) == ts_from and bucket_start(ts_to, granularity) == ts_to:
+            return granularity
+    return GRANULARITIES[0]
+
+
+def merge_rollups(rows: Iterable[Dict[str, Any]], resolution: str) -> List[Dict[str, Any]]:
+    """
+    Combina rollups de una granularidad fina en buckets de `resolution`.
+    Las filas deben venir ordenadas por bucket_start.
+    """
+    merged: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for row in rows:
+        start = bucket_start(row["bucket_start"], resolution)
+        if current is None or current["bucket_start"] != start:
+            current = {**row, "bucket_start": start}
+            merged.append(current)
+            continue
+        current["sample_count"] += row["sample_count"]
+        for column in ROLLUP_VALUE_COLUMNS[1:]:
+            value, other = current[column], row[column]
+            if other is None:
+                continue
+            if value is None:
+                current[column] = other
+            elif column.endswith("_min"):
+                current[column] = min(value, other)
+            elif column.endswith("_max"):
+                current[column] = max(value, other)
+            else:
+                current[column] = value + other
+    return merged
+
+
+def present_rollups(rows: List[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Forma de respuesta: min/max/avg por medición y delta de cada contador.
+
+    El delta de un bucket es la suma de los deltas de sus lecturas (ya
+    incluyen el consumo desde la lectura anterior, rollover y reinicios).
+    Los buckets con lecturas guardadas antes de que existieran los deltas
+    no la tienen: para ellos es el último valor del registro menos el
+    último del bucket anterior (o el primero del bucket si no hay anterior).
+    """
+    result = []
+    for row in rows:
+        count = row["sample_count"]
+        item: Dict[str, Any] = {"bucket_start": row["bucket_start"], "sample_count": count}
+        for name in STAT_FIELDS:
+            total = row[f"{name}_sum"]
+            item[f"{name}_min"] = row[f"{name}_min"]
+            item[f"{name}_max"] = row[f"{name}_max"]
+            item[f"{name}_avg"] = total / count if total is not None and count else None
+        for name, delta in zip(COUNTER_FIELDS, DELTA_FIELDS):
+            if row.get(f"{delta}_sum") is not None:
+                item[f"{name}_delta"] = row[f"{delta}_sum"]
+                continue
+            last = row[f"{name}_max"]
+            base = previous[f"{name}_max"] if previous is not None else None
+            if base is None:
+                base = row[f"{name}_min"]
+            item[f"{name}_delta"] = last - base if last is not None and base is not None else None
+        result.append(item)
+        previous = row
+    return result
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+from app.energy.domain.models.energy_record import READING_COLUMNS, METER_ID_INDEX, TIMESTAMP_INDEX
+
+FLAG_INDEX = READING_COLUMNS.index("flag")
+# Mediciones de una fila (voltage_a … energy_re) y su posición dentro de ese bloque
+_VALUES = slice(READING_COLUMNS.index("voltage_a"), READING_COLUMNS.index("energy_re") + 1)
+VALUE_COLUMNS = READING_COLUMNS[_VALUES]
+VOLTAGE_VALUES = slice(VALUE_COLUMNS.index("voltage_a"), VALUE_COLUMNS.index("voltage_c") + 1)
+CURRENT_VALUES = slice(VALUE_COLUMNS.index("current_a"), VALUE_COLUMNS.index("current_c") + 1)
+POWER_VALUES = slice(VALUE_COLUMNS.index("power_ai"), VALUE_COLUMNS.index("power_re") + 1)
+ENERGY_VALUES = slice(VALUE_COLUMNS.index("energy_ai"), VALUE_COLUMNS.index("energy_re") + 1)
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def _int_column(column: Sequence[Any]) -> np.ndarray:
+    """Columna entera como int64; los valores que no caben quedan en -1 (fuera de rango)"""
+    try:
+        return np.fromiter(column, dtype=np.int64, count=len(column))
+    except OverflowError:
+        return np.fromiter(
+            (value if -_INT64_MAX <= value <= _INT64_MAX else -1 for value in column),
+            dtype=np.int64, count=len(column)
+        )
+
+
+@dataclass
+class ReadingBatch:
+    """
+    Un lote de lecturas en columnas numpy. La conversión desde las tuplas
+    es lo único que recorre el lote en Python (una pasada por columna); la
+    validación y el cálculo de deltas trabajan sobre estos arreglos.
+    """
+    meter_ids: List[str]    # medidores distintos del lote, en orden de aparición
+    meters: np.ndarray      # índice en meter_ids de cada lectura (intp)
+    ts: np.ndarray          # int64, ms
+    flags: np.ndarray       # int64
+    values: np.ndarray      # float64 (14, n): una fila por medición, voltage_a … energy_re; nulo = NaN
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> "ReadingBatch":
+        """Columnas de tuplas en el orden de READING_COLUMNS"""
+        return cls.from_columns(list(zip(*rows)) if rows else [()] * len(READING_COLUMNS))
+
+    @classmethod
+    def from_columns(cls, columns: Sequence[Sequence[Any]]) -> "ReadingBatch":
+        """Igual que from_rows, con las filas ya traspuestas (una secuencia por columna)"""
+        n = len(columns[METER_ID_INDEX])
+        codes: Dict[str, int] = {}
+        meters = np.fromiter(
+            (codes.setdefault(meter_id, len(codes)) for meter_id in columns[METER_ID_INDEX]), dtype=np.intp, count=n
+        )
+        values = np.empty((len(VALUE_COLUMNS), n), dtype=np.float64)
+        for j, column in enumerate(columns[_VALUES]):
+            values[j] = np.fromiter(column, dtype=np.float64, count=n)
+        return cls(list(codes), meters, _int_column(columns[TIMESTAMP_INDEX]), _int_column(columns[FLAG_INDEX]), values)
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def ranges(self) -> Dict[str, Tuple[int, int]]:
+        """Primer y último timestamp de cada medidor del lote"""
+        ts_from = np.full(len(self.meter_ids), np.iinfo(np.int64).max)
+        ts_to = np.full(len(self.meter_ids), np.iinfo(np.int64).min)
+        np.minimum.at(ts_from, self.meters, self.ts)
+        np.maximum.at(ts_to, self.meters, self.ts)
+        return {meter_id: (int(ts_from[code]), int(ts_to[code])) for code, meter_id in enumerate(self.meter_ids)}
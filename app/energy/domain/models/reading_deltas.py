@@ -0,0 +1,148 @@
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from app.energy.domain.models.reading_batch import ReadingBatch, ENERGY_VALUES
+
+# Un registro que baja desde al menos ROLLOVER_FRACTION de su capacidad
+# (10^dígitos) a menos de 1 - ROLLOVER_FRACTION dio la vuelta (rollover)
+ROLLOVER_FRACTION = 0.9
+# Un registro que baja a RESET_FRACTION o menos de su valor anterior se
+# reinició (cambio de medidor, borrado de memoria): cuenta desde 0
+RESET_FRACTION = 0.01
+
+# Lectura ya guardada usada como contexto:
+# (timestamp, energy_ai, energy_ae, energy_ri, energy_re, delta_ai, delta_ae, delta_ri, delta_re)
+StoredCounters = Tuple[int, ...]
+# Corrección del delta de una lectura guardada: (meter_id, timestamp, delta_ai, delta_ae, delta_ri, delta_re)
+DeltaUpdate = Tuple[str, int, ...]
+# Último estado conocido de un medidor: (timestamp y flag de su última lectura,
+# último valor no nulo de energy_ai, energy_ae, energy_ri, energy_re)
+MeterState = Tuple[int, int, Optional[float], Optional[float], Optional[float], Optional[float]]
+# Lector del contexto guardado de un lote: meter_id → (ts_from, ts_to) a
+# meter_id → lecturas que lo rodean (ver EnergyRepositoryPort.get_counter_context)
+CounterContextReader = Callable[[Dict[str, Tuple[int, int]]], Dict[str, List[StoredCounters]]]
+# Lector del timestamp de la última lectura guardada de cada medidor
+# (los que no tienen lecturas no se incluyen)
+LatestReadingReader = Callable[[Iterable[str]], Dict[str, int]]
+# Cálculo de los deltas de un lote con esos lectores: (deltas de cada fila, correcciones)
+CounterDeltas = Callable[[CounterContextReader, LatestReadingReader], Tuple[List[tuple], List[DeltaUpdate]]]
+
+
+def counter_steps(previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """
+    Incremento de un registro acumulado entre dos lecturas consecutivas.
+
+    - Si el registro sube (o se mantiene): current - previous
+    - Si baja por rollover: lo que faltaba para la capacidad más current
+    - Si baja por reinicio: current
+    - Cualquier otra bajada no es consumo (lectura errónea): NaN
+    Un valor nulo (NaN) en cualquiera de las dos lecturas da NaN.
+    """
+    steps = current - previous
+    with np.errstate(invalid="ignore", divide="ignore"):
+        falling = steps < 0
+        if not falling.any():
+            return steps
+        capacity = 10.0 ** (np.floor(np.log10(np.where(previous > 0, previous, 1.0))) + 1)
+        rollover = falling & (previous >= ROLLOVER_FRACTION * capacity) & (current < (1 - ROLLOVER_FRACTION) * capacity)
+        reset = falling & ~rollover & (current <= RESET_FRACTION * previous)
+    steps = np.where(rollover, capacity - previous + current, steps)
+    steps = np.where(reset, current, steps)
+    steps[falling & ~rollover & ~reset] = np.nan
+    return steps
+
+
+def previous_present(present: np.ndarray, meters: np.ndarray) -> np.ndarray:
+    """
+    Posición de la lectura anterior con dato del mismo medidor, por fila de
+    present (contadores x lecturas ordenadas por medidor y timestamp);
+    -1 si no hay. Un máximo acumulado de las posiciones con dato da, en
+    cada posición, la última con dato hasta ella, sin recorrer el lote.
+    """
+    n = present.shape[-1]
+    last = np.maximum.accumulate(np.where(present, np.arange(n), -1), axis=-1)
+    before = np.empty_like(last)
+    before[..., 0] = -1
+    before[..., 1:] = last[..., :-1]
+    before[(before >= 0) & (meters[before] != meters)] = -1
+    return before
+
+
+def sequence_deltas(meters: np.ndarray, energy: np.ndarray, usable: np.ndarray) -> np.ndarray:
+    """
+    Deltas de lecturas ordenadas por medidor y timestamp.
+
+    Args:
+        meters: Código de medidor de cada lectura
+        energy: Contadores (4, n); nulo = NaN
+        usable: Lecturas que cuentan (las demás quedan con delta NaN y no
+            sirven de referencia, p. ej. duplicados)
+
+    Returns:
+        Arreglo (4, n): consumo desde la lectura anterior con dato del mismo
+        medidor; NaN si no hay anterior o el valor es nulo
+    """
+    present = ~np.isnan(energy) & usable
+    before = previous_present(present, meters)
+    has_before = present & (before >= 0)
+    deltas = np.full(energy.shape, np.nan)
+    deltas[has_before] = counter_steps(np.take_along_axis(energy, before, axis=-1)[has_before], energy[has_before])
+    return deltas
+
+
+def interval_deltas(
+    batch: ReadingBatch,
+    context: Mapping[str, Sequence[StoredCounters]],
+) -> Tuple[List[tuple], List[DeltaUpdate]]:
+    """
+    Deltas de los contadores de un lote (consumo de cada lectura desde la
+    anterior del medidor), vectorizados para todos los medidores a la vez.
+
+    El lote se ordena junto con las lecturas ya guardadas de cada medidor
+    (context: la anterior a su primera lectura y las que caen dentro o
+    justo después de su rango), así el borde con el lote anterior se
+    calcula igual que el interior. Si llegan lecturas tardías, cambia el
+    delta de la lectura guardada que les sigue: se retorna su corrección.
+    Ante un timestamp repetido vale la lectura guardada (la BD ignora la
+    nueva) o, dentro del lote, la primera.
+
+    Returns:
+        Tuple: (deltas de cada fila en el orden del lote, con None para los
+        nulos; correcciones de lecturas guardadas)
+    """
+    n = len(batch)
+    codes = {meter_id: code for code, meter_id in enumerate(batch.meter_ids)}
+    stored = [(codes[meter_id], item) for meter_id, items in context.items() if meter_id in codes for item in items]
+    m = len(stored)
+    meters = np.concatenate([batch.meters, np.fromiter((code for code, _ in stored), dtype=np.intp, count=m)])
+    ts = np.concatenate([batch.ts, np.fromiter((item[0] for _, item in stored), dtype=np.int64, count=m)])
+    energy = np.concatenate([
+        batch.values[ENERGY_VALUES],
+        np.array([item[1:5] for _, item in stored], dtype=np.float64).reshape(m, 4).T,
+    ], axis=1)
+    is_new = np.arange(n + m) < n
+
+    # Orden por (medidor, timestamp) con las guardadas antes que las nuevas
+    order = np.lexsort((is_new, ts, meters))
+    sorted_meters, sorted_ts = meters[order], ts[order]
+    repeated = np.zeros(n + m, dtype=bool)
+    repeated[1:] = (sorted_meters[1:] == sorted_meters[:-1]) & (sorted_ts[1:] == sorted_ts[:-1])
+    deltas = sequence_deltas(sorted_meters, energy[:, order], ~repeated)
+
+    result = np.full((4, n + m), np.nan)
+    result[:, order] = deltas
+    rows = np.where(np.isnan(result[:, :n]), None, result[:, :n]).T.tolist()
+
+    updates: List[DeltaUpdate] = []
+    if m:
+        # Las guardadas anteriores al lote no cambian; el resto, si su delta es otro
+        first_new = np.full(len(batch.meter_ids), np.iinfo(np.int64).max)
+        np.minimum.at(first_new, batch.meters, batch.ts)
+        old = np.array([item[5:9] for _, item in stored], dtype=np.float64).reshape(m, 4).T
+        new = result[:, n:]
+        changed = ~((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=0)
+        changed &= ts[n:] > first_new[meters[n:]]
+        for i in np.flatnonzero(changed):
+            values = tuple(None if np.isnan(value) else float(value) for value in new[:, i])
+            updates.append((batch.meter_ids[meters[n + i]], int(ts[n + i])) + values)
+    return [tuple(row) for row in rows], updates
+
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import List
+from app.energy.domain.models.energy_rollup import bogota_tz, bucket_start, bucket_end
+
+# Las lecturas se particionan y archivan por mes calendario en hora de
+# Bogotá, los mismos meses de los rollups 1mo.
+
+
+def month_label(start: int) -> str:
+    """Etiqueta 'YYYY-MM' del mes que empieza en start (ms)"""
+    return datetime.fromtimestamp(start / 1000, bogota_tz).strftime("%Y-%m")
+
+
+def add_months(start: int, months: int) -> int:
+    """Inicio del mes desplazado `months` meses (negativo = hacia atrás) desde el mes que empieza en start"""
+    for _ in range(months):
+        start = bucket_end(start, "1mo")
+    for _ in range(-months):
+        start = bucket_start(start - 1, "1mo")
+    return start
+
+
+def month_starts(ts_from: int, ts_to: int) -> List[int]:
+    """Inicios de los meses que se solapan con [ts_from, ts_to)"""
+    months = []
+    start = bucket_start(ts_from, "1mo")
+    while start < ts_to:
+        months.append(start)
+        start = bucket_end(start, "1mo")
+    return months
+
+
+def retention_cutoff(now: int, retention_months: int) -> int:
+    """
+    Primer instante que se conserva en la BD: se conservan el mes en curso
+    y los retention_months meses anteriores; lo previo se archiva.
+    """
+    return add_months(bucket_start(now, "1mo"), -retention_months)
+
+
+def partitions_until(now: int, months_ahead: int) -> int:
+    """Fin (exclusivo) del último mes que debe tener partición: el mes en curso y months_ahead más"""
+    return add_months(bucket_start(now, "1mo"), months_ahead + 1)
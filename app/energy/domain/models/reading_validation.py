@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from app.energy.domain.models.reading_batch import (
+    ReadingBatch, CURRENT_VALUES, ENERGY_VALUES, POWER_VALUES, VOLTAGE_VALUES
+)
+from app.energy.domain.models.reading_deltas import counter_steps, previous_present
+
+_NON_NEGATIVE = slice(CURRENT_VALUES.start, ENERGY_VALUES.stop)
+
+# Motivos de rechazo; el bit i de ValidationResult.reasons corresponde a REJECT_REASONS[i]
+REJECT_REASONS = (
+    "duplicate_timestamp",
+    "timestamp_out_of_range",
+    "future_timestamp",
+    "invalid_flag",
+    "flag_rejected",
+    "non_finite_value",
+    "negative_value",
+    "voltage_out_of_range",
+    "current_out_of_range",
+    "power_out_of_range",
+    "counter_decrease",
+)
+_BIT = {reason: np.uint16(1 << i) for i, reason in enumerate(REJECT_REASONS)}
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+# Estado previo de un medidor: (timestamp, energy_ai, energy_ae, energy_ri, energy_re)
+PreviousReading = Tuple[int, Optional[float], Optional[float], Optional[float], Optional[float]]
+
+@dataclass
+class ValidationResult:
+    """Resultado de validar un lote: motivos de rechazo (bits) por lectura, en el orden de entrada"""
+    reasons: np.ndarray
+
+    @property
+    def rejected(self) -> np.ndarray:
+        """Máscara de lecturas rechazadas"""
+        return self.reasons != 0
+
+    @property
+    def rejected_count(self) -> int:
+        return int(np.count_nonzero(self.reasons))
+
+    def counts(self) -> Dict[str, int]:
+        """Lecturas rechazadas por motivo (una lectura puede tener varios)"""
+        if not self.rejected_count:
+            return {}
+        counts = {}
+        for reason, bit in _BIT.items():
+            count = int(np.count_nonzero(self.reasons & bit))
+            if count:
+                counts[reason] = count
+        return counts
+
+    def split(self, rows: Sequence[tuple]) -> List[tuple]:
+        """Filas aceptadas"""
+        if not self.rejected_count:
+            return list(rows)
+        return [rows[i] for i in np.flatnonzero(self.reasons == 0)]
+
+
+class ReadingValidator:
+    """
+    Reglas de negocio sobre las lecturas de un lote, aplicadas de forma
+    vectorizada: el lote (tuplas en el orden de READING_COLUMNS) se
+    convierte una sola vez en columnas numpy (ReadingBatch) y cada regla es una operación
+    sobre columnas, sin recorrer lectura por lectura en Python.
+
+    Reglas (un bit de REJECT_REASONS por regla):
+    - timestamp: repetido para el mismo medidor dentro del lote (se conserva
+      la primera), anterior a min_timestamp (p. ej. segundos en vez de ms)
+      o más de max_future_ms en el futuro
+    - flag: fuera de [0, 2^31) o con algún bit de flag_reject_mask
+    - mediciones: infinitas, negativas (corriente, potencia y energía) o
+      fuera de rango (voltaje, corriente y potencia). Los nulos se aceptan.
+    - contadores de energía (ai, ae, ri, re): dentro de cada medidor, en
+      orden de timestamp, ningún registro puede bajar respecto de la lectura
+      anterior con dato que pasó las demás reglas, ni respecto del estado
+      previo del medidor si se entrega (previous), salvo por rollover o
+      reinicio del registro (ver reading_deltas.counter_steps).
+    Las lecturas desordenadas no se rechazan: los contadores se comparan
+    en orden de timestamp.
+    """
+
+    def __init__(
+        self,
+        voltage_range: Tuple[float, float] = (0.0, 500.0),
+        max_current: float = 2000.0,
+        max_power: float = 1000.0,
+        max_future_ms: int = 3_600_000,
+        min_timestamp: int = 946_684_800_000,
+        flag_reject_mask: int = 0,
+    ):
+        """
+        Args:
+            voltage_range: Voltaje mínimo y máximo por fase (V)
+            max_current: Corriente máxima por fase (A)
+            max_power: Potencia máxima (kW / kVAr)
+            max_future_ms: Tolerancia a relojes adelantados
+            min_timestamp: Primer timestamp válido (ms; por defecto 2000-01-01)
+            flag_reject_mask: Bits de flag que marcan una lectura inválida
+        """
+        self.voltage_range = voltage_range
+        self.max_current = max_current
+        self.max_power = max_power
+        self.max_future_ms = max_future_ms
+        self.min_timestamp = min_timestamp
+        self.flag_reject_mask = flag_reject_mask
+
+    def validate(
+        self,
+        rows: Sequence[tuple],
+        now_ms: int,
+        previous: Optional[Mapping[str, PreviousReading]] = None,
+    ) -> ValidationResult:
+        """
+        Valida un lote de lecturas.
+
+        Args:
+            rows: Tuplas en el orden de READING_COLUMNS (pueden mezclar medidores)
+            now_ms: Hora actual (ms) para la regla de timestamps futuros
+            previous: Última lectura conocida de cada medidor (opcional)
+
+        Returns:
+            ValidationResult con los motivos de rechazo de cada lectura
+        """
+        return self.validate_batch(ReadingBatch.from_rows(rows), now_ms, previous)
+
+    def validate_batch(
+        self,
+        batch: ReadingBatch,
+        now_ms: int,
+        previous: Optional[Mapping[str, PreviousReading]] = None,
+    ) -> ValidationResult:
+        """Igual que validate, sobre un lote ya convertido a columnas"""
+        n = len(batch)
+        reasons = np.zeros(n, dtype=np.uint16)
+        if not n:
+            return ValidationResult(reasons)
+        meters, ts, flags, values = batch.meters, batch.ts, batch.flags, batch.values
+
+        reasons |= (ts < self.min_timestamp) * _BIT["timestamp_out_of_range"]
+        reasons |= (ts > now_ms + self.max_future_ms) * _BIT["future_timestamp"]
+        reasons |= ((flags < 0) | (flags > np.iinfo(np.int32).max)) * _BIT["invalid_flag"]
+        if self.flag_reject_mask:
+            reasons |= ((flags & self.flag_reject_mask) != 0) * _BIT["flag_rejected"]
+
+        # Los nulos (NaN) no se rechazan
+        with np.errstate(invalid="ignore"):
+            reasons |= np.isinf(values).any(axis=0) * _BIT["non_finite_value"]
+            # fmin/fmax ignoran los NaN: el extremo de cada lectura entre sus mediciones con dato
+            reasons |= (np.fmin.reduce(values[_NON_NEGATIVE], axis=0) < 0) * _BIT["negative_value"]
+            voltage = values[VOLTAGE_VALUES]
+            low, high = self.voltage_range
+            reasons |= (
+                (np.fmin.reduce(voltage, axis=0) < low) | (np.fmax.reduce(voltage, axis=0) > high)
+            ) * _BIT["voltage_out_of_range"]
+            reasons |= (np.fmax.reduce(values[CURRENT_VALUES], axis=0) > self.max_current) * _BIT["current_out_of_range"]
+            reasons |= (np.fmax.reduce(values[POWER_VALUES], axis=0) > self.max_power) * _BIT["power_out_of_range"]
+
+        # Orden por (medidor, timestamp); lexsort es estable: ante timestamps
+        # repetidos queda primero la lectura que llegó primero
+        order = np.lexsort((ts, meters))
+        sorted_meters, sorted_ts = meters[order], ts[order]
+        same_meter = np.empty(n, dtype=bool)
+        same_meter[0] = False
+        np.equal(sorted_meters[1:], sorted_meters[:-1], out=same_meter[1:])
+        duplicate = np.zeros(n, dtype=bool)
+        duplicate[1:] = same_meter[1:] & (sorted_ts[1:] == sorted_ts[:-1])
+        reasons[order[duplicate]] |= _BIT["duplicate_timestamp"]
+
+        # Las lecturas rechazadas por otra regla no sirven de referencia para los contadores
+        baseline = ~duplicate & (reasons[order] == 0)
+        decrease = self._counter_decreases(
+            values[ENERGY_VALUES][:, order], sorted_meters, sorted_ts, baseline, batch.meter_ids, previous
+        )
+        reasons[order[decrease]] |= _BIT["counter_decrease"]
+        return ValidationResult(reasons)
+
+    @staticmethod
+    def _counter_decreases(
+        energy: np.ndarray,
+        meters: np.ndarray,
+        ts: np.ndarray,
+        baseline: np.ndarray,
+        meter_ids: List[str],
+        previous: Optional[Mapping[str, PreviousReading]],
+    ) -> np.ndarray:
+        """
+        Lecturas (ya ordenadas por medidor y timestamp) en las que algún
+        contador baja respecto del último valor no nulo anterior del mismo
+        medidor entre las lecturas de referencia (baseline), o del estado
+        previo si es la primera lectura con dato. Las bajadas que
+        counter_steps explica como rollover o reinicio no se rechazan.
+        """
+        present = ~np.isnan(energy) & baseline
+        before = previous_present(present, meters)
+        has_before = before >= 0
+        reference = np.where(has_before, np.take_along_axis(energy, before, axis=1), np.nan)
+        if previous:
+            known = [previous.get(meter_id) for meter_id in meter_ids]
+            previous_ts = np.array([p[0] if p else _INT64_MAX for p in known], dtype=np.int64)[meters]
+            previous_values = np.array(
+                [[np.nan if p is None or v is None else v for v in (p[1:] if p else (None,) * 4)] for p in known],
+                dtype=np.float64
+            ).T[:, meters]
+            first = ~has_before & (ts > previous_ts)
+            reference = np.where(first, previous_values, reference)
+        with np.errstate(invalid="ignore"):
+            falling = present & (energy < reference)
+        if not falling.any():
+            return falling.any(axis=0)
+        falling[falling] = np.isnan(counter_steps(reference[falling], energy[falling]))
+        return falling.any(axis=0)
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from app.energy.domain.models.energy_record import EnergyRecord
-from typing import Optional
+from app.energy.domain.models.reading_deltas import StoredCounters, MeterState, CounterDeltas
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.shared.infrastructure.pagination import KeysetPage
 
 
 class EnergyRepositoryPort(ABC):
@@ -23,6 +25,80 @@ class EnergyRepositoryPort(ABC):
         """
         pass
 
+    @abstractmethod
+    def save_rows(
+        self,
+        rows: Sequence[tuple],
+        counter_deltas: Optional[CounterDeltas] = None
+    ) -> int:
+        """
+        Inserta lecturas ya aplanadas, en una sola transacción.
+        Es idempotente: las lecturas cuya clave (meter_id, timestamp) ya existe
+        se ignoran.
+
+        Los deltas se calculan dentro de esa transacción, con los medidores
+        del lote bloqueados: dos lotes del mismo medidor se serializan y
+        cada uno ve las lecturas que el otro ya guardó.
+
+        Args:
+            rows: Tuplas con los valores en el orden de READING_COLUMNS
+            counter_deltas: Recibe los lectores del contexto guardado y de la
+                última lectura de cada medidor, y retorna
+                la tupla (delta_ai, delta_ae, delta_ri, delta_re) de cada fila
+                y los deltas corregidos de lecturas ya guardadas
+                (meter_id, timestamp, delta_ai, delta_ae, delta_ri, delta_re).
+                None = sin deltas
+
+        Returns:
+            int: Número de filas insertadas (sin contar duplicados)
+        """
+        pass
+
+    @abstractmethod
+    def get_counter_context(self, ranges: Dict[str, Tuple[int, int]]) -> Dict[str, List[StoredCounters]]:
+        """
+        Lecturas guardadas que rodean un lote, para calcular sus deltas: por
+        medidor, la anterior a ts_from, las de [ts_from, ts_to] y la
+        siguiente a ts_to, ordenadas por timestamp.
+
+        Args:
+            ranges: meter_id → (ts_from, ts_to) del lote
+
+        Returns:
+            meter_id → tuplas (timestamp, energy_ai … energy_re, delta_ai … delta_re)
+        """
+        pass
+
+    @abstractmethod
+    def get_meter_keys(self, meter_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Claves enteras de los medidores existentes (estables: no cambian
+        mientras exista el medidor). Los que no existen no se incluyen.
+        """
+        pass
+
+    @abstractmethod
+    def get_meter_states(self, meter_ids: Iterable[str]) -> Dict[str, MeterState]:
+        """
+        Estado de la última lectura guardada de cada medidor, en una sola
+        consulta para todos. Los medidores sin lecturas no se incluyen.
+
+        Returns:
+            meter_id → (timestamp, flag, último valor no nulo de energy_ai … energy_re)
+        """
+        pass
+
+    @abstractmethod
+    def recompute_deltas(self, meter_id: str, ts_from: int, ts_to: int) -> int:
+        """
+        Recalcula los deltas de las lecturas de un medidor en [ts_from, ts_to)
+        (p. ej. después de una carga masiva que insertó sin deltas).
+
+        Returns:
+            int: Lecturas cuyo delta cambió
+        """
+        pass
+
     @abstractmethod
     def get_by_id(self, record_id: int) -> Optional[EnergyRecord]:
         """
@@ -35,3 +111,45 @@ class EnergyRepositoryPort(ABC):
             Optional[EnergyRecord]: Registro encontrado o None
         """
         pass
+
+    @abstractmethod
+    def iter_readings(self, meter_id: Optional[str] = None, batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre las lecturas individuales ordenadas por id, como filas planas
+        (campos de READING_FIELDS), leyendo por lotes con cursor del servidor.
+
+        Args:
+            meter_id: Filtra por medidor (None = todos)
+            batch_size: Filas por lote leído de la BD
+        """
+        pass
+
+    @abstractmethod
+    def get_range(
+        self,
+        meter_id: str,
+        ts_from: int,
+        ts_to: int,
+        fields: Sequence[str],
+        after_ts: Optional[int] = None,
+        limit: int = 1000
+    ) -> KeysetPage[Dict[str, Any]]:
+        """
+        Obtiene una página de lecturas de un medidor en [ts_from, ts_to),
+        ordenada por timestamp (keyset sobre timestamp).
+        Query: SELECT timestamp, <fields> FROM energy_readings
+               WHERE meter_id = ? AND timestamp >= ? AND timestamp < ? AND timestamp > ?
+               ORDER BY timestamp LIMIT ?
+
+        Args:
+            meter_id: ID del medidor
+            ts_from: Inicio del rango (ms, inclusivo)
+            ts_to: Fin del rango (ms, exclusivo)
+            fields: Columnas a retornar (de READING_FIELDS); timestamp siempre se incluye
+            after_ts: timestamp de la última lectura de la página anterior
+            limit: Tamaño máximo de la página
+
+        Returns:
+            KeysetPage[Dict[str, Any]]: Filas y timestamp para la página siguiente
+        """
+        pass
@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class EnergyRollupRepositoryPort(ABC):
+    """
+    Puerto (interfaz) para el repositorio de agregados (rollups) de lecturas.
+    Define el contrato que debe cumplir cualquier implementación
+    de persistencia de rollups por medidor y granularidad.
+    """
+
+    @abstractmethod
+    def refresh(self, buckets: Sequence[Tuple[str, str, int, int]]) -> int:
+        """
+        Recalcula los buckets indicados desde sus fuentes (lecturas para 15m,
+        el rollup inmediatamente más fino para el resto) y los guarda con
+        upserts por lote, en una sola transacción.
+
+        Recalcular en lugar de sumar deltas lo hace idempotente: las lecturas
+        duplicadas ignoradas al insertar no cuentan dos veces.
+
+        Args:
+            buckets: Tuplas (meter_id, granularity, bucket_start, bucket_end)
+
+        Returns:
+            int: Número de buckets recalculados
+        """
+        pass
+
+    @abstractmethod
+    def get_rollups(self, meter_id: str, granularity: str, ts_from: int, ts_to: int) -> List[Dict[str, Any]]:
+        """
+        Rollups de un medidor con bucket_start en [ts_from, ts_to), ordenados por bucket_start.
+
+        Args:
+            meter_id: ID del medidor
+            granularity: 15m, 1h, 1d o 1mo
+            ts_from: Inicio del rango (ms, inclusivo)
+            ts_to: Fin del rango (ms, exclusivo)
+
+        Returns:
+            List[Dict[str, Any]]: bucket_start y columnas de ROLLUP_VALUE_COLUMNS
+        """
+        pass
+
+    @abstractmethod
+    def get_previous(self, meter_id: str, granularity: str, before: int) -> Optional[Dict[str, Any]]:
+        """
+        Último rollup del medidor con bucket_start < before (base para el
+        delta de los contadores del primer bucket de una consulta).
+
+        Returns:
+            Optional[Dict[str, Any]]: Rollup encontrado o None
+        """
+        pass
@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from typing import Set
+
+
+class MeterAccessPort(ABC):
+    """
+    Puerto (interfaz) para saber qué medidores puede reportar un usuario
+    que no es gateway: los que tiene asignados. La asignación vive en otro
+    contexto (app/user); la implementación la conecta la raíz de
+    composición (app.composition).
+    """
+
+    @abstractmethod
+    def owned_meters(self, user_id: int) -> Set[str]:
+        """
+        Args:
+            user_id: Usuario autenticado
+
+        Returns:
+            Set[str]: meter_id asignados al usuario
+        """
+        pass
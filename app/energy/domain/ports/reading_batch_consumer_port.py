@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+from typing import Mapping, Optional, Sequence, Tuple
+
+# Energía acumulada de una lectura: (timestamp ms, energy_ai, energy_ae)
+MeterEnergyReading = Tuple[int, Optional[float], Optional[float]]
+
+
+class ReadingBatchConsumer(ABC):
+    """
+    Puerto (interfaz) para los consumidores de lecturas ya persistidas de
+    otros contextos (p. ej. los balances de energy_records de app/user).
+    app/energy no conoce las implementaciones: las conecta la raíz de
+    composición (app.composition).
+    """
+
+    @abstractmethod
+    def consume(self, readings: Mapping[str, Sequence[MeterEnergyReading]]) -> int:
+        """
+        Recibe las lecturas de un lote ya persistido, agrupadas por medidor
+        y en el orden en que llegaron. Debe ser idempotente: un lote puede
+        entregarse más de una vez (reintentos de la cola, cargas masivas).
+
+        Args:
+            readings: Lecturas por meter_id
+
+        Returns:
+            int: Registros del consumidor actualizados
+        """
+        pass
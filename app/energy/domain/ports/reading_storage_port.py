@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class ReadingStoragePort(ABC):
+    """
+    Puerto (interfaz) para el mantenimiento del almacenamiento de lecturas:
+    particiones mensuales por adelantado y retiro de los meses viejos a un
+    archivo fuera de la BD.
+    """
+
+    @abstractmethod
+    def maintain(self, partitions_until: int, archive_before: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Ejecuta un ciclo de mantenimiento. Debe ser seguro ante varios
+        workers a la vez (solo uno hace el trabajo) y reanudable si se
+        interrumpe.
+
+        Args:
+            partitions_until: Deben existir particiones hasta este instante (ms, exclusivo)
+            archive_before: Las lecturas anteriores a este instante (ms) se
+                archivan y salen de la BD; None = no archivar
+
+        Returns:
+            Dict: Particiones creadas, meses archivados y filas retiradas
+        """
+        pass
+
+    @abstractmethod
+    def status(self) -> Dict[str, Any]:
+        """
+        Estado del almacenamiento: particiones existentes y meses archivados.
+        """
+        pass
@@ -1,106 +1,246 @@
-from datetime import datetime
-from typing import Dict, Any
-from app.energy.domain.models.energy_record import EnergyRecord, MeterReadings, ReadingData, VoltageData, CurrentData, PowerData, EnergyData
+from typing import AsyncIterator, Callable, Dict, Any, Iterator, List, Optional, Sequence, Tuple
+import anyio.to_thread
+from app.energy.domain.models.energy_record import (
+    READING_COLUMNS, READING_FIELDS, READING_VALUE_FIELDS, METER_ID_INDEX, TIMESTAMP_INDEX
+)
+from app.energy.domain.models.energy_rollup import (
+    GRANULARITIES, bucket_start, bucket_end, dirty_buckets, choose_granularity, merge_rollups, present_rollups
+)
 from app.energy.domain.ports.energy_repository_port import EnergyRepositoryPort
+from app.energy.domain.models.reading_retention import retention_cutoff, partitions_until
+from app.energy.domain.models.reading_validation import ReadingValidator
+from app.energy.domain.models.reading_batch import ReadingBatch
+from app.energy.domain.models.reading_deltas import interval_deltas, CounterContextReader, LatestReadingReader, MeterState
+from app.energy.domain.ports.energy_rollup_repository_port import EnergyRollupRepositoryPort
+from app.energy.domain.ports.reading_storage_port import ReadingStoragePort
+from app.energy.domain.ports.reading_batch_consumer_port import ReadingBatchConsumer, MeterEnergyReading
 from app.shared.infrastructure.response import ResultHandler
+from app.shared.infrastructure.content_encoding import RequestBodyError
+from app.shared.infrastructure.export import streaming_export, EXPORT_BATCH_SIZE
+from app.shared.infrastructure.pagination import resolve_limit, decode_cursor, page_cursor
+from app.energy.infrastructure.ingestion_queue import IngestionQueue, IngestionQueueFull
+from app.energy.infrastructure.recent_keys import RecentReadingKeys
+from app.energy.infrastructure.meter_state import MeterStateTable
+from datetime import datetime
 from zoneinfo import ZoneInfo
 
 
 bogota_tz = ZoneInfo("America/Bogota")
 
 
+def _now_ms() -> int:
+    return int(datetime.now(bogota_tz).timestamp() * 1000)
+
+
+_ENERGY_AI_INDEX = READING_COLUMNS.index("energy_ai")
+_ENERGY_AE_INDEX = READING_COLUMNS.index("energy_ae")
+
+
+def energy_by_meter(rows: Sequence[tuple]) -> Dict[str, List[MeterEnergyReading]]:
+    """Lecturas (tuplas en el orden de READING_COLUMNS) agrupadas por medidor para los consumidores"""
+    readings: Dict[str, List[MeterEnergyReading]] = {}
+    for row in rows:
+        readings.setdefault(row[METER_ID_INDEX], []).append(
+            (row[TIMESTAMP_INDEX], row[_ENERGY_AI_INDEX], row[_ENERGY_AE_INDEX])
+        )
+    return readings
+
+
 class EnergyService:
     """
     Servicio de energía que maneja el almacenamiento de registros de lecturas.
 
     Responsabilidades:
-    - Procesar y validar lecturas de medidores
-    - Almacenar registros de energía
-    - Transformar datos de entrada a modelos de dominio
+    - Validar y almacenar lecturas de medidores (directo o mediante la cola de ingesta)
+    - Exportar lecturas almacenadas
+    - Mantener y consultar los rollups por medidor (15m, 1h, 1d, 1mo)
+    - Mantener el almacenamiento de lecturas (particiones mensuales y
+      archivo de los meses fuera de la retención)
     """
 
-    def __init__(self, energy_repository: EnergyRepositoryPort):
+    def __init__(
+        self,
+        energy_repository: EnergyRepositoryPort,
+        ingestion_queue: Optional[IngestionQueue] = None,
+        recent_keys: Optional[RecentReadingKeys] = None,
+        rollup_repository: Optional[EnergyRollupRepositoryPort] = None,
+        batch_consumers: Sequence[ReadingBatchConsumer] = (),
+        reading_storage: Optional[ReadingStoragePort] = None,
+        retention_months: int = 0,
+        partition_months_ahead: int = 3,
+        reading_validator: Optional[ReadingValidator] = None,
+        meter_state: Optional[MeterStateTable] = None
+    ):
+        """
+        Args:
+            energy_repository: Puerto de persistencia de lecturas
+            ingestion_queue: Cola de ingesta por lotes (None = guardado síncrono por request)
+            recent_keys: Caché de claves recientes para descartar duplicados (None = sin caché)
+            rollup_repository: Puerto de persistencia de rollups (None = sin rollups)
+            batch_consumers: Consumidores de cada lote persistido (p. ej. el
+                agregador de energy_records de app/user); deben ser idempotentes
+            reading_storage: Puerto de mantenimiento del almacenamiento (None = sin mantenimiento)
+            retention_months: Meses anteriores al en curso que se conservan en la
+                BD; lo previo se archiva (0 = no archivar)
+            partition_months_ahead: Meses futuros con partición creada por adelantado
+            reading_validator: Reglas de negocio por lectura (None = sin validación)
+            meter_state: Estado en memoria de la última lectura de cada medidor,
+                para validar y calcular deltas sin consultar la BD (None = sin caché)
+        """
         self.energy_repository = energy_repository
+        self.ingestion_queue = ingestion_queue
+        self.recent_keys = recent_keys
+        self.rollup_repository = rollup_repository
+        self.batch_consumers = list(batch_consumers)
+        self.reading_storage = reading_storage
+        self.retention_months = retention_months
+        self.partition_months_ahead = partition_months_ahead
+        self.reading_validator = reading_validator
+        self.meter_state = meter_state
+        # Motor de ingesta por shards (lo asigna el proveedor del servicio con
+        # ENERGY_INGEST_MODE=sharded): reemplaza a la cola local
+        self.ingestion_shards = None
+        # Tarea periódica que ejecuta maintain_storage (la asigna el proveedor del servicio)
+        self.maintenance_task = None
+
+    def _validate(self, rows: List[tuple]) -> Tuple[List[tuple], Dict[str, Any]]:
+        """
+        Descarta las lecturas que no cumplen las reglas de negocio.
+
+        Returns:
+            Tuple: (lecturas válidas, {"rejected_readings", "rejection_reasons"})
+        """
+        if self.reading_validator is None or not rows:
+            return rows, {"rejected_readings": 0, "rejection_reasons": {}}
+        batch = ReadingBatch.from_rows(rows)
+        # Estado previo de cada medidor (de la caché, o de la BD sin ella):
+        # los contadores no pueden bajar entre lotes
+        if self.meter_state is not None:
+            states = self.meter_state.lookup(batch.meter_ids)
+        else:
+            states = self.energy_repository.get_meter_states(batch.meter_ids)
+        previous = {meter_id: (state[0],) + state[2:] for meter_id, state in states.items()}
+        result = self.reading_validator.validate_batch(batch, _now_ms(), previous)
+        return result.split(rows), {"rejected_readings": result.rejected_count, "rejection_reasons": result.counts()}
+
+    def _drop_duplicates(self, rows: List[tuple]) -> Tuple[List[tuple], int]:
+        """Descarta los duplicados ya conocidos antes de ir a la BD"""
+        if self.recent_keys is None:
+            return rows, 0
+        return self.recent_keys.split(rows)
+
+    def _counter_deltas(
+        self,
+        batch: ReadingBatch,
+        states: Dict[str, MeterState],
+        read_context: CounterContextReader,
+        read_latest: LatestReadingReader,
+        stale: List[str]
+    ) -> Tuple[List[tuple], List[tuple]]:
+        """
+        Deltas de los contadores del lote y correcciones de lecturas ya
+        guardadas. Los medidores cuyas lecturas son todas posteriores a su
+        estado en caché (states, leído antes de la transacción) se calculan
+        desde ese estado, si sigue siendo la última lectura de la BD
+        (read_latest: un MAX(timestamp) por lote); el resto (lecturas
+        tardías, medidores nuevos, sin caché o con un estado que quedó
+        atrás, que se agregan a stale) con el contexto de la BD
+        (read_context), en una consulta por lote, no por medidor.
+        Los dos lectores corren dentro de la transacción de save_rows: aquí
+        no se abre otra sesión.
+        """
+        ranges = batch.ranges()
+        context = {}
+        cached = {meter_id: state for meter_id, state in states.items() if ranges[meter_id][0] > state[0]}
+        latest = read_latest(cached) if cached else {}
+        for meter_id, state in cached.items():
+            if latest.get(meter_id) == state[0]:
+                context[meter_id] = [(state[0],) + state[2:] + (None,) * 4]
+            else:
+                stale.append(meter_id)
+        ranges = {meter_id: bounds for meter_id, bounds in ranges.items() if meter_id not in context}
+        if ranges:
+            context.update(read_context(ranges))
+        return interval_deltas(batch, context)
+
+    def persist_rows(self, rows: List[tuple]) -> int:
+        """
+        Calcula los deltas de los contadores, inserta las lecturas, recalcula
+        los rollups de los buckets que tocan, entrega el lote a los
+        consumidores y registra sus claves en la caché de duplicados y su
+        estado en la caché de medidores.
+        Es también el sink de la cola de ingesta.
+
+        Los rollups y consumidores se ejecutan aunque la BD haya ignorado
+        todas las filas: si un intento anterior insertó pero falló después,
+        el reintento los deja al día.
+
+        Returns:
+            int: Lecturas nuevas insertadas (sin los duplicados ignorados por la BD)
+        """
+        batch = ReadingBatch.from_rows(rows)
+        states = self.meter_state.lookup(batch.meter_ids) if self.meter_state is not None and rows else {}
+        delta_updates: List[tuple] = []
+        stale: List[str] = []
+
+        def counter_deltas(read_context: CounterContextReader, read_latest: LatestReadingReader) -> Tuple[List[tuple], List[tuple]]:
+            deltas, updates = self._counter_deltas(batch, states, read_context, read_latest, stale)
+            delta_updates[:] = updates
+            return deltas, updates
 
-    def save_record(self, request_data: Dict[str, Any]):
+        inserted = self.energy_repository.save_rows(rows, counter_deltas)
+        if self.meter_state is not None:
+            if stale:
+                self.meter_state.invalidate(stale)
+            self.meter_state.update(batch)
+        if self.rollup_repository is not None and rows:
+            # Los buckets de meses ya archivados no se recalculan: sus lecturas
+            # no están en la BD y el recálculo los dejaría incompletos.
+            # También cambian los buckets de las lecturas con delta corregido.
+            cutoff = retention_cutoff(_now_ms(), self.retention_months) if self.retention_months else None
+            keys = [(row[METER_ID_INDEX], row[TIMESTAMP_INDEX]) for row in rows]
+            keys += [(update[0], update[1]) for update in delta_updates]
+            self.rollup_repository.refresh(dirty_buckets(
+                (meter_id, ts) for meter_id, ts in keys if cutoff is None or ts >= cutoff
+            ))
+        if rows and self.batch_consumers:
+            readings = energy_by_meter(rows)
+            for consumer in self.batch_consumers:
+                consumer.consume(readings)
+        if self.recent_keys is not None:
+            self.recent_keys.remember(rows)
+        return inserted
+
+    def save_readings(self, rows: List[tuple], summary: Dict[str, Any]):
         """
-        Caso de uso: Guardar un nuevo registro de lecturas de energía.
+        Caso de uso: Guardar las lecturas de un registro de energía.
 
-        Lógica de negocio:
-        1. Valida la estructura de los datos recibidos
-        2. Transforma el diccionario de medidores en lista de MeterReadings
-        3. Crea el registro en el sistema
-        4. Por ahora solo simula el guardado (sin persistencia real)
+        Las lecturas llegan ya validadas en su forma y aplanadas (tuplas en
+        el orden de READING_COLUMNS); las que no cumplen las reglas de
+        negocio se descartan y el resto se inserta en bloque en una sola
+        transacción. La ingesta es idempotente: los duplicados
+        (meter_id, timestamp) se descartan y se reportan en la respuesta.
 
         Args:
-            request_data (Dict[str, Any]): Datos del registro de energía
+            rows: Lecturas del request
+            summary: Datos de respuesta (operation, subject, conteos, timestamp)
 
         Returns:
             HTTP Response: Respuesta estructurada con ResultHandler
         """
         try:
-            # Validar campos obligatorios
-            if "operation" not in request_data:
-                return ResultHandler.bad_request(message="Campo 'operation' es requerido")
-
-            if "subject" not in request_data:
-                return ResultHandler.bad_request(message="Campo 'subject' es requerido")
-
-            if "meter" not in request_data:
-                return ResultHandler.bad_request(message="Campo 'meter' es requerido")
-
-            # Transformar el diccionario de meter a lista de MeterReadings
-            meter_readings_list = []
-            meter_dict = request_data.get("meter", {})
-
-            for meter_id, readings_data in meter_dict.items():
-                # Convertir cada reading al modelo ReadingData
-                readings = []
-                for reading_item in readings_data:
-                    reading = ReadingData(
-                        ts=reading_item.get("ts"),
-                        flag=reading_item.get("flag"),
-                        voltage=VoltageData(**reading_item.get("voltage", {})),
-                        current=CurrentData(**reading_item.get("current", {})),
-                        power=PowerData(**reading_item.get("power", {})),
-                        energy=EnergyData(**reading_item.get("energy", {}))
-                    )
-                    readings.append(reading)
-
-                meter_reading = MeterReadings(
-                    meter_id=meter_id,
-                    readings=readings
-                )
-                meter_readings_list.append(meter_reading)
-
-            # Crear objeto EnergyRecord del dominio
-            energy_record = EnergyRecord(
-                operation=request_data.get("operation"),
-                subject=request_data.get("subject"),
-                meter_readings=meter_readings_list,
-                created_at=datetime.now(bogota_tz)
-            )
-
-            # TODO: Implementar persistencia en base de datos
-            # Descomentar las siguientes líneas cuando la tabla energy_readings esté creada:
-            #
-            # saved_record = self.energy_repository.save(energy_record)
-            #
-            # El repositorio descompondrá el registro en lecturas individuales
-            # y las guardará en la tabla energy_readings
-
-            # Preparar datos de respuesta
-            response_data = {
-                "operation": energy_record.operation,
-                "subject": energy_record.subject,
-                "meters_count": len(energy_record.meter_readings),
-                "total_readings": sum(len(mr.readings) for mr in energy_record.meter_readings),
-                "timestamp": energy_record.created_at.isoformat() if energy_record.created_at else None
-            }
+            valid, rejections = self._validate(rows)
+            fresh, _ = self._drop_duplicates(valid)
+            inserted = self.persist_rows(fresh)
 
             return ResultHandler.success(
-                data=response_data,
-                message="El record ha sido almacenado correctamente"
+                data={
+                    **summary,
+                    "accepted_readings": inserted,
+                    "duplicate_readings": len(valid) - inserted,
+                    **rejections
+                },
+                message=self._saved_message(rejections, "El record ha sido almacenado correctamente")
             )
 
         except ValueError as e:
@@ -112,3 +252,477 @@ class EnergyService:
             return ResultHandler.internal_error(
                 message="Error interno del servidor al procesar registro de energía"
             )
+
+    async def enqueue_readings(self, rows: List[tuple], summary: Dict[str, Any]):
+        """
+        Caso de uso: Recibir las lecturas de un registro para ingesta diferida.
+
+        Encola las lecturas y responde 202 sin esperar a la BD.
+        La cola agrupa las lecturas de muchos requests y las persiste por lotes.
+        Los duplicados reportados son los detectados en memoria; los que solo
+        detecta la BD al insertar se cuentan en las métricas de la cola.
+
+        Args:
+            rows: Lecturas del request (tuplas en el orden de READING_COLUMNS)
+            summary: Datos de respuesta (operation, subject, conteos, timestamp)
+
+        Returns:
+            HTTP Response: 202 si fue encolado, 503 si la cola está llena
+        """
+        try:
+            accepted, known_duplicates, rejections = await self.enqueue_rows(rows)
+
+            return ResultHandler.accepted(
+                data={
+                    **summary,
+                    "accepted_readings": accepted,
+                    "duplicate_readings": known_duplicates,
+                    **rejections
+                },
+                message=self._saved_message(rejections, "El record fue recibido y será almacenado")
+            )
+
+        except IngestionQueueFull as e:
+            return ResultHandler.error(message=str(e), status_code=503)
+        except Exception as e:
+            print(f"Error al encolar registro de energía: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno del servidor al procesar registro de energía"
+            )
+
+    async def enqueue_rows(self, rows: List[tuple]) -> Tuple[int, int, Dict[str, Any]]:
+        """
+        Valida, descarta los duplicados conocidos y encola; con shards, el
+        lote se reparte entre los shards dueños de sus medidores, que hacen
+        ese mismo trabajo con su propia cola. La validación puede consultar
+        la BD (estado de los medidores): corre en el threadpool.
+
+        Returns:
+            Tuple: (lecturas encoladas, duplicados descartados, {"rejected_readings", "rejection_reasons"})
+
+        Raises:
+            IngestionQueueFull: Si la cola sigue llena tras su put_timeout_ms
+        """
+        if self.ingestion_shards is not None:
+            return await self.ingestion_shards.submit(rows)
+        valid, rejections = await anyio.to_thread.run_sync(self._validate, rows)
+        fresh, known_duplicates = self._drop_duplicates(valid)
+        await self.ingestion_queue.submit(fresh)
+        return len(fresh), known_duplicates, rejections
+
+    async def _ingest_rows(self, rows: List[tuple]) -> Tuple[int, int, Dict[str, Any]]:
+        """
+        Entrega lecturas al pipeline de ingesta: a la cola o a los shards si
+        están activos (enqueue_rows) o, en modo síncrono, inserción directa
+        en el threadpool.
+
+        Returns:
+            Tuple: (lecturas aceptadas, duplicados descartados, {"rejected_readings", "rejection_reasons"})
+
+        Raises:
+            IngestionQueueFull: Si la cola sigue llena tras su put_timeout_ms
+        """
+        if self.ingestion_queue is not None or self.ingestion_shards is not None:
+            return await self.enqueue_rows(rows)
+        valid, rejections = await anyio.to_thread.run_sync(self._validate, rows)
+        fresh, _ = self._drop_duplicates(valid)
+        inserted = await anyio.to_thread.run_sync(self.persist_rows, fresh)
+        return inserted, len(valid) - inserted, rejections
+
+    async def submit_readings(self, rows: List[tuple]) -> Tuple[int, int, int]:
+        """
+        Entrega lecturas al pipeline de ingesta sin construir una respuesta
+        HTTP (p. ej. los frames del WebSocket de ingesta).
+
+        Returns:
+            Tuple[int, int, int]: (lecturas aceptadas, duplicados descartados, lecturas inválidas)
+
+        Raises:
+            IngestionQueueFull: Si la cola sigue llena tras su put_timeout_ms
+        """
+        accepted, duplicates, rejections = await self._ingest_rows(rows)
+        return accepted, duplicates, rejections["rejected_readings"]
+
+    async def save_reading_stream(self, batches: AsyncIterator[List[tuple]], summary: Callable[[], Dict[str, Any]]):
+        """
+        Caso de uso: Guardar una carga grande de lecturas que llega en streaming.
+
+        Cada lote (ya validado en su forma y aplanado mientras se lee el
+        cuerpo) se entrega al pipeline de ingesta antes de leer el
+        siguiente, así que la memoria no depende del tamaño de la carga.
+        Con cola o shards pasa por enqueue_rows, como el resto de la
+        ingesta (los shards siguen siendo los únicos que escriben sus
+        medidores), y la espera de la cola llena frena la lectura del
+        cuerpo; en modo síncrono cada lote se inserta en su propia
+        transacción (contrapresión natural de TCP).
+
+        Si el cuerpo resulta inválido a mitad de camino, los lotes anteriores
+        quedan guardados; la respuesta de error los reporta y reenviar la
+        carga completa es seguro porque la ingesta es idempotente.
+
+        Args:
+            batches: Lotes de filas en el orden de READING_COLUMNS
+            summary: Datos de respuesta de lo leído hasta el momento
+
+        Returns:
+            HTTP Response: 200 con conteos y errores de validación por lectura
+            (202 si se encoló), el status de RequestBodyError con lo guardado
+            hasta el error, o 503 si la cola sigue llena
+        """
+        queued = self.ingestion_queue is not None or self.ingestion_shards is not None
+        accepted = duplicates = chunks = rejected = 0
+        reasons: Dict[str, int] = {}
+
+        def progress() -> Dict[str, Any]:
+            # rejected_readings del resumen son las lecturas con forma inválida
+            data = {**summary(), "accepted_readings": accepted, "duplicate_readings": duplicates, "chunks": chunks}
+            data["rejected_readings"] += rejected
+            data["rejection_reasons"] = reasons
+            return data
+
+        try:
+            async for rows in batches:
+                batch_accepted, batch_duplicates, rejections = await self._ingest_rows(rows)
+                rejected += rejections["rejected_readings"]
+                for reason, count in rejections["rejection_reasons"].items():
+                    reasons[reason] = reasons.get(reason, 0) + count
+                accepted += batch_accepted
+                duplicates += batch_duplicates
+                chunks += 1
+
+            data = progress()
+            if queued:
+                return ResultHandler.accepted(
+                    data=data,
+                    message=self._saved_message(data, "La carga fue recibida y será almacenada")
+                )
+            if data["rejected_readings"]:
+                return ResultHandler.success(
+                    data=data,
+                    message=f"Carga almacenada; se descartaron {data['rejected_readings']} lecturas inválidas"
+                )
+            return ResultHandler.success(data=data, message="La carga ha sido almacenada correctamente")
+
+        except RequestBodyError as e:
+            return ResultHandler.error(
+                message=str(e),
+                status_code=e.status_code,
+                data=progress()
+            )
+        except IngestionQueueFull as e:
+            return ResultHandler.error(message=str(e), status_code=503, data=progress())
+        except Exception as e:
+            print(f"Error al procesar carga de lecturas en streaming: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno del servidor al procesar la carga de lecturas"
+            )
+
+    @staticmethod
+    def _saved_message(rejections: Dict[str, Any], message: str) -> str:
+        if rejections["rejected_readings"]:
+            return f"{message}; se descartaron {rejections['rejected_readings']} lecturas inválidas"
+        return message
+
+    def ingestion_metrics(self):
+        """
+        Caso de uso: Consultar el estado de la cola de ingesta.
+
+        Returns:
+            HTTP Response con profundidad de la cola y latencias de vaciado
+        """
+        dedup = self.recent_keys.metrics() if self.recent_keys is not None else {}
+        if self.meter_state is not None:
+            dedup.update(self.meter_state.metrics())
+        if self.ingestion_shards is not None:
+            return ResultHandler.success(
+                data={"mode": "sharded", **self.ingestion_shards.metrics(), **dedup},
+                message="Métricas de los shards de ingesta"
+            )
+        if self.ingestion_queue is None:
+            return ResultHandler.success(data={"mode": "sync", **dedup}, message="Ingesta síncrona: no hay cola")
+        return ResultHandler.success(
+            data={"mode": "queue", **self.ingestion_queue.metrics(), **dedup},
+            message="Métricas de la cola de ingesta"
+        )
+
+    def maintain_storage(self) -> Dict[str, Any]:
+        """
+        Un ciclo de mantenimiento del almacenamiento de lecturas: crea las
+        particiones de los próximos partition_months_ahead meses y, si hay
+        retención, archiva y retira los meses anteriores al corte.
+        Es la función de la tarea periódica de mantenimiento.
+
+        Returns:
+            Dict: Resumen del ciclo (ver ReadingStoragePort.maintain)
+        """
+        if self.reading_storage is None:
+            raise RuntimeError("Mantenimiento de almacenamiento no configurado")
+        now = _now_ms()
+        cutoff = retention_cutoff(now, self.retention_months) if self.retention_months else None
+        return self.reading_storage.maintain(partitions_until(now, self.partition_months_ahead), archive_before=cutoff)
+
+    def run_storage_maintenance(self):
+        """
+        Caso de uso: Ejecutar ya un ciclo de mantenimiento del almacenamiento.
+
+        Returns:
+            HTTP Response: Resumen del ciclo, o 409 si otro worker lo está ejecutando
+        """
+        try:
+            summary = self.maintain_storage()
+            if summary["skipped"]:
+                return ResultHandler.error(message="Otro proceso está ejecutando el mantenimiento", status_code=409)
+            return ResultHandler.success(data=summary, message="Mantenimiento de lecturas ejecutado")
+
+        except Exception as e:
+            print(f"Error en el mantenimiento de lecturas: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno del servidor en el mantenimiento de lecturas"
+            )
+
+    def storage_status(self):
+        """
+        Caso de uso: Consultar particiones, retención y meses archivados.
+
+        Returns:
+            HTTP Response: Respuesta estructurada con ResultHandler
+        """
+        try:
+            if self.reading_storage is None:
+                raise RuntimeError("Mantenimiento de almacenamiento no configurado")
+            now = _now_ms()
+            return ResultHandler.success(
+                data={
+                    "retention_months": self.retention_months,
+                    "retention_cutoff": retention_cutoff(now, self.retention_months) if self.retention_months else None,
+                    "partition_months_ahead": self.partition_months_ahead,
+                    **self.reading_storage.status()
+                },
+                message="Estado del almacenamiento de lecturas"
+            )
+
+        except Exception as e:
+            print(f"Error al consultar el almacenamiento de lecturas: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno del servidor al consultar el almacenamiento de lecturas"
+            )
+
+    def export_readings(self, meter_id: Optional[str] = None, export_format: str = "ndjson"):
+        """
+        Caso de uso: Exportar lecturas individuales en streaming.
+
+        Args:
+            meter_id: Filtra por medidor (None = todos)
+            export_format: 'ndjson' o 'csv'
+
+        Returns:
+            StreamingResponse, o respuesta de error con ResultHandler
+        """
+        try:
+            return streaming_export(
+                self.energy_repository.iter_readings(meter_id=meter_id),
+                fieldnames=list(READING_FIELDS),
+                export_format=export_format,
+                filename=f"energy_readings_{meter_id}" if meter_id else "energy_readings"
+            )
+
+        except ValueError as e:
+            return ResultHandler.bad_request(message=str(e))
+        except Exception as e:
+            print(f"Error al exportar lecturas de energía: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno del servidor al exportar lecturas de energía"
+            )
+
+    def _parse_fields(self, fields: Optional[str]) -> List[str]:
+        """
+        Proyección solicitada ('energy_ai,energy_ae'). Por defecto, todas las mediciones.
+
+        Raises:
+            ValueError: Si algún campo no existe
+        """
+        if not fields:
+            return list(READING_VALUE_FIELDS)
+        selected = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in READING_FIELDS]
+        if unknown:
+            raise ValueError(f"Campos no válidos: {', '.join(unknown)}")
+        return selected
+
+    def _iter_range(self, meter_id: str, ts_from: int, ts_to: int, fields: List[str], after_ts: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todo el rango en páginas keyset de EXPORT_BATCH_SIZE lecturas.
+        Cada página es una consulta corta sobre el índice: no se mantiene un
+        cursor abierto en la BD mientras el cliente consume la respuesta.
+        """
+        while True:
+            page = self.energy_repository.get_range(
+                meter_id, ts_from, ts_to, fields, after_ts=after_ts, limit=EXPORT_BATCH_SIZE
+            )
+            yield from page.items
+            if page.next_key is None:
+                return
+            after_ts = page.next_key
+
+    def get_meter_readings(
+        self,
+        meter_id: str,
+        ts_from: int,
+        ts_to: int,
+        fields: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        export_format: str = "json"
+    ):
+        """
+        Caso de uso: Consultar las lecturas de un medidor en un rango de tiempo.
+
+        - json: una página (keyset sobre timestamp) con next_cursor
+        - ndjson/csv: todo el rango en streaming, desde el cursor si se envía
+
+        Args:
+            meter_id: ID del medidor
+            ts_from: Inicio del rango (ms, inclusivo)
+            ts_to: Fin del rango (ms, exclusivo)
+            fields: Columnas separadas por coma (timestamp siempre se incluye)
+            cursor: Cursor opaco de la página anterior
+            limit: Tamaño de página (solo json)
+            export_format: 'json', 'ndjson' o 'csv'
+
+        Returns:
+            HTTP Response: Respuesta estructurada con ResultHandler o StreamingResponse
+        """
+        try:
+            if ts_from >= ts_to:
+                raise ValueError("El parámetro 'from' debe ser menor que 'to'")
+            selected = self._parse_fields(fields)
+            after_ts = decode_cursor(cursor, key_type=int)
+
+            if export_format != "json":
+                return streaming_export(
+                    self._iter_range(meter_id, ts_from, ts_to, selected, after_ts),
+                    fieldnames=["timestamp"] + [name for name in selected if name != "timestamp"],
+                    export_format=export_format,
+                    filename=f"meter_{meter_id}_{ts_from}_{ts_to}"
+                )
+
+            page = self.energy_repository.get_range(
+                meter_id, ts_from, ts_to, selected, after_ts=after_ts, limit=resolve_limit(limit)
+            )
+            return ResultHandler.success(
+                data={
+                    "meter_id": meter_id,
+                    "readings": [
+                        {name: value.isoformat() if isinstance(value, datetime) else value for name, value in item.items()}
+                        for item in page.items
+                    ] if "created_at" in selected else page.items,
+                    "next_cursor": page_cursor(page)
+                },
+                message=f"Se obtuvieron {len(page.items)} lecturas del medidor"
+            )
+
+        except ValueError as e:
+            return ResultHandler.bad_request(message=str(e))
+        except Exception as e:
+            print(f"Error al consultar lecturas del medidor: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno del servidor al consultar lecturas del medidor"
+            )
+
+    def get_latest_reading(self, meter_id: str):
+        """
+        Caso de uso: Consultar el último estado conocido de un medidor.
+
+        Se sirve desde la caché de estado de medidores (sin consultar la BD
+        si el medidor ya está cargado); sin caché, desde la BD.
+
+        Args:
+            meter_id: ID del medidor
+
+        Returns:
+            HTTP Response: timestamp y flag de la última lectura y último
+            valor no nulo de cada contador de energía; 404 si no hay lecturas
+        """
+        try:
+            if self.meter_state is not None:
+                state = self.meter_state.get(meter_id)
+            else:
+                state = self.energy_repository.get_meter_states([meter_id]).get(meter_id)
+            if state is None:
+                return ResultHandler.error(message=f"El medidor {meter_id} no tiene lecturas", status_code=404)
+
+            ts, flag = state[:2]
+            return ResultHandler.success(
+                data={
+                    "meter_id": meter_id,
+                    "timestamp": ts,
+                    "flag": flag,
+                    "energy": dict(zip(("ai", "ae", "ri", "re"), state[2:]))
+                },
+                message="Última lectura del medidor"
+            )
+
+        except Exception as e:
+            print(f"Error al consultar la última lectura del medidor: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno del servidor al consultar la última lectura del medidor"
+            )
+
+    def get_meter_rollups(self, meter_id: str, ts_from: int, ts_to: int, resolution: str = "1h"):
+        """
+        Caso de uso: Consultar agregados de un medidor por bucket de tiempo.
+
+        Se lee el rollup más grueso que cubre el rango sin pasarse de la
+        resolución pedida (p. ej. un mes en resolución diaria sale de 1d; un
+        rango que empieza a mitad de día, de 1h) y, si hace falta, se combinan
+        sus buckets en buckets de `resolution`. Los bordes del rango se
+        ajustan a múltiplos de 15 minutos.
+
+        Args:
+            meter_id: ID del medidor
+            ts_from: Inicio del rango (ms, inclusivo)
+            ts_to: Fin del rango (ms, exclusivo)
+            resolution: 15m, 1h, 1d o 1mo
+
+        Returns:
+            HTTP Response: Respuesta estructurada con ResultHandler
+        """
+        try:
+            if resolution not in GRANULARITIES:
+                raise ValueError(f"Resolución no válida: {resolution}. Opciones: {', '.join(GRANULARITIES)}")
+            if ts_from >= ts_to:
+                raise ValueError("El parámetro 'from' debe ser menor que 'to'")
+            if self.rollup_repository is None:
+                raise RuntimeError("Rollups no configurados")
+
+            finest = GRANULARITIES[0]
+            ts_from = bucket_start(ts_from, finest)
+            if bucket_start(ts_to, finest) != ts_to:
+                ts_to = bucket_end(bucket_start(ts_to, finest), finest)
+            source = choose_granularity(ts_from, ts_to, resolution)
+
+            rows = self.rollup_repository.get_rollups(meter_id, source, ts_from, ts_to)
+            previous = self.rollup_repository.get_previous(meter_id, source, ts_from)
+            if source != resolution:
+                rows = merge_rollups(rows, resolution)
+            buckets = present_rollups(rows, previous)
+
+            return ResultHandler.success(
+                data={
+                    "meter_id": meter_id,
+                    "from": ts_from,
+                    "to": ts_to,
+                    "resolution": resolution,
+                    "source_granularity": source,
+                    "buckets": buckets
+                },
+                message=f"Se obtuvieron {len(buckets)} buckets del medidor"
+            )
+
+        except ValueError as e:
+            return ResultHandler.bad_request(message=str(e))
+        except Exception as e:
+            print(f"Error al consultar rollups del medidor: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno del servidor al consultar rollups del medidor"
+            )
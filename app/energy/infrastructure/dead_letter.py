@@ -0,0 +1,55 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Sequence
+from zoneinfo import ZoneInfo
+from app.energy.domain.models.energy_record import READING_COLUMNS
+
+bogota_tz = ZoneInfo("America/Bogota")
+
+
+def dead_letter_settings() -> Dict[str, Any]:
+    """Directorio de lecturas no persistidas desde variables de entorno"""
+    return {"directory": os.getenv("ENERGY_DEAD_LETTER_DIR", "dead_letter")}
+
+
+class DeadLetterFile:
+    """
+    Destino durable de las lecturas que la cola de ingesta no pudo
+    persistir: ya se respondieron con 202, así que no se descartan.
+
+    Cada proceso escribe su propio archivo JSONL (readings-<pid>.jsonl) en
+    directory: una línea por lectura con las columnas de READING_COLUMNS,
+    el error y la hora del fallo. Cada escritura se sincroniza a disco
+    (fsync) antes de retornar. Para reintentarlas basta corregir la causa
+    y volver a insertar las líneas (la clave única (meter_id, timestamp)
+    ignora las que ya estén).
+    Es segura entre hilos.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"readings-{os.getpid()}.jsonl")
+        self._lock = threading.Lock()
+        self.written_rows = 0
+
+    def write(self, rows: Sequence[tuple], error: str):
+        failed_at = datetime.now(bogota_tz).isoformat()
+        lines = []
+        for row in rows:
+            record = {
+                name: value.isoformat() if isinstance(value, datetime) else value
+                for name, value in zip(READING_COLUMNS, row)
+            }
+            record["error"] = error
+            record["failed_at"] = failed_at
+            lines.append(json.dumps(record, separators=(",", ":"), default=str))
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.written_rows += len(rows)
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, List, Optional, Sequence
+import anyio.to_thread
+
+logger = logging.getLogger(__name__)
+
+# Fallas seguidas al partir un lote tras las que se deja de partir (ver IngestionQueue)
+ISOLATION_MAX_FAILURES = 8
+
+
+class IngestionQueueFull(Exception):
+    """La cola de ingesta está llena y no se liberó espacio a tiempo"""
+
+
+class IngestionQueue:
+    """
+    Cola de ingesta con vaciado por lotes.
+
+    Los requests encolan lecturas ya aplanadas (tuplas) y retornan de inmediato.
+    Una tarea de fondo agrupa las lecturas de varios requests y las entrega al
+    sink (p. ej. EnergyService.persist_rows) en una sola transacción cuando:
+    - se juntan max_batch_rows filas, o
+    - la fila más antigua lleva max_delay_ms esperando.
+
+    La memoria está acotada por max_pending_rows: si la cola está llena,
+    submit espera hasta put_timeout_ms a que un vaciado libere espacio y luego
+    lanza IngestionQueueFull (contrapresión hacia el cliente).
+
+    El sink es síncrono (BD) y corre en el threadpool de AnyIO, un lote a la vez.
+
+    Las lecturas encoladas ya se confirmaron al cliente (202): si un lote
+    sigue fallando tras max_retries intentos, se parte en mitades hasta
+    aislar las filas que fallan, y solo esas van a dead_letter (p. ej.
+    DeadLetterFile); el resto del lote se persiste. Tras ISOLATION_MAX_FAILURES
+    fallas seguidas sin ninguna parte persistida la falla no es de unas
+    filas (BD caída): lo que queda va a dead_letter sin más intentos. Sin
+    dead_letter, o si este falla, las filas se descartan (dropped_rows).
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[Sequence[tuple]], int],
+        max_batch_rows: int = 5000,
+        max_delay_ms: float = 200,
+        max_pending_rows: int = 100_000,
+        put_timeout_ms: float = 2000,
+        max_retries: int = 3,
+        dead_letter: Optional[Callable[[Sequence[tuple], str], None]] = None,
+    ):
+        self.sink = sink
+        self.dead_letter = dead_letter
+        self.max_batch_rows = max_batch_rows
+        self.max_delay = max_delay_ms / 1000
+        self.max_pending_rows = max(max_pending_rows, max_batch_rows)
+        self.put_timeout = put_timeout_ms / 1000
+        self.max_retries = max_retries
+
+        self._rows: List[tuple] = []
+        self._oldest_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._changed: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+
+        # Métricas
+        self.enqueued_rows = 0
+        self.flushed_rows = 0
+        self.inserted_rows = 0
+        self.dropped_rows = 0
+        self.dead_lettered_rows = 0
+        self.rejected_requests = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Filas en espera de ser persistidas"""
+        return len(self._rows)
+
+    def start(self):
+        """Inicia la tarea de vaciado en el event loop actual (idempotente)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._closing = False
+        self._changed = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="energy-ingestion-flusher")
+
+    async def submit(self, rows: Sequence[tuple]):
+        """
+        Encola las filas de un request.
+
+        Raises:
+            IngestionQueueFull: Si no hay espacio tras put_timeout_ms
+            RuntimeError: Si la cola se está cerrando
+        """
+        if not rows:
+            return
+        self.start()
+        if self._closing:
+            raise RuntimeError("La cola de ingesta se está cerrando")
+
+        if len(self._rows) + len(rows) > self.max_pending_rows:
+            try:
+                async with self._space:
+                    await asyncio.wait_for(
+                        self._space.wait_for(lambda: len(self._rows) + len(rows) <= self.max_pending_rows),
+                        timeout=self.put_timeout,
+                    )
+            except asyncio.TimeoutError:
+                self.rejected_requests += 1
+                raise IngestionQueueFull(
+                    f"Cola de ingesta llena ({len(self._rows)} filas pendientes)"
+                )
+
+        if not self._rows:
+            self._oldest_at = time.monotonic()
+        self._rows.extend(rows)
+        self.enqueued_rows += len(rows)
+        self._changed.set()
+
+    async def _run(self):
+        while True:
+            if not self._rows and not self._closing:
+                await self._changed.wait()
+            self._changed.clear()
+
+            # Esperar a que el lote se llene o venza el plazo de la fila más antigua
+            while self._rows and len(self._rows) < self.max_batch_rows and not self._closing:
+                remaining = self._oldest_at + self.max_delay - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._changed.clear()
+
+            while self._rows and (len(self._rows) >= self.max_batch_rows or self._closing
+                                  or time.monotonic() - self._oldest_at >= self.max_delay):
+                batch = self._rows[:self.max_batch_rows]
+                self._rows = self._rows[self.max_batch_rows:]
+                self._oldest_at = time.monotonic() if self._rows else None
+                async with self._space:
+                    self._space.notify_all()
+                await self._flush(batch)
+
+            if self._closing and not self._rows:
+                return
+
+    async def _persist(self, batch: List[tuple]):
+        """Entrega un lote al sink y registra sus métricas; propaga el error del sink"""
+        start = time.perf_counter()
+        inserted = await anyio.to_thread.run_sync(self.sink, batch)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.flushed_rows += len(batch)
+        self.inserted_rows += inserted if isinstance(inserted, int) else len(batch)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    async def _flush(self, batch: List[tuple]):
+        error: Optional[Exception] = None
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self._persist(batch)
+                return
+            except Exception as e:
+                error = e
+                self.failed_flushes += 1
+                logger.error(f"Error al persistir lote de {len(batch)} lecturas (intento {attempt}) → {e}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(min(0.1 * 2 ** attempt, 2.0))
+        await self._isolate(batch, error)
+
+    async def _isolate(self, batch: List[tuple], error: Exception):
+        """Parte un lote que falló hasta aislar sus filas problemáticas (ver clase)"""
+        pending = [(batch, error)]
+        failures = 0
+        while pending:
+            part, part_error = pending.pop()
+            if len(part) == 1 or failures >= ISOLATION_MAX_FAILURES:
+                await self._dead_letter(part, part_error)
+                continue
+            middle = len(part) // 2
+            # La pila atiende primero la primera mitad
+            for half in (part[middle:], part[:middle]):
+                try:
+                    await self._persist(half)
+                    failures = 0
+                except Exception as e:
+                    self.failed_flushes += 1
+                    failures += 1
+                    pending.append((half, e))
+
+    async def _dead_letter(self, rows: List[tuple], error: Exception):
+        if self.dead_letter is not None:
+            try:
+                await anyio.to_thread.run_sync(self.dead_letter, rows, str(error))
+                self.dead_lettered_rows += len(rows)
+                logger.error(f"{len(rows)} lecturas enviadas a dead letter → {error}")
+                return
+            except Exception as e:
+                logger.error(f"Error al escribir {len(rows)} lecturas en dead letter → {e}")
+        self.dropped_rows += len(rows)
+        logger.error(f"Se descartaron {len(rows)} lecturas → {error}")
+
+    async def stop(self):
+        """Vacía todo lo pendiente y detiene la tarea (apagado ordenado)"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._changed.set()
+        await self._task
+        self._task = None
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self.depth,
+            "max_pending_rows": self.max_pending_rows,
+            "enqueued_rows": self.enqueued_rows,
+            "flushed_rows": self.flushed_rows,
+            "inserted_rows": self.inserted_rows,
+            "ignored_duplicates": self.flushed_rows - self.inserted_rows,
+            "dropped_rows": self.dropped_rows,
+            "dead_lettered_rows": self.dead_lettered_rows,
+            "rejected_requests": self.rejected_requests,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+def ingestion_settings() -> dict:
+    """Parámetros de la cola desde variables de entorno"""
+    return {
+        "max_batch_rows": int(os.getenv("ENERGY_QUEUE_BATCH_ROWS", "5000")),
+        "max_delay_ms": float(os.getenv("ENERGY_QUEUE_MAX_DELAY_MS", "200")),
+        "max_pending_rows": int(os.getenv("ENERGY_QUEUE_MAX_PENDING_ROWS", "100000")),
+        "put_timeout_ms": float(os.getenv("ENERGY_QUEUE_PUT_TIMEOUT_MS", "2000")),
+        "max_retries": int(os.getenv("ENERGY_QUEUE_MAX_RETRIES", "3")),
+    }
@@ -0,0 +1,477 @@
+import asyncio
+import importlib
+import logging
+import os
+import secrets
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import get_context, shared_memory
+from multiprocessing.connection import AuthenticationError, Client, Listener, wait
+from queue import Empty, SimpleQueue
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import anyio.to_thread
+import numpy as np
+from app.energy.domain.models.energy_record import READING_COLUMNS, METER_ID_INDEX
+from app.energy.domain.models.reading_batch import ReadingBatch, VALUE_COLUMNS
+from app.energy.infrastructure.ingestion_queue import IngestionQueueFull
+from app.energy.infrastructure.meter_state import attach_shared_memory
+
+logger = logging.getLogger(__name__)
+
+# Sockets de los shards (separados por os.pathsep) y clave de autenticación;
+# los define ingestion_shards antes de lanzar los workers
+SOCKETS_ENV = "ENERGY_INGEST_SHARD_SOCKETS"
+AUTHKEY_ENV = "ENERGY_INGEST_SHARD_AUTHKEY"
+SHARD_START_TIMEOUT_S = 60
+# Reinicios de un shard dentro de la ventana antes de detener el servidor
+SHARD_MAX_RESTARTS = 5
+SHARD_RESTART_WINDOW_S = 300
+# Lotes más chicos viajan serializados por el socket: crear y liberar un
+# segmento cuesta más que copiar unas pocas filas
+SHARED_MEMORY_MIN_ROWS = 256
+
+# Columnas de texto de una fila; se envían como códigos int32 + lista de valores
+_OPERATION_INDEX = READING_COLUMNS.index("operation")
+_SUBJECT_INDEX = READING_COLUMNS.index("subject")
+_CREATED_INDEX = READING_COLUMNS.index("created_at")
+
+
+def shard_settings() -> Dict[str, Any]:
+    """
+    Shards a lanzar (ENERGY_INGEST_SHARDS; 0 = uno por CPU), fábrica del
+    servicio de cada shard y reinicios tolerados por shard en la ventana
+    (ENERGY_INGEST_SHARD_MAX_RESTARTS, ENERGY_INGEST_SHARD_RESTART_WINDOW_S)
+    """
+    return {
+        "count": int(os.getenv("ENERGY_INGEST_SHARDS", "0")),
+        "service_factory": os.getenv("ENERGY_INGEST_SHARD_FACTORY", "app.composition:get_energy_service"),
+        "max_restarts": int(os.getenv("ENERGY_INGEST_SHARD_MAX_RESTARTS", str(SHARD_MAX_RESTARTS))),
+        "restart_window_s": float(os.getenv("ENERGY_INGEST_SHARD_RESTART_WINDOW_S", str(SHARD_RESTART_WINDOW_S))),
+    }
+
+
+def shard_client_settings() -> Optional[Dict[str, Any]]:
+    """Sockets y clave publicados por ingestion_shards; None si no hay shards en marcha"""
+    sockets = os.getenv(SOCKETS_ENV)
+    if not sockets:
+        return None
+    return {
+        "sockets": sockets.split(os.pathsep),
+        "authkey": bytes.fromhex(os.environ[AUTHKEY_ENV]),
+        "shared_memory_min_rows": int(os.getenv("ENERGY_INGEST_SHARD_SHM_MIN_ROWS", str(SHARED_MEMORY_MIN_ROWS))),
+    }
+
+
+def shard_of(meter_id: str, shards: int) -> int:
+    """Shard dueño de un medidor: crc32 (igual en todos los procesos, a diferencia de hash())"""
+    return zlib.crc32(meter_id.encode("utf-8")) % shards
+
+
+def _codes(column: Sequence[Any]) -> Tuple[np.ndarray, list]:
+    lookup: Dict[Any, int] = {}
+    codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in column), dtype=np.int32, count=len(column))
+    return codes, list(lookup)
+
+
+def pack_rows(rows: Sequence[tuple]) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """
+    Copia un lote a un segmento de memoria compartida en columnas:
+    ts y flag (int64), las 14 mediciones (float64, nulo = NaN) y códigos
+    int32 de meter_id, operation, subject y created_at. Los valores de
+    texto distintos (pocos por lote) van en el encabezado.
+
+    Returns:
+        Tuple: (segmento, encabezado para unpack_rows); quien lo crea lo libera
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(READING_COLUMNS)
+    batch = ReadingBatch.from_columns(columns)
+    n = len(batch)
+    operations, operation_names = _codes(columns[_OPERATION_INDEX])
+    subjects, subject_names = _codes(columns[_SUBJECT_INDEX])
+    created, created_values = _codes(columns[_CREATED_INDEX])
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * (8 * 2 + 8 * len(VALUE_COLUMNS) + 4 * 4)))
+    ints = np.ndarray((2, n), dtype=np.int64, buffer=shm.buf)
+    ints[0], ints[1] = batch.ts, batch.flags
+    values = np.ndarray(batch.values.shape, dtype=np.float64, buffer=shm.buf, offset=ints.nbytes)
+    values[:] = batch.values
+    codes = np.ndarray((4, n), dtype=np.int32, buffer=shm.buf, offset=ints.nbytes + values.nbytes)
+    codes[0], codes[1], codes[2], codes[3] = batch.meters, operations, subjects, created
+    del ints, values, codes  # el segmento no se puede cerrar con vistas abiertas
+    return shm, {
+        "rows": n,
+        "meter_ids": batch.meter_ids,
+        "operations": operation_names,
+        "subjects": subject_names,
+        "created_at": created_values,
+    }
+
+
+def unpack_rows(shm: shared_memory.SharedMemory, header: Dict[str, Any]) -> List[tuple]:
+    """Filas en el orden de READING_COLUMNS desde un segmento de pack_rows"""
+    n = header["rows"]
+    ints = np.ndarray((2, n), dtype=np.int64, buffer=shm.buf)
+    values = np.ndarray((len(VALUE_COLUMNS), n), dtype=np.float64, buffer=shm.buf, offset=ints.nbytes)
+    codes = np.ndarray((4, n), dtype=np.int32, buffer=shm.buf, offset=ints.nbytes + values.nbytes)
+    ts, flags = ints[0].tolist(), ints[1].tolist()
+    measurements = np.where(np.isnan(values), None, values).tolist()
+    texts = [
+        np.array(header[name], dtype=object)[codes[i]].tolist() if n else []
+        for i, name in enumerate(("meter_ids", "operations", "subjects", "created_at"))
+    ]
+    del ints, values, codes
+    meter_ids, operations, subjects, created = texts
+    return list(zip(operations, subjects, meter_ids, ts, flags, *measurements, created))
+
+
+class IngestionShardClient:
+    """
+    Lado de los workers HTTP del motor de ingesta por shards.
+
+    Reparte cada lote entre los shards por medidor (shard_of) y entrega la
+    parte de cada shard por memoria compartida: las columnas van en un
+    segmento (pack_rows) y por el socket del shard solo viajan su nombre y
+    el encabezado. Las partes de menos de shared_memory_min_rows filas van
+    serializadas por el socket. El shard valida, descarta duplicados y
+    encola, y responde los conteos; las partes de un lote se entregan en
+    paralelo.
+
+    Usa una conexión por petición en curso: las libres se reutilizan.
+    Es segura entre hilos.
+    """
+
+    def __init__(self, sockets: Sequence[str], authkey: bytes, shared_memory_min_rows: int = SHARED_MEMORY_MIN_ROWS):
+        """
+        Args:
+            sockets: Socket Unix de cada shard, en orden de shard
+            authkey: Clave de autenticación de las conexiones
+            shared_memory_min_rows: Filas desde las que una parte va por memoria compartida
+        """
+        self.sockets = list(sockets)
+        self.authkey = authkey
+        self.shared_memory_min_rows = shared_memory_min_rows
+        self._idle: List[SimpleQueue] = [SimpleQueue() for _ in self.sockets]
+        self._owners: Dict[str, int] = {}
+
+        # Métricas
+        self.handoffs = 0
+        self.handoff_rows = 0
+        self.shared_memory_handoffs = 0
+        self.rejected_requests = 0
+        self._total_handoff_ms = 0.0
+
+    def _connect(self, shard: int):
+        return Client(self.sockets[shard], family="AF_UNIX", authkey=self.authkey)
+
+    def _request(self, shard: int, message: tuple):
+        """
+        Envía un mensaje a un shard y espera su respuesta. Una conexión libre
+        puede haber quedado muerta (el shard se reinició): se descarta y el
+        mensaje se reenvía una vez por una conexión nueva. Reenviar es
+        seguro porque la ingesta es idempotente.
+        """
+        try:
+            conn, attempts = self._idle[shard].get_nowait(), 2
+        except Empty:
+            conn, attempts = self._connect(shard), 1
+        while True:
+            try:
+                conn.send(message)
+                reply = conn.recv()
+                break
+            except (OSError, EOFError):
+                conn.close()
+                attempts -= 1
+                if not attempts:
+                    raise
+                conn = self._connect(shard)
+        self._idle[shard].put(conn)
+        return reply
+
+    def _handoff(self, shard: int, rows: List[tuple]):
+        start = time.perf_counter()
+        if len(rows) < self.shared_memory_min_rows:
+            reply = self._request(shard, ("rows", rows))
+        else:
+            shm, header = pack_rows(rows)
+            try:
+                reply = self._request(shard, ("batch", shm.name, header))
+            finally:
+                shm.close()
+                shm.unlink()
+            self.shared_memory_handoffs += 1
+        self.handoffs += 1
+        self.handoff_rows += len(rows)
+        self._total_handoff_ms += (time.perf_counter() - start) * 1000
+        return reply
+
+    async def submit(self, rows: Sequence[tuple]) -> Tuple[int, int, Dict[str, Any]]:
+        """
+        Entrega un lote a los shards dueños de sus medidores.
+
+        Returns:
+            Tuple: (lecturas aceptadas, duplicados descartados,
+            {"rejected_readings", "rejection_reasons"})
+
+        Raises:
+            IngestionQueueFull: Si la cola de algún shard sigue llena (las
+                partes de los demás quedan encoladas; reenviar es seguro)
+        """
+        shards = len(self.sockets)
+        owners = self._owners
+        parts: Dict[int, List[tuple]] = {}
+        for row in rows:
+            meter_id = row[METER_ID_INDEX]
+            shard = owners.get(meter_id)
+            if shard is None:
+                shard = owners[meter_id] = shard_of(meter_id, shards)
+            parts.setdefault(shard, []).append(row)
+
+        replies = await asyncio.gather(*(
+            anyio.to_thread.run_sync(self._handoff, shard, part) for shard, part in parts.items()
+        ))
+        accepted = duplicates = rejected = 0
+        reasons: Dict[str, int] = {}
+        for reply in replies:
+            if reply[0] == "full":
+                self.rejected_requests += 1
+                raise IngestionQueueFull(reply[1])
+            if reply[0] != "ok":
+                raise RuntimeError(f"Error en el shard de ingesta: {reply[1]}")
+            _, shard_accepted, shard_duplicates, rejections = reply
+            accepted += shard_accepted
+            duplicates += shard_duplicates
+            rejected += rejections["rejected_readings"]
+            for reason, count in rejections["rejection_reasons"].items():
+                reasons[reason] = reasons.get(reason, 0) + count
+        return accepted, duplicates, {"rejected_readings": rejected, "rejection_reasons": reasons}
+
+    def metrics(self) -> dict:
+        """Métricas de entrega de este worker y de la cola de cada shard"""
+        shards = [self._request(shard, ("metrics",))[1] for shard in range(len(self.sockets))]
+        return {
+            "shards": shards,
+            "queue_depth": sum(shard.get("queue_depth", 0) for shard in shards),
+            "handoffs": self.handoffs,
+            "handoff_rows": self.handoff_rows,
+            "shared_memory_handoffs": self.shared_memory_handoffs,
+            "avg_handoff_ms": round(self._total_handoff_ms / self.handoffs, 2) if self.handoffs else 0.0,
+            "rejected_requests": self.rejected_requests,
+        }
+
+
+class IngestionShardServer:
+    """
+    Un shard del motor de ingesta: proceso dueño de los medidores que le
+    asigna shard_of. Recibe lotes por su socket Unix y los entrega a su
+    propio EnergyService (validación, duplicados, cola de ingesta y
+    persist_rows con deltas, rollups, agregador y estado de medidores).
+
+    Como cada medidor llega siempre al mismo shard y su cola persiste un
+    lote a la vez, las lecturas de un medidor se procesan en orden sin
+    locks entre procesos: los deltas se calculan contra el contexto ya
+    guardado por el mismo shard.
+    """
+
+    def __init__(self, index: int, service, socket_path: str, authkey: bytes):
+        self.index = index
+        self.service = service
+        self.socket_path = socket_path
+        self.authkey = authkey
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def serve(self, ready=None):
+        """Atiende conexiones hasta SIGTERM/SIGINT y luego vacía la cola"""
+        self._loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self._loop.add_signal_handler(signum, stop.set)
+        listener = Listener(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+        threading.Thread(target=self._accept, args=(listener,), name=f"shard-{self.index}-accept", daemon=True).start()
+        if ready is not None:
+            ready.set()
+        await stop.wait()
+        listener.close()
+        if self.service.ingestion_queue is not None:
+            await self.service.ingestion_queue.stop()
+        logger.info(f"Shard de ingesta {self.index} detenido")
+
+    def _accept(self, listener: Listener):
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn):
+        """Mensajes de un worker: ("batch", segmento, encabezado) o ("metrics",)"""
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                conn.send(self._handle(message))
+
+    def _handle(self, message: tuple) -> tuple:
+        if message[0] == "metrics":
+            return "ok", self.metrics()
+        try:
+            if message[0] == "rows":
+                rows = message[1]
+            else:
+                shm = attach_shared_memory(message[1])
+                try:
+                    rows = unpack_rows(shm, message[2])
+                finally:
+                    shm.close()
+            future = asyncio.run_coroutine_threadsafe(self.service.enqueue_rows(rows), self._loop)
+            accepted, duplicates, rejections = future.result()
+            return "ok", accepted, duplicates, rejections
+        except IngestionQueueFull as e:
+            return "full", str(e)
+        except Exception as e:
+            logger.error(f"Error en el shard de ingesta {self.index} → {e}")
+            return "error", str(e)
+
+    def metrics(self) -> dict:
+        service = self.service
+        data = {"shard": self.index, "pid": os.getpid()}
+        if service.ingestion_queue is not None:
+            data.update(service.ingestion_queue.metrics())
+        if service.recent_keys is not None:
+            data.update(service.recent_keys.metrics())
+        return data
+
+
+def run_shard(index: int, socket_path: str, authkey: bytes, service_factory: str, ready=None):
+    """
+    Punto de entrada del proceso de un shard. service_factory ("modulo:funcion")
+    construye su EnergyService; el shard lo usa siempre con cola de ingesta.
+    """
+    logging.basicConfig(level=logging.INFO)
+    os.environ["ENERGY_INGEST_MODE"] = "queue"
+    os.environ.pop(SOCKETS_ENV, None)
+    module, attribute = service_factory.split(":")
+    service = getattr(importlib.import_module(module), attribute)()
+    asyncio.run(IngestionShardServer(index, service, socket_path, authkey).serve(ready))
+
+
+def _start_shard(context, sockets: Sequence[str], authkey: bytes, service_factory: str, index: int):
+    """Lanza el proceso de un shard; retorna (proceso, evento de listo)"""
+    socket_path = sockets[index]
+    # Un shard que murió deja su socket y el Listener del nuevo no podría crearlo
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+    ready = context.Event()
+    process = context.Process(
+        target=run_shard, args=(index, socket_path, authkey, service_factory, ready), name=f"energy-ingest-shard-{index}"
+    )
+    process.start()
+    return process, ready
+
+
+def _supervise(processes: List, restart, stopping: threading.Event, failure: List[str], max_restarts: int, window_s: float):
+    """
+    Reinicia los shards que terminan mientras el servidor sigue en marcha.
+    Si un shard se reinicia más de max_restarts veces en window_s segundos,
+    o no vuelve a arrancar, anota la falla en failure y envía SIGTERM al
+    proceso: el servidor se detiene en lugar de seguir aceptando lecturas
+    de medidores sin shard.
+    """
+    restarts: List[List[float]] = [[] for _ in processes]
+    while not stopping.is_set():
+        sentinels = {process.sentinel: index for index, process in enumerate(processes)}
+        for sentinel in wait(list(sentinels), timeout=1.0):
+            if stopping.is_set():
+                return
+            index = sentinels[sentinel]
+            processes[index].join()
+            now = time.monotonic()
+            restarts[index] = [t for t in restarts[index] if now - t < window_s] + [now]
+            logger.error(f"El shard de ingesta {index} terminó (exitcode={processes[index].exitcode})")
+            if len(restarts[index]) > max_restarts:
+                failure.append(f"El shard de ingesta {index} se reinició más de {max_restarts} veces en {window_s:g} s")
+            else:
+                processes[index], ready = restart(index)
+                if ready.wait(SHARD_START_TIMEOUT_S):
+                    logger.info(f"Shard de ingesta {index} reiniciado")
+                else:
+                    failure.append(f"El shard de ingesta {index} no volvió a arrancar (exitcode={processes[index].exitcode})")
+            if failure:
+                logger.critical(f"{failure[0]}; se detiene el servidor")
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+
+
+@contextmanager
+def ingestion_shards(
+    count: int,
+    service_factory: str,
+    stop_timeout_s: float = 30,
+    max_restarts: int = SHARD_MAX_RESTARTS,
+    restart_window_s: float = SHARD_RESTART_WINDOW_S
+) -> Iterator[List[str]]:
+    """
+    Lanza count procesos shard y publica sus sockets en el entorno
+    (ENERGY_INGEST_SHARD_SOCKETS, ENERGY_INGEST_SHARD_AUTHKEY) para los
+    workers lanzados dentro del bloque. Un hilo supervisor reinicia los
+    shards que terminan (los workers se reconectan solos); si uno no se
+    recupera detiene el servidor con SIGTERM y el bloque termina con
+    RuntimeError. Al salir los detiene con SIGTERM: cada uno vacía su
+    cola antes de terminar.
+    """
+    context = get_context("spawn")
+    authkey = secrets.token_bytes(16)
+    directory = tempfile.mkdtemp(prefix="volt-ingest-")
+    sockets = [os.path.join(directory, f"shard-{index}.sock") for index in range(count)]
+    processes = []
+    stopping = threading.Event()
+    failure: List[str] = []
+    supervisor = None
+    try:
+        start = partial(_start_shard, context, sockets, authkey, service_factory)
+        readiness = []
+        for index in range(count):
+            process, ready = start(index)
+            processes.append(process)
+            readiness.append(ready)
+        for index, ready in enumerate(readiness):
+            if not ready.wait(SHARD_START_TIMEOUT_S):
+                raise RuntimeError(f"El shard de ingesta {index} no arrancó (exitcode={processes[index].exitcode})")
+        supervisor = threading.Thread(
+            target=_supervise, args=(processes, start, stopping, failure, max_restarts, restart_window_s),
+            name="energy-ingest-shard-supervisor", daemon=True
+        )
+        supervisor.start()
+        os.environ[SOCKETS_ENV] = os.pathsep.join(sockets)
+        os.environ[AUTHKEY_ENV] = authkey.hex()
+        logger.info(f"{count} shards de ingesta en marcha")
+        yield sockets
+        if failure:
+            raise RuntimeError(failure[0])
+    finally:
+        stopping.set()
+        if supervisor is not None:
+            supervisor.join(SHARD_START_TIMEOUT_S)
+        os.environ.pop(SOCKETS_ENV, None)
+        os.environ.pop(AUTHKEY_ENV, None)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(stop_timeout_s)
+            if process.is_alive():
+                process.kill()
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,240 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, Iterator, Optional
+import numpy as np
+from app.energy.domain.models.reading_batch import ReadingBatch, ENERGY_VALUES
+from app.energy.domain.models.reading_deltas import MeterState
+from app.energy.domain.ports.energy_repository_port import EnergyRepositoryPort
+
+try:
+    import fcntl
+except ImportError:  # Windows: la tabla se comparte solo dentro del proceso
+    fcntl = None
+
+# Un registro por medidor, en la posición de su clave entera (meters.id); ts = 0: sin estado
+STATE_DTYPE = np.dtype([("ts", np.int64), ("flag", np.int64), ("energy", np.float64, (4,))])
+
+# Nombre del segmento de memoria compartida; lo define app.server antes de lanzar los workers
+SHARED_NAME_ENV = "ENERGY_METER_STATE_SHM"
+
+
+def meter_state_settings() -> Dict[str, Any]:
+    """Parámetros de la tabla de estado de medidores desde variables de entorno"""
+    return {
+        "capacity": int(os.getenv("ENERGY_METER_STATE_CAPACITY", "250000")),
+        "shared_name": os.getenv(SHARED_NAME_ENV) or None,
+    }
+
+
+def _lock_path(name: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f"{name.lstrip('/')}.lock")
+
+
+@contextmanager
+def shared_meter_state(capacity: int) -> Iterator[shared_memory.SharedMemory]:
+    """
+    Segmento de memoria compartida para la tabla de estado de los workers
+    lanzados dentro del bloque: su nombre se publica en
+    ENERGY_METER_STATE_SHM (los workers heredan el entorno) y se libera al
+    salir. La memoria nueva llega en ceros: todos los medidores sin estado.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(capacity, 1) * STATE_DTYPE.itemsize)
+    os.environ[SHARED_NAME_ENV] = shm.name
+    try:
+        yield shm
+    finally:
+        os.environ.pop(SHARED_NAME_ENV, None)
+        shm.close()
+        # Los workers pudieron quitar el registro del resource_tracker (ver attach_shared_memory)
+        resource_tracker.register(shm._name, "shared_memory")
+        shm.unlink()
+        try:
+            os.remove(_lock_path(shm.name))
+        except OSError:
+            pass
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Abre un segmento existente sin que el proceso lo borre al terminar"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Antes de 3.13 el resource_tracker borraría el segmento al salir el worker
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class MeterStateTable:
+    """
+    Estado de la última lectura de cada medidor (timestamp, flag y último
+    valor no nulo de cada contador de energía) en memoria, para que la
+    validación y el cálculo de deltas no consulten energy_readings por lote.
+
+    Almacenamiento compacto: un arreglo numpy de registros STATE_DTYPE
+    (48 bytes por medidor) indexado por la clave entera del medidor, sin
+    diccionarios por medidor. Los medidores con clave >= capacity no se
+    guardan: su estado se consulta a la BD cada vez.
+
+    - Lectura (lookup): los medidores sin estado se cargan de la BD en una
+      sola consulta para todos (get_meter_states) y quedan en la tabla.
+    - Escritura (update): después de persistir un lote, con el estado de
+      su última lectura por medidor (write-through).
+    - Invalidación (invalidate): el cálculo de deltas compara el estado con
+      la última lectura de la BD y descarta el que quedó atrás.
+    Lectura y escritura son monótonas: un estado solo reemplaza a otro más
+    antiguo, así que una carga desde la BD que compite con una escritura no
+    retrocede.
+
+    Coherencia entre workers: con ENERGY_METER_STATE_SHM (lo define
+    app.server) el arreglo vive en memoria compartida y todos los workers
+    del servidor leen y escriben la misma tabla, serializados con flock
+    sobre un archivo de lock (compartido para leer, exclusivo para
+    escribir). Sin esa variable (un solo proceso, pruebas) la tabla es del
+    proceso. Las lecturas que se insertan por fuera de la API (backfill,
+    restauraciones) no pasan por la tabla: el estado de esos medidores se
+    invalida en su próximo lote.
+    Es segura entre hilos.
+    """
+
+    def __init__(self, repository: EnergyRepositoryPort, capacity: int = 250_000, shared_name: Optional[str] = None):
+        """
+        Args:
+            repository: Puerto de lecturas (claves de medidores y carga del estado)
+            capacity: Registros de la tabla propia del proceso (sin shared_name)
+            shared_name: Segmento de memoria compartida creado con shared_meter_state
+        """
+        self.repository = repository
+        self._shm = None
+        self._lock_file = None
+        if shared_name:
+            self._shm = attach_shared_memory(shared_name)
+            capacity = self._shm.size // STATE_DTYPE.itemsize
+            self.states = np.ndarray(capacity, dtype=STATE_DTYPE, buffer=self._shm.buf)
+            if fcntl is not None:
+                self._lock_file = open(_lock_path(shared_name), "a+b")
+        else:
+            self.states = np.zeros(capacity, dtype=STATE_DTYPE)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """Lock de hilos del proceso y, con memoria compartida, flock entre workers"""
+        with self._lock:
+            if self._lock_file is None:
+                yield
+                return
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def lookup(self, meter_ids: Iterable[str]) -> Dict[str, MeterState]:
+        """
+        Estado de cada medidor; los que no están en la tabla se cargan de la
+        BD. Los medidores sin lecturas guardadas no se incluyen.
+        """
+        keys = self.repository.get_meter_keys(meter_ids)
+        cached = {meter_id: key for meter_id, key in keys.items() if key < self.capacity}
+        slots = np.fromiter(cached.values(), dtype=np.int64, count=len(cached))
+        with self._locked(exclusive=False):
+            rows = self.states[slots]
+        states: Dict[str, MeterState] = {}
+        energy = np.where(np.isnan(rows["energy"]), None, rows["energy"]).tolist()
+        for meter_id, ts, flag, values in zip(cached, rows["ts"].tolist(), rows["flag"].tolist(), energy):
+            if ts:
+                states[meter_id] = (ts, flag, *values)
+        missing = [meter_id for meter_id in keys if meter_id not in states]
+        self.hits += len(states)
+        self.misses += len(missing)
+        if missing:
+            loaded = self.repository.get_meter_states(missing)
+            self._store({cached[meter_id]: state for meter_id, state in loaded.items() if meter_id in cached})
+            states.update(loaded)
+        return states
+
+    def get(self, meter_id: str) -> Optional[MeterState]:
+        return self.lookup([meter_id]).get(meter_id)
+
+    def _store(self, states: Dict[int, MeterState]):
+        """Guarda estados leídos de la BD en los registros vacíos o más antiguos"""
+        if not states:
+            return
+        slots = np.fromiter(states, dtype=np.int64, count=len(states))
+        loaded = np.array([
+            (state[0], state[1], tuple(np.nan if value is None else value for value in state[2:]))
+            for state in states.values()
+        ], dtype=STATE_DTYPE)
+        with self._locked(exclusive=True):
+            newer = loaded["ts"] > self.states["ts"][slots]
+            self.states[slots[newer]] = loaded[newer]
+
+    def update(self, batch: ReadingBatch):
+        """
+        Write-through de un lote ya persistido: por medidor, la última
+        lectura del lote reemplaza el estado si es más reciente, y sus
+        contadores nulos conservan el último valor conocido. Los medidores
+        sin estado en la tabla no se tocan (se cargan completos de la BD en
+        el próximo lookup).
+        """
+        if not len(batch):
+            return
+        keys = self.repository.get_meter_keys(batch.meter_ids)
+        slot_of = np.array([keys.get(meter_id, self.capacity) for meter_id in batch.meter_ids], dtype=np.int64)
+
+        # Última lectura de cada medidor y última posición con dato de cada contador
+        order = np.lexsort((batch.ts, batch.meters))
+        meters = batch.meters[order]
+        n = len(order)
+        last = np.flatnonzero(np.append(meters[1:] != meters[:-1], True))
+        energy = batch.values[ENERGY_VALUES][:, order]
+        latest = np.maximum.accumulate(np.where(~np.isnan(energy), np.arange(n), -1), axis=1)[:, last]
+        has_value = (latest >= 0) & (meters[np.maximum(latest, 0)] == meters[last])
+        values = np.where(has_value, np.take_along_axis(energy, np.maximum(latest, 0), axis=1), np.nan).T
+
+        slots = slot_of[meters[last]]
+        inside = slots < self.capacity
+        slots, values = slots[inside], values[inside]
+        ts, flags = batch.ts[order][last][inside], batch.flags[order][last][inside]
+        with self._locked(exclusive=True):
+            current = self.states[slots]
+            known = current["ts"] != 0
+            newer = known & (ts > current["ts"])
+            stored = current["energy"]
+            # Más reciente: sus valores, o los guardados donde es nulo; más antiguo: solo llena nulos
+            current["energy"] = np.where(
+                newer[:, None], np.where(np.isnan(values), stored, values), np.where(np.isnan(stored), values, stored)
+            )
+            current["ts"] = np.where(newer, ts, current["ts"])
+            current["flag"] = np.where(newer, flags, current["flag"])
+            self.states[slots[known]] = current[known]
+
+    def invalidate(self, meter_ids: Iterable[str]):
+        """
+        Descarta el estado de medidores que quedó atrás de la BD (lecturas
+        insertadas por otra vía): el próximo lookup lo vuelve a cargar.
+        """
+        keys = self.repository.get_meter_keys(meter_ids)
+        slots = np.fromiter((key for key in keys.values() if key < self.capacity), dtype=np.int64)
+        if not len(slots):
+            return
+        with self._locked(exclusive=True):
+            self.states[slots] = np.zeros(1, dtype=STATE_DTYPE)
+        self.invalidated += len(slots)
+
+    def metrics(self) -> dict:
+        return {
+            "meter_state_capacity": self.capacity,
+            "meter_state_shared": self._shm is not None,
+            "meter_state_hits": self.hits,
+            "meter_state_misses": self.misses,
+            "meter_state_invalidated": self.invalidated,
+        }
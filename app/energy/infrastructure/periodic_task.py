@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Any, Callable, Optional
+import anyio.to_thread
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Ejecuta una función síncrona cada interval_s segundos en una tarea de
+    fondo del event loop. La función corre en el threadpool de AnyIO para
+    no bloquear el loop; un fallo se registra y se reintenta en el
+    siguiente ciclo.
+    """
+
+    def __init__(self, fn: Callable[[], Any], interval_s: float, name: str):
+        self.fn = fn
+        self.interval = interval_s
+        self.name = name
+        self._task: Optional[asyncio.Task] = None
+
+        # Métricas
+        self.runs = 0
+        self.failed_runs = 0
+        self.last_result: Any = None
+
+    def start(self):
+        """Inicia la tarea en el event loop actual (idempotente)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+
+    async def _run(self):
+        while True:
+            try:
+                self.last_result = await anyio.to_thread.run_sync(self.fn)
+                self.runs += 1
+            except Exception as e:
+                self.failed_runs += 1
+                logger.error(f"Error en la tarea periódica {self.name} → {e}")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        """Cancela la tarea; una ejecución en curso en el threadpool termina sola"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
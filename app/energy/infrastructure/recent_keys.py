@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict, deque
+from typing import List, Sequence, Tuple
+from app.energy.domain.models.energy_record import METER_ID_INDEX, TIMESTAMP_INDEX
+
+
+class RecentReadingKeys:
+    """
+    Caché en memoria de las últimas claves (meter_id, timestamp) persistidas
+    por medidor.
+
+    Descarta antes de llegar a la BD los duplicados obvios (reintentos del
+    medidor, envíos onDemand que se solapan con los programados). No es la
+    garantía de unicidad: esa la da la clave única de energy_readings; la
+    caché solo ahorra viajes y filas ignoradas.
+
+    Las claves se registran solo después de persistir (remember), para que
+    un lote que falló pueda reintentarse sin ser descartado.
+    Es segura entre hilos (event loop y threadpool).
+    """
+
+    def __init__(self, keys_per_meter: int = 672, max_meters: int = 50_000):
+        """
+        Args:
+            keys_per_meter: Timestamps recordados por medidor (672 = 7 días cada 15 min)
+            max_meters: Medidores recordados; se expulsa el usado hace más tiempo
+        """
+        self.keys_per_meter = keys_per_meter
+        self.max_meters = max_meters
+        self._meters: "OrderedDict[str, Tuple[set, deque]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.dropped_duplicates = 0
+
+    def split(self, rows: Sequence[tuple]) -> Tuple[List[tuple], int]:
+        """
+        Separa las filas nuevas de los duplicados conocidos o repetidos en el mismo lote.
+
+        Returns:
+            Tuple[List[tuple], int]: Filas a persistir y número de duplicados descartados
+        """
+        fresh = []
+        seen = set()
+        duplicates = 0
+        with self._lock:
+            meters = self._meters
+            for row in rows:
+                meter_id, ts = row[METER_ID_INDEX], row[TIMESTAMP_INDEX]
+                key = (meter_id, ts)
+                entry = meters.get(meter_id)
+                if key in seen or (entry is not None and ts in entry[0]):
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                fresh.append(row)
+            self.dropped_duplicates += duplicates
+        return fresh, duplicates
+
+    def remember(self, rows: Sequence[tuple]):
+        """Registra las claves de filas ya persistidas"""
+        with self._lock:
+            meters = self._meters
+            for row in rows:
+                meter_id, ts = row[METER_ID_INDEX], row[TIMESTAMP_INDEX]
+                entry = meters.get(meter_id)
+                if entry is None:
+                    entry = meters[meter_id] = (set(), deque())
+                    if len(meters) > self.max_meters:
+                        meters.popitem(last=False)
+                else:
+                    meters.move_to_end(meter_id)
+                keys, order = entry
+                if ts in keys:
+                    continue
+                keys.add(ts)
+                order.append(ts)
+                if len(order) > self.keys_per_meter:
+                    keys.discard(order.popleft())
+
+    def metrics(self) -> dict:
+        return {
+            "dedup_cached_meters": len(self._meters),
+            "dedup_dropped_duplicates": self.dropped_duplicates,
+        }
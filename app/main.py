@@ -1,17 +1,77 @@
-from fastapi import FastAPI
-from fastapi.openapi.utils import get_openapi
-from app.auth.adapters.http.routes import router as auth_router
-from app.user.adapters.http.routes import router as user_router
-from app.transactions.adapters.http.routes import router as transactions_router
-from app.energy.adapters.http.routes import router as energy_router
+import os
+from contextlib import asynccontextmanager
+from app.shared.infrastructure.startup import startup_report
 
-app = FastAPI(title="Volt Platform Services")
+# Cada importación se mide para el reporte de arranque (costo por módulo)
+with startup_report.measure("import", "fastapi"):
+    from fastapi import FastAPI
+    from fastapi.openapi.utils import get_openapi
+with startup_report.measure("import", "app.auth"):
+    from app.auth.adapters.http import routes as auth_routes
+with startup_report.measure("import", "app.user"):
+    from app.user.adapters.http import routes as user_routes
+with startup_report.measure("import", "app.transactions"):
+    from app.transactions.adapters.http import routes as transactions_routes
+with startup_report.measure("import", "app.energy"):
+    from app.energy.adapters.http import routes as energy_routes
+# Conecta los consumidores de lecturas entre contextos antes de construir servicios
+import app.composition  # noqa: F401
+from app.shared.infrastructure.db import check_connection
+from app.shared.infrastructure.compression import CompressionMiddleware, compression_settings
+
+# Contenedores de servicios que se inicializan en el arranque.
+# Son perezosos: si el arranque no los toca, se construyen en la primera petición.
+SERVICE_PROVIDERS = {
+    "auth.AuthService": auth_routes.get_auth_manager,
+    "user.CityService": user_routes.get_city_service,
+    "user.UserService": user_routes.get_user_service,
+    "transactions.TransactionService": transactions_routes.get_transaction_service,
+    "energy.EnergyService": energy_routes.get_energy_manager,
+}
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Hook de arranque/apagado.
+    Construye los servicios (sin abrir conexiones) y, si DB_CHECK_ON_STARTUP
+    está activo, prueba la conexión a MySQL antes de aceptar tráfico.
+    Inicia la tarea periódica de mantenimiento de lecturas de energía y, al
+    apagar, la detiene y vacía la cola de ingesta.
+    """
+    # Las rutas síncronas corren en el threadpool de AnyIO (40 hilos por defecto)
+    threadpool_size = int(os.getenv("THREADPOOL_SIZE", "0"))
+    if threadpool_size > 0:
+        import anyio.to_thread
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool_size
+    if _env_flag("EAGER_SERVICE_INIT", "true"):
+        for name, provider in SERVICE_PROVIDERS.items():
+            with startup_report.measure("init", name):
+                provider()
+    if _env_flag("DB_CHECK_ON_STARTUP", "false"):
+        with startup_report.measure("init", "db.check_connection"):
+            check_connection()
+    startup_report.log()
+    energy_routes.start_storage_maintenance()
+    yield
+    # Apagado: detener el mantenimiento y persistir lo que quede en la cola de ingesta
+    await energy_routes.shutdown_ingestion()
+
+
+app = FastAPI(title="Volt Platform Services", lifespan=lifespan)
+
+# Compresión gzip/brotli negociada para payloads grandes (listados, exportaciones)
+app.add_middleware(CompressionMiddleware, **compression_settings())
 
 # Registrar las rutas de los microservicios
-app.include_router(auth_router)
-app.include_router(user_router)
-app.include_router(transactions_router)
-app.include_router(energy_router)
+app.include_router(auth_routes.router)
+app.include_router(user_routes.router)
+app.include_router(transactions_routes.router)
+app.include_router(energy_routes.router)
 
 def custom_openapi():
     if app.openapi_schema:
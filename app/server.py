@@ -0,0 +1,121 @@
+"""
+Punto de entrada de producción.
+
+Lanza uvicorn con varios workers (uno por CPU disponible por defecto), el
+event loop uvloop y el parser httptools, sin recarga de archivos.
+Toda la configuración se toma de variables de entorno.
+Antes de lanzar los workers crea la memoria compartida de la tabla de
+estado de medidores (ENERGY_METER_STATE_CAPACITY registros) y, con
+ENERGY_INGEST_MODE=sharded, los procesos shard de ingesta
+(ENERGY_INGEST_SHARDS); todo se libera al terminar.
+
+Ejecutar con: python -m app.server
+"""
+import importlib.util
+import logging
+import math
+import os
+from contextlib import ExitStack
+import uvicorn
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+
+def available_cpus() -> int:
+    """
+    Número de CPUs que el proceso puede usar realmente.
+    Considera la afinidad del proceso y la cuota de CPU del cgroup (contenedores).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # Cuota de cgroup v2: "<quota> <period>" o "max <period>"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def _module_available(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def build_config() -> dict:
+    """
+    Construye los argumentos de uvicorn.run a partir del entorno.
+
+    Variables:
+        HOST, PORT: dirección de escucha (0.0.0.0:8000)
+        WEB_CONCURRENCY: número de workers (por defecto, CPUs disponibles)
+        UVICORN_LOOP: uvloop | asyncio (uvloop si está instalado)
+        UVICORN_HTTP: httptools | h11 (httptools si está instalado)
+        KEEPALIVE_TIMEOUT: segundos de keep-alive HTTP (5)
+        BACKLOG: conexiones pendientes en el socket (2048)
+        GRACEFUL_SHUTDOWN_TIMEOUT: segundos para terminar peticiones en curso (30)
+        LIMIT_CONCURRENCY: máximo de conexiones concurrentes por worker (sin límite)
+        LIMIT_MAX_REQUESTS: reciclar el worker tras N peticiones (sin límite)
+        FORWARDED_ALLOW_IPS: IPs de proxies confiables ("127.0.0.1")
+        LOG_LEVEL: nivel de log de uvicorn (info)
+
+    El tamaño del threadpool de rutas síncronas (THREADPOOL_SIZE) se aplica en
+    el hook de arranque de app.main, dentro de cada worker.
+    """
+    workers = int(os.getenv("WEB_CONCURRENCY", "0")) or available_cpus()
+    loop = os.getenv("UVICORN_LOOP") or ("uvloop" if _module_available("uvloop") else "asyncio")
+    http = os.getenv("UVICORN_HTTP") or ("httptools" if _module_available("httptools") else "h11")
+    limit_concurrency = os.getenv("LIMIT_CONCURRENCY")
+    limit_max_requests = os.getenv("LIMIT_MAX_REQUESTS")
+
+    return {
+        "host": os.getenv("HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", "8000")),
+        "workers": workers,
+        "loop": loop,
+        "http": http,
+        "timeout_keep_alive": int(os.getenv("KEEPALIVE_TIMEOUT", "5")),
+        "backlog": int(os.getenv("BACKLOG", "2048")),
+        "timeout_graceful_shutdown": int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30")),
+        "limit_concurrency": int(limit_concurrency) if limit_concurrency else None,
+        "limit_max_requests": int(limit_max_requests) if limit_max_requests else None,
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        "log_level": os.getenv("LOG_LEVEL", "info"),
+        "reload": False,
+    }
+
+
+def main():
+    config = build_config()
+    logger.info(
+        f"Iniciando {config['workers']} workers (loop={config['loop']}, http={config['http']}) "
+        f"en {config['host']}:{config['port']}"
+    )
+    with ExitStack() as stack:
+        if os.getenv("ENERGY_METER_STATE", "true").lower() == "true":
+            # Tabla de estado de medidores compartida por todos los workers (ver MeterStateTable)
+            from app.energy.infrastructure.meter_state import meter_state_settings, shared_meter_state
+            stack.enter_context(shared_meter_state(meter_state_settings()["capacity"]))
+        if os.getenv("ENERGY_INGEST_MODE", "queue").lower() == "sharded":
+            # Procesos shard de ingesta, dueños de los medidores por hash (ver IngestionShardServer)
+            from app.energy.infrastructure.ingestion_shards import ingestion_shards, shard_settings
+            settings = shard_settings()
+            stack.enter_context(ingestion_shards(
+                settings["count"] or available_cpus(), settings["service_factory"],
+                stop_timeout_s=config["timeout_graceful_shutdown"],
+                max_restarts=settings["max_restarts"], restart_window_s=settings["restart_window_s"]
+            ))
+        uvicorn.run("app.main:app", **config)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,285 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se negocia gzip
+    brotli = None
+
+# Tipos de contenido que vale la pena comprimir
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Convierte 'br;q=1.0, gzip;q=0.8, *;q=0.1' en {'br': 1.0, 'gzip': 0.8, '*': 0.1}.
+    """
+    encodings = {}
+    for part in header.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Elige la codificación a usar según Accept-Encoding.
+    Prefiere brotli sobre gzip a igual peso.
+
+    Returns:
+        Optional[str]: 'br', 'gzip' o None (sin comprimir)
+    """
+    if not accept_encoding:
+        return None
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def merge_vary(headers, field: bytes) -> bytes:
+    """
+    Valor de Vary con field agregado a los que ya traía la respuesta (p. ej.
+    Origin de CORS): reemplazarlos haría que un caché sirva una variante
+    ajena. Varios encabezados Vary se combinan en uno.
+    """
+    fields = []
+    for name, value in headers:
+        if name.lower() == b"vary":
+            fields.extend(part.strip() for part in value.split(b",") if part.strip())
+    if b"*" in fields:
+        return b"*"
+    if field.lower() not in (existing.lower() for existing in fields):
+        fields.append(field)
+    return b", ".join(fields)
+
+
+class _StreamCompressor:
+    """Compresor incremental con la misma interfaz para gzip y brotli"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 → formato gzip (cabecera + CRC)
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        # Vacía lo acumulado sin cerrar el stream, para que el cliente reciba datos
+        if self.encoding == "br":
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compresión con negociación gzip/brotli.
+
+    - No comprime respuestas menores a minimum_size ni tipos no compresibles.
+    - Respeta respuestas que ya traen Content-Encoding (p. ej. precomprimidas).
+    - Las respuestas en streaming se comprimen por chunks, sin acumular el cuerpo.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                # Se retiene hasta ver el primer chunk del cuerpo
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = {k.lower(): v for k, v in start_message["headers"]}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                already_encoded = b"content-encoding" in headers
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+                too_small = not more_body and len(body) < self.minimum_size
+                if already_encoded or not compressible or too_small:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                raw_headers = [
+                    (k, v) for k, v in start_message["headers"]
+                    if k.lower() not in (b"content-length", b"vary")
+                ]
+                raw_headers.append((b"content-encoding", encoding.encode("latin-1")))
+                raw_headers.append((b"vary", merge_vary(start_message["headers"], b"Accept-Encoding")))
+
+                if not more_body:
+                    # Cuerpo completo: se comprime de una vez y se conoce el tamaño
+                    compressed = compressor.compress(body) + compressor.finish()
+                    raw_headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    start_message["headers"] = raw_headers
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                start_message["headers"] = raw_headers
+                await send(start_message)
+
+            chunk = compressor.compress(body)
+            if more_body:
+                chunk += compressor.flush()
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                chunk += compressor.finish()
+                await send({"type": "http.response.body", "body": chunk})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def content_version(body: bytes) -> str:
+    """Versión del contenido: igual en todos los workers para el mismo cuerpo"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class PrecompressedPayload:
+    """
+    Cuerpo de respuesta comprimido una sola vez en todas las codificaciones.
+    Pensado para payloads calientes y estables como el catálogo de ciudades.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.media_type = media_type
+        self.created_at = time.monotonic()
+        self.version = content_version(body)
+        # Se usa el nivel máximo: el costo se paga una vez y se amortiza
+        self.variants = {None: body, "gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body, quality=11)
+
+    def etag(self, encoding: Optional[str]) -> str:
+        """ETag fuerte de una variante: cada codificación es una representación distinta"""
+        return f'"{self.version}-{encoding}"' if encoding else f'"{self.version}"'
+
+    def etags(self) -> set:
+        """ETags de todas las variantes de esta versión"""
+        return {self.etag(encoding) for encoding in self.variants}
+
+    def to_response(self, accept_encoding: Optional[str], headers: Optional[dict] = None) -> Response:
+        """Respuesta con la variante negociada para el cliente"""
+        encoding = negotiate_encoding(accept_encoding)
+        response_headers = {"Vary": "Accept-Encoding", "ETag": self.etag(encoding)}
+        response_headers.update(headers or {})
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+        return Response(content=self.variants[encoding], media_type=self.media_type, headers=response_headers)
+
+
+class PrecompressedCache:
+    """
+    Caché en memoria de PrecompressedPayload por nombre, con expiración.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, PrecompressedPayload] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[PrecompressedPayload]:
+        entry = self._entries.get(key)
+        if entry is None or self.expired(entry):
+            return None
+        return entry
+
+    def peek(self, key: str) -> Optional[PrecompressedPayload]:
+        """Entrada guardada aunque haya expirado (para revalidarla sin dejar de servirla)"""
+        return self._entries.get(key)
+
+    def expired(self, entry: PrecompressedPayload) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl_seconds
+
+    def put(self, key: str, body: bytes, media_type: str = "application/json") -> PrecompressedPayload:
+        """
+        Guarda un cuerpo. Si es igual al guardado solo renueva su vigencia:
+        se evita recomprimir y la versión (las ETags) no cambia.
+        """
+        current = self._entries.get(key)
+        if current is not None and current.media_type == media_type and current.version == content_version(body):
+            current.created_at = time.monotonic()
+            return current
+        entry = PrecompressedPayload(body, media_type)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+def compression_settings() -> dict:
+    """Parámetros del middleware desde variables de entorno"""
+    return {
+        "minimum_size": int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+        "gzip_level": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+        "brotli_quality": int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")),
+    }
@@ -0,0 +1,114 @@
+import os
+import zlib
+from typing import AsyncIterator, Optional
+
+# zstandard está en requirements.txt; si falta (entornos locales) los cuerpos zstd se rechazan con 415
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Tamaño máximo de un cuerpo ya descomprimido (protege contra "bombas" de compresión)
+MAX_DECODED_BODY_BYTES = int(os.getenv("REQUEST_MAX_DECODED_BYTES", str(64 * 1024 * 1024)))
+
+
+class RequestBodyError(Exception):
+    """El cuerpo del request no se pudo decodificar; lleva el status HTTP a responder"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def supported_encodings() -> tuple:
+    """Content-Encoding aceptados en requests"""
+    return ("identity", "gzip", "deflate") + (("zstd",) if zstandard is not None else ())
+
+
+def decode_request_body(body: bytes, content_encoding: Optional[str], max_size: int = MAX_DECODED_BODY_BYTES) -> bytes:
+    """
+    Descomprime el cuerpo de un request según Content-Encoding (gzip,
+    deflate o zstd), sin pasar de max_size bytes descomprimidos.
+
+    Raises:
+        RequestBodyError: 415 si la codificación no está soportada, 400 si el
+            cuerpo está corrupto y 413 si descomprimido excede max_size
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding in ("", "identity"):
+        decoded = body
+    elif encoding in ("gzip", "x-gzip", "deflate"):
+        # wbits=47: detecta cabecera gzip o zlib
+        decompressor = zlib.decompressobj(47)
+        try:
+            decoded = decompressor.decompress(body, max_size + 1)
+        except zlib.error as e:
+            raise RequestBodyError(f"Cuerpo {encoding} inválido: {e}")
+        if len(decoded) <= max_size and not decompressor.eof:
+            raise RequestBodyError(f"Cuerpo {encoding} incompleto")
+    elif encoding == "zstd" and zstandard is not None:
+        try:
+            reader = zstandard.ZstdDecompressor().stream_reader(body)
+            decoded = reader.read(max_size + 1)
+        except zstandard.ZstdError as e:
+            raise RequestBodyError(f"Cuerpo zstd inválido: {e}")
+    else:
+        raise RequestBodyError(
+            f"Content-Encoding no soportado: {encoding}. Opciones: {', '.join(supported_encodings())}",
+            status_code=415
+        )
+    if len(decoded) > max_size:
+        raise RequestBodyError(f"El cuerpo descomprimido excede {max_size} bytes", status_code=413)
+    return decoded
+
+
+# Bytes descomprimidos por paso al descomprimir en streaming
+STREAM_DECODE_STEP = 1024 * 1024
+
+
+async def iter_decoded_body(chunks: AsyncIterator[bytes], content_encoding: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    Descomprime en streaming el cuerpo de un request (p. ej. request.stream())
+    según Content-Encoding. Sin límite de tamaño total: cada bloque
+    descomprimido es de a lo sumo STREAM_DECODE_STEP bytes, así que la
+    memoria no depende del tamaño del cuerpo (salvo con zstd, cuyo
+    decompressobj no acota la salida por paso).
+
+    Raises:
+        RequestBodyError: 415 si la codificación no está soportada, 400 si el
+            cuerpo está corrupto o incompleto
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding in ("", "identity"):
+        async for chunk in chunks:
+            if chunk:
+                yield chunk
+        return
+    bounded = encoding in ("gzip", "x-gzip", "deflate")
+    if bounded:
+        decompressor = zlib.decompressobj(47)
+    elif encoding == "zstd" and zstandard is not None:
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        raise RequestBodyError(
+            f"Content-Encoding no soportado: {encoding}. Opciones: {', '.join(supported_encodings())}",
+            status_code=415
+        )
+    errors = (zlib.error, zstandard.ZstdError) if zstandard is not None else (zlib.error,)
+    try:
+        async for chunk in chunks:
+            if bounded:
+                data = chunk
+                while data:
+                    decoded = decompressor.decompress(data, STREAM_DECODE_STEP)
+                    data = decompressor.unconsumed_tail
+                    if decoded:
+                        yield decoded
+            else:
+                decoded = decompressor.decompress(chunk)
+                if decoded:
+                    yield decoded
+    except errors as e:
+        raise RequestBodyError(f"Cuerpo {encoding} inválido: {e}")
+    if bounded and not decompressor.eof:
+        raise RequestBodyError(f"Cuerpo {encoding} incompleto")
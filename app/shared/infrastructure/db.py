@@ -1,5 +1,6 @@
 import os # Para manejar variables de entorno
 import logging # Para logging
+import threading # Para inicialización perezosa segura entre hilos
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv # Para cargar variables de entorno desde un archivo .env
@@ -23,28 +24,112 @@ DB_NAME = os.getenv("DB_NAME")
 # Permite mapear tablas de la base de datos a clases de Python
 Base = declarative_base()
 
-# Validación de configuración
-if not all([DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME]):
-  # Si falta alguna variable, loguear error y no crear engine
-  logger.warning("Faltan variables de conexión en el archivo .env")
-  engine = None
-else:
+# El engine y la fábrica de sesiones se crean de forma perezosa (primer uso o
+# hook de arranque) para que importar los módulos no abra conexiones a MySQL.
+_engine = None
+_SessionLocal = None
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def _build_engine():
+  """
+  Construye el engine de SQLAlchemy a partir de las variables de entorno.
+  Retorna None si falta configuración.
+  """
+  # Validación de configuración
+  if not all([DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME]):
+    # Si falta alguna variable, loguear error y no crear engine
+    logger.warning("Faltan variables de conexión en el archivo .env")
+    return None
 
   # Construcción segura de la URL (usa pymysql como driver)
   # Codificar la contraseña para manejar caracteres especiales como @
-  DATABASE_URL = f"mysql+pymysql://{DB_USER}:{quote_plus(DB_PASSWORD)}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
+  database_url = f"mysql+pymysql://{DB_USER}:{quote_plus(DB_PASSWORD)}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
+  # pool_pre_ping evita usar conexiones muertas; la conexión real se abre en el primer uso.
+  # El pool debe acompañar al threadpool de rutas síncronas (THREADPOOL_SIZE)
+  # para que los hilos no queden esperando conexión.
+  return create_engine(
+    database_url,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+  )
+
+
+def _ensure_initialized():
+  global _engine, _SessionLocal, _initialized
+  if _initialized:
+    return
+  with _init_lock:
+    if _initialized:
+      return
+    try:
+      _engine = _build_engine()
+    except Exception as e:
+      logger.error(f"No se pudo crear el engine de base de datos → {e}")
+      _engine = None
+    # SessionLocal solo si hay engine válido
+    _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine) if _engine else None
+    _initialized = True
+
+
+def get_engine():
+  """
+  Retorna el engine de SQLAlchemy, creándolo en el primer uso.
+  Retorna None si la base de datos no está configurada.
+  """
+  _ensure_initialized()
+  return _engine
+
+
+def configure_engine(engine):
+  """
+  Reemplaza el engine por uno provisto externamente.
+  Útil para scripts y benchmarks que trabajan contra otra base (p. ej. SQLite).
+
+  Args:
+    engine: Engine de SQLAlchemy ya construido
+  """
+  global _engine, _SessionLocal, _initialized
+  with _init_lock:
+    _engine = engine
+    _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) if engine else None
+    _initialized = True
+
+
+def check_connection() -> bool:
+  """
+  Prueba la conexión a la base de datos.
+  Se invoca desde el hook de arranque de la aplicación, no al importar el módulo.
+
+  Returns:
+    bool: True si la conexión fue exitosa
+  """
+  engine = get_engine()
+  if engine is None:
+    return False
   try:
-    # Crear el engine de SQLAlchemy con pool_pre_ping para evitar conexiones muertas
-    engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
-    # Probar la conexión
-    with engine.connect() as conn:
+    with engine.connect():
       logger.info("Conexión OK a la base de datos")
+    return True
   except Exception as e:
     logger.error(f"No se pudo conectar a la base de datos → {e}")
-    engine = None
+    return False
+
+
+def __getattr__(name):
+  # Compatibilidad: `from app.shared.infrastructure.db import engine, SessionLocal`
+  # sigue funcionando, pero ahora resuelve de forma perezosa.
+  if name == "engine":
+    return get_engine()
+  if name == "SessionLocal":
+    _ensure_initialized()
+    return _SessionLocal
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# SessionLocal solo si hay engine válido es decir si pudo conectar a la BD
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) if engine else None
 
 # Dependencia para obtener la sesión
 def get_db():
@@ -52,9 +137,10 @@ def get_db():
   Generador que proporciona una sesión de base de datos.
   Cierra la sesión automáticamente al finalizar.
   """
-  if SessionLocal is None:
+  _ensure_initialized()
+  if _SessionLocal is None:
     raise RuntimeError("La base de datos no está configurada correctamente.")
-  db = SessionLocal()
+  db = _SessionLocal()
   try:
     yield db
   finally:
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from fastapi.responses import StreamingResponse
+
+# Filas que se leen de la BD por viaje (yield_per) y filas por chunk HTTP
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value: Any):
+    """Serializa los tipos que json no soporta de forma nativa"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def _csv_value(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Convierte filas en chunks NDJSON (un objeto JSON por línea).
+    Agrupa chunk_rows filas por chunk para no pagar un envío por fila.
+    """
+    dumps = json.dumps
+    buffer: List[str] = []
+    for row in rows:
+        buffer.append(dumps(row, default=_json_default, separators=(",", ":")))
+        if len(buffer) >= chunk_rows:
+            buffer.append("")
+            yield "\n".join(buffer).encode("utf-8")
+            buffer = []
+    if buffer:
+        buffer.append("")
+        yield "\n".join(buffer).encode("utf-8")
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], fieldnames: List[str], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Convierte filas en chunks CSV con encabezado.
+    El buffer se reutiliza entre chunks, así que la memoria no crece con el total.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldnames)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_value(row.get(name)) for name in fieldnames])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def prime(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Lee la primera fila de inmediato.
+
+    Así los errores de conexión o de consulta ocurren dentro del caso de uso,
+    antes de enviar el 200, y pueden responderse con ResultHandler.
+    """
+    iterator = iter(rows)
+    try:
+        first = next(iterator)
+    except StopIteration:
+        return iter(())
+    except Exception:
+        close = getattr(iterator, "close", None)
+        if close:
+            close()
+        raise
+    return chain((first,), iterator)
+
+
+def streaming_export(
+    rows: Iterable[Dict[str, Any]],
+    fieldnames: List[str],
+    export_format: str,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Respuesta en streaming con las filas en NDJSON o CSV.
+    La primera fila se lee antes de responder (ver prime).
+
+    Args:
+        rows: Iterador de filas (dict por fila), idealmente leído con cursor del servidor
+        fieldnames: Columnas en orden (encabezado del CSV)
+        export_format: 'ndjson' o 'csv'
+        filename: Nombre sugerido del archivo, sin extensión
+
+    Raises:
+        ValueError: Si el formato no es soportado
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación no soportado: {export_format}")
+    rows = prime(rows)
+    if export_format == "csv":
+        body = iter_csv(rows, fieldnames)
+    else:
+        body = iter_ndjson(rows)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
+
+def stream_query(query, batch_size: Optional[int] = None) -> Iterator:
+    """
+    Itera una Query con cursor del lado del servidor (stream_results) y en
+    lotes (yield_per): el driver no carga todo el resultado en memoria.
+    """
+    return iter(query.execution_options(stream_results=True).yield_per(batch_size or EXPORT_BATCH_SIZE))
@@ -0,0 +1,137 @@
+import logging
+import threading
+from typing import Callable, Optional
+from fastapi import Request
+from fastapi.responses import Response
+from app.shared.infrastructure.compression import PrecompressedCache, PrecompressedPayload, negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_if_none_match(header: Optional[str]) -> set:
+    """
+    Extrae las ETags de If-None-Match. If-None-Match usa comparación débil,
+    así que el prefijo W/ se ignora.
+    """
+    if not header:
+        return set()
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+class CachedCatalog:
+    """
+    Endpoint de lectura con caché, ETag fuerte y GET condicional.
+
+    Reutilizable para cualquier recurso de lectura mayoritaria: el loader
+    produce la respuesta completa (normalmente un ResultHandler.success) y el
+    catálogo guarda su cuerpo serializado y precomprimido junto con su versión
+    (hash del contenido). Mientras la versión esté vigente, un If-None-Match
+    que coincide se responde con 304 sin llamar al loader (sin tocar la BD).
+
+    Al vencer ttl_seconds la versión vigente se sigue sirviendo mientras un
+    hilo la recarga en segundo plano (stale-while-revalidate): ninguna
+    petición espera a la BD salvo la primera. Si el contenido no cambió, la
+    versión y sus ETags se conservan y los clientes siguen recibiendo 304.
+
+    Las escrituras sobre el recurso hechas por la app deben llamar a
+    invalidate(); las externas (cargas directas a la BD) se ven a más tardar
+    ttl_seconds después, igual que en los demás workers del servidor, que
+    tienen su propia caché.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Response],
+        ttl_seconds: float,
+        max_age: int,
+        cache: Optional[PrecompressedCache] = None,
+    ):
+        """
+        Args:
+            name: Nombre del catálogo (clave en la caché)
+            loader: Función que consulta y serializa el catálogo
+            ttl_seconds: Tiempo tras el cual se recarga desde el loader
+            max_age: Segundos de Cache-Control para clientes y proxies
+            cache: Caché a usar (por defecto, una propia)
+        """
+        self.name = name
+        self.loader = loader
+        self.max_age = max_age
+        self.cache = cache or PrecompressedCache(ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._reloading = False
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}"
+
+    def current(self) -> Optional[PrecompressedPayload]:
+        """Versión vigente en memoria, o None si hay que recargar"""
+        return self.cache.get(self.name)
+
+    def invalidate(self):
+        """Descarta la versión vigente; la próxima petición recarga desde el loader"""
+        self.cache.invalidate(self.name)
+
+    def _load(self) -> Response:
+        """Llama al loader y, si fue exitoso, guarda la nueva versión"""
+        result = self.loader()
+        if result.status_code == 200:
+            self.cache.put(self.name, result.body, result.media_type or "application/json")
+        return result
+
+    def _reload(self):
+        try:
+            result = self._load()
+            if result.status_code != 200:
+                logger.warning(f"No se pudo recargar el catálogo {self.name} (status {result.status_code})")
+        except Exception as e:
+            logger.error(f"Error al recargar el catálogo {self.name} → {e}")
+        finally:
+            self._reloading = False
+
+    def _revalidate(self):
+        """Recarga en segundo plano una versión expirada (una recarga a la vez)"""
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, name=f"catalog-{self.name}", daemon=True).start()
+
+    def respond(self, request: Request) -> Response:
+        """
+        Responde la petición:
+        - 304 si If-None-Match coincide con la versión vigente
+        - 200 con la variante negociada (gzip/br/identidad) en otro caso
+        - la respuesta del loader tal cual si no fue exitosa
+        """
+        payload = self.cache.peek(self.name)
+        if payload is None:
+            result = self._load()
+            if result.status_code != 200:
+                return result
+            payload = self.cache.peek(self.name)
+        elif self.cache.expired(payload):
+            self._revalidate()
+
+        accept_encoding = request.headers.get("accept-encoding")
+        headers = {"Cache-Control": self.cache_control}
+        client_tags = _parse_if_none_match(request.headers.get("if-none-match"))
+        if "*" in client_tags or client_tags & payload.etags():
+            return Response(
+                status_code=304,
+                headers={
+                    "ETag": payload.etag(negotiate_encoding(accept_encoding)),
+                    "Vary": "Accept-Encoding",
+                    **headers,
+                },
+            )
+        return payload.to_response(accept_encoding, headers=headers)
@@ -0,0 +1,49 @@
+from typing import Any, Dict, Type, TypeVar
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def parse_json_body(model: Type[M], body: bytes) -> M:
+    """
+    Valida el cuerpo crudo directamente con pydantic-core (model_validate_json).
+
+    Evita el json.loads + validación sobre dicts que hace FastAPI con Body(...),
+    para rutas de ingesta con payloads grandes. Los errores se reportan igual
+    que los de FastAPI (422 con loc bajo "body").
+
+    Raises:
+        RequestValidationError: Si el cuerpo no es JSON válido o no cumple el modelo
+    """
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=body)
+
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if ref is not None and ref.startswith("#/$defs/"):
+            return _inline_refs(defs[ref[len("#/$defs/"):]], defs)
+        return {key: _inline_refs(value, defs) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_inline_refs(value, defs) for value in node]
+    return node
+
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    openapi_extra que documenta el cuerpo de una ruta que lo lee con
+    parse_json_body (FastAPI no lo infiere porque la ruta recibe Request).
+    """
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _inline_refs(schema, defs)}},
+        }
+    }
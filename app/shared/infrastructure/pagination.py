@@ -0,0 +1,86 @@
+import base64
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", "100"))
+MAX_PAGE_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", "1000"))
+
+
+@dataclass
+class KeysetPage(Generic[T]):
+    """
+    Página de resultados con paginación por clave (keyset).
+
+    items: elementos de la página, en el orden solicitado
+    next_key: clave del último elemento si hay más resultados, o None
+    """
+    items: List[T] = field(default_factory=list)
+    next_key: Optional[Any] = None
+
+
+def resolve_limit(limit: Optional[int]) -> int:
+    """
+    Normaliza el tamaño de página solicitado.
+
+    Raises:
+        ValueError: Si el límite no es positivo
+    """
+    if limit is None:
+        return DEFAULT_PAGE_LIMIT
+    if limit < 1:
+        raise ValueError("El parámetro 'limit' debe ser mayor que 0")
+    return min(limit, MAX_PAGE_LIMIT)
+
+
+def encode_cursor(key: Any, order: str = "asc") -> str:
+    """
+    Codifica la clave keyset (y el orden) en un cursor opaco para el cliente.
+    """
+    raw = json.dumps({"k": key, "o": order}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+# Rango de las claves enteras (BIGINT): una clave fuera de él no llega a la BD
+_KEY_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def decode_cursor(cursor: Optional[str], order: str = "asc", key_type: type = int) -> Optional[Any]:
+    """
+    Decodifica un cursor opaco y retorna la clave keyset.
+
+    Args:
+        cursor: Cursor de encode_cursor (None o vacío = primera página)
+        order: Orden de la consulta; debe ser el del cursor
+        key_type: Tipo de la clave del endpoint (p. ej. int para ids y timestamps)
+
+    Raises:
+        ValueError: Si el cursor es inválido, su clave no es de key_type o
+            fue emitido para otro orden
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key, cursor_order = data["k"], data["o"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
+    # bool es subclase de int: no es una clave válida
+    if not isinstance(key, key_type) or isinstance(key, bool):
+        raise ValueError("Cursor inválido")
+    if key_type is int and not _KEY_RANGE[0] <= key <= _KEY_RANGE[1]:
+        raise ValueError("Cursor inválido")
+    if cursor_order != order:
+        raise ValueError("El cursor no corresponde al orden solicitado")
+    return key
+
+
+def page_cursor(page: KeysetPage, order: str = "asc") -> Optional[str]:
+    """Cursor de la página siguiente, o None si es la última"""
+    if page.next_key is None:
+        return None
+    return encode_cursor(page.next_key, order)
@@ -24,13 +24,24 @@ class ResultHandler:
     )
 
   @staticmethod
-  def error(message="Ha ocurrido un error", status_code=400):
+  def accepted(data=None, message="Solicitud aceptada para procesamiento"):
+    return JSONResponse(
+      status_code=202,
+      content={
+        "success": True,
+        "message": message,
+        "data": data or {}
+      }
+    )
+
+  @staticmethod
+  def error(message="Ha ocurrido un error", status_code=400, data=None):
     return JSONResponse(
       status_code=status_code,
       content={
         "success": False,
         "message": message,
-        "data": None
+        "data": data
       }
     )
   
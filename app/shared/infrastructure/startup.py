@@ -0,0 +1,66 @@
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """
+    Registro del costo de arranque del proceso.
+
+    Mide por separado el tiempo de importación de cada módulo y el tiempo de
+    inicialización de cada contenedor de servicios, para poder ver qué
+    contribuye al cold start de un worker nuevo.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.entries: List[Tuple[str, str, float, int]] = []
+
+    @contextmanager
+    def measure(self, phase: str, name: str):
+        """
+        Mide un bloque de código.
+
+        Args:
+            phase (str): 'import' o 'init'
+            name (str): Nombre del módulo o servicio medido
+        """
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            new_modules = len(sys.modules) - modules_before
+            self.entries.append((phase, name, elapsed_ms, new_modules))
+
+    def as_dict(self) -> dict:
+        """Resumen serializable del arranque"""
+        return {
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 2),
+            "entries": [
+                {"phase": phase, "name": name, "ms": round(ms, 2), "new_modules": new_modules}
+                for phase, name, ms, new_modules in self.entries
+            ],
+        }
+
+    def log(self):
+        """Escribe el reporte en el log si STARTUP_REPORT está habilitado"""
+        if os.getenv("STARTUP_REPORT", "true").lower() not in ("1", "true", "yes"):
+            return
+        report = self.as_dict()
+        lines = [f"Reporte de arranque (total {report['total_ms']} ms):"]
+        for entry in sorted(report["entries"], key=lambda e: e["ms"], reverse=True):
+            lines.append(
+                f"  [{entry['phase']:<6}] {entry['name']:<40} {entry['ms']:>9.2f} ms"
+                f"  (+{entry['new_modules']} módulos)"
+            )
+        logger.info("\n".join(lines))
+
+
+startup_report = StartupReport()
@@ -1,6 +1,7 @@
-from fastapi import APIRouter
+from functools import lru_cache
+from typing import Optional
+from fastapi import APIRouter, Query
 from app.transactions.domain.services.transaction_service import TransactionService
-from app.transactions.adapters.persistence.transaction_repository import TransactionRepositorySQL
 
 router = APIRouter(
     prefix="/transactions",
@@ -8,14 +9,29 @@ router = APIRouter(
 )
 
 # Inyección de dependencias - Configuración de servicios
-transaction_repo = TransactionRepositorySQL()
-transaction_service = TransactionService(transaction_repo)
+# Se construyen en el primer uso (o en el hook de arranque de app.main)
+@lru_cache(maxsize=None)
+def get_transaction_service() -> TransactionService:
+    from app.transactions.adapters.persistence.transaction_repository import TransactionRepositorySQL
+    return TransactionService(TransactionRepositorySQL())
 
 
 @router.get("/")
-def get_transactions():
-    """Obtiene todas las transacciones"""
-    result = transaction_service.get_all_transactions()
+def get_transactions(
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior"),
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Orden por id")
+):
+    """Obtiene las transacciones paginadas por cursor (keyset sobre id)"""
+    result = get_transaction_service().get_all_transactions(cursor=cursor, limit=limit, order=order)
+    return result
+
+@router.get("/export")
+def export_transactions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Formato de exportación")
+):
+    """Exporta todas las transacciones en streaming (NDJSON o CSV)"""
+    result = get_transaction_service().export_transactions(export_format=format)
     return result
 
 @router.get("/ping")
@@ -1,9 +1,11 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from sqlalchemy.orm import Session
 from app.transactions.domain.ports.transaction_repository_port import TransactionRepositoryPort
 from app.transactions.domain.models.transaction import Transaction
 from app.transactions.adapters.persistence.transaction_entity import TransactionEntity
 from app.shared.infrastructure.db import get_db
+from app.shared.infrastructure.pagination import KeysetPage
+from app.shared.infrastructure.export import stream_query
 
 class TransactionRepositorySQL(TransactionRepositoryPort):
     """
@@ -19,6 +21,18 @@ class TransactionRepositorySQL(TransactionRepositoryPort):
         db_generator = get_db()
         return next(db_generator)
 
+    # Columnas de los listados: se consultan como tuplas, sin hidratar entidades ORM
+    _READ_COLUMNS = (TransactionEntity.id,)
+
+    def _row_to_domain(self, row) -> Transaction:
+        """
+        Convierte una fila (tupla en el orden de _READ_COLUMNS) a modelo de dominio.
+        """
+        return Transaction(
+            id=row[0]
+            # Aquí mapear los demás campos (agregándolos a _READ_COLUMNS)
+        )
+
     def _entity_to_domain(self, entity: TransactionEntity) -> Transaction:
         """
         Convierte una entidad de base de datos a modelo de dominio.
@@ -32,14 +46,48 @@ class TransactionRepositorySQL(TransactionRepositoryPort):
         """Obtiene todas las transacciones desde MySQL."""
         db = self._get_db_session()
         try:
-            transaction_entities = db.query(TransactionEntity).all()
-            transactions = [self._entity_to_domain(entity) for entity in transaction_entities]
+            rows = db.query(*self._READ_COLUMNS).all()
+            transactions = [self._row_to_domain(row) for row in rows]
             return transactions
         except Exception as e:
             raise Exception(f"Error al obtener transacciones: {str(e)}")
         finally:
             db.close()
 
+    def get_page(self, after_id: Optional[int], limit: int, descending: bool = False) -> KeysetPage[Transaction]:
+        """
+        Obtiene una página de transacciones desde MySQL.
+        Query: SELECT ... FROM transactions WHERE id > ? ORDER BY id LIMIT ?+1
+        Se pide un elemento extra para saber si hay página siguiente.
+        """
+        db = self._get_db_session()
+        try:
+            query = db.query(*self._READ_COLUMNS)
+            if after_id is not None:
+                query = query.filter(TransactionEntity.id < after_id if descending else TransactionEntity.id > after_id)
+            order = TransactionEntity.id.desc() if descending else TransactionEntity.id.asc()
+            rows = query.order_by(order).limit(limit + 1).all()
+            items = [self._row_to_domain(row) for row in rows[:limit]]
+            next_key = items[-1].id if len(rows) > limit else None
+            return KeysetPage(items=items, next_key=next_key)
+        except Exception as e:
+            raise Exception(f"Error al obtener página de transacciones: {str(e)}")
+        finally:
+            db.close()
+
+    def iter_all(self, batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todas las transacciones con cursor del servidor.
+        La sesión queda abierta mientras se consume el iterador.
+        """
+        db = self._get_db_session()
+        try:
+            query = db.query(*self._READ_COLUMNS).order_by(TransactionEntity.id.asc())
+            for row in stream_query(query, batch_size):
+                yield dict(row._mapping)
+        finally:
+            db.close()
+
     def get_by_id(self, transaction_id: int) -> Optional[Transaction]:
         """Obtiene transacción por ID desde MySQL."""
         db = self._get_db_session()
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from app.transactions.domain.models.transaction import Transaction
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+from app.shared.infrastructure.pagination import KeysetPage
 
 class TransactionRepositoryPort(ABC):
     """
@@ -14,6 +15,32 @@ class TransactionRepositoryPort(ABC):
         """Obtiene todas las transacciones"""
         pass
 
+    @abstractmethod
+    def get_page(self, after_id: Optional[int], limit: int, descending: bool = False) -> KeysetPage[Transaction]:
+        """
+        Obtiene una página de transacciones ordenada por id (keyset).
+
+        Args:
+            after_id: id del último elemento de la página anterior (None = primera página)
+            limit: Tamaño máximo de la página
+            descending: True para recorrer de la más reciente a la más antigua
+
+        Returns:
+            KeysetPage[Transaction]: Transacciones y clave para la página siguiente
+        """
+        pass
+
+    @abstractmethod
+    def iter_all(self, batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todas las transacciones ordenadas por id, como filas planas,
+        leyendo por lotes con cursor del servidor (para exportación).
+
+        Args:
+            batch_size: Filas por lote leído de la BD
+        """
+        pass
+
     @abstractmethod
     def get_by_id(self, transaction_id: int) -> Optional[Transaction]:
         """Busca una transacción por ID"""
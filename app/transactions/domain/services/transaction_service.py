@@ -1,7 +1,9 @@
-from typing import List
+from typing import List, Optional
 from app.transactions.domain.models.transaction import Transaction
 from app.transactions.domain.ports.transaction_repository_port import TransactionRepositoryPort
 from app.shared.infrastructure.response import ResultHandler
+from app.shared.infrastructure.pagination import resolve_limit, decode_cursor, page_cursor
+from app.shared.infrastructure.export import streaming_export
 
 class TransactionService:
     """
@@ -18,20 +20,32 @@ class TransactionService:
         """
         self.transaction_repository = transaction_repository
 
-    def get_all_transactions(self):
+    def get_all_transactions(self, cursor: Optional[str] = None, limit: Optional[int] = None, order: str = "asc"):
         """
-        Caso de uso: Obtener todas las transacciones del sistema.
+        Caso de uso: Obtener las transacciones del sistema, paginadas por cursor.
+
+        Args:
+            cursor: Cursor opaco de la página anterior (None = primera página)
+            limit: Tamaño de página (se acota a PAGINATION_MAX_LIMIT)
+            order: 'asc' o 'desc' por id
 
         Returns:
             HTTP Response: Respuesta estructurada con ResultHandler
         """
         try:
-            transactions = self.transaction_repository.get_all()
-            transactions_dict = [transaction.model_dump() for transaction in transactions]
+            page = self.transaction_repository.get_page(
+                after_id=decode_cursor(cursor, order, key_type=int),
+                limit=resolve_limit(limit),
+                descending=order == "desc"
+            )
+            transactions_dict = [transaction.model_dump() for transaction in page.items]
 
             return ResultHandler.success(
-                data=transactions_dict,
-                message=f"Se obtuvieron {len(transactions)} transacciones correctamente"
+                data={
+                    "transactions": transactions_dict,
+                    "next_cursor": page_cursor(page, order)
+                },
+                message=f"Se obtuvieron {len(page.items)} transacciones correctamente"
             )
 
         except ValueError as e:
@@ -42,3 +56,33 @@ class TransactionService:
             return ResultHandler.internal_error(
                 message="Error al obtener transacciones"
             )
+
+    def export_transactions(self, export_format: str = "ndjson"):
+        """
+        Caso de uso: Exportar todas las transacciones en streaming.
+
+        Las filas se leen por lotes con cursor del servidor y se escriben
+        como NDJSON o CSV a medida que llegan: la memoria no depende del total.
+
+        Args:
+            export_format: 'ndjson' o 'csv'
+
+        Returns:
+            StreamingResponse, o respuesta de error con ResultHandler
+        """
+        try:
+            return streaming_export(
+                self.transaction_repository.iter_all(),
+                fieldnames=list(Transaction.model_fields),
+                export_format=export_format,
+                filename="transactions"
+            )
+
+        except ValueError as e:
+            return ResultHandler.bad_request(message=str(e))
+
+        except Exception as e:
+            print(f"Error al exportar transacciones: {e}")
+            return ResultHandler.internal_error(
+                message="Error al exportar transacciones"
+            )
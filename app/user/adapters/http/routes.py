@@ -1,15 +1,13 @@
-from fastapi import APIRouter, Body, Query
+import os
+from functools import lru_cache
+from typing import Optional
+from fastapi import APIRouter, Body, Query, Request
 from app.user.domain.services.city_service import CityService
 from app.user.domain.services.user_service import UserService
-from app.user.adapters.persistence.city_repository import CityRepositorySQL
-from app.user.adapters.persistence.user_repository import UserRepositorySQL
-from app.user.adapters.persistence.community_member_repository import CommunityMemberRepositorySQL
-from app.user.adapters.persistence.energy_record_repository import EnergyRecordRepositorySQL
-from app.user.adapters.persistence.p2p_contract_repository import P2PContractRepositorySQL
-from app.user.adapters.persistence.energy_credit_repository import EnergyCreditRepositorySQL
-from app.user.adapters.persistence.pde_allocation_repository import PDEAllocationRepositorySQL
-from app.user.adapters.http.user_dtos import RegisterUserInCommunityRequest
+from app.user.domain.services.energy_balance_aggregator import EnergyBalanceAggregator
+from app.user.adapters.http.user_dtos import RegisterUserInCommunityRequest, AssignMeterRequest
 from app.shared.infrastructure.response import ResultHandler
+from app.shared.infrastructure.http_cache import CachedCatalog
 
 router = APIRouter(
     prefix="/user",
@@ -17,57 +15,107 @@ router = APIRouter(
 )
 
 # Inyección de dependencias - Configuración de servicios
-city_repo = CityRepositorySQL()
-city_service = CityService(city_repo)
-
-# Repositorios para UserService
-user_repo = UserRepositorySQL()
-community_member_repo = CommunityMemberRepositorySQL()
-energy_record_repo = EnergyRecordRepositorySQL()
-p2p_contract_repo = P2PContractRepositorySQL()
-energy_credit_repo = EnergyCreditRepositorySQL()
-pde_allocation_repo = PDEAllocationRepositorySQL()
-
-user_service = UserService(
-    user_repository=user_repo,
-    community_member_repository=community_member_repo,
-    energy_record_repository=energy_record_repo,
-    p2p_contract_repository=p2p_contract_repo,
-    energy_credit_repository=energy_credit_repo,
-    pde_allocation_repository=pde_allocation_repo
+# Se construyen en el primer uso (o en el hook de arranque de app.main)
+@lru_cache(maxsize=None)
+def get_city_service() -> CityService:
+    from app.user.adapters.persistence.city_repository import CityRepositorySQL
+    return CityService(CityRepositorySQL())
+
+
+@lru_cache(maxsize=None)
+def get_user_service() -> UserService:
+    from app.user.adapters.persistence.user_repository import UserRepositorySQL
+    from app.user.adapters.persistence.community_member_repository import CommunityMemberRepositorySQL
+    from app.user.adapters.persistence.energy_record_repository import EnergyRecordRepositorySQL
+    from app.user.adapters.persistence.p2p_contract_repository import P2PContractRepositorySQL
+    from app.user.adapters.persistence.energy_credit_repository import EnergyCreditRepositorySQL
+    from app.user.adapters.persistence.pde_allocation_repository import PDEAllocationRepositorySQL
+    from app.user.adapters.persistence.meter_assignment_repository import MeterAssignmentRepositorySQL
+    return UserService(
+        user_repository=UserRepositorySQL(),
+        community_member_repository=CommunityMemberRepositorySQL(),
+        energy_record_repository=EnergyRecordRepositorySQL(),
+        p2p_contract_repository=P2PContractRepositorySQL(),
+        energy_credit_repository=EnergyCreditRepositorySQL(),
+        pde_allocation_repository=PDEAllocationRepositorySQL(),
+        meter_assignment_repository=MeterAssignmentRepositorySQL()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_energy_balance_aggregator() -> EnergyBalanceAggregator:
+    from app.user.adapters.persistence.energy_record_repository import EnergyRecordRepositorySQL
+    return EnergyBalanceAggregator(EnergyRecordRepositorySQL())
+
+
+# El catálogo de ciudades casi no cambia: se guarda serializado y precomprimido,
+# con ETag por versión; los GET condicionales se resuelven sin tocar la BD.
+cities_catalog = CachedCatalog(
+    name="cities",
+    loader=lambda: get_city_service().get_all_cities(),
+    ttl_seconds=float(os.getenv("CITY_CATALOG_CACHE_SECONDS", "3600")),
+    max_age=int(os.getenv("CITY_CATALOG_MAX_AGE", "300")),
 )
 
 
 @router.get("/cities")
-def get_cities():
-    result = city_service.get_all_cities()
-    return result
+def get_cities(request: Request):
+    return cities_catalog.respond(request)
 
 @router.get('/cities-with-departments')
 def get_cities_with_departments():
-    result = city_service.get_cities_with_departments()
+    result = get_city_service().get_cities_with_departments()
     return result
 
 
 # ========== ENDPOINTS DE USUARIOS P2P ==========
 
+@router.get("/")
+def get_users(
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior"),
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Orden por id")
+):
+    """
+    Lista usuarios paginados por cursor (keyset sobre id).
+    """
+    result = get_user_service().get_users(cursor=cursor, limit=limit, order=order)
+    return result
+
+
 @router.get("/{user_id}/complete-data")
 def get_user_with_community_data(user_id: int):
     """
     Obtiene datos completos de un usuario con información energética.
     Incluye: datos básicos, membresía, energía del mes, contratos, créditos, PDE.
     """
-    result = user_service.get_user_with_community_data(user_id)
+    result = get_user_service().get_user_with_community_data(user_id)
     return result
 
 
 @router.get("/community/{community_id}/members")
-def get_community_users(community_id: int):
+def get_community_users(
+    community_id: int,
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior"),
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página")
+):
     """
-    Obtiene lista completa de usuarios de una comunidad.
+    Obtiene los usuarios de una comunidad, paginados por cursor.
     Incluye: datos consolidados, energía, contratos, créditos, PDE.
     """
-    result = user_service.get_community_users(community_id)
+    result = get_user_service().get_community_users(community_id, cursor=cursor, limit=limit)
+    return result
+
+
+@router.get("/community/{community_id}/members/export")
+def export_community_members(
+    community_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Formato de exportación")
+):
+    """
+    Exporta los miembros de una comunidad en streaming (NDJSON o CSV).
+    """
+    result = get_user_service().export_community_members(community_id, export_format=format)
     return result
 
 
@@ -80,7 +128,7 @@ def get_user_energy_balance(
     Obtiene balance energético detallado de un usuario.
     Calcula: autoconsumo, excedentes, importaciones, compras/ventas P2P, balance neto.
     """
-    result = user_service.get_user_energy_balance(user_id, period)
+    result = get_user_service().get_user_energy_balance(user_id, period)
     return result
 
 
@@ -90,7 +138,7 @@ def register_user_in_community(request: RegisterUserInCommunityRequest = Body(..
     Registra un usuario en una comunidad energética.
     Valida: usuario activo, no duplicado, rol válido, pde_share en rango.
     """
-    result = user_service.register_user_in_community(
+    result = get_user_service().register_user_in_community(
         user_id=request.user_id,
         community_id=request.community_id,
         role=request.role,
@@ -100,6 +148,16 @@ def register_user_in_community(request: RegisterUserInCommunityRequest = Body(..
     return result
 
 
+@router.put("/meters/{meter_id}")
+def assign_meter(meter_id: str, request: AssignMeterRequest = Body(...)):
+    """
+    Asigna un medidor a un usuario (crea o reemplaza la asignación).
+    Desde entonces sus lecturas se suman a los registros energéticos del usuario.
+    """
+    result = get_user_service().assign_meter(meter_id=meter_id, user_id=request.user_id, kind=request.kind)
+    return result
+
+
 @router.get("/ping")
 def ping():
     """Health check para el servicio de usuarios"""
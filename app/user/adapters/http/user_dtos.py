@@ -18,3 +18,10 @@ class UserEnergyBalanceRequest(BaseModel):
     """
     user_id: int
     period: str  # 'YYYY-MM'
+
+class AssignMeterRequest(BaseModel):
+    """
+    DTO para asignar un medidor a un usuario.
+    """
+    user_id: int
+    kind: str = "grid"  # 'grid', 'generation'
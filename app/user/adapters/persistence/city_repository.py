@@ -26,6 +26,26 @@ class CityRepositorySQL(CityRepositoryPort):
     db_generator = get_db()
     return next(db_generator)
   
+  # Columnas de los listados: se consultan como tuplas, sin hidratar entidades
+  # ORM (identity map, estado de instancia), y se mapean directo al dominio.
+  _READ_COLUMNS = (CityEntity.codCiudad, CityEntity.codCiudadDane, CityEntity.codDepto, CityEntity.nomCiudad)
+
+  def _row_to_domain(self, row) -> City:
+    """
+    Convierte una fila (tupla en el orden de _READ_COLUMNS) a modelo de dominio.
+    Args:
+      row: Fila devuelta por la consulta de columnas
+    Returns:
+      City: Modelo de dominio
+    """
+    cod_ciudad, cod_ciudad_dane, cod_depto, nom_ciudad = row
+    return City(
+      codCiudad=cod_ciudad,
+      codCiudadDane=cod_ciudad_dane,
+      codDepto=cod_depto,
+      nomCiudad=nom_ciudad
+    )
+
   def _entity_to_domain(self, entity: CityEntity) -> City:
     """
     Convierte una entidad de base de datos a modelo de dominio.
@@ -47,16 +67,16 @@ class CityRepositorySQL(CityRepositoryPort):
     
     Flujo:
     1. Obtiene sesión de DB
-    2. Consulta todas las entidades CityEntity
-    3. Convierte cada entidad al modelo de dominio City
+    2. Consulta las columnas de ciudades como tuplas
+    3. Convierte cada fila al modelo de dominio City
     4. Retorna lista de modelos de dominio
     """
     db = self._get_db_session()
     try:
-      # 1. Consulta SQL a través del ORM
-      city_entities = db.query(CityEntity).all()
-      # 2. Conversión de entidades a modelos de dominio
-      cities = [self._entity_to_domain(entity) for entity in city_entities]
+      # 1. Consulta SQL de columnas (sin hidratar entidades ORM)
+      rows = db.query(*self._READ_COLUMNS).all()
+      # 2. Conversión de filas a modelos de dominio
+      cities = [self._row_to_domain(row) for row in rows]
       return cities
         
     except Exception as e:
@@ -89,8 +109,8 @@ class CityRepositorySQL(CityRepositoryPort):
     """
     db = self._get_db_session()
     try:
-      entities = db.query(CityEntity).filter(CityEntity.codDepto == depto_code).all()
-      cities = [self._entity_to_domain(entity) for entity in entities]
+      rows = db.query(*self._READ_COLUMNS).filter(CityEntity.codDepto == depto_code).all()
+      cities = [self._row_to_domain(row) for row in rows]
       return cities
         
     except Exception as e:
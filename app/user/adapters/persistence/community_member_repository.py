@@ -1,9 +1,12 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from sqlalchemy.orm import Session
 from app.user.domain.ports.community_member_repository_port import CommunityMemberRepositoryPort
-from app.user.domain.models.community_member import CommunityMember
+from app.user.domain.models.community_member import CommunityMember, MEMBER_EXPORT_FIELDS
 from app.user.adapters.persistence.community_member_entity import CommunityMemberEntity
+from app.user.adapters.persistence.user_entity import UserEntity
 from app.shared.infrastructure.db import get_db
+from app.shared.infrastructure.pagination import KeysetPage
+from app.shared.infrastructure.export import stream_query
 
 
 class CommunityMemberRepositorySQL(CommunityMemberRepositoryPort):
@@ -66,6 +69,57 @@ class CommunityMemberRepositorySQL(CommunityMemberRepositoryPort):
         finally:
             db.close()
 
+    def get_page_by_community_id(self, community_id: int, after_id: Optional[int], limit: int) -> KeysetPage[CommunityMember]:
+        """
+        Query: SELECT * FROM community_members WHERE community_id = ? AND id > ? ORDER BY id LIMIT ?+1
+        """
+        db = self._get_db_session()
+        try:
+            query = db.query(CommunityMemberEntity).filter(
+                CommunityMemberEntity.community_id == community_id
+            )
+            if after_id is not None:
+                query = query.filter(CommunityMemberEntity.id > after_id)
+            entities = query.order_by(CommunityMemberEntity.id.asc()).limit(limit + 1).all()
+
+            items = [self._entity_to_domain(entity) for entity in entities[:limit]]
+            next_key = items[-1].id if len(entities) > limit else None
+            return KeysetPage(items=items, next_key=next_key)
+        except Exception as e:
+            raise Exception(f"Error al obtener página de miembros de comunidad {community_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def iter_export_rows(self, community_id: int, batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Query: SELECT ... FROM community_members JOIN users WHERE community_id = ? ORDER BY id
+        Un solo recorrido con cursor del servidor; la sesión queda abierta mientras
+        se consume el iterador.
+        """
+        db = self._get_db_session()
+        try:
+            query = db.query(
+                CommunityMemberEntity.id,
+                CommunityMemberEntity.community_id,
+                CommunityMemberEntity.user_id,
+                UserEntity.name,
+                UserEntity.lastname,
+                UserEntity.email,
+                CommunityMemberEntity.role,
+                CommunityMemberEntity.pde_share,
+                CommunityMemberEntity.installed_capacity,
+                CommunityMemberEntity.joined_at
+            ).join(
+                UserEntity, UserEntity.id == CommunityMemberEntity.user_id
+            ).filter(
+                CommunityMemberEntity.community_id == community_id
+            ).order_by(CommunityMemberEntity.id.asc())
+
+            for row in stream_query(query, batch_size):
+                yield dict(zip(MEMBER_EXPORT_FIELDS, row))
+        finally:
+            db.close()
+
     def save(self, member: CommunityMember) -> CommunityMember:
         """
         Query especificada:
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, DECIMAL
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, DECIMAL, UniqueConstraint, Index
 from app.shared.infrastructure.db import Base
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -12,9 +12,16 @@ class EnergyRecordEntity(Base):
     """
     Entidad de base de datos para registros energéticos.
     Mapea la tabla 'energy_records' en MySQL.
+
+    Hay un registro por (usuario, periodo, comunidad); la clave única es
+    también el índice de get_by_user_and_period.
     """
     __tablename__ = "energy_records"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        UniqueConstraint("user_id", "period", "community_id", name="uq_energy_records_user_period"),
+        Index("ix_energy_records_community_period", "community_id", "period"),
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,11 +1,22 @@
-from typing import List, Optional
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.user.domain.ports.energy_record_repository_port import EnergyRecordRepositoryPort
 from app.user.domain.models.energy_record import EnergyRecord
+from app.user.domain.models.meter_assignment import MeterWatermark, fold_meter_readings
 from app.user.adapters.persistence.energy_record_entity import EnergyRecordEntity
+from app.user.adapters.persistence.meter_assignment_entity import MeterAssignmentEntity
+from app.user.adapters.persistence.meter_watermark_entity import MeterWatermarkEntity
+from app.user.adapters.persistence.meter_energy_period_entity import MeterEnergyPeriodEntity
 from app.shared.infrastructure.db import get_db
 
 
+def _kwh(value: float) -> Decimal:
+    """kWh acumulados redondeados a la precisión de energy_records (DECIMAL(10, 2))"""
+    return Decimal(f"{value:.2f}")
+
+
 class EnergyRecordRepositorySQL(EnergyRecordRepositoryPort):
     """
     Implementación SQL del repositorio de registros energéticos.
@@ -115,3 +126,166 @@ class EnergyRecordRepositorySQL(EnergyRecordRepositoryPort):
             raise Exception(f"Error al guardar registro energético: {str(e)}")
         finally:
             db.close()
+
+    def apply_meter_readings(self, readings_by_meter: Dict[str, List[Tuple[int, Optional[float], Optional[float]]]]) -> int:
+        """
+        Suma un lote de lecturas a energy_records.
+
+        1. Bloquea las marcas de agua de los medidores asignados (FOR UPDATE):
+           dos lotes del mismo medidor no se suman en paralelo.
+        2. Convierte las lecturas posteriores a la marca en kWh por periodo.
+        3. Bloquea los energy_records (usuario, comunidad, periodo) afectados
+           (FOR UPDATE, en orden; crea los que falten): dos lotes de medidores
+           distintos del mismo usuario y periodo se serializan aquí, así el
+           recálculo de uno no pisa la suma del otro.
+        4. Acumula los kWh en meter_energy_periods y recalcula esos
+           energy_records con una lectura bloqueante (ve lo último confirmado):
+           - generated = exportado por medidores de generación
+           - imported / exported = importado / exportado por medidores de red
+           - consumed = generated + imported - exported
+        Cada paso lee solo las filas de los medidores y periodos del lote.
+        """
+        if not readings_by_meter:
+            return 0
+        db = self._get_db_session()
+        try:
+            assignments = db.query(MeterAssignmentEntity).filter(
+                MeterAssignmentEntity.meter_id.in_(list(readings_by_meter))
+            ).all()
+            if not assignments:
+                return 0
+            meter_ids = [a.meter_id for a in assignments]
+            watermarks = {
+                w.meter_id: w for w in db.query(MeterWatermarkEntity).filter(
+                    MeterWatermarkEntity.meter_id.in_(meter_ids)
+                ).with_for_update().all()
+            }
+
+            # Energía nueva por (medidor, periodo)
+            deltas: Dict[Tuple[str, str], List[float]] = {}
+            for a in assignments:
+                entity = watermarks.get(a.meter_id)
+                current = MeterWatermark.model_validate(entity) if entity is not None else None
+                meter_deltas, mark = fold_meter_readings(a.meter_id, current, sorted(readings_by_meter[a.meter_id]))
+                for period, values in meter_deltas.items():
+                    deltas[(a.meter_id, period)] = values
+                if mark is None:
+                    continue
+                if entity is None:
+                    db.add(MeterWatermarkEntity(**mark.model_dump()))
+                else:
+                    entity.timestamp, entity.energy_ai, entity.energy_ae = mark.timestamp, mark.energy_ai, mark.energy_ae
+            if not deltas:
+                db.commit()
+                return 0
+
+            by_meter = {a.meter_id: a for a in assignments}
+            periods = sorted({period for _, period in deltas})
+            existing = {
+                (p.meter_id, p.period): p for p in db.query(MeterEnergyPeriodEntity).filter(
+                    MeterEnergyPeriodEntity.meter_id.in_([meter_id for meter_id, _ in deltas]),
+                    MeterEnergyPeriodEntity.period.in_(periods)
+                ).with_for_update().all()
+            }
+            # Las filas de un periodo ya existentes conservan su usuario y comunidad
+            affected = set()
+            for meter_id, period in deltas:
+                row = existing.get((meter_id, period))
+                a = row if row is not None else by_meter[meter_id]
+                affected.add((a.user_id, a.community_id, period))
+            records = self._lock_records(db, affected)
+
+            for (meter_id, period), (imported, exported) in deltas.items():
+                a = by_meter[meter_id]
+                row = existing.get((meter_id, period))
+                if row is None:
+                    row = MeterEnergyPeriodEntity(
+                        meter_id=meter_id, period=period, user_id=a.user_id, community_id=a.community_id,
+                        kind=a.kind, imported_kwh=0.0, exported_kwh=0.0
+                    )
+                    db.add(row)
+                row.imported_kwh += imported
+                row.exported_kwh += exported
+            db.flush()
+
+            updated = self._recompute_records(db, records)
+            db.commit()
+            return updated
+
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error al sumar lecturas a registros energéticos: {str(e)}")
+        finally:
+            db.close()
+
+    def _lock_records(self, db: Session, keys) -> Dict[Tuple[int, int, str], EnergyRecordEntity]:
+        """
+        Bloquea (FOR UPDATE) los energy_records de las claves (user_id,
+        community_id, period), en orden, y crea los que falten. Si otro
+        proceso crea el mismo registro a la vez, la clave única hace fallar
+        uno de los dos y su lote se reintenta.
+        """
+        user_ids = sorted({user_id for user_id, _, _ in keys})
+        periods = sorted({period for _, _, period in keys})
+        records = {
+            (r.user_id, r.community_id, r.period): r for r in db.query(EnergyRecordEntity).filter(
+                EnergyRecordEntity.user_id.in_(user_ids),
+                EnergyRecordEntity.period.in_(periods)
+            ).order_by(
+                EnergyRecordEntity.user_id, EnergyRecordEntity.period, EnergyRecordEntity.community_id
+            ).with_for_update().all()
+            if (r.user_id, r.community_id, r.period) in keys
+        }
+        for user_id, community_id, period in sorted(set(keys) - set(records)):
+            record = EnergyRecordEntity(
+                user_id=user_id, community_id=community_id, period=period,
+                generated_kwh=0, consumed_kwh=0, exported_kwh=0, imported_kwh=0
+            )
+            db.add(record)
+            records[(user_id, community_id, period)] = record
+        db.flush()
+        return records
+
+    def _recompute_records(self, db: Session, records: Dict[Tuple[int, int, str], EnergyRecordEntity]) -> int:
+        """Recalcula los energy_records ya bloqueados de las claves (user_id, community_id, period)"""
+        user_ids = sorted({user_id for user_id, _, _ in records})
+        periods = sorted({period for _, _, period in records})
+        totals: Dict[Tuple[int, int, str], Dict[str, float]] = {
+            key: {"generated": 0.0, "imported": 0.0, "exported": 0.0} for key in records
+        }
+        # Lectura bloqueante: en REPEATABLE READ una lectura simple usaría la
+        # instantánea del inicio de la transacción, anterior a los bloqueos
+        sums = db.query(
+            MeterEnergyPeriodEntity.user_id,
+            MeterEnergyPeriodEntity.community_id,
+            MeterEnergyPeriodEntity.period,
+            MeterEnergyPeriodEntity.kind,
+            func.sum(MeterEnergyPeriodEntity.imported_kwh),
+            func.sum(MeterEnergyPeriodEntity.exported_kwh)
+        ).filter(
+            MeterEnergyPeriodEntity.user_id.in_(user_ids),
+            MeterEnergyPeriodEntity.period.in_(periods)
+        ).group_by(
+            MeterEnergyPeriodEntity.user_id,
+            MeterEnergyPeriodEntity.community_id,
+            MeterEnergyPeriodEntity.period,
+            MeterEnergyPeriodEntity.kind
+        ).with_for_update(read=True).all()
+        for user_id, community_id, period, kind, imported, exported in sums:
+            total = totals.get((user_id, community_id, period))
+            if total is None:
+                continue
+            if kind == "generation":
+                total["generated"] += exported or 0.0
+            else:
+                total["imported"] += imported or 0.0
+                total["exported"] += exported or 0.0
+
+        for key, total in totals.items():
+            record = records[key]
+            consumed = max(0.0, total["generated"] + total["imported"] - total["exported"])
+            record.generated_kwh = _kwh(total["generated"])
+            record.consumed_kwh = _kwh(consumed)
+            record.imported_kwh = _kwh(total["imported"])
+            record.exported_kwh = _kwh(total["exported"])
+        return len(totals)
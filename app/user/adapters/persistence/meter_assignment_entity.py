@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.shared.infrastructure.db import Base
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+bogota_tz = ZoneInfo("America/Bogota")
+
+def bogota_now():
+    return datetime.now(bogota_tz)
+
+class MeterAssignmentEntity(Base):
+    """
+    Entidad de base de datos para la asignación medidor → usuario.
+    Mapea la tabla 'meter_assignments' en MySQL.
+    """
+    __tablename__ = "meter_assignments"
+    __table_args__ = {'extend_existing': True}
+
+    meter_id = Column(String(100), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    community_id = Column(Integer, ForeignKey("communities.id"), nullable=False)
+    kind = Column(String(20), nullable=False)  # 'grid', 'generation'
+    assigned_at = Column(DateTime(timezone=True), default=bogota_now)
+
+    def __repr__(self):
+        return f"<MeterAssignmentEntity(meter_id='{self.meter_id}', user_id={self.user_id})>"
@@ -0,0 +1,87 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.user.domain.ports.meter_assignment_repository_port import MeterAssignmentRepositoryPort
+from app.user.domain.models.meter_assignment import MeterAssignment
+from app.user.adapters.persistence.meter_assignment_entity import MeterAssignmentEntity
+from app.shared.infrastructure.db import get_db
+
+
+class MeterAssignmentRepositorySQL(MeterAssignmentRepositoryPort):
+    """
+    Implementación SQL del repositorio de asignaciones medidor → usuario.
+    """
+
+    def __init__(self):
+        pass
+
+    def _get_db_session(self) -> Session:
+        db_generator = get_db()
+        return next(db_generator)
+
+    def _entity_to_domain(self, entity: MeterAssignmentEntity) -> MeterAssignment:
+        """Convierte entidad ORM a modelo de dominio"""
+        return MeterAssignment(
+            meter_id=entity.meter_id,
+            user_id=entity.user_id,
+            community_id=entity.community_id,
+            kind=entity.kind,
+            assigned_at=entity.assigned_at
+        )
+
+    def get_by_meter_id(self, meter_id: str) -> Optional[MeterAssignment]:
+        """
+        Query especificada: SELECT * FROM meter_assignments WHERE meter_id = ?
+        """
+        db = self._get_db_session()
+        try:
+            entity = db.query(MeterAssignmentEntity).filter(
+                MeterAssignmentEntity.meter_id == meter_id
+            ).first()
+
+            if entity is None:
+                return None
+
+            return self._entity_to_domain(entity)
+        except Exception as e:
+            raise Exception(f"Error al obtener asignación del medidor {meter_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def get_by_user_id(self, user_id: int) -> List[MeterAssignment]:
+        """
+        Query especificada: SELECT * FROM meter_assignments WHERE user_id = ?
+        """
+        db = self._get_db_session()
+        try:
+            entities = db.query(MeterAssignmentEntity).filter(
+                MeterAssignmentEntity.user_id == user_id
+            ).order_by(MeterAssignmentEntity.meter_id.asc()).all()
+
+            return [self._entity_to_domain(entity) for entity in entities]
+        except Exception as e:
+            raise Exception(f"Error al obtener medidores del usuario {user_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def save(self, assignment: MeterAssignment) -> MeterAssignment:
+        """
+        Crea o reemplaza la asignación (meter_id es la clave primaria).
+        """
+        db = self._get_db_session()
+        try:
+            entity = db.merge(MeterAssignmentEntity(
+                meter_id=assignment.meter_id,
+                user_id=assignment.user_id,
+                community_id=assignment.community_id,
+                kind=assignment.kind,
+                assigned_at=assignment.assigned_at
+            ))
+            db.commit()
+            db.refresh(entity)
+
+            return self._entity_to_domain(entity)
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error al guardar asignación del medidor: {str(e)}")
+        finally:
+            db.close()
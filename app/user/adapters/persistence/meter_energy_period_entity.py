@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Float, Index
+from app.shared.infrastructure.db import Base
+
+class MeterEnergyPeriodEntity(Base):
+    """
+    Entidad de base de datos para la energía acumulada de un medidor en un
+    periodo (sin redondear). energy_records se recalcula a partir de estas
+    filas, así el redondeo a DECIMAL(10, 2) se aplica una sola vez.
+    Mapea la tabla 'meter_energy_periods' en MySQL.
+    """
+    __tablename__ = "meter_energy_periods"
+    __table_args__ = (
+        Index("ix_meter_energy_periods_user_period", "user_id", "period"),
+        {'extend_existing': True},
+    )
+
+    meter_id = Column(String(100), primary_key=True)
+    period = Column(String(7), primary_key=True)  # 'YYYY-MM'
+    user_id = Column(Integer, nullable=False)
+    community_id = Column(Integer, nullable=False)
+    kind = Column(String(20), nullable=False)  # 'grid', 'generation'
+    imported_kwh = Column(Float, nullable=False, default=0)  # Δ energy_ai
+    exported_kwh = Column(Float, nullable=False, default=0)  # Δ energy_ae
+
+    def __repr__(self):
+        return f"<MeterEnergyPeriodEntity(meter_id='{self.meter_id}', period='{self.period}')>"
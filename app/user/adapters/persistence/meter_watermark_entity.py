@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Float, BigInteger
+from app.shared.infrastructure.db import Base
+
+class MeterWatermarkEntity(Base):
+    """
+    Entidad de base de datos para la marca de agua de cada medidor:
+    última lectura ya sumada a energy_records y sus contadores.
+    Mapea la tabla 'meter_watermarks' en MySQL.
+    """
+    __tablename__ = "meter_watermarks"
+    __table_args__ = {'extend_existing': True}
+
+    meter_id = Column(String(100), primary_key=True)
+    timestamp = Column(BigInteger, nullable=False)  # ms
+    energy_ai = Column(Float, nullable=True)
+    energy_ae = Column(Float, nullable=True)
+
+    def __repr__(self):
+        return f"<MeterWatermarkEntity(meter_id='{self.meter_id}', timestamp={self.timestamp})>"
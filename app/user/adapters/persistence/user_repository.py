@@ -4,6 +4,7 @@ from app.user.domain.ports.user_repository_port import UserRepositoryPort
 from app.user.domain.models.user import User
 from app.user.adapters.persistence.user_entity import UserEntity
 from app.shared.infrastructure.db import get_db
+from app.shared.infrastructure.pagination import KeysetPage
 
 
 class UserRepositorySQL(UserRepositoryPort):
@@ -21,8 +22,12 @@ class UserRepositorySQL(UserRepositoryPort):
         return next(db_generator)
 
     def _entity_to_domain(self, entity: UserEntity) -> User:
-        """Convierte entidad ORM a modelo de dominio"""
-        return User(
+        """
+        Convierte entidad ORM (o fila con los mismos atributos) a modelo de dominio.
+        Usa model_construct: el email ya se validó como EmailStr al guardarse y
+        revalidarlo en cada lectura cuesta ~10x más que construir el modelo.
+        """
+        return User.model_construct(
             id=entity.id,
             document=entity.document,
             name=entity.name,
@@ -73,13 +78,34 @@ class UserRepositorySQL(UserRepositoryPort):
         """
         db = self._get_db_session()
         try:
-            entities = db.query(UserEntity).all()
-            return [self._entity_to_domain(entity) for entity in entities]
+            # Filas de columnas (sin hidratar entidades ORM); exponen los mismos atributos
+            rows = db.query(*UserEntity.__table__.columns).all()
+            return [self._entity_to_domain(row) for row in rows]
         except Exception as e:
             raise Exception(f"Error al obtener todos los usuarios: {str(e)}")
         finally:
             db.close()
 
+    def get_page(self, after_id: Optional[int], limit: int, descending: bool = False) -> KeysetPage[User]:
+        """
+        Obtiene una página de usuarios.
+        Query: SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?+1
+        """
+        db = self._get_db_session()
+        try:
+            query = db.query(*UserEntity.__table__.columns)
+            if after_id is not None:
+                query = query.filter(UserEntity.id < after_id if descending else UserEntity.id > after_id)
+            order = UserEntity.id.desc() if descending else UserEntity.id.asc()
+            rows = query.order_by(order).limit(limit + 1).all()
+            items = [self._entity_to_domain(row) for row in rows[:limit]]
+            next_key = items[-1].id if len(rows) > limit else None
+            return KeysetPage(items=items, next_key=next_key)
+        except Exception as e:
+            raise Exception(f"Error al obtener página de usuarios: {str(e)}")
+        finally:
+            db.close()
+
     def save(self, user: User) -> User:
         """
         Guarda un nuevo usuario.
@@ -18,3 +18,10 @@ class CommunityMember(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Columnas de la exportación de miembros (membresía + datos básicos del usuario)
+MEMBER_EXPORT_FIELDS = (
+    "member_id", "community_id", "user_id", "name", "lastname", "email",
+    "role", "pde_share", "installed_capacity", "joined_at",
+)
@@ -0,0 +1,93 @@
+from pydantic import BaseModel
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+bogota_tz = ZoneInfo("America/Bogota")
+
+# Tipos de medidor:
+# - grid: frontera con la red; energy_ai = importado, energy_ae = exportado
+# - generation: salida de la planta del usuario; energy_ae = generado
+METER_KINDS = ("grid", "generation")
+
+
+class MeterAssignment(BaseModel):
+    """
+    Modelo de dominio para la asignación de un medidor a un usuario.
+    Determina a qué registro energético (usuario, comunidad, periodo)
+    se suman las lecturas del medidor.
+    """
+    meter_id: str
+    user_id: int
+    community_id: int
+    kind: str  # 'grid', 'generation'
+    assigned_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MeterWatermark(BaseModel):
+    """
+    Última lectura de un medidor ya sumada a los registros energéticos.
+    Las lecturas con timestamp menor o igual ya están contabilizadas.
+    """
+    meter_id: str
+    timestamp: int  # ms
+    energy_ai: Optional[float] = None
+    energy_ae: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+def period_of(ts: int) -> str:
+    """Periodo 'YYYY-MM' (hora de Bogotá) de un timestamp en ms"""
+    return datetime.fromtimestamp(ts / 1000, bogota_tz).strftime("%Y-%m")
+
+
+def fold_meter_readings(
+    meter_id: str,
+    watermark: Optional[MeterWatermark],
+    readings: Iterable[Tuple[int, Optional[float], Optional[float]]]
+) -> Tuple[Dict[str, List[float]], Optional[MeterWatermark]]:
+    """
+    Convierte lecturas de contadores acumulados en energía por periodo.
+
+    La energía entre dos lecturas es la diferencia de los contadores y se
+    asigna al periodo de la lectura posterior. Solo cuentan las lecturas
+    posteriores a la marca de agua: reintentos y duplicados no suman dos
+    veces, y una lectura atrasada no cambia el total (los contadores ya la
+    incluyen). Una diferencia negativa (contador reiniciado) no suma y la
+    lectura pasa a ser la nueva base.
+
+    Args:
+        meter_id: ID del medidor
+        watermark: Marca de agua actual (None = primera lectura, solo fija la base)
+        readings: Tuplas (timestamp, energy_ai, energy_ae) ordenadas por timestamp
+
+    Returns:
+        ({periodo: [kWh importados, kWh exportados]}, nueva marca de agua)
+    """
+    deltas: Dict[str, List[float]] = {}
+    last_ts = watermark.timestamp if watermark is not None else None
+    last_ai = watermark.energy_ai if watermark is not None else None
+    last_ae = watermark.energy_ae if watermark is not None else None
+    for ts, ai, ae in readings:
+        if last_ts is not None and ts <= last_ts:
+            continue
+        if last_ts is not None:
+            d_ai = ai - last_ai if ai is not None and last_ai is not None else 0.0
+            d_ae = ae - last_ae if ae is not None and last_ae is not None else 0.0
+            if d_ai > 0 or d_ae > 0:
+                acc = deltas.setdefault(period_of(ts), [0.0, 0.0])
+                acc[0] += max(d_ai, 0.0)
+                acc[1] += max(d_ae, 0.0)
+        last_ts = ts
+        if ai is not None:
+            last_ai = ai
+        if ae is not None:
+            last_ae = ae
+    if last_ts is None or (watermark is not None and last_ts == watermark.timestamp):
+        return deltas, None
+    return deltas, MeterWatermark(meter_id=meter_id, timestamp=last_ts, energy_ai=last_ai, energy_ae=last_ae)
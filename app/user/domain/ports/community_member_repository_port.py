@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from app.user.domain.models.community_member import CommunityMember
-from typing import Optional, List
+from typing import Any, Dict, Iterator, Optional, List
+from app.shared.infrastructure.pagination import KeysetPage
 
 class CommunityMemberRepositoryPort(ABC):
     """
@@ -24,6 +25,24 @@ class CommunityMemberRepositoryPort(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_page_by_community_id(self, community_id: int, after_id: Optional[int], limit: int) -> KeysetPage[CommunityMember]:
+        """
+        Obtiene una página de miembros de una comunidad ordenada por id (keyset).
+        Query: SELECT * FROM community_members WHERE community_id = ? AND id > ? ORDER BY id LIMIT ?
+        """
+        pass
+
+    @abstractmethod
+    def iter_export_rows(self, community_id: int, batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los miembros de una comunidad con sus datos de usuario, como filas
+        planas (MEMBER_EXPORT_FIELDS), leyendo por lotes con cursor del servidor.
+        Query: SELECT ... FROM community_members JOIN users ON users.id = user_id
+               WHERE community_id = ? ORDER BY community_members.id
+        """
+        pass
+
     @abstractmethod
     def save(self, member: CommunityMember) -> CommunityMember:
         """
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from app.user.domain.models.energy_record import EnergyRecord
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 
 class EnergyRecordRepositoryPort(ABC):
     """
@@ -33,3 +33,19 @@ class EnergyRecordRepositoryPort(ABC):
     def save(self, record: EnergyRecord) -> EnergyRecord:
         """Guarda un nuevo registro energético"""
         pass
+
+    @abstractmethod
+    def apply_meter_readings(self, readings_by_meter: Dict[str, List[Tuple[int, Optional[float], Optional[float]]]]) -> int:
+        """
+        Suma un lote de lecturas de medidores a los registros energéticos de
+        sus usuarios, en una sola transacción: avanza la marca de agua de cada
+        medidor asignado y recalcula los registros (usuario, comunidad, periodo)
+        afectados con upserts. Las lecturas de medidores sin asignar se ignoran.
+
+        Args:
+            readings_by_meter: {meter_id: [(timestamp, energy_ai, energy_ae), ...]}
+
+        Returns:
+            int: Número de registros energéticos actualizados
+        """
+        pass
@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+from app.user.domain.models.meter_assignment import MeterAssignment
+from typing import Optional, List
+
+class MeterAssignmentRepositoryPort(ABC):
+    """
+    Puerto (interfaz) para el repositorio de asignaciones medidor → usuario.
+    Define el contrato para operaciones de persistencia.
+    """
+
+    @abstractmethod
+    def get_by_meter_id(self, meter_id: str) -> Optional[MeterAssignment]:
+        """
+        Obtiene la asignación de un medidor.
+        Query: SELECT * FROM meter_assignments WHERE meter_id = ?
+        """
+        pass
+
+    @abstractmethod
+    def get_by_user_id(self, user_id: int) -> List[MeterAssignment]:
+        """
+        Obtiene los medidores asignados a un usuario.
+        Query: SELECT * FROM meter_assignments WHERE user_id = ?
+        """
+        pass
+
+    @abstractmethod
+    def save(self, assignment: MeterAssignment) -> MeterAssignment:
+        """Crea o reemplaza la asignación de un medidor"""
+        pass
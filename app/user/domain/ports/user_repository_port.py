@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from app.user.domain.models.user import User
 from typing import Optional, List
+from app.shared.infrastructure.pagination import KeysetPage
 
 class UserRepositoryPort(ABC):
     """
@@ -23,6 +24,14 @@ class UserRepositoryPort(ABC):
         """Obtiene todos los usuarios"""
         pass
 
+    @abstractmethod
+    def get_page(self, after_id: Optional[int], limit: int, descending: bool = False) -> KeysetPage[User]:
+        """
+        Obtiene una página de usuarios ordenada por id (keyset).
+        Query: SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?
+        """
+        pass
+
     @abstractmethod
     def save(self, user: User) -> User:
         """Guarda un nuevo usuario"""
@@ -0,0 +1,33 @@
+from typing import Mapping, Optional, Sequence, Tuple
+from app.user.domain.ports.energy_record_repository_port import EnergyRecordRepositoryPort
+
+
+class EnergyBalanceAggregator:
+    """
+    Mantiene energy_records a partir de las lecturas que ingiere app/energy.
+
+    La raíz de composición (app.composition) lo conecta como consumidor de
+    los lotes persistidos por EnergyService:
+    cada lote se suma de forma incremental a los registros (usuario,
+    comunidad, periodo) de los medidores asignados, así los casos de uso de
+    balance leen una sola fila en lugar de recorrer las lecturas del mes.
+    Es idempotente: reintentar un lote no suma dos veces (marcas de agua).
+    """
+
+    def __init__(self, energy_record_repository: EnergyRecordRepositoryPort):
+        """Inyección de dependencias - Inversión de control"""
+        self.energy_record_repository = energy_record_repository
+
+    def fold_readings(self, readings: Mapping[str, Sequence[Tuple[int, Optional[float], Optional[float]]]]) -> int:
+        """
+        Suma un lote de lecturas agrupadas por medidor.
+
+        Args:
+            readings: Tuplas (timestamp, energy_ai, energy_ae) por meter_id
+
+        Returns:
+            int: Número de registros energéticos actualizados
+        """
+        return self.energy_record_repository.apply_meter_readings(
+            {meter_id: list(items) for meter_id, items in readings.items()}
+        )
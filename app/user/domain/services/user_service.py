@@ -7,8 +7,12 @@ from app.user.domain.ports.energy_record_repository_port import EnergyRecordRepo
 from app.user.domain.ports.p2p_contract_repository_port import P2PContractRepositoryPort
 from app.user.domain.ports.energy_credit_repository_port import EnergyCreditRepositoryPort
 from app.user.domain.ports.pde_allocation_repository_port import PDEAllocationRepositoryPort
-from app.user.domain.models.community_member import CommunityMember
+from app.user.domain.ports.meter_assignment_repository_port import MeterAssignmentRepositoryPort
+from app.user.domain.models.community_member import CommunityMember, MEMBER_EXPORT_FIELDS
+from app.user.domain.models.meter_assignment import MeterAssignment, METER_KINDS, bogota_tz
 from app.shared.infrastructure.response import ResultHandler
+from app.shared.infrastructure.pagination import resolve_limit, decode_cursor, page_cursor
+from app.shared.infrastructure.export import streaming_export
 
 
 class UserService:
@@ -17,10 +21,12 @@ class UserService:
     Implementa los casos de uso definidos en la arquitectura hexagonal.
 
     Casos de uso:
+    - getUsers: Listado paginado de usuarios
     - getUserWithCommunityData: Datos completos de usuario con info energética
     - getCommunityUsers: Lista de miembros con datos consolidados
     - getUserEnergyBalance: Balance energético detallado
     - registerUserInCommunity: Registro de usuario en comunidad
+    - assignMeter: Asignación de medidores a usuarios
     """
 
     def __init__(
@@ -30,7 +36,8 @@ class UserService:
         energy_record_repository: EnergyRecordRepositoryPort,
         p2p_contract_repository: P2PContractRepositoryPort,
         energy_credit_repository: EnergyCreditRepositoryPort,
-        pde_allocation_repository: PDEAllocationRepositoryPort
+        pde_allocation_repository: PDEAllocationRepositoryPort,
+        meter_assignment_repository: Optional[MeterAssignmentRepositoryPort] = None
     ):
         """Inyección de dependencias - Inversión de control"""
         self.user_repository = user_repository
@@ -39,6 +46,56 @@ class UserService:
         self.p2p_contract_repository = p2p_contract_repository
         self.energy_credit_repository = energy_credit_repository
         self.pde_allocation_repository = pde_allocation_repository
+        self.meter_assignment_repository = meter_assignment_repository
+
+
+    def get_users(self, cursor: Optional[str] = None, limit: Optional[int] = None, order: str = "asc") -> Dict[str, Any]:
+        """
+        Caso de uso: Listar usuarios paginados por cursor (keyset sobre id).
+
+        Args:
+            cursor: Cursor opaco de la página anterior (None = primera página)
+            limit: Tamaño de página (se acota a PAGINATION_MAX_LIMIT)
+            order: 'asc' o 'desc' por id
+
+        Returns:
+            HTTP Response con ResultHandler
+        """
+        try:
+            page = self.user_repository.get_page(
+                after_id=decode_cursor(cursor, order, key_type=int),
+                limit=resolve_limit(limit),
+                descending=order == "desc"
+            )
+            users_data = [
+                {
+                    "id": user.id,
+                    "document": user.document,
+                    "name": user.name,
+                    "lastname": user.lastname,
+                    "email": user.email,
+                    "phone": user.phone,
+                    "is_active": user.is_active,
+                    "role": user.role
+                }
+                for user in page.items
+            ]
+
+            return ResultHandler.success(
+                data={
+                    "users": users_data,
+                    "next_cursor": page_cursor(page, order)
+                },
+                message=f"Se obtuvieron {len(users_data)} usuarios"
+            )
+
+        except ValueError as e:
+            return ResultHandler.bad_request(message=str(e))
+        except Exception as e:
+            print(f"Error al listar usuarios: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno al listar usuarios"
+            )
 
 
     def get_user_with_community_data(self, user_id: int) -> Dict[str, Any]:
@@ -173,9 +230,14 @@ class UserService:
             )
 
 
-    def get_community_users(self, community_id: int) -> Dict[str, Any]:
+    def get_community_users(
+        self,
+        community_id: int,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
-        Caso de uso: Obtener lista completa de usuarios de una comunidad.
+        Caso de uso: Obtener los usuarios de una comunidad, paginados por cursor.
 
         Retorna para cada miembro:
         - Datos de usuario
@@ -186,13 +248,20 @@ class UserService:
 
         Args:
             community_id: ID de la comunidad
+            cursor: Cursor opaco de la página anterior (None = primera página)
+            limit: Tamaño de página (se acota a PAGINATION_MAX_LIMIT)
 
         Returns:
             HTTP Response con ResultHandler
         """
         try:
-            # 1. Obtener todos los miembros de la comunidad
-            members = self.community_member_repository.get_by_community_id(community_id)
+            # 1. Obtener la página de miembros de la comunidad
+            page = self.community_member_repository.get_page_by_community_id(
+                community_id,
+                after_id=decode_cursor(cursor, key_type=int),
+                limit=resolve_limit(limit)
+            )
+            members = page.items
 
             if not members:
                 return ResultHandler.success(
@@ -251,7 +320,8 @@ class UserService:
                 data={
                     "community_id": community_id,
                     "members_count": len(members_data),
-                    "members": members_data
+                    "members": members_data,
+                    "next_cursor": page_cursor(page)
                 },
                 message=f"Se obtuvieron {len(members_data)} miembros de la comunidad"
             )
@@ -265,6 +335,37 @@ class UserService:
             )
 
 
+    def export_community_members(self, community_id: int, export_format: str = "ndjson"):
+        """
+        Caso de uso: Exportar los miembros de una comunidad en streaming.
+
+        A diferencia de get_community_users, no consolida datos energéticos por
+        miembro: es un único recorrido de la membresía con datos del usuario.
+
+        Args:
+            community_id: ID de la comunidad
+            export_format: 'ndjson' o 'csv'
+
+        Returns:
+            StreamingResponse, o respuesta de error con ResultHandler
+        """
+        try:
+            return streaming_export(
+                self.community_member_repository.iter_export_rows(community_id),
+                fieldnames=list(MEMBER_EXPORT_FIELDS),
+                export_format=export_format,
+                filename=f"community_{community_id}_members"
+            )
+
+        except ValueError as e:
+            return ResultHandler.bad_request(message=str(e))
+        except Exception as e:
+            print(f"Error al exportar miembros de comunidad: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno al exportar miembros de comunidad"
+            )
+
+
     def get_user_energy_balance(self, user_id: int, period: str) -> Dict[str, Any]:
         """
         Caso de uso: Obtener balance energético detallado de un usuario.
@@ -466,3 +567,64 @@ class UserService:
             return ResultHandler.internal_error(
                 message="Error interno al registrar usuario en comunidad"
             )
+
+    def assign_meter(self, meter_id: str, user_id: int, kind: str = "grid") -> Dict[str, Any]:
+        """
+        Caso de uso: Asignar un medidor a un usuario.
+
+        La comunidad se toma de la membresía del usuario. Las lecturas del
+        medidor se suman a sus registros energéticos desde la siguiente
+        lectura ingerida (la primera solo fija la base de los contadores).
+
+        Validaciones:
+        - Usuario existe y pertenece a una comunidad
+        - Tipo de medidor válido (grid, generation)
+
+        Args:
+            meter_id: ID del medidor (el de las lecturas de /energy)
+            user_id: ID del usuario
+            kind: 'grid' (frontera con la red) o 'generation' (planta del usuario)
+
+        Returns:
+            HTTP Response con ResultHandler
+        """
+        try:
+            if kind not in METER_KINDS:
+                return ResultHandler.bad_request(
+                    message=f"Tipo de medidor inválido. Debe ser uno de: {', '.join(METER_KINDS)}"
+                )
+
+            user = self.user_repository.get_by_id(user_id)
+            if not user:
+                return ResultHandler.error(message=f"Usuario {user_id} no encontrado", status_code=404)
+
+            membership = self.community_member_repository.get_by_user_id(user_id)
+            if not membership:
+                return ResultHandler.bad_request(message="El usuario no pertenece a ninguna comunidad")
+
+            saved = self.meter_assignment_repository.save(MeterAssignment(
+                meter_id=meter_id,
+                user_id=user_id,
+                community_id=membership.community_id,
+                kind=kind,
+                assigned_at=datetime.now(bogota_tz)
+            ))
+
+            return ResultHandler.success(
+                data={
+                    "meter_id": saved.meter_id,
+                    "user_id": saved.user_id,
+                    "community_id": saved.community_id,
+                    "kind": saved.kind,
+                    "assigned_at": saved.assigned_at.isoformat() if saved.assigned_at else None
+                },
+                message="Medidor asignado exitosamente"
+            )
+
+        except ValueError as e:
+            return ResultHandler.bad_request(message=str(e))
+        except Exception as e:
+            print(f"Error al asignar medidor: {e}")
+            return ResultHandler.internal_error(
+                message="Error interno al asignar medidor"
+            )
@@ -0,0 +1,6 @@
+"""
+Benchmarks de rendimiento de la plataforma Volt.
+
+Cada módulo se ejecuta como script, por ejemplo:
+    python -m benchmarks.read_models --rows 20000
+"""
@@ -0,0 +1,124 @@
+"""
+Benchmark del camino de escritura de /energy/save-record.
+
+Compara el camino anterior (una entidad ORM por lectura + bulk_save_objects)
+contra el actual (tuplas planas + executemany a nivel de driver, por bloques,
+en una transacción) para requests de 1, 100 y 10k lecturas.
+Usa SQLite en memoria para aislar el costo de CPU del de la red.
+
+Ejecutar con: python -m benchmarks.energy_insert
+"""
+import argparse
+import time
+from datetime import datetime
+from sqlalchemy import create_engine
+from app.shared.infrastructure.db import configure_engine, get_db, Base
+from app.energy.adapters.persistence.energy_record_entity import EnergyReadingEntity, bogota_tz
+from app.energy.adapters.persistence.energy_repository import EnergyRepositorySQL
+from app.energy.domain.models.energy_record import (
+    EnergyRecord, MeterReadings, ReadingData, VoltageData, CurrentData, PowerData, EnergyData
+)
+
+READINGS_PER_METER = 96  # un día de lecturas cada 15 minutos
+
+# Claves de diccionario (meters, reading_operations, reading_subjects) para
+# el camino anterior; se cargan en main después de un guardado inicial
+LOOKUP_KEYS = {}
+
+
+def build_record(readings: int) -> EnergyRecord:
+    """Registro con `readings` lecturas repartidas en medidores de 96 lecturas"""
+    meters = []
+    base_ts = 1_700_000_000_000
+    for meter_index in range(0, readings, READINGS_PER_METER):
+        count = min(READINGS_PER_METER, readings - meter_index)
+        meters.append(MeterReadings(
+            meter_id=f"MTR{meter_index // READINGS_PER_METER:06d}",
+            readings=[
+                ReadingData(
+                    ts=base_ts + i * 900_000,
+                    flag=0,
+                    voltage=VoltageData(a=120.1, b=119.8, c=120.4),
+                    current=CurrentData(a=5.2, b=5.1, c=4.9),
+                    power=PowerData(ai=1.8, ae=0.0, ri=0.2, re=0.0),
+                    energy=EnergyData(ai=1520.5 + i, ae=10.0, ri=80.2, re=0.0),
+                )
+                for i in range(count)
+            ],
+        ))
+    return EnergyRecord(operation="sendReadings", subject="onDemand",
+                        meter_readings=meters, created_at=datetime.now(bogota_tz))
+
+
+def legacy_save(energy_record: EnergyRecord):
+    """Camino anterior: una EnergyReadingEntity por lectura + bulk_save_objects"""
+    db = next(get_db())
+    try:
+        entities = []
+        operation_id = LOOKUP_KEYS["operation"][energy_record.operation]
+        subject_id = LOOKUP_KEYS["subject"][energy_record.subject]
+        for meter_reading in energy_record.meter_readings:
+            meter_key = LOOKUP_KEYS["meter_id"][meter_reading.meter_id]
+            for r in meter_reading.readings:
+                entities.append(EnergyReadingEntity(
+                    operation_id=operation_id, subject_id=subject_id,
+                    meter_key=meter_key, timestamp=r.ts, flag=r.flag,
+                    voltage_a=r.voltage.a, voltage_b=r.voltage.b, voltage_c=r.voltage.c,
+                    current_a=r.current.a, current_b=r.current.b, current_c=r.current.c,
+                    power_ai=r.power.ai, power_ae=r.power.ae, power_ri=r.power.ri, power_re=r.power.re,
+                    energy_ai=r.energy.ai, energy_ae=r.energy.ae, energy_ri=r.energy.ri, energy_re=r.energy.re,
+                ))
+        db.bulk_save_objects(entities)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _rows_per_second(fn, record: EnergyRecord, readings: int, min_seconds: float, engine) -> float:
+    """
+    Repite fn hasta acumular min_seconds y retorna filas/s.
+    La tabla se vacía entre llamadas (fuera de la medición): con la clave única
+    (meter_id, timestamp) repetir el mismo registro solo mediría duplicados.
+    """
+    calls = 0
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        start = time.perf_counter()
+        fn(record)
+        elapsed += time.perf_counter() - start
+        calls += 1
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"DELETE FROM {EnergyReadingEntity.__tablename__}")
+    return calls * readings / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--seconds", type=float, default=2.0, help="Tiempo mínimo por caso")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    configure_engine(engine)
+    Base.metadata.create_all(engine, tables=[
+        Base.metadata.tables[name] for name in ("meters", "reading_operations", "reading_subjects", "energy_readings")
+    ])
+    repository = EnergyRepositorySQL()
+    repository.save(build_record(max(args.sizes)))
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DELETE FROM {EnergyReadingEntity.__tablename__}")
+        for field, table, column in (("meter_id", "meters", "meter_id"),
+                                     ("operation", "reading_operations", "name"),
+                                     ("subject", "reading_subjects", "name")):
+            LOOKUP_KEYS[field] = dict((name, key) for key, name in conn.exec_driver_sql(f"SELECT id, {column} FROM {table}"))
+
+    print(f"{'lecturas/request':>16} {'anterior':>14} {'actual':>14} {'speedup':>8}")
+    for size in args.sizes:
+        record = build_record(size)
+        before = _rows_per_second(legacy_save, record, size, args.seconds, engine)
+        after = _rows_per_second(repository.save, record, size, args.seconds, engine)
+        print(f"{size:>16} {before:>10.0f} f/s {after:>10.0f} f/s {after / before:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Benchmark de capacidad de ingesta: ¿cuántos medidores aguanta un worker?
+
+Genera una flota sintética (benchmarks.meter_fleet) y reproduce sus
+requests contra /energy/save-record con la concurrencia indicada:
+- en proceso (por defecto): la app ASGI con httpx.ASGITransport, sobre una
+  BD SQLite temporal (o --database-url, con las tablas ya creadas); con
+  --shards N la ingesta va a N procesos shard (ENERGY_INGEST_MODE=sharded)
+- por HTTP (--url): contra un servidor en marcha (p. ej. python -m app.server)
+
+Cada valor de --concurrency es una corrida sobre los intervalos siguientes
+de la misma flota (sin duplicados entre corridas). Se reporta:
+- filas/s: lecturas aceptadas / tiempo total, incluido el vaciado de la
+  cola de ingesta (con ENERGY_INGEST_MODE=queue las respuestas son 202)
+- latencia p50 / p99 por request
+- CPU por 1k lecturas: del proceso (en proceso incluye al cliente httpx) o
+  del servidor y sus workers con --server-pid (Linux, /proc)
+- bytes escritos en la BD: tamaño del archivo en SQLite (+ WAL);
+  Innodb_data_written + Innodb_os_log_written en MySQL
+
+Ejecutar con:
+    python -m benchmarks.ingest_fleet --meters 2000 --days 1 --concurrency 1 8 32
+    python -m benchmarks.ingest_fleet --database-url mysql+pymysql://... --shards 4 --concurrency 32
+    python -m benchmarks.ingest_fleet --url http://localhost:8000 --server-pid 1234 \\
+        --database-url mysql+pymysql://... --format frame --gzip
+"""
+import argparse
+import asyncio
+import contextlib
+import gzip
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from benchmarks.meter_fleet import MeterFleet, encode_bodies, intervals_for_days, payload_readings
+
+FRAME_CONTENT_TYPE = "application/vnd.volt.readings-frame"
+# BD de los procesos shard (la app en proceso la configura con configure_engine)
+SHARD_DATABASE_ENV = "BENCH_SHARD_DATABASE_URL"
+
+
+def process_cpu_seconds(pid: int) -> float:
+    """CPU (usuario + sistema) de un proceso y sus descendientes vivos, desde /proc"""
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0.0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / ticks
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+
+class DatabaseWriteCounter:
+    """Bytes escritos por la BD entre dos lecturas del contador"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def read(self) -> Optional[int]:
+        if self.engine is None:
+            return None
+        if self.engine.dialect.name == "mysql":
+            with self.engine.connect() as conn:
+                status = dict(conn.exec_driver_sql(
+                    "SHOW GLOBAL STATUS WHERE Variable_name IN ('Innodb_data_written', 'Innodb_os_log_written')"
+                ).fetchall())
+            return sum(int(value) for value in status.values())
+        if self.engine.dialect.name == "sqlite" and self.engine.url.database:
+            path = self.engine.url.database
+            return sum(os.path.getsize(name) for name in (path, f"{path}-wal") if os.path.exists(name))
+        return None
+
+
+def register_entities():
+    """
+    Entidades de energía y de energy_records en Base.metadata. communities
+    no tiene entidad en la app (existe solo en MySQL): se declara una mínima
+    para que se resuelvan las claves foráneas.
+    """
+    from sqlalchemy import Column, Integer, Table
+    from app.shared.infrastructure.db import Base
+    from app.energy.adapters.persistence import (  # noqa: F401
+        energy_record_entity, meter_entity, reading_operation_entity, reading_subject_entity, energy_rollup_entity
+    )
+    from app.user.adapters.persistence import (  # noqa: F401
+        energy_record_entity as user_energy_record_entity, meter_assignment_entity, meter_watermark_entity,
+        meter_energy_period_entity, user_entity
+    )
+    if "communities" not in Base.metadata.tables:
+        Table("communities", Base.metadata, Column("id", Integer, primary_key=True))
+    return Base.metadata
+
+
+def create_schema(engine, meter_ids: List[str]):
+    """
+    Tablas de lecturas, rollups y agregados de energy_records en una BD
+    vacía, y una asignación por medidor para que el agregador también
+    trabaje.
+    """
+    from datetime import datetime
+    from app.user.adapters.persistence.meter_assignment_entity import MeterAssignmentEntity
+    register_entities().create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(MeterAssignmentEntity.__table__.insert(), [
+            {"meter_id": meter_id, "user_id": i + 1, "community_id": 1, "kind": "grid", "assigned_at": datetime(2000, 1, 1)}
+            for i, meter_id in enumerate(meter_ids)
+        ])
+
+
+async def replay(
+    client,
+    bodies: List[bytes],
+    readings: List[int],
+    concurrency: int,
+    headers: Dict[str, str],
+    drain: Callable[[], Any],
+) -> Dict[str, Any]:
+    """Envía los cuerpos en orden con `concurrency` requests en vuelo y espera el vaciado"""
+    latencies = np.zeros(len(bodies))
+    statuses: Dict[int, int] = {}
+    accepted = [0]
+    next_index = [0]
+
+    async def worker():
+        while next_index[0] < len(bodies):
+            index = next_index[0]
+            next_index[0] += 1
+            start = time.perf_counter()
+            response = await client.post("/energy/save-record", content=bodies[index], headers=headers)
+            latencies[index] = time.perf_counter() - start
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code in (200, 202):
+                accepted[0] += response.json()["data"]["accepted_readings"]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    sent_at = time.perf_counter()
+    await drain()
+    finished_at = time.perf_counter()
+    return {
+        "requests": len(bodies),
+        "readings": sum(readings),
+        "accepted": accepted[0],
+        "statuses": statuses,
+        "send_s": sent_at - start,
+        "total_s": finished_at - start,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+    }
+
+
+def _create_engine(database_url: str):
+    from sqlalchemy import create_engine
+    if database_url.startswith("sqlite"):
+        # Con shards escriben varios procesos: esperar el lock en vez de fallar
+        return create_engine(database_url, connect_args={"check_same_thread": False, "timeout": 60})
+    return create_engine(database_url)
+
+
+def shard_service():
+    """Fábrica del servicio de cada shard (--shards): la misma BD que la app en proceso"""
+    from app.shared.infrastructure.db import configure_engine
+    from app.composition import get_energy_service
+    register_entities()
+    configure_engine(_create_engine(os.environ[SHARD_DATABASE_ENV]))
+    return get_energy_service()
+
+
+def in_process_target(args, fleet: MeterFleet, stack: contextlib.ExitStack):
+    """Cliente ASGI en proceso, función de vaciado y engine de la BD de prueba"""
+    os.environ.setdefault("ENERGY_MAINTENANCE_INTERVAL_S", "0")
+    os.environ.setdefault("STARTUP_REPORT", "false")
+    from app.shared.infrastructure.db import configure_engine
+    if args.database_url:
+        database_url = args.database_url
+        engine = _create_engine(database_url)
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="volt-bench-"), "bench.db")
+        database_url = f"sqlite:///{path}"
+        engine = _create_engine(database_url)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        create_schema(engine, fleet.meter_ids)
+    configure_engine(engine)
+    if args.shards:
+        from app.energy.infrastructure.ingestion_shards import ingestion_shards
+        os.environ["ENERGY_INGEST_MODE"] = "sharded"
+        os.environ[SHARD_DATABASE_ENV] = database_url
+        stack.enter_context(ingestion_shards(args.shards, "benchmarks.ingest_fleet:shard_service"))
+
+    import httpx
+    from app.main import app
+    from app.energy.adapters.http.routes import get_energy_manager
+    service = get_energy_manager()
+
+    def make_client():
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+
+    async def drain():
+        if service.ingestion_queue is not None:
+            await service.ingestion_queue.stop()
+        if service.ingestion_shards is not None:
+            # Cada shard terminó cuando todo lo encolado se persistió (o descartó)
+            while True:
+                shards = (await asyncio.to_thread(service.ingestion_shards.metrics))["shards"]
+                if all(s["enqueued_rows"] == s["flushed_rows"] + s["dropped_rows"] + s["dead_lettered_rows"] for s in shards):
+                    break
+                await asyncio.sleep(0.05)
+
+    return make_client, drain, engine
+
+
+def http_target(args):
+    """Cliente HTTP contra --url; el vaciado espera a que la cola del servidor quede vacía"""
+    import httpx
+    engine = None
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+
+    def make_client():
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        return httpx.AsyncClient(base_url=args.url, timeout=None, limits=limits)
+
+    async def drain():
+        # Con varios workers cada uno tiene su cola: se espera a ver varias veces seguidas profundidad 0
+        async with make_client() as client:
+            empty = 0
+            while empty < 5:
+                data = (await client.get("/energy/ingestion/metrics")).json()["data"]
+                empty = empty + 1 if not data.get("queue_depth") else 0
+                await asyncio.sleep(0.05)
+
+    return make_client, drain, engine
+
+
+async def run_level(make_client, drain, bodies, readings, concurrency, headers, cpu_clock, writes: DatabaseWriteCounter):
+    written_before = writes.read()
+    cpu_before = cpu_clock()
+    async with make_client() as client:
+        result = await replay(client, bodies, readings, concurrency, headers, drain)
+    result["cpu_s"] = cpu_clock() - cpu_before
+    written_after = writes.read()
+    result["db_bytes"] = written_after - written_before if written_before is not None else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meters", type=int, default=1000)
+    parser.add_argument("--days", type=float, default=1.0, help="Días de lecturas por corrida")
+    parser.add_argument("--readings-per-request", type=int, default=4, help="Lecturas por medidor en cada request")
+    parser.add_argument("--meters-per-request", type=int, default=1, help="Medidores por request (gateway)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Requests en vuelo; una corrida por valor")
+    parser.add_argument("--format", choices=("json", "frame"), default="json")
+    parser.add_argument("--gzip", action="store_true", help="Enviar los cuerpos con Content-Encoding: gzip")
+    parser.add_argument("--url", help="Servidor en marcha (por defecto, la app en proceso)")
+    parser.add_argument("--database-url", help="BD para medir bytes escritos (y la de la app en proceso)")
+    parser.add_argument("--server-pid", type=int, help="PID del servidor para medir su CPU (con --url)")
+    parser.add_argument("--ingest-mode", choices=("queue", "sync"), help="ENERGY_INGEST_MODE de la app en proceso")
+    parser.add_argument("--shards", type=int, default=0, help="Procesos shard de ingesta de la app en proceso (0 = sin shards)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # Una línea INFO por request del cliente ensuciaría el reporte
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.ingest_mode:
+        os.environ["ENERGY_INGEST_MODE"] = args.ingest_mode
+    fleet = MeterFleet(args.meters, seed=args.seed)
+    stack = contextlib.ExitStack()
+    if args.url:
+        make_client, drain, engine = http_target(args)
+        cpu_clock = (lambda: process_cpu_seconds(args.server_pid)) if args.server_pid else (lambda: float("nan"))
+    else:
+        make_client, drain, engine = in_process_target(args, fleet, stack)
+        # Con shards la CPU incluye la de sus procesos
+        cpu_clock = (lambda: process_cpu_seconds(os.getpid())) if args.shards else time.process_time
+    writes = DatabaseWriteCounter(engine)
+
+    headers = {"content-type": FRAME_CONTENT_TYPE if args.format == "frame" else "application/json"}
+    if args.gzip:
+        headers["content-encoding"] = "gzip"
+    intervals = intervals_for_days(args.days)
+    print(f"{args.meters} medidores, {intervals} intervalos por corrida, "
+          f"{args.readings_per_request} lecturas x {args.meters_per_request} medidores por request, "
+          f"{args.format}{' + gzip' if args.gzip else ''}, {'HTTP ' + args.url if args.url else 'en proceso'}")
+    print(f"{'conc':>5} {'requests':>9} {'lecturas':>9} {'filas/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'CPU ms/1k':>10} {'BD MB':>7} {'B/lectura':>9} {'body B/lect':>11}  status")
+    with stack:
+        for concurrency in args.concurrency:
+            run_concurrency(args, fleet, intervals, concurrency, make_client, drain, headers, cpu_clock, writes)
+
+
+def run_concurrency(args, fleet, intervals, concurrency, make_client, drain, headers, cpu_clock, writes):
+    """Una corrida: los próximos intervalos de la flota con `concurrency` requests en vuelo"""
+    payloads = list(fleet.iter_requests(intervals, args.readings_per_request, args.meters_per_request))
+    readings = [payload_readings(body) for body in payloads]
+    bodies = encode_bodies(payloads, args.format)
+    if args.gzip:
+        bodies = [gzip.compress(body, compresslevel=6) for body in bodies]
+    del payloads
+    result = asyncio.run(run_level(make_client, drain, bodies, readings, concurrency, headers, cpu_clock, writes))
+    total = result["readings"]
+    db_bytes = result["db_bytes"]
+    print(
+        f"{concurrency:>5} {result['requests']:>9} {total:>9} {result['accepted'] / result['total_s']:>9.0f} "
+        f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['cpu_s'] / total * 1e6:>10.2f} "
+        f"{db_bytes / 1e6 if db_bytes is not None else float('nan'):>7.1f} "
+        f"{db_bytes / total if db_bytes is not None else float('nan'):>9.0f} "
+        f"{sum(len(body) for body in bodies) / total:>11.1f}  {result['statuses']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de CPU por lectura en la entrada de /energy/save-record.
+
+Mide, desde el cuerpo JSON crudo hasta las tuplas listas para insertar:
+- anterior: json.loads → SaveRecordRequest → model_dump → modelos de dominio
+  (ReadingData, VoltageData, ...) → tuplas
+- dto:      json.loads → SaveRecordRequest → tuplas (request_to_rows)
+- json:     SaveRecordRequest.model_validate_json → tuplas (lo que hace la ruta)
+
+Ejecutar con: python -m benchmarks.ingest_transform --readings 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from app.energy.adapters.http.energy_dtos import SaveRecordRequest
+from app.energy.adapters.http.row_mapper import request_to_rows
+from app.energy.domain.models.energy_record import (
+    EnergyRecord, MeterReadings, ReadingData, VoltageData, CurrentData, PowerData, EnergyData, bogota_tz
+)
+
+READINGS_PER_METER = 96
+
+
+def build_payload(readings: int) -> bytes:
+    """Cuerpo JSON con `readings` lecturas repartidas en medidores de 96 lecturas"""
+    meter = {}
+    for index in range(readings):
+        meter.setdefault(f"MTR{index // READINGS_PER_METER:06d}", []).append({
+            "ts": 1_700_000_000_000 + (index % READINGS_PER_METER) * 900_000,
+            "flag": 0,
+            "voltage": {"a": 120.1, "b": 119.8, "c": 120.4},
+            "current": {"a": 5.2, "b": 5.1, "c": 4.9},
+            "power": {"ai": 1.8, "ae": 0.0, "ri": 0.2, "re": 0.0},
+            "energy": {"ai": 1520.5 + index, "ae": 10.0, "ri": 80.2, "re": 0.0},
+        })
+    return json.dumps({"operation": "sendReadings", "subject": "onDemand", "meter": meter}).encode()
+
+
+def legacy(body: bytes):
+    """Camino anterior: DTO → dict → modelos de dominio → tuplas"""
+    request_data = SaveRecordRequest.model_validate(json.loads(body)).model_dump()
+    meter_readings = []
+    for meter_id, readings_data in request_data["meter"].items():
+        readings = [
+            ReadingData(
+                ts=item.get("ts"),
+                flag=item.get("flag"),
+                voltage=VoltageData(**item.get("voltage", {})),
+                current=CurrentData(**item.get("current", {})),
+                power=PowerData(**item.get("power", {})),
+                energy=EnergyData(**item.get("energy", {})),
+            )
+            for item in readings_data
+        ]
+        meter_readings.append(MeterReadings(meter_id=meter_id, readings=readings))
+    record = EnergyRecord(operation=request_data["operation"], subject=request_data["subject"],
+                          meter_readings=meter_readings, created_at=datetime.now(bogota_tz))
+    return record.to_rows()
+
+
+def from_dto(body: bytes):
+    """DTO validado una vez → tuplas"""
+    return request_to_rows(SaveRecordRequest.model_validate(json.loads(body)), datetime.now(bogota_tz))
+
+
+def from_json(body: bytes):
+    """Validación directa desde bytes (pydantic-core) → tuplas"""
+    return request_to_rows(SaveRecordRequest.model_validate_json(body), datetime.now(bogota_tz))
+
+
+def _per_reading_us(fn, body: bytes, readings: int, min_seconds: float) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(body)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / (calls * readings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--seconds", type=float, default=2.0, help="Tiempo mínimo por caso")
+    args = parser.parse_args()
+
+    print(f"{'lecturas':>9} {'anterior':>12} {'dto':>12} {'json':>12} {'speedup':>8}")
+    for readings in args.readings:
+        body = build_payload(readings)
+        assert legacy(body)[0][:-1] == from_json(body)[0][:-1]
+        before = _per_reading_us(legacy, body, readings, args.seconds)
+        dto = _per_reading_us(from_dto, body, readings, args.seconds)
+        raw = _per_reading_us(from_json, body, readings, args.seconds)
+        print(f"{readings:>9} {before:>9.2f} µs {dto:>9.2f} µs {raw:>9.2f} µs {before / raw:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Generador de flotas sintéticas de medidores para benchmarks de ingesta.
+
+Cada medidor reporta cada 15 minutos con un perfil de consumo residencial
+(picos de mañana y noche en hora de Bogotá, ruido lognormal) y, una parte
+de la flota, generación solar que exporta a la red a mediodía:
+- energy.ai/ae/ri/re: registros acumulados, monótonos (kWh / kVArh)
+- power.ai/ae/ri/re: demanda instantánea importada/exportada (kW / kVAr)
+- voltage.a/b/c: 120 V nominal con desvío propio por fase, ruido y caída con la carga
+- current.a/b/c: corriente por fase a partir de la demanda, con desbalance
+
+Las lecturas de cada intervalo se generan vectorizadas para toda la flota;
+los cuerpos de /energy/save-record agrupan readings_per_request lecturas por
+medidor y meters_per_request medidores (un gateway) por request.
+
+Ejecutar con (escribe un cuerpo por línea, utilizable con el backfill):
+    python -m benchmarks.meter_fleet --meters 1000 --days 7 --out flota.jsonl.gz
+"""
+import argparse
+import gzip
+import json
+import math
+from typing import Any, Dict, Iterator, List
+import numpy as np
+
+INTERVAL_MS = 900_000  # 15 minutos
+INTERVAL_H = INTERVAL_MS / 3_600_000
+START_TS = 1_767_243_600_000  # 2026-01-01 00:00 en Bogotá
+BOGOTA_OFFSET_H = -5
+NOMINAL_VOLTAGE = 120.0
+
+
+class MeterFleet:
+    """
+    Flota de medidores con estado: cada llamada a next_intervals continúa
+    donde terminó la anterior (timestamps y registros acumulados), así que
+    varias corridas sobre la misma flota no generan lecturas duplicadas.
+    """
+
+    def __init__(self, meters: int, seed: int = 7, solar_share: float = 0.3, start_ts: int = START_TS):
+        """
+        Args:
+            meters: Número de medidores
+            seed: Semilla del generador (flotas reproducibles)
+            solar_share: Fracción de medidores con generación solar
+            start_ts: Timestamp (ms) de la primera lectura
+        """
+        rng = np.random.default_rng(seed)
+        self.rng = rng
+        self.meter_ids = [str(22_230_000_000 + i) for i in range(meters)]
+        self.next_ts = start_ts
+        # Perfil propio de cada medidor
+        self.base_kw = rng.lognormal(math.log(0.45), 0.5, meters)
+        self.solar_kwp = np.where(rng.random(meters) < solar_share, rng.uniform(1.5, 6.0, meters), 0.0)
+        self.power_factor = rng.uniform(0.88, 0.98, meters)
+        self.phase_offset = rng.normal(0.0, 1.5, (meters, 3))
+        self.phase_share = rng.dirichlet((20, 20, 20), meters)
+        # Registros acumulados ai, ae, ri, re (kWh / kVArh)
+        self.registers = np.column_stack([
+            rng.uniform(500, 20_000, meters),
+            np.where(self.solar_kwp > 0, rng.uniform(100, 5_000, meters), 0.0),
+            rng.uniform(100, 5_000, meters),
+            rng.uniform(0, 200, meters),
+        ])
+
+    @property
+    def size(self) -> int:
+        return len(self.meter_ids)
+
+    def next_intervals(self, intervals: int) -> Dict[str, np.ndarray]:
+        """
+        Lecturas de los próximos `intervals` intervalos de toda la flota.
+
+        Returns:
+            Dict de arreglos con forma (intervals, meters[, fases]):
+            ts, flag, voltage (…, 3), current (…, 3), power (…, 4), energy (…, 4)
+        """
+        rng = self.rng
+        meters = self.size
+        ts = self.next_ts + INTERVAL_MS * np.arange(intervals, dtype=np.int64)
+        self.next_ts = int(ts[-1]) + INTERVAL_MS
+        hour = ((ts / 3_600_000.0 + BOGOTA_OFFSET_H) % 24)[:, None]
+
+        shape = 0.55 + 0.6 * np.exp(-((hour - 7.0) / 1.5) ** 2) + 1.0 * np.exp(-((hour - 19.5) / 2.0) ** 2)
+        demand = self.base_kw * shape * rng.lognormal(0.0, 0.15, (intervals, meters))
+        sun = np.clip(np.sin(np.pi * (hour - 6.0) / 12.0), 0.0, None)
+        generation = self.solar_kwp * sun * rng.uniform(0.4, 1.0, (intervals, meters))
+        net = demand - generation
+        imported = np.clip(net, 0.0, None)
+        exported = np.clip(-net, 0.0, None)
+        reactive = demand * np.tan(np.arccos(self.power_factor))
+        reactive_export = exported * 0.05
+
+        power = np.stack([imported, exported, reactive, reactive_export], axis=-1)
+        energy = self.registers + np.cumsum(power * INTERVAL_H, axis=0)
+        self.registers = energy[-1]
+
+        voltage = (NOMINAL_VOLTAGE + self.phase_offset
+                   - 0.6 * demand[..., None] * self.phase_share * 3
+                   + rng.normal(0.0, 0.8, (intervals, meters, 3)))
+        current = (demand[..., None] * 1000.0 * self.phase_share / (voltage * self.power_factor[:, None])
+                   * rng.normal(1.0, 0.05, (intervals, meters, 3)))
+        # Eventos poco frecuentes marcados en flag (p. ej. corte de energía)
+        flag = (rng.random((intervals, meters)) < 0.001).astype(np.int64)
+
+        return {
+            "ts": np.broadcast_to(ts[:, None], (intervals, meters)),
+            "flag": flag,
+            "voltage": np.round(voltage, 1),
+            "current": np.round(np.clip(current, 0.0, None), 2),
+            "power": np.round(power, 3),
+            "energy": np.round(energy, 3),
+        }
+
+    def iter_requests(
+        self,
+        intervals: int,
+        readings_per_request: int = 4,
+        meters_per_request: int = 1,
+        operation: str = "sendReadings",
+        subject: str = "onDemand",
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Cuerpos de /energy/save-record (SaveRecordRequest como dict) para los
+        próximos `intervals` intervalos: cada medidor envía sus lecturas en
+        grupos de readings_per_request, y cada request lleva las de
+        meters_per_request medidores. Los requests salen en orden de tiempo.
+        """
+        for offset in range(0, intervals, readings_per_request):
+            block = self.next_intervals(min(readings_per_request, intervals - offset))
+            ts, flag = block["ts"].tolist(), block["flag"].tolist()
+            voltage, current = block["voltage"].tolist(), block["current"].tolist()
+            power, energy = block["power"].tolist(), block["energy"].tolist()
+            steps = range(len(ts))
+            for first in range(0, self.size, meters_per_request):
+                meter = {}
+                for m in range(first, min(first + meters_per_request, self.size)):
+                    meter[self.meter_ids[m]] = [
+                        {
+                            "ts": ts[i][m],
+                            "flag": flag[i][m],
+                            "voltage": dict(zip("abc", voltage[i][m])),
+                            "current": dict(zip("abc", current[i][m])),
+                            "power": dict(zip(("ai", "ae", "ri", "re"), power[i][m])),
+                            "energy": dict(zip(("ai", "ae", "ri", "re"), energy[i][m])),
+                        }
+                        for i in steps
+                    ]
+                yield {"operation": operation, "subject": subject, "meter": meter}
+
+
+def intervals_for_days(days: float) -> int:
+    return max(1, int(round(days * 24 * 3_600_000 / INTERVAL_MS)))
+
+
+def payload_readings(body: Dict[str, Any]) -> int:
+    """Número de lecturas de un cuerpo de /energy/save-record"""
+    return sum(len(items) for items in body["meter"].values())
+
+
+def encode_bodies(bodies: List[Dict[str, Any]], body_format: str) -> List[bytes]:
+    """Cuerpos listos para enviar: 'json' o 'frame' (frame columnar de record_formats)"""
+    if body_format == "json":
+        return [json.dumps(body, separators=(",", ":")).encode() for body in bodies]
+    from app.energy.adapters.http.energy_dtos import SaveRecordRequest
+    from app.energy.adapters.http.record_formats import encode_frame
+    return [encode_frame(SaveRecordRequest.model_validate(body)) for body in bodies]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meters", type=int, default=1000)
+    parser.add_argument("--days", type=float, default=1.0)
+    parser.add_argument("--readings-per-request", type=int, default=4, help="Lecturas por medidor en cada request")
+    parser.add_argument("--meters-per-request", type=int, default=1, help="Medidores por request (gateway)")
+    parser.add_argument("--solar-share", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", required=True, help="Archivo .jsonl (o .jsonl.gz) de salida")
+    args = parser.parse_args()
+
+    fleet = MeterFleet(args.meters, seed=args.seed, solar_share=args.solar_share)
+    opener = gzip.open if args.out.endswith(".gz") else open
+    requests = readings = 0
+    with opener(args.out, "wt", encoding="utf-8") as f:
+        for body in fleet.iter_requests(intervals_for_days(args.days), args.readings_per_request, args.meters_per_request):
+            f.write(json.dumps(body, separators=(",", ":")))
+            f.write("\n")
+            requests += 1
+            readings += payload_readings(body)
+    print(f"{requests} requests, {readings} lecturas → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark del camino de lectura: filas de BD → modelos de dominio.
+
+Compara el camino anterior (hidratar entidades ORM y revalidar cada una con
+pydantic) contra el actual de los repositorios (consulta de columnas como
+tuplas; model_construct donde la validación es cara, p. ej. EmailStr).
+Usa SQLite en memoria para aislar el costo de conversión del de la red.
+
+Ejecutar con: python -m benchmarks.read_models --rows 20000
+"""
+import argparse
+import time
+from datetime import datetime
+from sqlalchemy import create_engine
+from app.shared.infrastructure.db import configure_engine, get_db
+from app.user.adapters.persistence.city_entity import CityEntity
+from app.user.adapters.persistence.city_repository import CityRepositorySQL
+from app.user.adapters.persistence.user_entity import UserEntity
+from app.user.adapters.persistence.user_repository import UserRepositorySQL
+from app.user.domain.models.city import City
+from app.user.domain.models.user import User
+from app.transactions.adapters.persistence.transaction_entity import TransactionEntity
+from app.transactions.adapters.persistence.transaction_repository import TransactionRepositorySQL
+from app.transactions.domain.models.transaction import Transaction
+
+
+def _legacy_get_all(entity_cls, to_domain):
+    """Camino anterior: entidades ORM completas + constructor con validación"""
+    def get_all():
+        db = next(get_db())
+        try:
+            return [to_domain(entity) for entity in db.query(entity_cls).all()]
+        finally:
+            db.close()
+    return get_all
+
+
+def _legacy_city(entity):
+    return City(codCiudad=entity.codCiudad, codCiudadDane=entity.codCiudadDane,
+                codDepto=entity.codDepto, nomCiudad=entity.nomCiudad)
+
+
+def _legacy_user(entity):
+    return User(id=entity.id, document=entity.document, name=entity.name, lastname=entity.lastname,
+                phone=entity.phone, email=entity.email, created_at=entity.created_at,
+                is_active=entity.is_active, role=entity.role)
+
+
+def _seed(engine, rows: int):
+    for entity_cls in (CityEntity, TransactionEntity, UserEntity):
+        entity_cls.__table__.create(engine)
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(CityEntity.__table__.insert(), [
+            {"codCiudad": i, "codCiudadDane": f"{i:05d}", "codDepto": i % 33, "nomCiudad": f"Ciudad {i}"}
+            for i in range(1, rows + 1)
+        ])
+        conn.execute(TransactionEntity.__table__.insert(), [{"id": i} for i in range(1, rows + 1)])
+        conn.execute(UserEntity.__table__.insert(), [
+            {"id": i, "document": str(i), "name": "Nombre", "lastname": "Apellido", "phone": None,
+             "email": f"usuario{i}@volt.co", "created_at": now, "is_active": True, "role": 1}
+            for i in range(1, rows + 1)
+        ])
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    configure_engine(engine)
+    _seed(engine, args.rows)
+
+    cases = [
+        ("CityRepositorySQL.get_all", _legacy_get_all(CityEntity, _legacy_city), CityRepositorySQL().get_all),
+        ("TransactionRepositorySQL.get_all", _legacy_get_all(TransactionEntity, lambda e: Transaction(id=e.id)),
+         TransactionRepositorySQL().get_all),
+        ("UserRepositorySQL.get_all (user)", _legacy_get_all(UserEntity, _legacy_user), UserRepositorySQL().get_all),
+    ]
+    print(f"{args.rows} filas, mejor de {args.repeat}")
+    print(f"{'caso':<36} {'anterior':>12} {'actual':>12} {'speedup':>8}")
+    for name, before_fn, after_fn in cases:
+        before = _best_of(before_fn, args.repeat)
+        after = _best_of(after_fn, args.repeat)
+        print(f"{name:<36} {before * 1000:>10.1f}ms {after * 1000:>10.1f}ms {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
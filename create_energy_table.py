@@ -1,16 +1,273 @@
 """
 Script para crear la tabla energy_readings en la base de datos.
 Ejecutar con: python create_energy_table.py
+
+Si la tabla ya existía con el formato anterior (operation, subject y
+meter_id como texto en cada fila), la migra al formato compacto:
+1. Crea los diccionarios meters, reading_operations y reading_subjects.
+2. Copia las lecturas a energy_readings_compact por rangos de id de
+   ENERGY_MIGRATION_CHUNK_SIZE filas, una transacción por bloque. Es
+   reanudable: si se interrumpe, continúa desde el mayor id ya copiado.
+   Las lecturas duplicadas (meter_id, timestamp) se descartan (queda la de
+   menor id).
+3. Intercambia las tablas (energy_readings pasa a energy_readings_legacy)
+   y copia las lecturas que hayan llegado durante la migración (las de id
+   mayor al último copiado en el paso 2, con ids nuevos).
+La tabla legacy se conserva; se elimina a mano después de verificar.
+Conviene detener la ingesta durante el paso 3.
+
+Crea también la tabla energy_rollups; si no existía, la llena a partir de
+las lecturas ya almacenadas, medidor por medidor.
+
+Si energy_readings no tiene las columnas de deltas (delta_ai … delta_re,
+consumo por intervalo de cada contador), las agrega y calcula los deltas
+de las lecturas existentes medidor por medidor; lo mismo con las sumas de
+deltas de energy_rollups (delta_ai_sum …), que se recalculan completas.
+
+En MySQL particiona energy_readings por mes (RANGE sobre timestamp), desde
+el mes de la lectura más antigua hasta ENERGY_PARTITION_MONTHS_AHEAD meses
+adelante; las siguientes las crea el servicio. Antes quita las claves
+foráneas y cambia la clave primaria a (id, timestamp), que MySQL exige en
+tablas particionadas. Reescribe la tabla completa: conviene hacerlo en una
+ventana de mantenimiento.
+
+Por último crea las tablas del agregado de energy_records (asignación
+medidor → usuario, marcas de agua y energía por medidor y periodo) y agrega
+a energy_records la clave única (user_id, period, community_id) que usan
+sus upserts.
 """
-from app.shared.infrastructure.db import engine, Base
+import os
+import time
+from typing import Optional, Tuple
+from sqlalchemy import inspect, text
+from app.shared.infrastructure.db import get_engine, Base
 from app.energy.adapters.persistence.energy_record_entity import EnergyReadingEntity
+from app.energy.adapters.persistence.meter_entity import MeterEntity
+from app.energy.adapters.persistence.reading_operation_entity import ReadingOperationEntity
+from app.energy.adapters.persistence.reading_subject_entity import ReadingSubjectEntity
+from app.energy.adapters.persistence.energy_rollup_entity import EnergyRollupEntity
+from app.energy.adapters.persistence.energy_rollup_repository import EnergyRollupRepositorySQL
+from app.energy.adapters.persistence.energy_repository import EnergyRepositorySQL, STORAGE_COLUMNS
+from app.energy.domain.models.energy_record import DELTA_FIELDS
+from app.energy.adapters.persistence.reading_partitions import ReadingPartitionManager, partition_clause
+from app.energy.domain.models.energy_rollup import bucket_start, dirty_buckets
+from app.energy.domain.models.reading_retention import partitions_until
+from app.user.adapters.persistence.energy_record_entity import EnergyRecordEntity
+from app.user.adapters.persistence.meter_assignment_entity import MeterAssignmentEntity
+from app.user.adapters.persistence.meter_watermark_entity import MeterWatermarkEntity
+from app.user.adapters.persistence.meter_energy_period_entity import MeterEnergyPeriodEntity
+
+READINGS_TABLE = EnergyReadingEntity.__tablename__
+COMPACT_TABLE = "energy_readings_compact"
+LEGACY_TABLE = "energy_readings_legacy"
+MIGRATION_CHUNK_SIZE = int(os.getenv("ENERGY_MIGRATION_CHUNK_SIZE", "50000"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("ENERGY_PARTITION_MONTHS_AHEAD", "3"))
+ENERGY_RECORDS_KEY_NAME = "uq_energy_records_user_period"
+ENERGY_RECORDS_COMMUNITY_INDEX = "ix_energy_records_community_period"
+
+# Diccionario → (columna con el texto, columna de la tabla anterior, guarda created_at)
+LOOKUPS = (
+    (MeterEntity.__tablename__, "meter_id", "meter_id", True),
+    (ReadingOperationEntity.__tablename__, "name", "operation", False),
+    (ReadingSubjectEntity.__tablename__, "name", "subject", False),
+)
+
+
+def is_legacy_layout(engine) -> bool:
+    """True si energy_readings existe y guarda meter_id como texto"""
+    inspector = inspect(engine)
+    if not inspector.has_table(READINGS_TABLE):
+        return False
+    return "meter_id" in {column["name"] for column in inspector.get_columns(READINGS_TABLE)}
+
+
+def copy_legacy_rows(
+    engine, source: str, target: str, chunk_size: int = MIGRATION_CHUNK_SIZE,
+    after_id: Optional[int] = None, keep_ids: bool = True
+) -> Tuple[int, int]:
+    """
+    Copia a target (formato compacto) las lecturas de source (formato
+    anterior) con id mayor a after_id, por rangos de id.
+
+    Args:
+        after_id: Último id de source ya copiado; None = el mayor id de
+            target (reanuda una copia que conserva los ids)
+        keep_ids: Copiar el id de source; si no, target asigna ids nuevos
+            (para copiar a una tabla que ya recibe lecturas propias)
+
+    Returns:
+        (lecturas copiadas, último id de source copiado). Las copiadas
+        cuentan también las repetidas ignoradas: MySQL las reporta como
+        afectadas.
+    """
+    with engine.connect() as conn:
+        last = after_id
+        if last is None:
+            last = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {target}")).scalar()
+        end = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {source}")).scalar()
+
+    columns = ", ".join(STORAGE_COLUMNS)
+    values = ", ".join(f"r.{name}" for name in STORAGE_COLUMNS[3:-1])
+    copy_sql = text(
+        f"INSERT INTO {target} ({'id, ' if keep_ids else ''}{columns}) "
+        f"SELECT {'r.id, ' if keep_ids else ''}o.id, s.id, m.id, {values}, COALESCE(r.created_at, CURRENT_TIMESTAMP) "
+        f"FROM {source} r "
+        f"JOIN {MeterEntity.__tablename__} m ON m.meter_id = r.meter_id "
+        f"JOIN {ReadingOperationEntity.__tablename__} o ON o.name = r.operation "
+        f"JOIN {ReadingSubjectEntity.__tablename__} s ON s.name = r.subject "
+        "WHERE r.id > :last AND r.id <= :upper ORDER BY r.id "
+        # Solo se ignoran las claves repetidas (INSERT IGNORE también truncaría valores)
+        f"ON DUPLICATE KEY UPDATE {target}.id = {target}.id"
+    )
+    copied = 0
+    while last < end:
+        upper = min(last + chunk_size, end)
+        with engine.begin() as conn:
+            params = {"last": last, "upper": upper}
+            for table, column, legacy_column, stamped in LOOKUPS:
+                # Los medidores nuevos se registran con el created_at de su primera lectura
+                select = (
+                    f"SELECT {legacy_column}, MIN(COALESCE(created_at, CURRENT_TIMESTAMP)) FROM {source} "
+                    f"WHERE id > :last AND id <= :upper GROUP BY {legacy_column}"
+                ) if stamped else (
+                    f"SELECT DISTINCT {legacy_column} FROM {source} WHERE id > :last AND id <= :upper"
+                )
+                conn.execute(text(
+                    f"INSERT INTO {table} ({column}{', created_at' if stamped else ''}) {select} "
+                    f"ON DUPLICATE KEY UPDATE {table}.id = {table}.id"
+                ), params)
+            copied += conn.execute(copy_sql, params).rowcount
+        last = upper
+        print(f"   … {source} → {target}: hasta id {upper} de {end} ({copied} lecturas)")
+    return copied, end
+
+
+def migrate_to_compact_layout(engine) -> bool:
+    """Migra energy_readings del formato anterior al compacto (ver docstring del módulo)"""
+    if not is_legacy_layout(engine):
+        return False
+    compact = EnergyReadingEntity.__table__.to_metadata(Base.metadata, name=COMPACT_TABLE)
+    compact.create(engine, checkfirst=True)
+    copied, copied_until = copy_legacy_rows(engine, READINGS_TABLE, COMPACT_TABLE)
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"RENAME TABLE {READINGS_TABLE} TO {LEGACY_TABLE}, {COMPACT_TABLE} TO {READINGS_TABLE}"
+        ))
+    # Lo que llegó a la tabla anterior después de la copia. La tabla nueva ya
+    # recibe lecturas con sus propios ids: se parte del último id copiado (no
+    # de su MAX(id)) y las lecturas tardías toman ids nuevos en vez de chocar
+    # con los que la tabla nueva ya asignó.
+    caught_up, _ = copy_legacy_rows(engine, LEGACY_TABLE, READINGS_TABLE, after_id=copied_until, keep_ids=False)
+    print(f"🗜️  Lecturas migradas al formato compacto: {copied + caught_up}")
+    return True
+
+
+def partition_readings(engine) -> bool:
+    """Particiona energy_readings por mes en MySQL (ver docstring del módulo)"""
+    if engine.dialect.name != "mysql":
+        return False
+    with engine.connect() as conn:
+        if ReadingPartitionManager(READINGS_TABLE).partitions(conn):
+            return False
+        oldest = conn.execute(text(f"SELECT MIN(timestamp) FROM {READINGS_TABLE}")).scalar()
+    now = int(time.time() * 1000)
+    clause = partition_clause(bucket_start(oldest if oldest is not None else now, "1mo"),
+                              partitions_until(now, PARTITION_MONTHS_AHEAD))
+    foreign_keys = inspect(engine).get_foreign_keys(READINGS_TABLE)
+    with engine.begin() as conn:
+        for foreign_key in foreign_keys:
+            conn.execute(text(f"ALTER TABLE {READINGS_TABLE} DROP FOREIGN KEY {foreign_key['name']}"))
+        conn.execute(text(f"ALTER TABLE {READINGS_TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)"))
+        conn.execute(text(f"ALTER TABLE {READINGS_TABLE} {clause}"))
+    return True
+
+
+def backfill_rollups(engine):
+    """Calcula los rollups de todas las lecturas existentes, un medidor a la vez"""
+    repository = EnergyRollupRepositorySQL()
+    with engine.connect() as conn:
+        meters = [row[0] for row in conn.execute(text("SELECT meter_id FROM meters"))]
+    for meter_id in meters:
+        with engine.connect() as conn:
+            # Un timestamp por bucket de 15 minutos basta para marcar todos sus buckets
+            keys = [(meter_id, row[0]) for row in conn.execute(text(
+                "SELECT DISTINCT r.timestamp - (r.timestamp % 900000) FROM energy_readings r "
+                "JOIN meters m ON m.id = r.meter_key WHERE m.meter_id = :meter_id"
+            ), {"meter_id": meter_id})]
+        repository.refresh(dirty_buckets(keys))
+    return len(meters)
+
+
+def add_missing_columns(engine, table: str, columns) -> bool:
+    """Agrega a table las columnas Float nulas que le falten"""
+    existing = {column["name"] for column in inspect(engine).get_columns(table)}
+    missing = [name for name in columns if name not in existing]
+    if not missing:
+        return False
+    with engine.begin() as conn:
+        for name in missing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} DOUBLE NULL"))
+    return True
+
+
+def backfill_deltas(engine):
+    """Calcula los deltas de todas las lecturas existentes, un medidor a la vez"""
+    repository = EnergyRepositorySQL()
+    with engine.connect() as conn:
+        meters = [row[0] for row in conn.execute(text("SELECT meter_id FROM meters"))]
+    updated = 0
+    for meter_id in meters:
+        updated += repository.recompute_deltas(meter_id, 0, 2 ** 62)
+    return updated
+
+
+def add_energy_records_key(engine):
+    """
+    Agrega a energy_records la clave única (user_id, period, community_id)
+    y el índice (community_id, period). Si hay registros repetidos la
+    sentencia falla: deben consolidarse a mano antes de migrar.
+    """
+    if not inspect(engine).has_table(EnergyRecordEntity.__tablename__):
+        return False
+    constraints = inspect(engine).get_unique_constraints(EnergyRecordEntity.__tablename__)
+    if any(c["name"] == ENERGY_RECORDS_KEY_NAME for c in constraints):
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"ALTER TABLE energy_records ADD CONSTRAINT {ENERGY_RECORDS_KEY_NAME} "
+            "UNIQUE (user_id, period, community_id)"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX {ENERGY_RECORDS_COMMUNITY_INDEX} ON energy_records (community_id, period)"
+        ))
+    return True
+
 
 def create_tables():
-    """Crea la tabla energy_readings si no existe"""
+    """Crea las tablas de lecturas, rollups y agregados de energía si no existen"""
     try:
-        # Crear solo la tabla de energy_readings
-        EnergyReadingEntity.__table__.create(engine, checkfirst=True)
-        print("✅ Tabla 'energy_readings' creada exitosamente (o ya existía)")
+        engine = get_engine()
+        for entity in (MeterEntity, ReadingOperationEntity, ReadingSubjectEntity):
+            entity.__table__.create(engine, checkfirst=True)
+        if migrate_to_compact_layout(engine):
+            print(f"✅ Tabla 'energy_readings' migrada; la anterior quedó como '{LEGACY_TABLE}'")
+        else:
+            EnergyReadingEntity.__table__.create(engine, checkfirst=True)
+            print("✅ Tabla 'energy_readings' creada exitosamente (o ya existía)")
+        if partition_readings(engine):
+            print("✅ Tabla 'energy_readings' particionada por mes")
+        if add_missing_columns(engine, READINGS_TABLE, DELTA_FIELDS):
+            print(f"✅ Deltas agregados a 'energy_readings'; lecturas calculadas: {backfill_deltas(engine)}")
+        if not inspect(engine).has_table(EnergyRollupEntity.__tablename__):
+            EnergyRollupEntity.__table__.create(engine)
+            print(f"✅ Tabla 'energy_rollups' creada; medidores procesados: {backfill_rollups(engine)}")
+        elif add_missing_columns(engine, EnergyRollupEntity.__tablename__, [f"{name}_sum" for name in DELTA_FIELDS]):
+            print(f"✅ Sumas de deltas agregadas a 'energy_rollups'; medidores procesados: {backfill_rollups(engine)}")
+        for entity in (MeterAssignmentEntity, MeterWatermarkEntity, MeterEnergyPeriodEntity):
+            entity.__table__.create(engine, checkfirst=True)
+        print("✅ Tablas 'meter_assignments', 'meter_watermarks' y 'meter_energy_periods' creadas (o ya existían)")
+        if add_energy_records_key(engine):
+            print(f"✅ Clave única '{ENERGY_RECORDS_KEY_NAME}' agregada a energy_records")
     except Exception as e:
         print(f"❌ Error al crear tabla: {e}")
 
@@ -0,0 +1,49 @@
+"""
+Fixtures comunes: las pruebas corren contra SQLite en memoria (una sola
+conexión compartida), sin MySQL ni variables de entorno del despliegue.
+"""
+import os
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "5")
+
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from app.shared.infrastructure.db import Base, configure_engine
+from app.energy.adapters.persistence.energy_record_entity import EnergyReadingEntity
+from app.energy.adapters.persistence.meter_entity import MeterEntity
+from app.energy.adapters.persistence.reading_operation_entity import ReadingOperationEntity
+from app.energy.adapters.persistence.reading_subject_entity import ReadingSubjectEntity
+from app.energy.adapters.persistence.energy_rollup_entity import EnergyRollupEntity
+
+ENERGY_TABLES = [
+    entity.__table__
+    for entity in (EnergyReadingEntity, MeterEntity, ReadingOperationEntity, ReadingSubjectEntity, EnergyRollupEntity)
+]
+
+
+@pytest.fixture
+def engine():
+    """BD SQLite vacía con las tablas de lecturas, configurada como engine de la app"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=ENERGY_TABLES)
+    configure_engine(engine)
+    yield engine
+    configure_engine(None)
+    engine.dispose()
+
+
+@pytest.fixture
+def make_row():
+    """Fila en el orden de READING_COLUMNS con mediciones fijas y los contadores indicados"""
+    def make_row(meter_id, ts, energy_ai=None, energy_ae=None, energy_ri=None, energy_re=None, flag=0):
+        return (
+            "sendReadings", "onDemand", meter_id, ts, flag,
+            120.0, 120.0, 120.0, 1.0, 1.0, 1.0,
+            1.0, 0.0, 0.0, 0.0,
+            energy_ai, energy_ae, energy_ri, energy_re,
+            datetime(2026, 1, 1),
+        )
+    return make_row
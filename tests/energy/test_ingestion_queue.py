@@ -0,0 +1,101 @@
+import asyncio
+import json
+from app.energy.infrastructure.dead_letter import DeadLetterFile
+from app.energy.infrastructure.ingestion_queue import IngestionQueue, ISOLATION_MAX_FAILURES
+
+T = 1_767_243_600_000
+STEP = 900_000
+
+
+class FakeSink:
+    """Persiste los lotes sin filas de los medidores en failing; si trae alguna, falla el lote completo"""
+
+    def __init__(self, failing=(), down=False):
+        self.failing = set(failing)
+        self.down = down
+        self.stored = []
+        self.calls = 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        if self.down or any(row[2] in self.failing for row in rows):
+            raise RuntimeError("fila inválida para la BD")
+        self.stored += rows
+        return len(rows)
+
+
+def _keys(rows):
+    return sorted((row[2], row[3]) for row in rows)
+
+
+def _dead_letter_keys(dead_letter):
+    with open(dead_letter.path) as f:
+        return sorted((record["meter_id"], record["timestamp"]) for record in map(json.loads, f))
+
+
+def _ingest(queue, *requests):
+    async def run():
+        for rows in requests:
+            await queue.submit(rows)
+        await queue.stop()
+    asyncio.run(run())
+
+
+def _rows(make_row, meter_ids):
+    return [make_row(meter_id, T + i * STEP, float(i)) for i, meter_id in enumerate(meter_ids)]
+
+
+def test_only_failing_rows_reach_the_dead_letter(make_row, tmp_path):
+    rows = _rows(make_row, ["bad" if i in (2, 11) else f"m{i}" for i in range(16)])
+    sink = FakeSink(failing={"bad"})
+    dead_letter = DeadLetterFile(str(tmp_path))
+    queue = IngestionQueue(sink, max_batch_rows=16, max_delay_ms=10_000, max_retries=1, dead_letter=dead_letter.write)
+
+    _ingest(queue, rows[:9], rows[9:])
+
+    assert _keys(sink.stored) == _keys([row for row in rows if row[2] != "bad"])
+    assert _dead_letter_keys(dead_letter) == [("bad", T + 2 * STEP), ("bad", T + 11 * STEP)]
+    assert (queue.inserted_rows, queue.dead_lettered_rows, queue.dropped_rows) == (14, 2, 0)
+
+
+def test_database_down_dead_letters_the_rest_without_splitting_further(make_row, tmp_path):
+    rows = _rows(make_row, [f"m{i}" for i in range(64)])
+    sink = FakeSink(down=True)
+    dead_letter = DeadLetterFile(str(tmp_path))
+    queue = IngestionQueue(sink, max_batch_rows=64, max_delay_ms=10_000, max_retries=1, dead_letter=dead_letter.write)
+
+    _ingest(queue, rows)
+
+    assert sink.stored == []
+    assert _dead_letter_keys(dead_letter) == _keys(rows)
+    assert queue.dead_lettered_rows == 64
+    # Un intento del lote, ISOLATION_MAX_FAILURES mitades fallidas y ninguna más
+    assert sink.calls == 1 + ISOLATION_MAX_FAILURES
+
+
+def test_rows_are_dropped_without_a_working_dead_letter(make_row):
+    rows = _rows(make_row, ["bad", "m1", "m2", "m3"])
+
+    def broken_dead_letter(rows, error):
+        raise OSError("disco lleno")
+
+    for dead_letter in (None, broken_dead_letter):
+        sink = FakeSink(failing={"bad"})
+        queue = IngestionQueue(sink, max_batch_rows=4, max_delay_ms=10_000, max_retries=1, dead_letter=dead_letter)
+
+        _ingest(queue, rows)
+
+        assert _keys(sink.stored) == _keys(rows[1:])
+        assert (queue.dead_lettered_rows, queue.dropped_rows) == (0, 1)
+
+
+def test_stop_drains_the_queue(make_row):
+    rows = _rows(make_row, [f"m{i}" for i in range(10)])
+    sink = FakeSink()
+    queue = IngestionQueue(sink, max_batch_rows=4, max_delay_ms=60_000)
+
+    _ingest(queue, rows[:3], rows[3:7], rows[7:])
+
+    assert sink.stored == rows
+    assert queue.depth == 0
+    assert queue.metrics()["flushed_rows"] == 10
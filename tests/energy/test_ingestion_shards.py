@@ -0,0 +1,39 @@
+from datetime import datetime
+from app.energy.infrastructure.ingestion_shards import pack_rows, unpack_rows, shard_of
+
+T = 1_767_243_600_000
+
+
+def _round_trip(rows):
+    shm, header = pack_rows(rows)
+    try:
+        return unpack_rows(shm, header)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_pack_unpack_round_trip():
+    created = [datetime(2026, 1, 1, 8, 30, 0, 123456), datetime(2026, 1, 1, 8, 31)]
+    rows = [
+        ("sendReadings", "onDemand" if i % 2 else "scheduled", f"m{i % 3}", T + i, i % 4,
+         120.5, None, 121.0, 1.0, 2.0, None, 0.1, 0.2, 0.3, 0.4, 10.0 + i, None, 5.0, 6.0, created[i % 2])
+        for i in range(50)
+    ]
+
+    assert _round_trip(rows) == rows
+
+
+def test_pack_unpack_keeps_python_types():
+    row = _round_trip([("o", "s", "m1", T, 1) + (1.5,) * 14 + (datetime(2026, 1, 1),)])[0]
+
+    assert type(row[3]) is int and type(row[4]) is int and type(row[5]) is float
+
+
+def test_pack_unpack_empty_batch():
+    assert _round_trip([]) == []
+
+
+def test_shard_of_is_stable():
+    assert [shard_of(f"m{i}", 4) for i in range(6)] == [shard_of(f"m{i}", 4) for i in range(6)]
+    assert all(0 <= shard_of(f"m{i}", 3) < 3 for i in range(100))
@@ -0,0 +1,103 @@
+from sqlalchemy import text
+from app.energy.adapters.persistence.energy_repository import EnergyRepositorySQL
+from app.energy.domain.models.reading_batch import ReadingBatch
+from app.energy.domain.services.energy_service import EnergyService
+from app.energy.infrastructure.meter_state import MeterStateTable
+
+T = 1_767_243_600_000
+STEP = 900_000
+
+
+def _deltas(engine):
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text(
+            "SELECT timestamp, energy_ai, delta_ai FROM energy_readings ORDER BY timestamp"
+        ))]
+
+
+def _service():
+    repository = EnergyRepositorySQL()
+    meter_state = MeterStateTable(repository, capacity=1000)
+    return EnergyService(repository, meter_state=meter_state), repository, meter_state
+
+
+def test_deltas_from_cached_state(engine, make_row):
+    service, _, meter_state = _service()
+    service.persist_rows([make_row("m1", T, 10.0), make_row("m1", T + STEP, 12.0)])
+    service.persist_rows([make_row("m1", T + 2 * STEP, 15.0)])
+
+    assert _deltas(engine) == [(T, 10.0, None), (T + STEP, 12.0, 2.0), (T + 2 * STEP, 15.0, 3.0)]
+    assert meter_state.get("m1")[:3] == (T + 2 * STEP, 0, 15.0)
+    assert meter_state.invalidated == 0
+
+
+def test_state_behind_the_database_is_not_trusted(engine, make_row):
+    service, repository, meter_state = _service()
+    service.persist_rows([make_row("m1", T, 10.0)])
+    assert meter_state.get("m1")[0] == T
+    # Una lectura más reciente que entra por fuera del servicio (carga masiva)
+    repository.save_rows([make_row("m1", T + STEP, 14.0)])
+
+    service.persist_rows([make_row("m1", T + 2 * STEP, 15.0)])
+
+    assert _deltas(engine)[-1] == (T + 2 * STEP, 15.0, 1.0)
+    assert meter_state.invalidated == 1
+    assert meter_state.get("m1")[:3] == (T + 2 * STEP, 0, 15.0)
+
+
+def test_invalidated_state_reloads_from_the_database(engine, make_row):
+    service, repository, meter_state = _service()
+    service.persist_rows([make_row("m1", T, 10.0), make_row("m2", T, 5.0)])
+    meter_state.lookup(["m1", "m2"])
+    repository.save_rows([make_row("m1", T + STEP, 14.0)])
+
+    meter_state.invalidate(["m1"])
+
+    assert meter_state.get("m1")[:3] == (T + STEP, 0, 14.0)
+    assert meter_state.get("m2")[:3] == (T, 0, 5.0)
+
+
+def test_late_reading_uses_database_context(engine, make_row):
+    service, _, meter_state = _service()
+    service.persist_rows([make_row("m1", T, 10.0), make_row("m1", T + 2 * STEP, 16.0)])
+    service.persist_rows([make_row("m1", T + STEP, 13.0)])
+
+    assert _deltas(engine) == [(T, 10.0, None), (T + STEP, 13.0, 3.0), (T + 2 * STEP, 16.0, 3.0)]
+    assert meter_state.get("m1")[0] == T + 2 * STEP
+
+
+def test_update_only_moves_forward(engine, make_row):
+    service, _, meter_state = _service()
+    service.persist_rows([make_row("m1", T + STEP, 12.0, 3.0)])
+    assert meter_state.get("m1")[:4] == (T + STEP, 0, 12.0, 3.0)
+
+    # Un lote más antiguo no retrocede el estado; solo llena contadores nulos
+    meter_state.update(ReadingBatch.from_rows([make_row("m1", T, 10.0, 1.0)]))
+    assert meter_state.get("m1")[:4] == (T + STEP, 0, 12.0, 3.0)
+
+    # Uno más reciente lo reemplaza y conserva los valores donde trae nulos
+    meter_state.update(ReadingBatch.from_rows([make_row("m1", T + 2 * STEP, 15.0, flag=2)]))
+    assert meter_state.get("m1")[:4] == (T + 2 * STEP, 2, 15.0, 3.0)
+
+
+def test_update_fills_null_counters_from_older_readings(engine, make_row):
+    service, _, meter_state = _service()
+    service.persist_rows([make_row("m1", T + STEP, 12.0)])
+    meter_state.lookup(["m1"])
+
+    meter_state.update(ReadingBatch.from_rows([make_row("m1", T, 10.0, 4.0)]))
+
+    assert meter_state.get("m1")[:4] == (T + STEP, 0, 12.0, 4.0)
+
+
+def test_cache_lookup_does_not_touch_the_insert_transaction(engine, make_row):
+    service, repository, meter_state = _service()
+    service.persist_rows([make_row("m1", T, 10.0)])
+    meter_state.lookup(["m1"])
+
+    service.persist_rows([make_row("m1", T + STEP, 12.0), make_row("m2", T + STEP, 1.0)])
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM meters")).scalar() == 2
+    page = repository.get_range("m2", T, T + 2 * STEP, ["operation", "subject"])
+    assert [(item["operation"], item["subject"]) for item in page.items] == [("sendReadings", "onDemand")]
@@ -0,0 +1,86 @@
+import math
+import numpy as np
+from app.energy.domain.models.reading_batch import ReadingBatch
+from app.energy.domain.models.reading_deltas import counter_steps, interval_deltas
+
+T = 1_767_243_600_000
+STEP = 900_000
+
+
+def _steps(previous, current):
+    return counter_steps(np.array(previous, dtype=np.float64), np.array(current, dtype=np.float64)).tolist()
+
+
+def _stored(ts, energy_ai, delta_ai=None):
+    return (ts, energy_ai, None, None, None, delta_ai, None, None, None)
+
+
+def test_counter_steps_increase():
+    assert _steps([10.0, 5.0], [12.5, 5.0]) == [2.5, 0.0]
+
+
+def test_counter_steps_rollover():
+    # 99990 → 5 en un registro de 5 dígitos: faltaban 10 para 100000
+    assert _steps([99_990.0], [5.0]) == [15.0]
+
+
+def test_counter_steps_reset():
+    assert _steps([5_000.0], [3.0]) == [3.0]
+
+
+def test_counter_steps_invalid_decrease_is_nan():
+    assert math.isnan(_steps([500.0], [450.0])[0])
+
+
+def test_counter_steps_null_is_nan():
+    assert math.isnan(_steps([np.nan], [1.0])[0])
+
+
+def test_interval_deltas_within_batch(make_row):
+    batch = ReadingBatch.from_rows([
+        make_row("m1", T, 10.0), make_row("m2", T, 100.0), make_row("m1", T + STEP, 12.0), make_row("m2", T + STEP, 101.5),
+    ])
+    deltas, updates = interval_deltas(batch, {})
+
+    assert [row[0] for row in deltas] == [None, None, 2.0, 1.5]
+    assert updates == []
+
+
+def test_interval_deltas_from_stored_context(make_row):
+    batch = ReadingBatch.from_rows([make_row("m1", T + STEP, 12.0)])
+    deltas, updates = interval_deltas(batch, {"m1": [_stored(T, 10.0)]})
+
+    assert deltas[0][0] == 2.0
+    assert updates == []
+
+
+def test_interval_deltas_skip_null_counters(make_row):
+    batch = ReadingBatch.from_rows([make_row("m1", T, 10.0), make_row("m1", T + STEP), make_row("m1", T + 2 * STEP, 13.0)])
+    deltas, _ = interval_deltas(batch, {})
+
+    assert [row[0] for row in deltas] == [None, None, 3.0]
+
+
+def test_interval_deltas_late_reading_corrects_the_following(make_row):
+    batch = ReadingBatch.from_rows([make_row("m1", T + STEP, 13.0)])
+    context = {"m1": [_stored(T, 10.0), _stored(T + 2 * STEP, 16.0, 6.0)]}
+    deltas, updates = interval_deltas(batch, context)
+
+    assert deltas[0][0] == 3.0
+    assert updates == [("m1", T + 2 * STEP, 3.0, None, None, None)]
+
+
+def test_interval_deltas_stored_duplicate_wins(make_row):
+    batch = ReadingBatch.from_rows([make_row("m1", T + STEP, 99.0)])
+    context = {"m1": [_stored(T, 10.0), _stored(T + STEP, 12.0, 2.0)]}
+    deltas, updates = interval_deltas(batch, context)
+
+    assert deltas[0][0] is None
+    assert updates == []
+
+
+def test_interval_deltas_rollover_across_batches(make_row):
+    batch = ReadingBatch.from_rows([make_row("m1", T + STEP, 4.0)])
+    deltas, _ = interval_deltas(batch, {"m1": [_stored(T, 9_998.0)]})
+
+    assert deltas[0][0] == 6.0
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import text
+from app.energy.adapters.persistence.energy_repository import EnergyRepositorySQL
+from app.energy.adapters.persistence.reading_archive import ReadingArchive
+from app.energy.adapters.persistence.reading_storage import ReadingStorageSQL
+from app.energy.domain.models.energy_rollup import bucket_end
+
+JAN = 1_767_243_600_000  # 2026-01-01 00:00 America/Bogota
+FEB = bucket_end(JAN, "1mo")
+MAR = bucket_end(FEB, "1mo")
+HOUR = 3_600_000
+FIELDS = ["operation", "flag", "energy_ai"]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ReadingArchive(str(tmp_path / "archive"), shards=4)
+
+
+def _db_count(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM energy_readings")).scalar()
+
+
+def _all_pages(repository, meter_id, limit):
+    items, after_ts = [], None
+    while True:
+        page = repository.get_range(meter_id, JAN, MAR, FIELDS, after_ts=after_ts, limit=limit)
+        items += page.items
+        if page.next_key is None:
+            return items
+        after_ts = page.next_key
+
+
+def _seed(repository, make_row):
+    rows = [make_row(f"m{i}", start + h * HOUR, float(h)) for i in range(3) for start in (JAN, FEB) for h in range(10)]
+    repository.save_rows(rows)
+    return rows
+
+
+def test_keyset_pages_cover_the_range(engine, make_row):
+    repository = EnergyRepositorySQL()
+    _seed(repository, make_row)
+
+    pages = [_all_pages(repository, "m1", limit) for limit in (1, 3, 1000)]
+
+    assert pages[0] == pages[1] == pages[2]
+    assert [item["timestamp"] for item in pages[0]] == sorted(
+        start + h * HOUR for start in (JAN, FEB) for h in range(10)
+    )
+
+
+def test_archive_cycle_moves_old_months_out_of_the_database(engine, make_row, archive):
+    repository = EnergyRepositorySQL(archive=archive)
+    _seed(repository, make_row)
+    before = {meter_id: _all_pages(repository, meter_id, 4) for meter_id in ("m0", "m1", "m2")}
+    storage = ReadingStorageSQL(archive, delete_chunk_size=7)
+
+    result = storage.maintain(MAR, archive_before=FEB)
+
+    assert result["archived_months"] == ["2026-01"]
+    assert result["removed_rows"] == 30
+    assert _db_count(engine) == 30
+    assert {meter_id: _all_pages(repository, meter_id, 4) for meter_id in before} == before
+
+
+def test_late_reading_survives_until_the_next_cycle(engine, make_row, archive):
+    repository = EnergyRepositorySQL(archive=archive)
+    _seed(repository, make_row)
+    storage = ReadingStorageSQL(archive, delete_chunk_size=7)
+    storage.maintain(MAR, archive_before=FEB)
+
+    # Lectura tardía a un mes ya archivado: se lee de la BD y el siguiente ciclo la archiva
+    repository.save_rows([make_row("m1", JAN + 30 * 60_000, 0.5)])
+    assert len(_all_pages(repository, "m1", 4)) == 21
+
+    result = storage.maintain(MAR, archive_before=FEB)
+
+    assert result["removed_rows"] == 1
+    assert _db_count(engine) == 30
+    late = [item for item in _all_pages(repository, "m1", 4) if item["timestamp"] == JAN + 30 * 60_000]
+    assert late == [{"timestamp": JAN + 30 * 60_000, "operation": "sendReadings", "flag": 0, "energy_ai": 0.5}]
+
+
+def test_nothing_to_archive(engine, make_row, archive):
+    repository = EnergyRepositorySQL(archive=archive)
+    _seed(repository, make_row)
+
+    result = ReadingStorageSQL(archive).maintain(MAR, archive_before=JAN)
+
+    assert (result["archived_months"], result["removed_rows"]) == ([], 0)
+    assert _db_count(engine) == 60
@@ -0,0 +1,74 @@
+from app.energy.domain.models.reading_validation import ReadingValidator
+
+T = 1_767_243_600_000
+STEP = 900_000
+NOW = T + 10 * STEP
+
+
+def _reasons(rows, previous=None, **settings):
+    result = ReadingValidator(**settings).validate(rows, NOW, previous)
+    return result.rejected.tolist(), result.counts()
+
+
+def test_valid_readings_pass(make_row):
+    rows = [make_row("m1", T, 10.0), make_row("m1", T + STEP, 11.0)]
+    result = ReadingValidator().validate(rows, NOW)
+
+    assert result.rejected_count == 0
+    assert result.split(rows) == rows
+
+
+def test_timestamp_rules(make_row):
+    rows = [make_row("m1", T), make_row("m1", T), make_row("m1", 1_767_243_600), make_row("m1", NOW + 2 * 3_600_000)]
+
+    assert _reasons(rows) == (
+        [False, True, True, True],
+        {"duplicate_timestamp": 1, "timestamp_out_of_range": 1, "future_timestamp": 1},
+    )
+
+
+def test_flag_rules(make_row):
+    rows = [make_row("m1", T, flag=2 ** 31), make_row("m1", T + STEP, flag=4), make_row("m1", T + 2 * STEP, flag=1)]
+
+    assert _reasons(rows, flag_reject_mask=4) == ([True, True, False], {"invalid_flag": 1, "flag_rejected": 1})
+
+
+def test_measurement_rules(make_row):
+    high_voltage = make_row("m1", T)[:5] + (600.0,) + make_row("m1", T)[6:]
+    negative = make_row("m1", T + STEP, -1.0)
+    infinite = make_row("m1", T + 2 * STEP, float("inf"))
+    null_values = make_row("m1", T + 3 * STEP)[:5] + (None,) * 14 + make_row("m1", T)[19:]
+
+    assert _reasons([high_voltage, negative, infinite, null_values]) == (
+        [True, True, True, False],
+        {"non_finite_value": 1, "negative_value": 1, "voltage_out_of_range": 1},
+    )
+
+
+def test_counter_decrease_in_timestamp_order(make_row):
+    # Desordenadas: se comparan por timestamp, no por orden de llegada
+    rows = [make_row("m1", T + STEP, 12.0), make_row("m1", T, 10.0), make_row("m1", T + 2 * STEP, 11.0)]
+
+    assert _reasons(rows) == ([False, False, True], {"counter_decrease": 1})
+
+
+def test_counter_rollover_and_reset_are_accepted(make_row):
+    rows = [make_row("m1", T, 99_990.0), make_row("m1", T + STEP, 5.0), make_row("m2", T, 5_000.0), make_row("m2", T + STEP, 1.0)]
+
+    assert _reasons(rows) == ([False] * 4, {})
+
+
+def test_counter_decrease_against_previous_state(make_row):
+    previous = {"m1": (T, 20.0, None, None, None)}
+    rows = [make_row("m1", T + STEP, 15.0), make_row("m2", T + STEP, 15.0)]
+
+    assert _reasons(rows, previous) == ([True, False], {"counter_decrease": 1})
+
+
+def test_rejected_reading_is_not_a_counter_reference(make_row):
+    # La lectura de 50 se rechaza por voltaje: la de 12 se compara con la de 10
+    bad = make_row("m1", T + STEP, 50.0)
+    bad = bad[:5] + (900.0,) + bad[6:]
+    rows = [make_row("m1", T, 10.0), bad, make_row("m1", T + 2 * STEP, 12.0)]
+
+    assert _reasons(rows) == ([False, True, False], {"voltage_out_of_range": 1})
@@ -0,0 +1,111 @@
+import json
+from datetime import datetime
+import pytest
+from app.energy.adapters.http.record_stream import RecordStreamParser, RecordStreamDecoder
+from app.shared.infrastructure.content_encoding import RequestBodyError
+
+READING = {
+    "ts": 1_767_243_600_000, "flag": 0,
+    "voltage": {"a": 120.0}, "current": {"a": 1.0}, "power": {"ai": 1.0}, "energy": {"ai": 10.0},
+}
+BODY = json.dumps({
+    "operation": "sendReadings",
+    "subject": "onDemand",
+    "meter": {"m1": [READING, {**READING, "ts": READING["ts"] + 900_000}], "m2": []},
+})
+
+
+def _parse(text, piece):
+    parser = RecordStreamParser()
+    events = []
+    for start in range(0, len(text), piece):
+        events += parser.feed(text[start:start + piece])
+    return events + parser.close()
+
+
+@pytest.mark.parametrize("piece", [1, 7, len(BODY)])
+def test_parser_events_do_not_depend_on_chunking(piece):
+    assert _parse(BODY, piece) == [
+        ("field", "operation", "sendReadings"),
+        ("field", "subject", "onDemand"),
+        ("meters",),
+        ("meter", "m1"),
+        ("reading", "m1", READING),
+        ("reading", "m1", {**READING, "ts": READING["ts"] + 900_000}),
+        ("meter_end", "m1"),
+        ("meter", "m2"),
+        ("meter_end", "m2"),
+    ]
+
+
+@pytest.mark.parametrize("text", ['{"meter": [1,}', '[]', '{"operation": "x"', '{"meter": {}} {}'])
+def test_parser_rejects_invalid_json(text):
+    with pytest.raises(RequestBodyError):
+        _parse(text, 3)
+
+
+def test_parser_bounds_a_value_in_the_buffer():
+    parser = RecordStreamParser(max_value_chars=16)
+    with pytest.raises(RequestBodyError):
+        parser.feed('{"meter": {"m1": [{"ts": "' + "x" * 40)
+
+
+def _decode(body: bytes, chunk_readings=5000, piece=5):
+    decoder = RecordStreamDecoder(datetime(2026, 1, 1), chunk_readings=chunk_readings)
+    batches = []
+    for start in range(0, len(body), piece):
+        batches += decoder.feed(body[start:start + piece])
+    return decoder, batches + decoder.close()
+
+
+def test_decoder_rows_and_summary():
+    decoder, batches = _decode(BODY.encode())
+
+    assert [len(batch) for batch in batches] == [2]
+    assert batches[0][0][:5] == ("sendReadings", "onDemand", "m1", READING["ts"], 0)
+    summary = decoder.summary()
+    assert (summary["meters_count"], summary["total_readings"], summary["rejected_readings"]) == (2, 2, 0)
+
+
+def test_decoder_batches_by_chunk_readings():
+    readings = [{**READING, "ts": READING["ts"] + i * 900_000} for i in range(5)]
+    body = json.dumps({"operation": "o", "subject": "s", "meter": {"m1": readings}}).encode()
+
+    _, batches = _decode(body, chunk_readings=2)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_decoder_reports_invalid_readings_and_keeps_the_rest():
+    body = json.dumps({"operation": "o", "subject": "s", "meter": {"m1": [READING, {"ts": "x"}]}}).encode()
+
+    decoder, batches = _decode(body)
+
+    assert sum(len(batch) for batch in batches) == 1
+    assert decoder.rejected_readings == 1
+    assert decoder.errors[0]["loc"][:3] == ["meter", "m1", 1]
+
+
+def test_decoder_accepts_an_empty_meter_object():
+    _, batches = _decode(b'{"operation": "o", "subject": "s", "meter": {}}')
+
+    assert batches == []
+
+
+def test_decoder_requires_header_before_meter():
+    with pytest.raises(RequestBodyError) as error:
+        _decode(json.dumps({"meter": {"m1": [READING]}, "operation": "o", "subject": "s"}).encode())
+    assert error.value.status_code == 422
+
+
+def test_decoder_requires_meter():
+    with pytest.raises(RequestBodyError):
+        _decode(b'{"operation": "o", "subject": "s"}')
+
+
+def test_decoder_handles_split_utf8():
+    body = json.dumps({"operation": "medición", "subject": "s", "meter": {"m1": [READING]}}, ensure_ascii=False).encode()
+
+    decoder, _ = _decode(body, piece=1)
+
+    assert decoder.operation == "medición"
@@ -0,0 +1,74 @@
+import asyncio
+import json
+from app.energy.adapters.http.stream_session import ReadingStreamSession, gateway_roles
+
+READING = {
+    "ts": 1_767_243_600_000, "flag": 0,
+    "voltage": {"a": 120.0}, "current": {"a": 1.0}, "power": {"ai": 1.0}, "energy": {"ai": 10.0},
+}
+
+
+def _frame(meter_id):
+    return {
+        "type": "websocket.receive",
+        "text": json.dumps({"operation": "sendReadings", "subject": "onDemand", "meter": {meter_id: [READING]}}),
+    }
+
+
+class FakeWebSocket:
+    def __init__(self, messages):
+        self.messages = list(messages) + [{"type": "websocket.disconnect"}]
+        self.sent = []
+
+    async def receive(self):
+        return self.messages.pop(0)
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+class FakeService:
+    """Falla con los frames de los medidores en failing; acepta el resto"""
+
+    def __init__(self, failing):
+        self.failing = failing
+
+    async def submit_readings(self, rows):
+        if any(row[2] in self.failing for row in rows):
+            raise RuntimeError("conexión perdida")
+        return len(rows), 0, 0
+
+
+def _run(messages, service, **kwargs):
+    """Mensajes enviados al cliente; ack_every = len(messages), así que el último frame dispara el ack"""
+    websocket = FakeWebSocket(messages)
+    session = ReadingStreamSession(websocket, service, window=8, ack_every=len(messages), **kwargs)
+    asyncio.run(session.run())
+    return websocket.sent
+
+
+def test_pipeline_error_keeps_the_session_open():
+    sent = _run([_frame("m1"), _frame("bad"), _frame("m2")], FakeService({"bad"}))
+
+    assert sent[0]["type"] == "ready"
+    assert sent[1] == {
+        "type": "error", "seq": 2, "status": 500, "message": "Error interno del servidor al procesar el frame"
+    }
+    assert sent[2] == {
+        "type": "ack", "seq": 3, "frames": 3, "accepted": 2, "duplicates": 0, "rejected": 0, "credits": 3
+    }
+
+
+def test_unassigned_meter_is_rejected():
+    sent = _run([_frame("m1"), _frame("m9")], FakeService(set()), meter_access=lambda: {"m1"})
+
+    assert [(m["type"], m.get("seq"), m.get("status")) for m in sent[1:]] == [("error", 2, 403), ("ack", 2, None)]
+    assert sent[-1]["accepted"] == 1
+
+
+def test_no_gateway_roles_by_default(monkeypatch):
+    monkeypatch.delenv("ENERGY_STREAM_GATEWAY_ROLES", raising=False)
+    assert gateway_roles() == frozenset()
+
+    monkeypatch.setenv("ENERGY_STREAM_GATEWAY_ROLES", "0, 3")
+    assert gateway_roles() == frozenset({0, 3})
@@ -0,0 +1,37 @@
+import pytest
+from app.shared.infrastructure.pagination import (
+    KeysetPage, encode_cursor, decode_cursor, page_cursor, resolve_limit, MAX_PAGE_LIMIT, DEFAULT_PAGE_LIMIT
+)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(1_767_243_600_000)) == 1_767_243_600_000
+    assert decode_cursor(encode_cursor("abc", "desc"), "desc", key_type=str) == "abc"
+
+
+def test_empty_cursor_is_first_page():
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(True), encode_cursor("1"), encode_cursor(2 ** 63)])
+def test_invalid_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_of_another_order():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(5, "asc"), "desc")
+
+
+def test_page_cursor():
+    assert page_cursor(KeysetPage(items=[1], next_key=None)) is None
+    assert decode_cursor(page_cursor(KeysetPage(items=[1], next_key=7))) == 7
+
+
+def test_resolve_limit():
+    assert resolve_limit(None) == DEFAULT_PAGE_LIMIT
+    assert resolve_limit(MAX_PAGE_LIMIT + 1) == MAX_PAGE_LIMIT
+    with pytest.raises(ValueError):
+        resolve_limit(0)
@@ -0,0 +1,113 @@
+from decimal import Decimal
+import pytest
+from sqlalchemy import Column, Integer, Table
+from app.shared.infrastructure.db import Base
+from app.user.adapters.persistence.energy_record_entity import EnergyRecordEntity
+from app.user.adapters.persistence.energy_record_repository import EnergyRecordRepositorySQL
+from app.user.adapters.persistence.meter_assignment_entity import MeterAssignmentEntity
+from app.user.adapters.persistence.meter_energy_period_entity import MeterEnergyPeriodEntity
+from app.user.adapters.persistence.meter_watermark_entity import MeterWatermarkEntity
+from app.user.adapters.persistence import user_entity  # noqa: F401
+from app.user.domain.models.meter_assignment import MeterWatermark, fold_meter_readings
+
+JAN = 1_767_243_600_000  # 2026-01-01 00:00 America/Bogota
+FEB = JAN + 31 * 86_400_000
+STEP = 900_000
+
+
+def _mark(ts, ai, ae=None):
+    return MeterWatermark(meter_id="m1", timestamp=ts, energy_ai=ai, energy_ae=ae)
+
+
+def test_first_reading_only_sets_the_base():
+    deltas, mark = fold_meter_readings("m1", None, [(JAN, 100.0, 5.0)])
+
+    assert deltas == {}
+    assert mark == _mark(JAN, 100.0, 5.0)
+
+
+def test_replayed_batch_adds_nothing():
+    batch = [(JAN + STEP, 102.0, 5.0), (JAN + 2 * STEP, 105.0, 6.0)]
+    deltas, mark = fold_meter_readings("m1", _mark(JAN, 100.0, 5.0), batch)
+    assert deltas == {"2026-01": [5.0, 1.0]}
+
+    assert fold_meter_readings("m1", mark, batch) == ({}, None)
+
+
+def test_reading_older_than_the_watermark_is_ignored():
+    mark = _mark(JAN + 2 * STEP, 105.0)
+
+    assert fold_meter_readings("m1", mark, [(JAN + STEP, 101.0, None), (JAN + 2 * STEP, 105.0, None)]) == ({}, None)
+
+
+def test_counter_reset_rebases_the_watermark():
+    deltas, mark = fold_meter_readings(
+        "m1", _mark(JAN, 100.0), [(JAN + STEP, 110.0, None), (JAN + 2 * STEP, 5.0, None), (JAN + 3 * STEP, 8.0, None)]
+    )
+
+    # 100 → 110 suma 10; el reinicio a 5 no suma y pasa a ser la base de 5 → 8
+    assert deltas == {"2026-01": [13.0, 0.0]}
+    assert mark == _mark(JAN + 3 * STEP, 8.0)
+
+
+def test_month_boundary_splits_energy_by_the_later_reading():
+    deltas, mark = fold_meter_readings(
+        "m1", _mark(FEB - 2 * STEP, 100.0), [(FEB - STEP, 103.0, None), (FEB, 107.0, None), (FEB + STEP, 108.0, None)]
+    )
+
+    assert deltas == {"2026-01": [3.0, 0.0], "2026-02": [5.0, 0.0]}
+    assert mark.timestamp == FEB + STEP
+
+
+@pytest.fixture
+def repository(engine):
+    """Tablas de energy_records en la BD del fixture engine y un usuario con un medidor de red y uno de generación"""
+    if "communities" not in Base.metadata.tables:
+        Table("communities", Base.metadata, Column("id", Integer, primary_key=True))
+    Base.metadata.create_all(engine, tables=[
+        Base.metadata.tables[name] for name in ("users", "communities")
+    ] + [
+        entity.__table__
+        for entity in (EnergyRecordEntity, MeterAssignmentEntity, MeterWatermarkEntity, MeterEnergyPeriodEntity)
+    ])
+    with engine.begin() as conn:
+        conn.execute(MeterAssignmentEntity.__table__.insert(), [
+            {"meter_id": "grid", "user_id": 1, "community_id": 1, "kind": "grid"},
+            {"meter_id": "solar", "user_id": 1, "community_id": 1, "kind": "generation"},
+        ])
+    return EnergyRecordRepositorySQL()
+
+
+def _records(repository):
+    return {
+        record.period: (record.generated_kwh, record.consumed_kwh, record.exported_kwh, record.imported_kwh)
+        for record in repository.get_by_user_id(1)
+    }
+
+
+def test_apply_readings_is_idempotent(repository):
+    batch = {
+        "grid": [(JAN, 100.0, 50.0), (JAN + STEP, 104.0, 51.0)],
+        "solar": [(JAN, 0.0, 20.0), (JAN + STEP, 0.0, 23.0)],
+    }
+    repository.apply_meter_readings(batch)
+    expected = {"2026-01": (Decimal("3.00"), Decimal("6.00"), Decimal("1.00"), Decimal("4.00"))}
+    assert _records(repository) == expected
+
+    assert repository.apply_meter_readings(batch) == 0
+    assert repository.apply_meter_readings({"grid": [(JAN + STEP // 2, 102.0, 50.5)]}) == 0
+    assert _records(repository) == expected
+
+
+def test_apply_readings_across_a_month_boundary(repository):
+    repository.apply_meter_readings({"grid": [(FEB - 2 * STEP, 100.0, 0.0)], "nobody": [(FEB, 1.0, 0.0)]})
+    repository.apply_meter_readings({"grid": [(FEB - STEP, 101.0, 0.0), (FEB, 102.5, 0.0), (FEB + STEP, 104.0, 0.0)]})
+
+    # La energía entre dos lecturas va al periodo de la posterior
+    assert {period: record[3] for period, record in _records(repository).items()} == {
+        "2026-01": Decimal("1.00"), "2026-02": Decimal("3.00")
+    }
+
+    # El reinicio del contador no resta; la energía siguiente se suma desde la nueva base
+    repository.apply_meter_readings({"grid": [(FEB + 2 * STEP, 1.0, 0.0), (FEB + 3 * STEP, 2.0, 0.0)]})
+    assert _records(repository)["2026-02"] == (Decimal("0.00"), Decimal("4.00"), Decimal("0.00"), Decimal("4.00"))